@@ -1,7 +1,7 @@
 import logging
 import time
 
-from flask import Flask, request, g
+from flask import Flask, request, g, jsonify
 from flask_cors import CORS
 
 from .routes.courses import courses_bp
@@ -18,8 +18,11 @@ from .routes.course_fixed_slot_labels import course_fixed_slot_labels_bp
 
 from .populate_db import populate_db
 from .routes.timetable import timetable_bp
+from .routes.scenarios import scenarios_bp
 from .routes.config import config_bp
-from .translations import set_locale
+from .worker_pool import worker_pool
+from .scenarios import activate_scenario, deactivate_scenario
+from .translations import set_locale, t
 from .constants import DEFAULT_LOCALE
 from .logging_config import setup_logging, build_log_extra, get_request_id
 
@@ -43,6 +46,36 @@ def set_request_locale():
     set_locale(locale)
 
 
+@app.before_request
+def start_solver_workers():
+    """Start the solver worker pool (see worker_pool) with the first request.
+
+    Not at import time: ``flask run --debug`` also imports the app in the
+    reloader's watcher process, which never serves requests.
+    """
+    worker_pool.start()
+
+
+@app.before_request
+def set_request_scenario():
+    """Bind the sessions of this request to the scenario in the X-Scenario header."""
+    scenario = request.headers.get("X-Scenario")
+    if not scenario:
+        return None
+    try:
+        g.scenario_token = activate_scenario(scenario)
+    except (ValueError, FileNotFoundError):
+        return jsonify({'error': t('errors.scenario_not_found', name=scenario)}), 404
+    return None
+
+
+@app.teardown_request
+def reset_request_scenario(exc):
+    token = g.pop("scenario_token", None)
+    if token is not None:
+        deactivate_scenario(token)
+
+
 @app.after_request
 def log_request_result(response):
     duration_ms = 0.0
@@ -65,3 +98,4 @@ app.register_blueprint(joint_classes_bp)
 app.register_blueprint(support_bp)
 app.register_blueprint(teacher_fixed_slot_labels_bp)
 app.register_blueprint(course_fixed_slot_labels_bp)
+app.register_blueprint(scenarios_bp)
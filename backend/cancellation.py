@@ -0,0 +1,74 @@
+"""Cooperative cancellation of timetable generation.
+
+A ``CancellationToken`` is shared between the request that cancels a task
+and the background thread running it. Cancelling sets a flag that the
+generation code checks between steps (model build, diagnosis phases,
+isolation solves) and interrupts every CP-SAT solve currently registered
+with the token through ``CpSolver.StopSearch``.
+"""
+
+import logging
+import threading
+from contextlib import contextmanager, nullcontext
+
+
+logger = logging.getLogger(__name__)
+
+
+class SolveCancelled(Exception):
+    """Raised at a cancellation checkpoint once the task has been cancelled."""
+
+
+class CancellationToken:
+    """Thread-safe stop flag that also stops the solvers registered with it."""
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._solvers = set()
+
+    @property
+    def cancelled(self):
+        return self._event.is_set()
+
+    def cancel(self):
+        with self._lock:
+            self._event.set()
+            solvers = list(self._solvers)
+        for solver in solvers:
+            solver.StopSearch()
+        logger.info("Cancellation requested running_solvers=%d", len(solvers))
+
+    def raise_if_cancelled(self):
+        if self._event.is_set():
+            raise SolveCancelled()
+
+    @contextmanager
+    def solving(self, solver):
+        """Register ``solver`` for the duration of its ``Solve`` call.
+
+        Raises SolveCancelled before the solve starts if the token is already
+        cancelled (``StopSearch`` has no effect on a solve that has not
+        started yet).
+        """
+        with self._lock:
+            self.raise_if_cancelled()
+            self._solvers.add(solver)
+        try:
+            yield solver
+        finally:
+            with self._lock:
+                self._solvers.discard(solver)
+
+
+def solving(cancel_token, solver):
+    """``cancel_token.solving(solver)``, or a no-op context when there is no token."""
+    if cancel_token is None:
+        return nullcontext(solver)
+    return cancel_token.solving(solver)
+
+
+def check_cancelled(cancel_token):
+    """Raise SolveCancelled if ``cancel_token`` (optional) has been cancelled."""
+    if cancel_token is not None:
+        cancel_token.raise_if_cancelled()
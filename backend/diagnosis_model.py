@@ -0,0 +1,151 @@
+"""Single CP-SAT model for infeasibility isolation tests.
+
+Instead of rebuilding the full model for every restriction (or course,
+subject, teacher) that diagnosis wants to relax, the model is built once with
+every hard restriction behind an enforcement literal:
+
+- one literal per hard restriction,
+- one extra literal per subject for SubjectWeeklyHours,
+- one extra literal per teacher for TeacherMaxWeeklyHours.
+
+An isolation test is then a solve of the same model with every literal
+assumed true except the relaxed ones. A literal that is not assumed is free,
+so the solver may switch the gated constraints off, which is equivalent to
+skipping them. Soft restrictions and the objective are left out: isolation
+tests only need feasibility, so solves stop at the first solution.
+"""
+
+import logging
+import time
+from contextlib import contextmanager
+
+from ortools.sat.python import cp_model
+
+from .cancellation import solving
+from .logging_config import build_log_extra
+from .restrictions.occupancy_channels import channels_of
+
+
+logger = logging.getLogger(__name__)
+
+
+class GatedDiagnosisModel:
+    """CP-SAT model with every hard restriction gated by an enforcement literal."""
+
+    def __init__(self, all_teachers, all_subjects, all_groups, all_subjectgroups,
+                 num_days, num_hours, all_joint_classes=None,
+                 teacher_subject_lines=None):
+        from .scheduler import _build_hard_restrictions, _create_assignments
+        from .restrictions.joint_class_assignment import build_joint_class_lookup
+
+        started_at = time.perf_counter()
+        model = cp_model.CpModel()
+        self.model = model
+        self.assignments = _create_assignments(
+            model, all_teachers, all_subjects, all_groups, num_days, num_hours,
+            teacher_subject_lines=teacher_subject_lines,
+        )
+        joint_lookup = build_joint_class_lookup(
+            all_joint_classes, all_teachers,
+            num_days=num_days, num_hours=num_hours,
+        )
+
+        self.restriction_literals = {}
+        self.subject_literals = {}
+        self.teacher_literals = {}
+        for name, restriction, args in _build_hard_restrictions(
+            model, self.assignments, all_teachers, all_subjects,
+            all_groups, all_subjectgroups, num_days, num_hours,
+            all_joint_classes=all_joint_classes, joint_lookup=joint_lookup,
+        ):
+            gate = model.NewBoolVar(f"gate_{name}")
+            self.restriction_literals[name] = gate
+            if name == "SubjectWeeklyHours":
+                for subject in all_subjects:
+                    lit = model.NewBoolVar(f"gate_weekly_{subject.id}")
+                    self.subject_literals[subject.id] = lit
+                    with self._gated(gate, lit):
+                        restriction.apply(*args[:-1], [subject])
+            elif name == "TeacherMaxWeeklyHours":
+                for teacher in all_teachers:
+                    lit = model.NewBoolVar(f"gate_maxh_{teacher.id}")
+                    self.teacher_literals[teacher.id] = lit
+                    with self._gated(gate, lit):
+                        restriction.apply(model, self.assignments, [teacher], joint_lookup)
+            else:
+                with self._gated(gate):
+                    restriction.apply(*args)
+
+        logger.info(
+            "Built gated diagnosis model restrictions=%d subject_gates=%d teacher_gates=%d elapsed_ms=%.2f",
+            len(self.restriction_literals),
+            len(self.subject_literals),
+            len(self.teacher_literals),
+            (time.perf_counter() - started_at) * 1000,
+            extra=build_log_extra(),
+        )
+
+    @contextmanager
+    def _gated(self, *literals):
+        """Add ``literals`` as enforcement literals of every constraint added inside.
+
+        Occupancy channel definitions are left ungated: they are shared with
+        restrictions applied later and restrict nothing by themselves.
+        """
+        constraints = self.model.proto.constraints
+        start = len(constraints)
+        yield
+        indices = [lit.Index() for lit in literals]
+        channel_constraints = channels_of(self.model, self.assignments).constraint_indices
+        for i in range(start, len(constraints)):
+            if i not in channel_constraints:
+                constraints[i].enforcement_literal.extend(indices)
+
+    def solve(self, skip_restrictions=None, skip_subject_weekly_hours_for=None,
+              skip_teacher_max_hours_for=None, time_limit_seconds=10.0,
+              num_search_workers=None, cancel_token=None):
+        """Solve with the given parts of the model relaxed.
+
+        Keyword names match ``solve_scheduling_model`` so diagnosis jobs can
+        be expressed the same way for both. ``cancel_token`` (optional
+        CancellationToken) interrupts the solve when the task is cancelled.
+
+        Returns:
+            CP-SAT status of the relaxed model.
+        """
+        skip_restrictions = set(skip_restrictions or ())
+        skip_subjects = set(skip_subject_weekly_hours_for or ())
+        skip_teachers = set(skip_teacher_max_hours_for or ())
+
+        assumptions = [
+            lit for name, lit in self.restriction_literals.items()
+            if name not in skip_restrictions
+        ]
+        assumptions += [
+            lit for subject_id, lit in self.subject_literals.items()
+            if subject_id not in skip_subjects
+        ]
+        assumptions += [
+            lit for teacher_id, lit in self.teacher_literals.items()
+            if teacher_id not in skip_teachers
+        ]
+
+        self.model.ClearAssumptions()
+        self.model.AddAssumptions(assumptions)
+        solver = cp_model.CpSolver()
+        solver.parameters.max_time_in_seconds = time_limit_seconds
+        if num_search_workers is not None:
+            solver.parameters.num_search_workers = num_search_workers
+        started_at = time.perf_counter()
+        with solving(cancel_token, solver):
+            status = solver.Solve(self.model)
+        logger.debug(
+            "Isolation solve status=%s relaxed_restrictions=%d relaxed_subjects=%d relaxed_teachers=%d elapsed_ms=%.2f",
+            solver.StatusName(status),
+            len(skip_restrictions),
+            len(skip_subjects),
+            len(skip_teachers),
+            (time.perf_counter() - started_at) * 1000,
+            extra=build_log_extra(),
+        )
+        return status
@@ -0,0 +1,126 @@
+"""Static domain pruning of assignment variables.
+
+Some assignment variables can only ever be 0, whatever the rest of the
+timetable looks like:
+
+- a teacher at a slot they marked unavailable (TeacherUnavailableTimes),
+- any slot of a teacher whose weekly maximum minus coordination hours is 0
+  or less (TeacherMaxWeeklyHours),
+- any slot of a subject whose ``max_hours_per_day`` is 0 or less
+  (GroupSubjectMaxHoursPerDay).
+
+``DomainPruning`` works these out before the model is built so that
+``_create_assignments`` does not create those variables at all. A rule only
+applies while its restriction is active, so a model built with that
+restriction skipped keeps the variables.
+
+Restrictions read a missing variable as 0, which is exactly the value the
+pruned ones were forced to. The exceptions are SubjectMustEveryDay and
+fully-shared SubjectGroupAssignment, which skip a (group, subject, slot) that
+has no variables at all instead of forcing it to 0. For those subjects a
+slot whose candidates would all be pruned keeps them, and the restriction
+that forces them to 0 still applies.
+"""
+
+import logging
+from collections import Counter
+
+from .restrictions.teacher_unavailable_times import unavailable_slots
+
+
+logger = logging.getLogger(__name__)
+
+
+def _protected_subject_ids(all_subjects, all_subjectgroups, skip_restrictions):
+    protected = set()
+    if "SubjectMustEveryDay" not in skip_restrictions:
+        protected.update(s.id for s in all_subjects if getattr(s, "teach_every_day", False))
+    if "SubjectGroupAssignment" not in skip_restrictions:
+        for sg in all_subjectgroups or []:
+            if getattr(sg, "shared_hours", None) is None:
+                protected.update(s.id for s in getattr(sg, "subjects", []) or [])
+    return protected
+
+
+class DomainPruning:
+    """Statically excluded (teacher, subject, day, hour) combinations."""
+
+    def __init__(self, all_teachers, all_subjects, all_subjectgroups, num_days, num_hours,
+                 skip_restrictions=None, skip_teacher_max_hours_for=None):
+        skip_restrictions = set(skip_restrictions or ())
+        skip_teachers = set(skip_teacher_max_hours_for or ())
+        self.num_days = num_days
+        self.num_hours = num_hours
+
+        # teacher_id -> set of (day, hour), or None for every slot
+        self.teacher_slots = {}
+        if "TeacherUnavailableTimes" not in skip_restrictions:
+            for teacher in all_teachers:
+                slots = unavailable_slots(teacher, num_days, num_hours)
+                if slots:
+                    self.teacher_slots[teacher.id] = set(slots)
+        if "TeacherMaxWeeklyHours" not in skip_restrictions:
+            for teacher in all_teachers:
+                coord = getattr(teacher, "coordination_hours", 0) or 0
+                if teacher.id not in skip_teachers and teacher.max_hours_week - coord <= 0:
+                    self.teacher_slots[teacher.id] = None
+
+        self.subject_ids = set()
+        if "GroupSubjectMaxHoursPerDay" not in skip_restrictions:
+            self.subject_ids = {
+                s.id for s in all_subjects
+                if getattr(s, "max_hours_per_day", None) is not None and s.max_hours_per_day <= 0
+            }
+
+        self.protected_subject_ids = _protected_subject_ids(
+            all_subjects, all_subjectgroups, skip_restrictions,
+        )
+        self.pruned = Counter()
+        self.kept = 0
+
+    def _reason(self, subject_id, teacher_id, d, h):
+        if subject_id in self.subject_ids:
+            return "subject_max_hours_per_day"
+        if teacher_id in self.teacher_slots:
+            slots = self.teacher_slots[teacher_id]
+            if slots is None:
+                return "teacher_max_weekly_hours"
+            if (d, h) in slots:
+                return "teacher_unavailable"
+        return None
+
+    def allowed_slots(self, subject_id, teacher_id, candidate_teacher_ids):
+        """Return the (day, hour) slots to create for a group-subject-teacher.
+
+        Args:
+            candidate_teacher_ids: Every teacher that gets variables for this
+                group and subject; needed to keep slots of protected subjects
+                that would otherwise end up with no variables.
+        """
+        slots = []
+        protected = subject_id in self.protected_subject_ids
+        for d in range(self.num_days):
+            for h in range(self.num_hours):
+                reason = self._reason(subject_id, teacher_id, d, h)
+                if reason is not None and protected and all(
+                    self._reason(subject_id, other, d, h) is not None
+                    for other in candidate_teacher_ids
+                ):
+                    reason = None
+                if reason is None:
+                    slots.append((d, h))
+                    self.kept += 1
+                else:
+                    self.pruned[reason] += 1
+        return slots
+
+    def summary(self):
+        """Return pruning counters as a JSON-serializable dict."""
+        total = self.kept + sum(self.pruned.values())
+        return {
+            "candidates": total,
+            "created": self.kept,
+            "pruned": sum(self.pruned.values()),
+            "pruned_ratio": round(sum(self.pruned.values()) / total, 4) if total else 0.0,
+            "by_reason": dict(self.pruned),
+        }
@@ -2,29 +2,38 @@
 Excel export for timetables using openpyxl.
 Preserves cell colours from Subject, SubjectGroup, FixedSlot and Config.day_colors.
 Exports one sheet per course (by course_line) and one sheet per teacher (by name).
+
+Workbooks are written in openpyxl's write-only mode: each row is streamed to
+the file as soon as it is built, so memory stays flat however many sheets
+are exported. Cell styles are interned per workbook (see ``_StyleCache``).
 """
 
 import json
+from copy import copy
+from functools import lru_cache
 from io import BytesIO
 from collections import defaultdict
 
 from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
 from openpyxl.styles import Font, PatternFill, Border, Side, Alignment
 from openpyxl.utils import get_column_letter
+from openpyxl.worksheet.cell_range import CellRange
 
 from .models import (
-    TimeSlotAssignment,
-    Timeslot,
     Teacher,
     Config,
     FixedSlot,
-    TeacherBusySlot,
-    SupportAssignment,
     JointClass,
-    TeacherFixedSlotLabel,
     CourseFixedSlotLabel,
     normalize_tutor_groups,
 )
+from .read_model import (
+    load_assignments,
+    load_busy_slots,
+    load_support_assignments,
+    load_teacher_fixed_slot_labels,
+)
 from .translations import t
 
 # ---------------------------------------------------------------------------
@@ -56,15 +65,25 @@ COORD_FILL = PatternFill(
     end_color=COORDINATION_COLOR.lstrip("#"),
     fill_type="solid",
 )
+UNAVAILABLE_FILL = PatternFill(start_color="eb5252", end_color="eb5252", fill_type="solid")
+DAY_FONT = Font(bold=True, size=12)
+
+CENTER = Alignment(horizontal="center", vertical="center")
+WRAP_CENTER = Alignment(wrap_text=True, vertical="center", horizontal="center")
+LEFT = Alignment(horizontal="left", vertical="center")
+ROTATED_HEADER = Alignment(text_rotation=90, vertical="center", horizontal="center")
 
 
 # ---------------------------------------------------------------------------
 # Helpers
 # ---------------------------------------------------------------------------
 
+@lru_cache(maxsize=256)
 def _hex_to_fill(hex_color):
     """Convert a hex colour string (e.g. ``"#dbeafe"``) to an openpyxl PatternFill
-    or return *None* if the value is invalid/missing."""
+    or return *None* if the value is invalid/missing.
+
+    The same colour always returns the same (shared, never mutated) fill."""
     if not hex_color:
         return None
     color = hex_color.lstrip("#")
@@ -77,6 +96,73 @@ def _hex_to_fill(hex_color):
     return PatternFill(start_color=color, end_color=color, fill_type="solid")
 
 
+class _StyleCache:
+    """Interns the cell styles of one workbook.
+
+    Assigning a font, fill, border and alignment to a cell registers each of
+    them with the workbook, hashing every style object again. The cache does
+    that once per combination of (shared) style objects and copies the
+    resulting style indices to every later cell with the same look.
+    """
+
+    def __init__(self):
+        self._styles = {}
+
+    def cell(self, ws, value, font=None, fill=None, border=None, alignment=None):
+        """Return a ``WriteOnlyCell`` of *ws* holding *value* with the given style."""
+        cell = WriteOnlyCell(ws, value=value)
+        key = (id(font), id(fill), id(border), id(alignment))
+        cached = self._styles.get(key)
+        if cached is not None:
+            cell._style = copy(cached[0])
+            return cell
+        if font is not None:
+            cell.font = font
+        if fill is not None:
+            cell.fill = fill
+        if border is not None:
+            cell.border = border
+        if alignment is not None:
+            cell.alignment = alignment
+        # Keep the style objects alive so their ids stay unique
+        self._styles[key] = (copy(cell._style), font, fill, border, alignment)
+        return cell
+
+
+class _SheetWriter:
+    """Appends styled rows to a write-only worksheet.
+
+    Column widths and frozen panes must be set before the first row, and a
+    row height before its row; merged ranges may be added at any time.
+    """
+
+    def __init__(self, wb, title, styles):
+        self.ws = wb.create_sheet(title=title)
+        self.styles = styles
+        self.row = 0
+
+    def cell(self, value, font=None, fill=None, border=None, alignment=None):
+        return self.styles.cell(self.ws, value, font, fill, border, alignment)
+
+    def set_widths(self, widths):
+        """Set column widths from a ``{column_index: width}`` mapping."""
+        for col_idx, width in widths.items():
+            self.ws.column_dimensions[get_column_letter(col_idx)].width = width
+
+    def merge(self, row, start_column, end_column):
+        self.ws.merged_cells.add(CellRange(
+            min_col=start_column, min_row=row, max_col=end_column, max_row=row,
+        ))
+
+    def append(self, cells=(), height=None):
+        """Write the next row and return its (1-based) index."""
+        self.row += 1
+        if height is not None:
+            self.ws.row_dimensions[self.row].height = height
+        self.ws.append(list(cells))
+        return self.row
+
+
 def _interleave_rows(sorted_hours, fixed_slots_sorted):
     """Yield (row_type, data) tuples interleaving solver hours and fixed slots
     by their 1-indexed ``position``."""
@@ -120,27 +206,15 @@ def _get_course_data(session, course_lines=None):
 
     # Timetable cells
     timetable = defaultdict(lambda: defaultdict(list))
-    assignments = session.query(TimeSlotAssignment).all()
-    for assignment in assignments:
-        ts = assignment.timeslot
-        course_line = f"{ts.course_id}{chr(ord('A') + ts.line)}"
-        hour, weekday = ts.hour, ts.day
-        subject_name = assignment.subject.name
-        teacher_name = assignment.teacher.name
-
-        group_color = None
-        if ts.subject_group is not None:
-            group_color = getattr(ts.subject_group, "color", None)
-        subject_color = group_color or assignment.subject.color
-        label = f"{subject_name} ({teacher_name})"
-        timetable[course_line][(hour, weekday)].append((label, subject_color))
+    for row in load_assignments(session):
+        label = f"{row.subject_name} ({row.teacher_name})"
+        timetable[row.course_line][(row.hour, row.day)].append((label, row.color))
 
     # Support assignments
-    support_assignments = session.query(SupportAssignment).all()
+    support_assignments = load_support_assignments(session)
     for sa in support_assignments:
-        course_line = f"{sa.course_id}{chr(ord('A') + sa.line)}"
-        label = f"{sa.teacher.name} ({t('timetable.support_label')})"
-        timetable[course_line][(sa.hour, sa.day)].append((label, sa.subject.color))
+        label = f"{sa.teacher_name} ({t('timetable.support_label')})"
+        timetable[sa.course_line][(sa.hour, sa.day)].append((label, sa.subject_color))
 
     # Filter by requested course_lines (empty list = none)
     if course_lines is not None:
@@ -178,11 +252,7 @@ def _get_course_data(session, course_lines=None):
         )
         weekdays = [t(f"day.{i}") for i in day_indices]
         tutor_name = tutors_dict.get(course_line)
-        support_hours = sum(
-            1
-            for sa in support_assignments
-            if f"{sa.course_id}{chr(ord('A') + sa.line)}" == course_line
-        )
+        support_hours = sum(1 for sa in support_assignments if sa.course_line == course_line)
 
         result[course_line] = {
             "tutor_name": tutor_name,
@@ -231,31 +301,19 @@ def _get_teacher_data(session, teacher_names=None):
 
     # First pass: collect raw items
     cell_items = defaultdict(list)
-    assignments = session.query(TimeSlotAssignment).all()
-    for assignment in assignments:
-        ts = assignment.timeslot
-        teacher_name = assignment.teacher.name
-        subject_name = assignment.subject.name
-        course_line = f"{ts.course_id}{chr(ord('A') + ts.line)}"
-        line_letter = chr(ord("A") + ts.line)
-
+    for row in load_assignments(session):
         matched_jc = None
-        for jc in jc_lookup.get((ts.course_id, assignment.subject_id, line_letter), []):
-            if jc.teacher_id is None or jc.teacher_id == assignment.teacher_id:
+        for jc in jc_lookup.get((row.course_id, row.subject_id, row.line_letter), []):
+            if jc.teacher_id is None or jc.teacher_id == row.teacher_id:
                 matched_jc = jc
                 break
 
-        group_color = None
-        if ts.subject_group is not None:
-            group_color = getattr(ts.subject_group, "color", None)
-        subject_color = group_color or assignment.subject.color
-
-        cell_items[(teacher_name, ts.hour, ts.day)].append({
+        cell_items[(row.teacher_name, row.hour, row.day)].append({
             "jc": matched_jc,
-            "subject_name": subject_name,
-            "subject_id": assignment.subject.id,
-            "course_line": course_line,
-            "subject_color": subject_color,
+            "subject_name": row.subject_name,
+            "subject_id": row.subject_id,
+            "course_line": row.course_line,
+            "subject_color": row.color,
         })
 
     # Second pass: build structured cells
@@ -285,19 +343,15 @@ def _get_teacher_data(session, teacher_names=None):
                     )
 
     # Support
-    for sa in session.query(SupportAssignment).all():
-        teacher_name = sa.teacher.name
-        subject_id = sa.subject.id
-        subject_name = sa.subject.name
-        is_conflict = (sa.day, sa.hour) in teacher_unavailable.get(teacher_name, set())
-        support_course_line = f"{sa.course_id}{chr(ord('A') + sa.line)}"
-        teacher_data[teacher_name][(sa.hour, sa.day)].append(
-            (subject_id, sa.subject.color, is_conflict, True, support_course_line, subject_name)
+    for sa in load_support_assignments(session):
+        is_conflict = (sa.day, sa.hour) in teacher_unavailable.get(sa.teacher_name, set())
+        teacher_data[sa.teacher_name][(sa.hour, sa.day)].append(
+            (sa.subject_id, sa.subject_color, is_conflict, True, sa.course_line, sa.subject_name)
         )
 
     # Busy slots (coordination)
-    for slot in session.query(TeacherBusySlot).all():
-        teacher_data[slot.teacher.name][(slot.hour, slot.day)].append(
+    for slot in load_busy_slots(session):
+        teacher_data[slot.teacher_name][(slot.hour, slot.day)].append(
             (t("timetable.coordination_label"), COORDINATION_COLOR, False, False, "", "")
         )
 
@@ -343,10 +397,9 @@ def _get_teacher_data(session, teacher_names=None):
     )
 
     # Teacher fixed slot labels
-    override_rows = session.query(TeacherFixedSlotLabel).all()
     teacher_fixed_labels = {}
-    for row in override_rows:
-        teacher_fixed_labels.setdefault(row.teacher.name, {}).setdefault(
+    for row in load_teacher_fixed_slot_labels(session):
+        teacher_fixed_labels.setdefault(row.teacher_name, {}).setdefault(
             row.fixed_slot_id, {}
         )[row.day] = row.label
 
@@ -379,12 +432,62 @@ def _get_teacher_data(session, teacher_names=None):
     return result
 
 
+
+
 # ---------------------------------------------------------------------------
 # Sheet writers
 # ---------------------------------------------------------------------------
 
-def _write_course_sheet(ws, course_line, info):
-    """Write a single course timetable into *ws*."""
+def _hour_label(hour_names, hour):
+    if hour < len(hour_names):
+        return hour_names[hour]
+    return t("hours.label").format(n=hour + 1)
+
+
+def _write_day_table_top(sheet, title, weekdays):
+    """Write the title and day-header rows of a course or teacher sheet."""
+    num_days = len(weekdays)
+    sheet.set_widths({1: 14, **{col_idx: 32 for col_idx in range(2, num_days + 2)}})
+    sheet.ws.freeze_panes = "B3"
+
+    # --- Row 1: Title ---
+    row = sheet.append([None, sheet.cell(title, font=TITLE_FONT, alignment=CENTER)])
+    sheet.merge(row, 2, num_days + 1)
+
+    # --- Row 2: Headers ---
+    headers = [t("timetable.hour_header")] + list(weekdays)
+    sheet.append(
+        [
+            sheet.cell(label, font=HEADER_FONT_WHITE, fill=HEADER_FILL_BLACK,
+                       border=THIN_BORDER, alignment=CENTER)
+            for label in headers
+        ],
+        height=40,
+    )
+
+
+def _hour_cell(sheet, label):
+    return sheet.cell(label, font=HOUR_FONT, fill=HOUR_FILL, border=THIN_BORDER, alignment=CENTER)
+
+
+def _empty_cell(sheet):
+    return sheet.cell("", border=THIN_BORDER, alignment=CENTER)
+
+
+def _fixed_row_cells(sheet, fs, slot_overrides, num_days):
+    """Cells of a fixed-slot row (e.g. a break) of a course or teacher sheet."""
+    cells = [_hour_cell(sheet, fs.time_range)]
+    fill = _hex_to_fill(fs.color) if fs.color else None
+    for day_index in range(num_days):
+        override = slot_overrides.get(day_index)
+        label = override if override is not None else fs.label
+        cells.append(sheet.cell(label, font=NORMAL_FONT, fill=fill,
+                                border=THIN_BORDER, alignment=CENTER))
+    return cells
+
+
+def _write_course_sheet(sheet, course_line, info):
+    """Write a single course timetable into *sheet*."""
     day_indices = info["day_indices"]
     weekdays = info["weekdays"]
     hour_names = info["hour_names"]
@@ -394,129 +497,49 @@ def _write_course_sheet(ws, course_line, info):
     support_hours = info["support_hours"]
     fixed_rows = info.get("fixed_rows", [])
     fixed_labels = info.get("fixed_labels", {})
-    day_colors = info.get("day_colors", {})
 
     num_days = len(day_indices)
 
-    # --- Row 1: Title ---
     title_parts = [f"{t('timetable.course_label')}: {course_line}"]
     if tutor_name:
-        title_parts.append(f"\u2014 {t('timetable.group_tutor')}: {tutor_name}")
+        title_parts.append(f"— {t('timetable.group_tutor')}: {tutor_name}")
     if support_hours > 0:
         title_parts.append(
             f"({support_hours}h {t('timetable.support_label_short')})"
         )
-    title = " ".join(title_parts)
-    ws.merge_cells(start_row=1, start_column=2, end_row=1, end_column=num_days + 1)
-    c = ws.cell(row=1, column=2, value=title)
-    c.font = TITLE_FONT
-    c.alignment = Alignment(horizontal="center", vertical="center")
-
-    # --- Row 2: Headers ---
-    c = ws.cell(row=2, column=1, value=t("timetable.hour_header"))
-    c.font = HEADER_FONT_WHITE
-    c.fill = HEADER_FILL_BLACK
-    c.border = THIN_BORDER
-    c.alignment = Alignment(horizontal="center", vertical="center")
-
-    for col_idx, day_idx in enumerate(day_indices, start=2):
-        day_name = weekdays[col_idx - 2]
-        c = ws.cell(row=2, column=col_idx, value=day_name)
-        c.font = HEADER_FONT_WHITE
-        c.border = THIN_BORDER
-        c.fill = HEADER_FILL_BLACK
-        c.alignment = Alignment(horizontal="center", vertical="center")
-
-    ws.row_dimensions[2].height = 40
+    _write_day_table_top(sheet, " ".join(title_parts), weekdays[:num_days])
 
     # --- Data rows ---
-    data_row = 3
     for row_type, data in _interleave_rows(sorted_hours, fixed_rows):
         if row_type == "fixed":
-            fs = data
-            slot_overrides = fixed_labels.get(fs.id, {})
-            hour_label = fs.time_range
-
-            c = ws.cell(row=data_row, column=1, value=hour_label)
-            c.font = HOUR_FONT
-            c.fill = HOUR_FILL
-            c.border = THIN_BORDER
-            c.alignment = Alignment(horizontal="center", vertical="center")
-
-            for day_index in range(num_days):
-                override = slot_overrides.get(day_index)
-                label = override if override is not None else fs.label
-                c = ws.cell(row=data_row, column=day_index + 2, value=label)
-                c.border = THIN_BORDER
-                c.font = NORMAL_FONT
-                c.alignment = Alignment(horizontal="center", vertical="center")
-                if fs.color:
-                    fill = _hex_to_fill(fs.color)
-                    if fill:
-                        c.fill = fill
-        else:
-            hour = data
-            hour_label = (
-                hour_names[hour]
-                if hour < len(hour_names)
-                else t("hours.label").format(n=hour + 1)
-            )
-            c = ws.cell(row=data_row, column=1, value=hour_label)
-            c.font = HOUR_FONT
-            c.fill = HOUR_FILL
-            c.border = THIN_BORDER
-            c.alignment = Alignment(horizontal="center", vertical="center")
-
-            max_lines = 1
-            for day_index in range(num_days):
-                assignments = cells.get((hour, day_index), [])
-                if assignments:
-                    lines = []
-                    colours = set()
-                    for label, colour in assignments:
-                        lines.append(label)
-                        if colour:
-                            colours.add(colour)
-                    cell_text = "\n".join(lines)
-                    c = ws.cell(
-                        row=data_row, column=day_index + 2, value=cell_text
-                    )
-                    c.border = THIN_BORDER
-                    c.font = NORMAL_FONT
-                    c.alignment = Alignment(
-                        wrap_text=True, vertical="center", horizontal="center"
-                    )
-
-                    # If all items share the same colour apply it to the cell
-                    if len(colours) == 1:
-                        fill = _hex_to_fill(next(iter(colours)))
-                        if fill:
-                            c.fill = fill
-                    max_lines = max(max_lines, len(lines))
-                else:
-                    c = ws.cell(
-                        row=data_row, column=day_index + 2, value=""
-                    )
-                    c.border = THIN_BORDER
-                    c.alignment = Alignment(horizontal="center", vertical="center")
-
-            ws.row_dimensions[data_row].height = 80
-
-        data_row += 1
-
-    # --- Column widths ---
-    ws.column_dimensions["A"].width = 14
-    for col_idx in range(2, num_days + 2):
-        ws.column_dimensions[get_column_letter(col_idx)].width = 32
-
-    ws.freeze_panes = "B3"
+            sheet.append(_fixed_row_cells(sheet, data, fixed_labels.get(data.id, {}), num_days))
+            continue
+
+        hour = data
+        row_cells = [_hour_cell(sheet, _hour_label(hour_names, hour))]
+        for day_index in range(num_days):
+            assignments = cells.get((hour, day_index), [])
+            if not assignments:
+                row_cells.append(_empty_cell(sheet))
+                continue
+            lines = [label for label, _ in assignments]
+            colours = {colour for _, colour in assignments if colour}
+            # If all items share the same colour apply it to the cell
+            fill = _hex_to_fill(next(iter(colours))) if len(colours) == 1 else None
+            row_cells.append(sheet.cell("\n".join(lines), font=NORMAL_FONT, fill=fill,
+                                        border=THIN_BORDER, alignment=WRAP_CENTER))
+        sheet.append(row_cells, height=80)
 
 
 # ---------------------------------------------------------------------------
 # Teacher grid sheet (single sheet for all teachers, day-by-day sections)
 # ---------------------------------------------------------------------------
 
-def _write_teacher_grid_sheet(ws, teacher_data, day_indices, weekdays,
+def _grid_display(label, course_line):
+    return f"{course_line}-{label}" if course_line else label
+
+
+def _write_teacher_grid_sheet(sheet, teacher_data, day_indices, weekdays,
                               hour_names, day_colors):
     """Write all teacher timetables into one sheet as a grid with one section
     per day, matching the ``teacher_staff`` front-end tab layout."""
@@ -525,144 +548,114 @@ def _write_teacher_grid_sheet(ws, teacher_data, day_indices, weekdays,
         return
 
     num_hours = len(hour_names)
-    num_days = len(day_indices)
     num_cols = len(teacher_names) + 1
 
+    # Auto-fit column widths (write-only sheets need them before any row)
+    max_hour_len = max((len(str(h)) for h in hour_names), default=0)
+    widths = {1: max(max_hour_len + 2, 8)}
+    for ci, t_name in enumerate(teacher_names, start=2):
+        max_len = 0
+        for items in teacher_data[t_name]["cells"].values():
+            for label, _, _, _, course_line, _ in items:
+                max_len = max(max_len, len(_grid_display(label, course_line)))
+        widths[ci] = max(max_len + 2, 8)
+    sheet.set_widths(widths)
+    sheet.ws.freeze_panes = "A2"
+
     # --- Row 1: Title ---
-    ws.merge_cells(
-        start_row=1, start_column=2, end_row=1, end_column=num_cols
-    )
-    c = ws.cell(row=1, column=2, value=t("timetable.tab_teacher_staff"))
-    c.font = TITLE_FONT
-    c.alignment = Alignment(horizontal="center", vertical="center")
+    row = sheet.append([None, sheet.cell(t("timetable.tab_teacher_staff"),
+                                         font=TITLE_FONT, alignment=CENTER)])
+    sheet.merge(row, 2, num_cols)
 
     # --- Row 2: Column headers (shown once, rotated vertically up) ---
-    header_alignment = Alignment(text_rotation=90, vertical='center', horizontal='center')
-    c = ws.cell(row=2, column=1, value=t("timetable.hour_header"))
-    c.font = HEADER_FONT_WHITE
-    c.fill = HEADER_FILL_BLACK
-    c.border = THIN_BORDER
-    c.alignment = header_alignment
-    for ci, t_name in enumerate(teacher_names, start=2):
-        c = ws.cell(row=2, column=ci, value=t_name)
-        c.font = HEADER_FONT_WHITE
-        c.fill = HEADER_FILL_BLACK
-        c.border = THIN_BORDER
-        c.alignment = header_alignment
     max_name_len = max((len(n) for n in teacher_names), default=0)
-    ws.row_dimensions[2].height = max_name_len * 9
+    sheet.append(
+        [
+            sheet.cell(label, font=HEADER_FONT_WHITE, fill=HEADER_FILL_BLACK,
+                       border=THIN_BORDER, alignment=ROTATED_HEADER)
+            for label in [t("timetable.hour_header")] + teacher_names
+        ],
+        height=max_name_len * 9,
+    )
+    sheet.append()  # blank separator
 
-    row = 4  # skip title row + header row + blank separator
     for di, day_idx in enumerate(day_indices):
-        day_name = weekdays[di]
-
         # Day section header (merged, with day colour)
-        ws.merge_cells(
-            start_row=row, start_column=1, end_row=row, end_column=num_cols
-        )
-        c = ws.cell(row=row, column=1, value=day_name)
-        c.font = Font(bold=True, size=12)
-        c.alignment = Alignment(horizontal="left", vertical="center")
         day_color = (
             day_colors.get(str(day_idx))
             if isinstance(day_colors, dict)
             else None
         )
-        if day_color:
-            fill = _hex_to_fill(day_color)
-            if fill:
-                c.fill = fill
-        row += 1
+        day_fill = _hex_to_fill(day_color) if day_color else None
+        row = sheet.append([sheet.cell(weekdays[di], font=DAY_FONT, fill=day_fill, alignment=LEFT)])
+        sheet.merge(row, 1, num_cols)
 
         # Data rows
         for hour in range(num_hours):
-            hour_label = (
-                hour_names[hour]
-                if hour < len(hour_names)
-                else t("hours.label").format(n=hour + 1)
-            )
-            c = ws.cell(row=row, column=1, value=hour_label)
-            c.font = HOUR_FONT
-            c.fill = HOUR_FILL
-            c.border = THIN_BORDER
-            c.alignment = Alignment(horizontal="center", vertical="center")
-
+            row_cells = [_hour_cell(sheet, _hour_label(hour_names, hour))]
             max_lines = 1
-            for ci, t_name in enumerate(teacher_names, start=2):
-                items = teacher_data[t_name]["cells"].get(
-                    (hour, day_idx), []
-                )
-                if items:
-                    lines = []
-                    is_unavailable = False
-                    is_support = False
-                    is_empty_gap = False
-                    any_conflict = False
-                    for label, colour, conflict, support, course_line, _ in items:
-                        if course_line:
-                            lines.append(f"{course_line}-{label}")
-                        else:
-                            lines.append(label)
-                        if conflict:
-                            any_conflict = True
-                        if label == "\u2715":
-                            is_unavailable = True
-                        if support:
-                            is_support = True
-                    is_empty_gap = all(label == "" for label, _, _, _, _, _ in items)
-
-                    cell_text = "\n".join(lines)
-                    cell_text = cell_text.strip() or ""
-                    c = ws.cell(row=row, column=ci, value=cell_text)
-                    c.border = THIN_BORDER
-                    c.font = CONFLICT_FONT if any_conflict else NORMAL_FONT
-                    c.alignment = Alignment(
-                        wrap_text=True, vertical="center", horizontal="center"
-                    )
-
-                    if is_unavailable:
-                        c.fill = _hex_to_fill("#eb5252")
-                    elif is_support or is_empty_gap:
-                        pass
-                    elif day_color:
-                        fill = _hex_to_fill(day_color)
-                        if fill:
-                            c.fill = fill
-                    max_lines = max(max_lines, len(lines))
-                else:
-                    c = ws.cell(row=row, column=ci, value="")
-                    c.border = THIN_BORDER
-                    c.alignment = Alignment(horizontal="center", vertical="center")
-
-            ws.row_dimensions[row].height = max(15, max_lines * 15)
-            row += 1
-
-        row += 1  # blank separator between days
-
-    # Auto-fit column widths
-    max_hour_len = max((len(str(h)) for h in hour_names), default=0)
-    ws.column_dimensions["A"].width = max(max_hour_len + 2, 8)
-    for ci, t_name in enumerate(teacher_names, start=2):
-        col_letter = get_column_letter(ci)
-        max_len = 0
-        for (hour, day_idx), items in teacher_data[t_name]["cells"].items():
-            for label, colour, conflict, support, course_line, _ in items:
-                if course_line:
-                    display = f"{course_line}-{label}"
+            for t_name in teacher_names:
+                items = teacher_data[t_name]["cells"].get((hour, day_idx), [])
+                if not items:
+                    row_cells.append(_empty_cell(sheet))
+                    continue
+                lines = [_grid_display(label, course_line) for label, _, _, _, course_line, _ in items]
+                any_conflict = any(conflict for _, _, conflict, _, _, _ in items)
+                is_unavailable = any(label == "✕" for label, _, _, _, _, _ in items)
+                is_support = any(support for _, _, _, support, _, _ in items)
+                is_empty_gap = all(label == "" for label, _, _, _, _, _ in items)
+
+                if is_unavailable:
+                    fill = UNAVAILABLE_FILL
+                elif is_support or is_empty_gap:
+                    fill = None
                 else:
-                    display = label
-                max_len = max(max_len, len(display))
-        ws.column_dimensions[col_letter].width = max(max_len + 2, 8)
+                    fill = day_fill
+                row_cells.append(sheet.cell(
+                    "\n".join(lines).strip(),
+                    font=CONFLICT_FONT if any_conflict else NORMAL_FONT,
+                    fill=fill, border=THIN_BORDER, alignment=WRAP_CENTER,
+                ))
+                max_lines = max(max_lines, len(lines))
+            sheet.append(row_cells, height=max(15, max_lines * 15))
 
-    ws.freeze_panes = "A2"
+        sheet.append()  # blank separator between days
 
 
 # ---------------------------------------------------------------------------
 # Individual teacher sheet
 # ---------------------------------------------------------------------------
 
-def _write_teacher_sheet(ws, teacher_name, info):
-    """Write a single teacher timetable into *ws*."""
+def _teacher_cell_lines(items):
+    """Return ``(lines, colours, any_conflict, is_unavailable)`` of a teacher cell."""
+    lines = []
+    colours = set()
+    any_conflict = False
+    is_unavailable = False
+    for label, colour, conflict, support, course_line, subject_name in items:
+        if label == "✕":
+            lines.append("✕")
+            is_unavailable = True
+            any_conflict = True
+        elif support and subject_name:
+            lines.append(f"{course_line}: {subject_name} ({t('timetable.support_label')})")
+            if colour:
+                colours.add(colour)
+            if conflict:
+                any_conflict = True
+        elif (isinstance(label, str) and label) or subject_name:
+            lines.append(f"{course_line}: {subject_name}" if course_line else subject_name)
+            if colour:
+                colours.add(colour)
+            if conflict and not (isinstance(label, str) and label):
+                any_conflict = True
+        else:
+            lines.append(str(label))
+    return lines, colours, any_conflict, is_unavailable
+
+
+def _write_teacher_sheet(sheet, teacher_name, info):
+    """Write a single teacher timetable into *sheet*."""
     day_indices = info["day_indices"]
     weekdays = info["weekdays"]
     hour_names = info["hour_names"]
@@ -670,11 +663,9 @@ def _write_teacher_sheet(ws, teacher_name, info):
     cells = info["cells"]
     fixed_rows = info.get("fixed_rows", [])
     fixed_labels = info.get("fixed_labels", {})
-    day_colors = info.get("day_colors", {})
 
     num_days = len(day_indices)
 
-    # --- Row 1: Title ---
     title_parts = [f"{t('timetable.teacher_label')}: {teacher_name}"]
     summary_parts = []
     max_hours = info.get("max_hours", 0)
@@ -690,151 +681,35 @@ def _write_teacher_sheet(ws, teacher_name, info):
     if support:
         summary_parts.append(f"{t('timetable.support_label')}: {support}h")
     if summary_parts:
-        title_parts.append("\u2014 " + ", ".join(summary_parts))
-    title = " ".join(title_parts)
-    ws.merge_cells(start_row=1, start_column=2, end_row=1, end_column=num_days + 1)
-    c = ws.cell(row=1, column=2, value=title)
-    c.font = TITLE_FONT
-    c.alignment = Alignment(horizontal="center", vertical="center")
-
-    # --- Row 2: Headers ---
-    c = ws.cell(row=2, column=1, value=t("timetable.hour_header"))
-    c.font = HEADER_FONT_WHITE
-    c.fill = HEADER_FILL_BLACK
-    c.border = THIN_BORDER
-    c.alignment = Alignment(horizontal="center", vertical="center")
-
-    for col_idx, day_idx in enumerate(day_indices, start=2):
-        day_name = weekdays[col_idx - 2]
-        c = ws.cell(row=2, column=col_idx, value=day_name)
-        c.font = HEADER_FONT_WHITE
-        c.border = THIN_BORDER
-        c.fill = HEADER_FILL_BLACK
-        c.alignment = Alignment(horizontal="center", vertical="center")
-
-    ws.row_dimensions[2].height = 40
+        title_parts.append("— " + ", ".join(summary_parts))
+    _write_day_table_top(sheet, " ".join(title_parts), weekdays[:num_days])
 
     # --- Data rows ---
-    data_row = 3
     for row_type, data in _interleave_rows(sorted_hours, fixed_rows):
         if row_type == "fixed":
-            fs = data
-            slot_overrides = fixed_labels.get(fs.id, {})
-            hour_label = fs.time_range
-
-            c = ws.cell(row=data_row, column=1, value=hour_label)
-            c.font = HOUR_FONT
-            c.fill = HOUR_FILL
-            c.border = THIN_BORDER
-            c.alignment = Alignment(horizontal="center", vertical="center")
-
-            for day_index in range(num_days):
-                override = slot_overrides.get(day_index)
-                label = override if override is not None else fs.label
-                c = ws.cell(row=data_row, column=day_index + 2, value=label)
-                c.border = THIN_BORDER
-                c.font = NORMAL_FONT
-                c.alignment = Alignment(horizontal="center", vertical="center")
-                if fs.color:
-                    fill = _hex_to_fill(fs.color)
-                    if fill:
-                        c.fill = fill
-        else:
-            hour = data
-            hour_label = (
-                hour_names[hour]
-                if hour < len(hour_names)
-                else t("hours.label").format(n=hour + 1)
-            )
-            c = ws.cell(row=data_row, column=1, value=hour_label)
-            c.font = HOUR_FONT
-            c.fill = HOUR_FILL
-            c.border = THIN_BORDER
-            c.alignment = Alignment(horizontal="center", vertical="center")
-
-            max_lines = 1
-            for day_index in range(num_days):
-                items = cells.get((hour, day_index), [])
-                if items:
-                    lines = []
-                    colours = set()
-                    any_conflict = False
-                    is_unavailable = False
-                    for label, colour, conflict, support, course_line, subject_name in items:
-                        if label == "\u2715":
-                            lines.append("\u2715")
-                            is_unavailable = True
-                            any_conflict = True
-                        elif support and subject_name:
-                            display = f"{course_line}: {subject_name} ({t('timetable.support_label')})"
-                            lines.append(display)
-                            if colour:
-                                colours.add(colour)
-                            if conflict:
-                                any_conflict = True
-                        elif isinstance(label, str) and label:
-                            if course_line:
-                                display = f"{course_line}: {subject_name}"
-                            else:
-                                display = subject_name
-                            lines.append(display)
-                            if colour:
-                                colours.add(colour)
-                        elif subject_name:
-                            if course_line:
-                                display = f"{course_line}: {subject_name}"
-                            else:
-                                display = subject_name
-                            lines.append(display)
-                            if colour:
-                                colours.add(colour)
-                            if conflict:
-                                any_conflict = True
-                        else:
-                            lines.append(str(label))
-                    cell_text = "\n".join(lines)
-                    c = ws.cell(
-                        row=data_row, column=day_index + 2, value=cell_text
-                    )
-                    c.border = THIN_BORDER
-                    if is_unavailable:
-                        c.font = CONFLICT_FONT
-                        fill = _hex_to_fill("#eb5252")
-                        if fill:
-                            c.fill = fill
-                    elif any_conflict:
-                        c.font = CONFLICT_FONT
-                        if len(colours) == 1:
-                            fill = _hex_to_fill(next(iter(colours)))
-                            if fill:
-                                c.fill = fill
-                    else:
-                        c.font = NORMAL_FONT
-                        if len(colours) == 1:
-                            fill = _hex_to_fill(next(iter(colours)))
-                            if fill:
-                                c.fill = fill
-                    c.alignment = Alignment(
-                        wrap_text=True, vertical="center", horizontal="center"
-                    )
-                    max_lines = max(max_lines, len(lines))
-                else:
-                    c = ws.cell(
-                        row=data_row, column=day_index + 2, value=""
-                    )
-                    c.border = THIN_BORDER
-                    c.alignment = Alignment(horizontal="center", vertical="center")
-
-            ws.row_dimensions[data_row].height = 80
-
-        data_row += 1
-
-    # --- Column widths ---
-    ws.column_dimensions["A"].width = 14
-    for col_idx in range(2, num_days + 2):
-        ws.column_dimensions[get_column_letter(col_idx)].width = 32
-
-    ws.freeze_panes = "B3"
+            sheet.append(_fixed_row_cells(sheet, data, fixed_labels.get(data.id, {}), num_days))
+            continue
+
+        hour = data
+        row_cells = [_hour_cell(sheet, _hour_label(hour_names, hour))]
+        for day_index in range(num_days):
+            items = cells.get((hour, day_index), [])
+            if not items:
+                row_cells.append(_empty_cell(sheet))
+                continue
+            lines, colours, any_conflict, is_unavailable = _teacher_cell_lines(items)
+            if is_unavailable:
+                fill = UNAVAILABLE_FILL
+            elif len(colours) == 1:
+                fill = _hex_to_fill(next(iter(colours)))
+            else:
+                fill = None
+            row_cells.append(sheet.cell(
+                "\n".join(lines),
+                font=CONFLICT_FONT if any_conflict else NORMAL_FONT,
+                fill=fill, border=THIN_BORDER, alignment=WRAP_CENTER,
+            ))
+        sheet.append(row_cells, height=80)
 
 
 # ---------------------------------------------------------------------------
@@ -842,7 +717,7 @@ def _write_teacher_sheet(ws, teacher_name, info):
 # ---------------------------------------------------------------------------
 
 def generate_excel_timetable(session, course_lines=None, teacher_names=None,
-                             teacher_grouped=True):
+                             teacher_grouped=True, output=None):
     """Build an ``.xlsx`` workbook with one sheet per course and either a
     single ``Profesorado`` grid sheet or individual teacher sheets.
 
@@ -851,41 +726,44 @@ def generate_excel_timetable(session, course_lines=None, teacher_names=None,
     session : sqlalchemy.orm.Session
         Database session.
     course_lines : list[str] | None
-        Course lines to include (e.g. ``["1\u00baA", "2\u00baB"]``).
+        Course lines to include (e.g. ``["1ºA", "2ºB"]``).
         *None* means all.
     teacher_names : list[str] | None
         Teacher names to include.  *None* means all.
     teacher_grouped : bool
         If *True* (default), create a single grid sheet with all teachers.
         If *False*, create one sheet per teacher individually.
+    output : str | file-like | None
+        Path or binary file to write the workbook to.  *None* writes it to
+        a new in-memory buffer.
 
     Returns
     -------
-    BytesIO
-        In-memory Excel file ready to be served as a download.
+    BytesIO | str | file-like
+        The in-memory Excel file ready to be served as a download, or
+        *output* once the workbook has been written to it.
     """
     course_data = _get_course_data(session, course_lines)
     teacher_data = _get_teacher_data(session, teacher_names)
 
-    wb = Workbook()
-    wb.remove(wb.active)
+    wb = Workbook(write_only=True)
+    styles = _StyleCache()
 
     # Course sheets (one per course)
     for course_line in sorted(course_data):
-        sheet_name = str(course_line)[:31]
-        ws = wb.create_sheet(title=sheet_name)
-        _write_course_sheet(ws, course_line, course_data[course_line])
+        sheet = _SheetWriter(wb, str(course_line)[:31], styles)
+        _write_course_sheet(sheet, course_line, course_data[course_line])
 
     # Teacher sheets
     if teacher_data:
         if teacher_grouped:
             # Single grid sheet (Profesorado tab)
-            ws = wb.create_sheet(
-                title=(t("timetable.tab_teacher_staff") or "Profesorado")[:31]
+            sheet = _SheetWriter(
+                wb, (t("timetable.tab_teacher_staff") or "Profesorado")[:31], styles
             )
             sample = next(iter(teacher_data.values()))
             _write_teacher_grid_sheet(
-                ws,
+                sheet,
                 teacher_data,
                 day_indices=sample["day_indices"],
                 weekdays=sample["weekdays"],
@@ -895,10 +773,12 @@ def generate_excel_timetable(session, course_lines=None, teacher_names=None,
         else:
             # Individual teacher sheets (General tab)
             for teacher_name in sorted(teacher_data):
-                sheet_name = str(teacher_name)[:31]
-                ws = wb.create_sheet(title=sheet_name)
-                _write_teacher_sheet(ws, teacher_name, teacher_data[teacher_name])
+                sheet = _SheetWriter(wb, str(teacher_name)[:31], styles)
+                _write_teacher_sheet(sheet, teacher_name, teacher_data[teacher_name])
 
+    if output is not None:
+        wb.save(output)
+        return output
     buf = BytesIO()
     wb.save(buf)
     buf.seek(0)
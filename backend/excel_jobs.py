@@ -0,0 +1,177 @@
+"""Excel workbooks built in the background and downloaded when ready.
+
+Exporting every course and teacher sheet of a large school takes seconds.
+With ``"async": true``, ``POST /timetable/excel`` hands the export to a small
+thread pool and returns at once; the workbook is streamed to a file in the
+export directory and served by ``GET /timetable/excel/<export_id>/download``.
+
+Exports are keyed by the view-cache key of the workbook (scenario, locale,
+parameters and data generation, see ``view_cache.view_key``), so asking
+again for an unchanged workbook returns the export already queued or done.
+Files are deleted ``EXPORT_RETENTION_SECONDS`` after they were requested.
+
+Set ``BACKEND_EXPORT_DIR`` to choose the directory (default: ``exports`` next
+to the live database) and ``BACKEND_EXPORT_WORKERS`` the number of exports
+built at once (default 1).
+"""
+
+import logging
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from .logging_config import build_log_extra
+from .models import Session as DbSession
+from .scenarios import live_database_path, use_scenario
+from .translations import use_locale
+
+
+logger = logging.getLogger(__name__)
+
+EXPORT_DIR_ENV = "BACKEND_EXPORT_DIR"
+EXPORT_WORKERS_ENV = "BACKEND_EXPORT_WORKERS"
+EXPORT_RETENTION_SECONDS = 24 * 3600
+EXPORT_SUFFIX = ".xlsx"
+
+
+def export_dir():
+    directory = os.getenv(EXPORT_DIR_ENV)
+    if not directory:
+        directory = os.path.join(os.path.dirname(live_database_path()), "exports")
+    return directory
+
+
+def _export_workers():
+    raw = os.getenv(EXPORT_WORKERS_ENV)
+    if raw:
+        try:
+            return max(1, int(raw))
+        except ValueError:
+            logger.warning("Ignoring invalid %s=%r", EXPORT_WORKERS_ENV, raw, extra=build_log_extra())
+    return 1
+
+
+def _remove(path):
+    for candidate in (path, path + ".tmp"):
+        try:
+            os.remove(candidate)
+        except FileNotFoundError:
+            pass
+
+
+class ExcelExports:
+    """Thread-safe registry of background Excel exports."""
+
+    def __init__(self, workers=None):
+        self._workers = workers
+        self._executor = None
+        self._exports = {}
+        self._by_key = {}
+        self._lock = threading.Lock()
+
+    def _submit(self, fn, *args):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self._workers or _export_workers(),
+                thread_name_prefix="excel-export",
+            )
+        self._executor.submit(fn, *args)
+
+    def submit(self, key, params, scenario=None, locale=None):
+        """Queue the export of the workbook ``key`` unless it is queued or done.
+
+        Args:
+            key: View-cache key of the workbook.
+            params: Keyword arguments of ``generate_excel_timetable``.
+            scenario: Scenario to read, None for the live database.
+            locale: Locale of the sheet titles and labels.
+        Returns:
+            The status dict of the export.
+        """
+        with self._lock:
+            self._prune_locked()
+            export_id = self._by_key.get(key)
+            export = self._exports.get(export_id)
+            if export is not None and export["status"] != "error":
+                return self._status(export)
+            export_id = uuid.uuid4().hex
+            directory = export_dir()
+            os.makedirs(directory, exist_ok=True)
+            export = {
+                "export_id": export_id,
+                "status": "running",
+                "created_at": time.time(),
+                "finished_at": None,
+                "size_bytes": None,
+                "error": None,
+                "key": key,
+                "path": os.path.join(directory, export_id + EXPORT_SUFFIX),
+            }
+            self._exports[export_id] = export
+            self._by_key[key] = export_id
+        self._submit(self._run, export, params, scenario, locale)
+        logger.info("Excel export queued export_id=%s", export_id, extra=build_log_extra())
+        return self._status(export)
+
+    def _run(self, export, params, scenario, locale):
+        from .excel_export import generate_excel_timetable
+
+        tmp_path = export["path"] + ".tmp"
+        started = time.perf_counter()
+        try:
+            with use_scenario(scenario), use_locale(locale):
+                session = DbSession()
+                try:
+                    with open(tmp_path, "wb") as output:
+                        generate_excel_timetable(session, output=output, **params)
+                finally:
+                    session.close()
+            os.replace(tmp_path, export["path"])
+        except Exception as exc:
+            logger.exception("Excel export failed export_id=%s", export["export_id"], extra=build_log_extra())
+            _remove(export["path"])
+            with self._lock:
+                export.update(status="error", error=str(exc), finished_at=time.time())
+            return
+        with self._lock:
+            export.update(
+                status="success",
+                size_bytes=os.path.getsize(export["path"]),
+                finished_at=time.time(),
+            )
+        logger.info(
+            "Excel export finished export_id=%s elapsed=%.2fs",
+            export["export_id"], time.perf_counter() - started, extra=build_log_extra(),
+        )
+
+    @staticmethod
+    def _status(export):
+        return {k: v for k, v in export.items() if k not in ("key", "path")}
+
+    def get_status(self, export_id):
+        with self._lock:
+            export = self._exports.get(export_id)
+            return self._status(export) if export else None
+
+    def file_path(self, export_id):
+        """Return the path of the finished workbook, or None if not ready."""
+        with self._lock:
+            export = self._exports.get(export_id)
+            if export is None or export["status"] != "success":
+                return None
+            return export["path"]
+
+    def _prune_locked(self):
+        cutoff = time.time() - EXPORT_RETENTION_SECONDS
+        for export_id, export in list(self._exports.items()):
+            if export["status"] == "running" or export["created_at"] >= cutoff:
+                continue
+            _remove(export["path"])
+            del self._exports[export_id]
+            if self._by_key.get(export["key"]) == export_id:
+                del self._by_key[export["key"]]
+
+
+excel_exports = ExcelExports()
@@ -1,6 +1,13 @@
 import json as _json
-from sqlalchemy import delete
+import os
+import tempfile
+from collections import defaultdict
+from itertools import batched
+
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import Session as OrmSession
 from .models import (
+    Base,
     Course,
     Subject,
     SubjectGroup,
@@ -15,131 +22,413 @@ from .models import (
     TeacherFixedSlotLabel,
     CourseFixedSlotLabel,
     normalize_tutor_groups,
+    serialize_tutor_groups,
+    subjectgroup_subject,
     teacher_subject,
 )
+from .scenarios import replace_database
+from .schemas import ImportPayload
+
+
+# Rows fetched from the database, and items serialised, per chunk of the
+# streamed export.
+EXPORT_BATCH_ROWS = 500
+
+
+def _json_lines(value):
+    try:
+        return _json.loads(value) if value is not None else None
+    except (ValueError, TypeError):
+        return None
+
+
+def _rows(session, stmt):
+    """Run ``stmt`` and iterate its rows, fetched in batches."""
+    return session.execute(stmt, execution_options={"yield_per": EXPORT_BATCH_ROWS})
+
+
+def _grouped(session, stmt):
+    """Map the first column of each row of ``stmt`` to the list of the rest."""
+    grouped = defaultdict(list)
+    for key, *rest in session.execute(stmt):
+        grouped[key].append(rest)
+    return grouped
+
+
+def _courses(course_rows):
+    for course_id, num_lines in course_rows:
+        yield {"id": course_id, "name": course_id, "num_lines": num_lines}
+
+
+def _subjects(session, course_lines):
+    groups = _grouped(session, select(
+        subjectgroup_subject.c.subject_id, SubjectGroup.id, SubjectGroup.name,
+    ).join(SubjectGroup, SubjectGroup.id == subjectgroup_subject.c.subjectgroup_id))
+    teachers = _grouped(session, select(
+        teacher_subject.c.subject_id, Teacher.id, Teacher.name,
+    ).join(Teacher, Teacher.id == teacher_subject.c.teacher_id))
+    stmt = select(
+        Subject.id, Subject.name, Subject.color, Subject.weekly_hours, Subject.teach_every_day,
+        Subject.max_hours_per_day, Subject.consecutive_hours, Subject.course_id,
+        Subject.linked_subject_id, Subject.included_lines,
+    )
+    for row in _rows(session, stmt):
+        course = None
+        if row.course_id in course_lines:
+            course = {"id": row.course_id, "name": row.course_id, "num_lines": course_lines[row.course_id]}
+        yield {
+            "id": row.id,
+            "name": row.name,
+            "color": row.color,
+            "weekly_hours": row.weekly_hours,
+            "teach_every_day": row.teach_every_day,
+            "max_hours_per_day": row.max_hours_per_day,
+            "consecutive_hours": row.consecutive_hours,
+            "course": course,
+            "subject_groups": [{"id": gid, "name": name} for gid, name in groups.get(row.id, [])],
+            "full_name": f"{row.name} ({row.course_id})" if row.course_id else row.name,
+            "linked_subject_id": row.linked_subject_id,
+            "teachers": [{"id": tid, "name": name} for tid, name in teachers.get(row.id, [])],
+            "included_lines": _json.loads(row.included_lines) if row.included_lines else None,
+        }
 
 
-def dump_db(session):
-    data = {}
-    data["courses"] = [c.to_dict() for c in session.query(Course).all()]
-    data["subjects"] = [s.to_dict() for s in session.query(Subject).all()]
-    data["subject_groups"] = [
-        {
+def _subject_groups(session):
+    members = _grouped(session, select(
+        subjectgroup_subject.c.subjectgroup_id, subjectgroup_subject.c.subject_id,
+    ).join(Subject, Subject.id == subjectgroup_subject.c.subject_id))
+    stmt = select(
+        SubjectGroup.id, SubjectGroup.name, SubjectGroup.color,
+        SubjectGroup.included_lines, SubjectGroup.shared_hours,
+    )
+    for g in _rows(session, stmt):
+        yield {
             "id": g.id,
             "name": g.name,
             "color": g.color,
-            "subjects": [s.id for s in g.subjects],
+            "subjects": [sid for sid, in members.get(g.id, [])],
             "included_lines": _json.loads(g.included_lines) if g.included_lines else None,
             "shared_hours": g.shared_hours,
         }
-        for g in session.query(SubjectGroup).all()
-    ]
-
-    teachers = []
-    for t in session.query(Teacher).all():
-        ts_rows = session.execute(
-            teacher_subject.select().where(teacher_subject.c.teacher_id == t.id)
-        ).fetchall()
-        teacher_subject_lines = {}
-        for _, subject_id, included_lines in ts_rows:
-            if included_lines is not None:
-                try:
-                    teacher_subject_lines[str(subject_id)] = _json.loads(included_lines)
-                except (ValueError, TypeError):
-                    teacher_subject_lines[str(subject_id)] = None
-            else:
-                teacher_subject_lines[str(subject_id)] = None
-        teachers.append(
-            {
-                "id": t.id,
-                "name": t.name,
-                "subjects": [s.id for s in t.subjects],
-                "teacher_subject_lines": teacher_subject_lines,
-                "preferences": t.preferences,
-                "coordination_hours": t.coordination_hours,
-                "max_hours_week": t.max_hours_week,
-                "tutor_group": t.tutor_group,
-                "tutor_groups": normalize_tutor_groups(t.tutor_group),
-            }
-        )
-    data["teachers"] = teachers
-
-    data["timeslots"] = [
-        {
-            "id": ts.id,
-            "day": ts.day,
-            "hour": ts.hour,
-            "course_id": ts.course_id,
-            "line": ts.line,
-            "subject_group_id": ts.subject_group_id,
-        }
-        for ts in session.query(Timeslot).all()
-    ]
 
-    data["assignments"] = [
-        {
-            "id": a.id,
-            "timeslot_id": a.timeslot_id,
-            "subject_id": a.subject_id,
-            "teacher_id": a.teacher_id,
+
+def _teachers(session):
+    links = _grouped(session, select(
+        teacher_subject.c.teacher_id, teacher_subject.c.subject_id,
+        teacher_subject.c.included_lines, Subject.id,
+    ).outerjoin(Subject, Subject.id == teacher_subject.c.subject_id))
+    stmt = select(
+        Teacher.id, Teacher.name, Teacher.preferences, Teacher.coordination_hours,
+        Teacher.max_hours_week, Teacher.tutor_group,
+    )
+    for t in _rows(session, stmt):
+        teacher_links = links.get(t.id, [])
+        yield {
+            "id": t.id,
+            "name": t.name,
+            # Links to deleted subjects keep their lines but list no subject
+            "subjects": [existing for _, _, existing in teacher_links if existing is not None],
+            "teacher_subject_lines": {
+                str(subject_id): _json_lines(included_lines)
+                for subject_id, included_lines, _ in teacher_links
+            },
+            "preferences": t.preferences,
+            "coordination_hours": t.coordination_hours,
+            "max_hours_week": t.max_hours_week,
+            "tutor_group": t.tutor_group,
+            "tutor_groups": normalize_tutor_groups(t.tutor_group),
         }
-        for a in session.query(TimeSlotAssignment).all()
-    ]
 
+
+def _columns(session, *columns, **transforms):
+    """Rows of ``columns`` as dicts keyed by column name; ``transforms`` map
+    a column name to a function applied to its value."""
+    names = [column.key for column in columns]
+    for row in _rows(session, select(*columns)):
+        item = dict(zip(names, row))
+        for name, transform in transforms.items():
+            item[name] = transform(item[name])
+        yield item
+
+
+def _config(session):
     cfg = session.query(Config).first()
-    data["config"] = cfg.to_dict() if cfg else {}
+    return cfg.to_dict() if cfg else {}
+
+
+def iter_sections(session):
+    """Yield the ``(name, value)`` sections of the export document in order.
+
+    Each value is a dict (``config``) or an iterator of dicts that reads its
+    table with one batched query (plus one query per association table
+    used), so large tables are never held in memory as a whole.
+    """
+    course_lines = dict(session.execute(select(Course.id, Course.num_lines)).all())
+    yield "courses", _courses(course_lines.items())
+    yield "subjects", _subjects(session, course_lines)
+    yield "subject_groups", _subject_groups(session)
+    yield "teachers", _teachers(session)
+    yield "timeslots", _columns(
+        session, Timeslot.id, Timeslot.day, Timeslot.hour, Timeslot.course_id,
+        Timeslot.line, Timeslot.subject_group_id,
+    )
+    yield "assignments", _columns(
+        session, TimeSlotAssignment.id, TimeSlotAssignment.timeslot_id,
+        TimeSlotAssignment.subject_id, TimeSlotAssignment.teacher_id,
+    )
+    yield "config", _config(session)
+    yield "fixed_slots", _columns(
+        session, FixedSlot.id, FixedSlot.slot_type, FixedSlot.position, FixedSlot.label,
+        FixedSlot.time_range, FixedSlot.color,
+    )
+    yield "teacher_fixed_slot_labels", _columns(
+        session, TeacherFixedSlotLabel.id, TeacherFixedSlotLabel.teacher_id,
+        TeacherFixedSlotLabel.fixed_slot_id, TeacherFixedSlotLabel.day, TeacherFixedSlotLabel.label,
+    )
+    yield "course_fixed_slot_labels", _columns(
+        session, CourseFixedSlotLabel.id, CourseFixedSlotLabel.course_line,
+        CourseFixedSlotLabel.fixed_slot_id, CourseFixedSlotLabel.day, CourseFixedSlotLabel.label,
+    )
+    yield "teacher_busy_slots", _columns(
+        session, TeacherBusySlot.id, TeacherBusySlot.teacher_id, TeacherBusySlot.day,
+        TeacherBusySlot.hour, TeacherBusySlot.slot_type,
+    )
+    yield "joint_classes", _columns(
+        session, JointClass.id, JointClass.name, JointClass.course_id, JointClass.subject_id,
+        JointClass.teacher_id, JointClass.lines, JointClass.shared_hours,
+        lines=lambda lines: _json.loads(lines) if lines else [],
+    )
+    yield "support_assignments", _columns(
+        session, SupportAssignment.id, SupportAssignment.teacher_id, SupportAssignment.day,
+        SupportAssignment.hour, SupportAssignment.subject_id, SupportAssignment.course_id,
+        SupportAssignment.line,
+    )
+
+
+def dump_db(session):
+    """Return the whole export document as a dict."""
+    return {
+        name: value if isinstance(value, dict) else list(value)
+        for name, value in iter_sections(session)
+    }
+
 
-    data["fixed_slots"] = [fs.to_dict() for fs in session.query(FixedSlot).all()]
+def iter_export_json(session):
+    """Yield the export document as JSON text, a batch of items at a time.
 
-    data["teacher_fixed_slot_labels"] = [
+    The text is the same as ``json.dumps(dump_db(session), indent=2,
+    ensure_ascii=False)``; no section is materialised as a whole.
+    """
+
+    def dumps(value, indent):
+        # JSON strings escape newlines, so re-indenting every line is safe
+        return _json.dumps(value, indent=2, ensure_ascii=False).replace("\n", "\n" + indent)
+
+    yield "{"
+    for index, (name, value) in enumerate(iter_sections(session)):
+        key = ("," if index else "") + "\n  " + _json.dumps(name, ensure_ascii=False) + ": "
+        if isinstance(value, dict):
+            yield key + dumps(value, "  ")
+            continue
+        opened = False
+        for batch in batched(value, EXPORT_BATCH_ROWS):
+            items = ",\n    ".join(dumps(item, "    ") for item in batch)
+            yield (",\n    " if opened else key + "[\n    ") + items
+            opened = True
+        yield "\n  ]" if opened else key + "[]"
+    yield "\n}"
+
+
+def _assign_ids(rows):
+    """Give the rows without an ``id`` the next free ids, in payload order."""
+    next_id = max((row["id"] for row in rows if row["id"] is not None), default=0)
+    for row in rows:
+        if row["id"] is None:
+            next_id += 1
+            row["id"] = next_id
+    return rows
+
+
+def _dumps_or_none(value):
+    return _json.dumps(value, ensure_ascii=False) if value is not None else None
+
+
+def _find_timeslot(timeslots, assignment):
+    """Fallback lookup of an assignment's timeslot by its coordinates."""
+    for ts in timeslots:
+        if assignment.day and ts["day"] != assignment.day:
+            continue
+        if assignment.hour is not None and ts["hour"] != assignment.hour:
+            continue
+        if assignment.course_id and ts["course_id"] != assignment.course_id:
+            continue
+        if assignment.line is not None and ts["line"] != assignment.line:
+            continue
+        return ts
+    return None
+
+
+def payload_rows(document):
+    """Convert a validated ``ImportPayload`` into rows to insert, per table.
+
+    Returns a list of ``(table, rows)`` pairs in insertion order, where rows
+    are dicts of column values. Fixed slots, subject groups, timeslots and
+    teachers keep the ids of the payload (rows without one get the next free
+    id), so the references between sections hold. Assignments are kept when
+    their timeslot and subject exist, busy slots when their teacher does.
+    """
+    tables = []
+
+    cfg = document.config
+    if cfg is not None:
+        has_hour_names = cfg.hour_names is not None
+        tables.append((Config.__table__, [{
+            "classes_per_day": cfg.classes_per_day,
+            "days_per_week": cfg.days_per_week,
+            "hour_names": _dumps_or_none(cfg.hour_names),
+            "day_indices": _json.dumps(cfg.day_indices, ensure_ascii=False) if has_hour_names else None,
+            "day_colors": _dumps_or_none(cfg.day_colors),
+            "disabled_restrictions": _dumps_or_none(cfg.disabled_restrictions),
+            "solver_profiles": _json.dumps(cfg.solver_profiles, ensure_ascii=False) if cfg.solver_profiles else None,
+            "solver_profile": cfg.solver_profile,
+        }]))
+
+    tables.append((FixedSlot.__table__, _assign_ids([
         {
-            "id": lbl.id,
-            "teacher_id": lbl.teacher_id,
-            "fixed_slot_id": lbl.fixed_slot_id,
-            "day": lbl.day,
-            "label": lbl.label,
+            "id": fs.id,
+            "slot_type": fs.slot_type,
+            "position": fs.position,
+            "label": fs.label,
+            "time_range": fs.time_range,
+            "color": fs.color,
+        }
+        for fs in document.fixed_slots or []
+    ])))
+    tables.append((TeacherFixedSlotLabel.__table__, [
+        {"teacher_id": lbl.teacher_id, "fixed_slot_id": lbl.fixed_slot_id, "day": lbl.day, "label": lbl.label}
+        for lbl in document.teacher_fixed_slot_labels or []
+    ]))
+    tables.append((CourseFixedSlotLabel.__table__, [
+        {"course_line": lbl.course_line, "fixed_slot_id": lbl.fixed_slot_id, "day": lbl.day, "label": lbl.label}
+        for lbl in document.course_fixed_slot_labels or []
+    ]))
+    tables.append((Course.__table__, [
+        {"id": c.id, "num_lines": c.num_lines} for c in document.courses or []
+    ]))
+
+    subjects = {}
+    for subj in document.subjects or []:
+        subjects[subj.id] = {
+            "id": subj.id,
+            "name": subj.name,
+            "color": subj.color,
+            "weekly_hours": subj.weekly_hours,
+            "max_hours_per_day": subj.max_hours_per_day,
+            "consecutive_hours": subj.consecutive_hours,
+            "teach_every_day": subj.teach_every_day,
+            "course_id": subj.course_ref(),
+            "linked_subject_id": subj.linked_subject_id,
+            "included_lines": _json.dumps(subj.included_lines) if subj.included_lines is not None else None,
         }
-        for lbl in session.query(TeacherFixedSlotLabel).all()
-    ]
+    # Ensure links are reciprocal
+    for subj in subjects.values():
+        linked = subjects.get(subj["linked_subject_id"]) if subj["linked_subject_id"] else None
+        if linked and linked["linked_subject_id"] != subj["id"]:
+            linked["linked_subject_id"] = subj["id"]
+    tables.append((Subject.__table__, list(subjects.values())))
 
-    data["course_fixed_slot_labels"] = [
+    groups = _assign_ids([
         {
-            "id": lbl.id,
-            "course_line": lbl.course_line,
-            "fixed_slot_id": lbl.fixed_slot_id,
-            "day": lbl.day,
-            "label": lbl.label,
+            "id": g.id,
+            "name": g.name,
+            "color": g.color,
+            "included_lines": _json.dumps(g.included_lines) if g.included_lines is not None else None,
+            "shared_hours": g.shared_hours,
         }
-        for lbl in session.query(CourseFixedSlotLabel).all()
-    ]
-
-    data["teacher_busy_slots"] = [
+        for g in document.subject_groups or []
+    ])
+    tables.append((SubjectGroup.__table__, groups))
+    tables.append((subjectgroup_subject, [
+        {"subjectgroup_id": row["id"], "subject_id": sid}
+        for row, g in zip(groups, document.subject_groups or [])
+        for sid in g.subjects
+        if sid in subjects
+    ]))
+
+    teachers = _assign_ids([
         {
-            "id": bs.id,
-            "teacher_id": bs.teacher_id,
-            "day": bs.day,
-            "hour": bs.hour,
-            "slot_type": bs.slot_type,
+            "id": teacher.id,
+            "name": teacher.name,
+            "preferences": (
+                teacher.preferences if not isinstance(teacher.preferences, dict)
+                else _json.dumps(teacher.preferences, ensure_ascii=False)
+            ),
+            "coordination_hours": teacher.coordination_hours,
+            "max_hours_week": teacher.max_hours_week,
+            "tutor_group": serialize_tutor_groups(teacher.tutor_groups_value()),
         }
-        for bs in session.query(TeacherBusySlot).all()
-    ]
-
-    data["joint_classes"] = [
+        for teacher in document.teachers or []
+    ])
+    tables.append((Teacher.__table__, teachers))
+    links = []
+    for row, teacher in zip(teachers, document.teachers or []):
+        lines = teacher.teacher_subject_lines or {}
+        for subject_id in teacher.subjects:
+            included = lines.get(str(subject_id))
+            links.append({
+                "teacher_id": row["id"],
+                "subject_id": subject_id,
+                "included_lines": _json.dumps(included) if included is not None else None,
+            })
+    tables.append((teacher_subject, links))
+
+    timeslots = _assign_ids([
+        {
+            "id": ts.id,
+            "day": ts.day,
+            "hour": ts.hour,
+            "course_id": ts.course_id,
+            "line": ts.line,
+            "subject_group_id": ts.subject_group_id,
+        }
+        for ts in document.timeslots or []
+    ])
+    tables.append((Timeslot.__table__, timeslots))
+
+    timeslots_by_id = {ts["id"]: ts for ts in timeslots}
+    teacher_ids = {row["id"] for row in teachers}
+    assignments = []
+    for a in document.assignments or []:
+        timeslot = timeslots_by_id.get(a.timeslot_id) if a.timeslot_id is not None else None
+        if timeslot is None:
+            timeslot = _find_timeslot(timeslots, a)
+        if timeslot is None or a.subject_id not in subjects:
+            continue
+        assignments.append({
+            "timeslot_id": timeslot["id"],
+            "subject_id": a.subject_id,
+            "teacher_id": a.teacher_id if a.teacher_id in teacher_ids else None,
+        })
+    tables.append((TimeSlotAssignment.__table__, assignments))
+
+    tables.append((TeacherBusySlot.__table__, [
+        {"teacher_id": bs.teacher_id, "day": bs.day, "hour": bs.hour, "slot_type": bs.slot_type}
+        for bs in document.teacher_busy_slots or []
+        if bs.teacher_id in teacher_ids
+    ]))
+    tables.append((JointClass.__table__, [
         {
-            "id": jc.id,
             "name": jc.name,
             "course_id": jc.course_id,
             "subject_id": jc.subject_id,
             "teacher_id": jc.teacher_id,
-            "lines": _json.loads(jc.lines) if jc.lines else [],
+            "lines": _json.dumps(jc.lines) if isinstance(jc.lines, list) else jc.lines,
             "shared_hours": jc.shared_hours,
         }
-        for jc in session.query(JointClass).all()
-    ]
-
-    data["support_assignments"] = [
+        for jc in document.joint_classes or []
+    ]))
+    tables.append((SupportAssignment.__table__, [
         {
-            "id": sa.id,
             "teacher_id": sa.teacher_id,
             "day": sa.day,
             "hour": sa.hour,
@@ -147,283 +436,65 @@ def dump_db(session):
             "course_id": sa.course_id,
             "line": sa.line,
         }
-        for sa in session.query(SupportAssignment).all()
-    ]
+        for sa in document.support_assignments or []
+    ]))
+    return tables
 
-    return data
+
+def _bulk_insert(connection, table, rows):
+    """Insert ``rows`` (dicts with the same keys) with one DBAPI ``executemany``."""
+    compiled = table.insert().compile(dialect=connection.dialect, column_keys=list(rows[0]))
+    connection.exec_driver_sql(
+        compiled.string, [tuple(row[key] for key in compiled.positiontup) for row in rows],
+    )
 
 
 def import_payload(session, payload):
     """Import a payload (parsed JSON) into the provided session.
 
-    Drops and recreates schema is the caller's responsibility if needed.
+    The payload is validated against ``schemas.ImportPayload`` (raising
+    ``pydantic.ValidationError``) and each table is bulk-inserted with one
+    ``executemany``. Emptying the tables first is the caller's
+    responsibility; see ``import_database``.
     """
-    # Config
-    cfg_payload = payload.get("config", {}) if isinstance(payload, dict) else {}
-    if cfg_payload:
-        hour_names = cfg_payload.get("hour_names")
-        disabled_raw = cfg_payload.get("disabled_restrictions")
-        try:
-            disabled_restrictions = _json.dumps(disabled_raw, ensure_ascii=False) if disabled_raw is not None else None
-        except Exception:
-            disabled_restrictions = None
-
-        day_colors_raw = cfg_payload.get("day_colors")
-        try:
-            day_colors = _json.dumps(day_colors_raw, ensure_ascii=False) if day_colors_raw is not None else None
-        except Exception:
-            day_colors = None
-
-        if hour_names is not None:
-            try:
-                cfg = Config(
-                    classes_per_day=cfg_payload.get("classes_per_day", 5),
-                    days_per_week=cfg_payload.get("days_per_week", 5),
-                    hour_names=_json.dumps(hour_names, ensure_ascii=False),
-                    day_indices=_json.dumps(
-                        cfg_payload.get("day_indices", []), ensure_ascii=False
-                    ),
-                    day_colors=day_colors,
-                    disabled_restrictions=disabled_restrictions,
-                )
-            except Exception:
-                cfg = Config(
-                    classes_per_day=cfg_payload.get("classes_per_day", 5),
-                    days_per_week=cfg_payload.get("days_per_week", 5),
-                    day_colors=day_colors,
-                    disabled_restrictions=disabled_restrictions,
-                )
-        else:
-            cfg = Config(
-                classes_per_day=cfg_payload.get("classes_per_day", 5),
-                days_per_week=cfg_payload.get("days_per_week", 5),
-                day_colors=day_colors,
-                disabled_restrictions=disabled_restrictions,
-            )
-        session.add(cfg)
-
-    # Fixed slots
-    for fs in payload.get("fixed_slots", []) or []:
-        fixed = FixedSlot(
-            slot_type=fs.get("slot_type"),
-            position=fs.get("position"),
-            label=fs.get("label"),
-            time_range=fs.get("time_range"),
-            color=fs.get("color", "#f1f5f9"),
-        )
-        session.add(fixed)
+    document = payload if isinstance(payload, ImportPayload) else ImportPayload.model_validate(payload)
     session.flush()
+    connection = session.connection()
+    for table, rows in payload_rows(document):
+        if rows:
+            _bulk_insert(connection, table, rows)
 
-    # Teacher fixed slot labels
-    for lbl in payload.get("teacher_fixed_slot_labels", []) or []:
-        label = TeacherFixedSlotLabel(
-            teacher_id=lbl.get("teacher_id"),
-            fixed_slot_id=lbl.get("fixed_slot_id"),
-            day=lbl.get("day"),
-            label=lbl.get("label", ""),
-        )
-        session.add(label)
-    session.flush()
 
-    # Course fixed slot labels
-    for lbl in payload.get("course_fixed_slot_labels", []) or []:
-        label = CourseFixedSlotLabel(
-            course_line=lbl.get("course_line"),
-            fixed_slot_id=lbl.get("fixed_slot_id"),
-            day=lbl.get("day"),
-            label=lbl.get("label", ""),
-        )
-        session.add(label)
-    session.flush()
+def import_database(payload, engine):
+    """Replace the data of the SQLite database of ``engine`` with ``payload``.
 
-    # Courses
-    course_map = {}
-    for c in payload.get("courses", []) or []:
-        course = Course(
-            id=c.get("id"), num_lines=c.get("num_lines", c.get("num_lines", 1))
-        )
-        session.add(course)
-        course_map[course.id] = course
-    session.flush()
-
-    # Subjects
-    subject_map = {}
-    for s in payload.get("subjects", []) or []:
-        course_id = None
-        if "course" in s and isinstance(s["course"], dict):
-            course_id = s["course"].get("id")
-        elif "course_id" in s:
-            course_id = s["course_id"]
-        elif "course" in s and isinstance(s["course"], str):
-            course_id = s["course"]
-
-        incl_lines = s.get("included_lines", None)
-        if incl_lines is not None:
-            incl_lines = _json.dumps(incl_lines)
-
-        subj = Subject(
-            id=s.get("id"),
-            name=s.get("name"),
-            color=s.get("color", "#dbeafe"),
-            weekly_hours=s.get("weekly_hours", 1),
-            max_hours_per_day=s.get("max_hours_per_day", 2),
-            consecutive_hours=s.get("consecutive_hours", True),
-            teach_every_day=s.get("teach_every_day", False),
-            course_id=course_id,
-            linked_subject_id=s.get("linked_subject_id", None),
-            included_lines=incl_lines,
-        )
-        session.add(subj)
-        subject_map[subj.id] = subj
-    session.flush()
-
-    # Ensure links are reciprocal
-    for subj in list(subject_map.values()):
-        linked = getattr(subj, "linked_subject_id", None)
-        if linked:
-            other = session.get(Subject, linked)
-            if other and other.linked_subject_id != subj.id:
-                other.linked_subject_id = subj.id
-                session.add(other)
-    session.flush()
-
-    # Subject groups
-    for g in payload.get("subject_groups", []) or []:
-        incl_lines = g.get("included_lines", None)
-        if incl_lines is not None:
-            incl_lines = _json.dumps(incl_lines)
-
-        sg = SubjectGroup(
-            name=g.get("name"),
-            color=g.get("color", "#fef3c7"),
-            included_lines=incl_lines,
-            shared_hours=g.get("shared_hours"),
-        )
-        session.add(sg)
-        session.flush()
-        members = []
-        for sid in g.get("subjects", []) or []:
-            s_obj = session.get(Subject, sid)
-            if s_obj:
-                members.append(s_obj)
-        if members:
-            sg.subjects = members
-    session.flush()
+    The payload is validated first and written to a staging database next
+    to the target, which is then swapped in with ``replace_database`` in a
+    single transaction: readers see the old data until the new one is
+    complete, and an invalid payload leaves the database untouched. The job
+    queue tables are kept (see ``scenarios.LIVE_ONLY_TABLES``).
 
-    # Teachers
-    for teacher_data in payload.get("teachers", []) or []:
-        teacher = Teacher(
-            id=teacher_data.get("id"),
-            name=teacher_data.get("name"),
-            preferences=teacher_data.get("preferences"),
-            coordination_hours=teacher_data.get("coordination_hours", 0),
-            max_hours_week=teacher_data.get("max_hours_week", 1),
-        )
-        teacher.set_tutor_groups(teacher_data.get("tutor_groups", teacher_data.get("tutor_group")))
-        session.add(teacher)
-        session.flush()
-        ts_lines = teacher_data.get("teacher_subject_lines") or {}
-        if ts_lines or teacher_data.get("subjects"):
-            session.execute(
-                delete(teacher_subject).where(teacher_subject.c.teacher_id == teacher.id)
-            )
-            for subject_id in teacher_data.get("subjects", []) or []:
-                included = ts_lines.get(str(subject_id))
-                included_json = _json.dumps(included) if included is not None else None
-                session.execute(
-                    teacher_subject.insert().values(
-                        teacher_id=teacher.id,
-                        subject_id=subject_id,
-                        included_lines=included_json,
-                    )
-                )
-    session.flush()
-
-    # Timeslots
-    ts_map = {}
-    for ts in payload.get("timeslots", []) or []:
-        timeslot = Timeslot(
-            day=ts.get("day"),
-            hour=ts.get("hour"),
-            course_id=ts.get("course_id"),
-            line=ts.get("line"),
-            subject_group_id=ts.get("subject_group_id"),
-        )
-        session.add(timeslot)
-        session.flush()
-        ts_map[timeslot.id] = timeslot
-    session.flush()
-
-    # Assignments
-    for a in payload.get("assignments", []) or []:
-        timeslot = None
-        if a.get("timeslot_id") is not None:
-            timeslot = session.get(Timeslot, a.get("timeslot_id"))
-        if not timeslot:
-            ts_q = session.query(Timeslot)
-            if a.get("day"):
-                ts_q = ts_q.filter_by(day=a.get("day"))
-            if a.get("hour") is not None:
-                ts_q = ts_q.filter_by(hour=a.get("hour"))
-            if a.get("course_id"):
-                ts_q = ts_q.filter_by(course_id=a.get("course_id"))
-            if a.get("line") is not None:
-                ts_q = ts_q.filter_by(line=a.get("line"))
-            timeslot = ts_q.first()
-
-        subject = (
-            session.get(Subject, a.get("subject_id"))
-            if a.get("subject_id") is not None
-            else None
-        )
-        teacher = (
-            session.get(Teacher, a.get("teacher_id"))
-            if a.get("teacher_id") is not None
-            else None
-        )
-        if timeslot and subject:
-            assign = TimeSlotAssignment(
-                timeslot=timeslot,
-                subject_id=subject.id,
-                teacher_id=(teacher.id if teacher else None),
-            )
-            session.add(assign)
-
-    # Teacher busy slots (coordination, etc.)
-    for bs in payload.get("teacher_busy_slots", []) or []:
-        teacher = session.get(Teacher, bs.get("teacher_id"))
-        if teacher:
-            busy_slot = TeacherBusySlot(
-                teacher_id=teacher.id,
-                day=bs.get("day", 0),
-                hour=bs.get("hour", 0),
-                slot_type=bs.get("slot_type", "coordinacion"),
-            )
-            session.add(busy_slot)
-
-    # Joint classes
-    for jc in payload.get("joint_classes", []) or []:
-        lines = jc.get("lines", [])
-        joint = JointClass(
-            name=jc.get("name"),
-            course_id=jc.get("course_id"),
-            subject_id=jc.get("subject_id"),
-            teacher_id=jc.get("teacher_id"),
-            lines=_json.dumps(lines) if isinstance(lines, list) else lines,
-            shared_hours=jc.get("shared_hours"),
-        )
-        session.add(joint)
-
-    # Support assignments
-    for sa in payload.get("support_assignments", []) or []:
-        support = SupportAssignment(
-            teacher_id=sa.get("teacher_id"),
-            day=sa.get("day"),
-            hour=sa.get("hour"),
-            subject_id=sa.get("subject_id"),
-            course_id=sa.get("course_id"),
-            line=sa.get("line"),
-        )
-        session.add(support)
-
-    session.flush()
+    Raises:
+        pydantic.ValidationError: if the payload does not match the schema.
+    """
+    document = ImportPayload.model_validate(payload)
+    target = os.path.abspath(engine.url.database)
+    fd, staging_path = tempfile.mkstemp(prefix=".import-", suffix=".db", dir=os.path.dirname(target))
+    os.close(fd)
+    staging = create_engine(f"sqlite:///{staging_path}")
+    try:
+        Base.metadata.create_all(staging)
+        with staging.begin() as conn:
+            # A throw-away file: no need to wait for the disk
+            conn.exec_driver_sql("PRAGMA synchronous = OFF")
+            with OrmSession(bind=conn) as session:
+                import_payload(session, document)
+        staging.dispose()
+        replace_database(target, staging_path)
+    finally:
+        staging.dispose()
+        for path in (staging_path, staging_path + "-journal"):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
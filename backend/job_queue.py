@@ -0,0 +1,392 @@
+"""Persistent queue of timetable generation jobs, stored in the ``jobs`` table.
+
+The API process enqueues jobs and reads their status; solver worker
+processes (see ``worker_pool``) claim queued jobs and report progress and
+results through the same rows (``update_progress``, ``record_solution``,
+``complete_task``...).
+
+A job moves through::
+
+    queued -> running -> success | error | cancelled
+
+A running job whose worker process dies is queued again until it has been
+started ``max_attempts`` times, then fails. Status payloads report queued
+jobs as ``running`` with phase ``queued``, so pollers only need to know the
+terminal statuses.
+
+Jobs of a scenario (see ``scenarios``) carry its name and solve its
+database; the queue itself always lives in the live database, and at most
+one job per scenario is active at a time.
+
+Every change of a job is also appended to the ``job_events`` table, which
+``GET /timetable/<task_id>/events`` streams as server-sent events: status
+changes, phase changes, the text appended to the diagnosis of the current
+phase, and solver progress. Event ids increase, so a client that
+reconnects resumes after the last event it received.
+"""
+
+import json
+import logging
+import time
+import uuid
+
+from .constants import DEFAULT_LOCALE
+from .models import Job, JobEvent, LiveSession
+from .translations import t_locale
+
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCESS = "success"
+ERROR = "error"
+CANCELLED = "cancelled"
+ACTIVE_STATUSES = (QUEUED, RUNNING)
+RETRYABLE_STATUSES = (ERROR, CANCELLED)
+TERMINAL_STATUSES = (SUCCESS, ERROR, CANCELLED)
+
+# A crashed job is started at most this many times in total.
+DEFAULT_MAX_ATTEMPTS = 2
+
+# Events of jobs older than this are removed when a new job is queued.
+JOB_EVENT_RETENTION_SECONDS = 7 * 24 * 3600
+
+# Event payloads of status changes, in the format of ``JobQueue.get_status``
+_QUEUED_EVENT = {"status": RUNNING, "phase": QUEUED, "phase_details": None}
+
+
+def _loads(raw, default=None):
+    return json.loads(raw) if raw else default
+
+
+class JobQueue:
+    """Database-backed job tracker shared by the API and worker processes."""
+
+    def __init__(self, session_factory=LiveSession):
+        self._session_factory = session_factory
+
+    @staticmethod
+    def _add_event(session, task_id, event, data):
+        session.add(JobEvent(
+            task_id=task_id,
+            event=event,
+            data=json.dumps(data, default=sorted),
+            created_at=time.time(),
+        ))
+
+    def _update(self, task_id, values, statuses=(RUNNING,), cancellable=True, event=None):
+        """Update a job in one of ``statuses``; return True if a row changed.
+
+        ``event`` is an ``(event, data)`` pair recorded when the row changes.
+        """
+        with self._session_factory() as session:
+            query = session.query(Job).filter(Job.id == task_id, Job.status.in_(statuses))
+            if cancellable:
+                query = query.filter(Job.cancel_requested.is_(False))
+            changed = query.update(values, synchronize_session=False)
+            if changed and event is not None:
+                self._add_event(session, task_id, *event)
+            session.commit()
+        return changed > 0
+
+    # --- API side -----------------------------------------------------------
+
+    def create_task(self, options=None, locale=DEFAULT_LOCALE, max_attempts=DEFAULT_MAX_ATTEMPTS,
+                    scenario=None):
+        """Queue a job running ``create_timetable(**options)`` on the database
+        of ``scenario`` (None = live) and return its id.
+
+        Returns None, without queueing anything, if a job of ``scenario`` is
+        already queued or running.
+        """
+        task_id = str(uuid.uuid4())
+        now = time.time()
+        with self._session_factory() as session:
+            # Take the write lock before looking for an active job, so two
+            # concurrent requests cannot both queue one.
+            session.connection().exec_driver_sql("BEGIN IMMEDIATE")
+            active = (
+                self._of_scenario(session.query(Job.id), scenario)
+                .filter(Job.status.in_(ACTIVE_STATUSES))
+                .first()
+            )
+            if active is not None:
+                session.rollback()
+                logger.info("Job not queued: job %s is active scenario=%s", active.id, scenario)
+                return None
+            session.query(JobEvent).filter(
+                JobEvent.created_at < now - JOB_EVENT_RETENTION_SECONDS
+            ).delete(synchronize_session=False)
+            session.add(Job(
+                id=task_id,
+                status=QUEUED,
+                # Sets (re-solve scope) are stored as sorted lists
+                options=json.dumps(options or {}, default=sorted),
+                locale=locale,
+                attempts=0,
+                max_attempts=max_attempts,
+                cancel_requested=False,
+                scenario=scenario,
+                created_at=now,
+            ))
+            self._add_event(session, task_id, "status", dict(_QUEUED_EVENT, attempts=0))
+            session.commit()
+        logger.info("Job queued id=%s scenario=%s", task_id, scenario)
+        return task_id
+
+    def cancel_task(self, task_id):
+        """Cancel a queued job, or ask the worker running it to stop."""
+        changed = self._update(
+            task_id,
+            {"status": CANCELLED, "cancel_requested": True, "finished_at": time.time()},
+            statuses=ACTIVE_STATUSES, cancellable=False,
+            event=("status", {"status": CANCELLED}),
+        )
+        logger.info("Job marked cancelled id=%s active=%s", task_id, changed)
+        return changed
+
+    def retry_task(self, task_id):
+        """Queue a new job with the options of a failed or cancelled one.
+
+        Returns the new task id, or None if the job does not exist, is not
+        in a retryable status or another job of its scenario is active.
+        """
+        with self._session_factory() as session:
+            job = session.get(Job, task_id)
+            if job is None or job.status not in RETRYABLE_STATUSES:
+                return None
+            options, locale, max_attempts, scenario = job.options, job.locale, job.max_attempts, job.scenario
+        new_id = self.create_task(
+            _loads(options, {}), locale=locale, max_attempts=max_attempts, scenario=scenario,
+        )
+        if new_id is not None:
+            logger.info("Job retried id=%s new_id=%s", task_id, new_id)
+        return new_id
+
+    def is_cancelled(self, task_id):
+        with self._session_factory() as session:
+            cancelled = session.query(Job.cancel_requested).filter(Job.id == task_id).scalar()
+        return bool(cancelled)
+
+    @staticmethod
+    def _status(job):
+        status = RUNNING if job.status == QUEUED else job.status
+        phase = job.phase or (QUEUED if job.status == QUEUED else None)
+        return {
+            "task_id": job.id,
+            "status": status,
+            "error": job.error,
+            "details": job.details,
+            "phase": phase,
+            "phase_details": job.phase_details,
+            "created_at": job.created_at,
+            "build_profile": _loads(job.build_profile),
+            "solver_profile": _loads(job.solver_profile),
+            "solutions": _loads(job.solutions, []),
+            "attempts": job.attempts,
+            "scenario": job.scenario,
+        }
+
+    def get_status(self, task_id):
+        with self._session_factory() as session:
+            job = session.get(Job, task_id)
+            return self._status(job) if job is not None else None
+
+    @staticmethod
+    def _of_scenario(query, scenario):
+        if scenario is None:
+            return query.filter(Job.scenario.is_(None))
+        return query.filter(Job.scenario == scenario)
+
+    def get_current_status(self, scenario=None):
+        """Status of the oldest queued or running job of ``scenario``, or None."""
+        with self._session_factory() as session:
+            job = (
+                self._of_scenario(session.query(Job), scenario)
+                .filter(Job.status.in_(ACTIVE_STATUSES))
+                .order_by(Job.created_at)
+                .first()
+            )
+            return self._status(job) if job is not None else None
+
+    def get_latest_status(self, scenario=None):
+        """Status of the most recently created job of ``scenario``, or None."""
+        with self._session_factory() as session:
+            job = (
+                self._of_scenario(session.query(Job), scenario)
+                .order_by(Job.created_at.desc())
+                .first()
+            )
+            return self._status(job) if job is not None else None
+
+    # --- Worker side --------------------------------------------------------
+
+    def claim(self, worker_pid):
+        """Mark the oldest queued job as running and return it, or None.
+
+        Returns:
+            dict with task_id, options, locale, attempts and scenario.
+        """
+        with self._session_factory() as session:
+            while True:
+                job = (
+                    session.query(Job)
+                    .filter(Job.status == QUEUED)
+                    .order_by(Job.created_at)
+                    .first()
+                )
+                if job is None:
+                    return None
+                now = time.time()
+                # Another worker may claim the same job first: only the
+                # update that still sees it queued wins.
+                claimed = (
+                    session.query(Job)
+                    .filter(Job.id == job.id, Job.status == QUEUED)
+                    .update({
+                        "status": RUNNING,
+                        "attempts": Job.attempts + 1,
+                        "worker_pid": worker_pid,
+                        "started_at": now,
+                        "heartbeat_at": now,
+                        "phase": None,
+                        "phase_details": None,
+                    }, synchronize_session=False)
+                )
+                if claimed:
+                    self._add_event(session, job.id, "status", {
+                        "status": RUNNING, "phase": None, "phase_details": None,
+                        "attempts": job.attempts + 1,
+                    })
+                session.commit()
+                if claimed:
+                    session.refresh(job)
+                    logger.info("Job claimed id=%s worker_pid=%d attempt=%d", job.id, worker_pid, job.attempts)
+                    return {
+                        "task_id": job.id,
+                        "options": _loads(job.options, {}),
+                        "locale": job.locale or DEFAULT_LOCALE,
+                        "attempts": job.attempts,
+                        "scenario": job.scenario,
+                    }
+
+    def set_worker(self, task_id, worker_pid):
+        """Record the process that runs the job."""
+        self._update(task_id, {"worker_pid": worker_pid, "heartbeat_at": time.time()}, cancellable=False)
+
+    def heartbeat(self, task_id):
+        self._update(task_id, {"heartbeat_at": time.time()}, cancellable=False)
+
+    def complete_task(self, task_id):
+        if self._update(task_id, {"status": SUCCESS, "finished_at": time.time()},
+                        event=("status", {"status": SUCCESS})):
+            logger.info("Job marked success id=%s", task_id)
+
+    def fail_task(self, task_id, error, details=None):
+        if self._update(task_id, {
+            "status": ERROR, "error": error, "details": details, "finished_at": time.time(),
+        }, event=("status", {"status": ERROR, "error": error, "details": details})):
+            logger.warning("Job marked error id=%s", task_id)
+
+    def requeue_or_fail(self, task_id, error):
+        """Handle a running job whose worker stopped without reporting a result.
+
+        The job is queued again while it has attempts left, and fails with
+        ``error`` otherwise. Returns the new status, or None if the job was
+        not running.
+        """
+        with self._session_factory() as session:
+            job = session.get(Job, task_id)
+            if job is None or job.status != RUNNING:
+                return None
+            retry = job.attempts < job.max_attempts and not job.cancel_requested
+            values = {"worker_pid": None}
+            if retry:
+                values.update(status=QUEUED, phase=None, phase_details=None)
+                event = dict(_QUEUED_EVENT, attempts=job.attempts)
+            else:
+                values.update(status=ERROR, error=error, finished_at=time.time())
+                event = {"status": ERROR, "error": error}
+        if not self._update(task_id, values, cancellable=False, event=("status", event)):
+            return None
+        status = values["status"]
+        logger.warning("Job worker stopped id=%s status=%s error=%s", task_id, status, error)
+        return status
+
+    def recover_stale(self, stale_after_seconds):
+        """Requeue or fail running jobs whose heartbeat is older than ``stale_after_seconds``.
+
+        Used by worker pools for jobs left running by a worker (or server)
+        that stopped. Returns the number of recovered jobs.
+        """
+        cutoff = time.time() - stale_after_seconds
+        with self._session_factory() as session:
+            stale = session.query(Job.id, Job.locale).filter(
+                Job.status == RUNNING,
+                (Job.heartbeat_at.is_(None)) | (Job.heartbeat_at < cutoff),
+            ).all()
+        for job_id, locale in stale:
+            self.requeue_or_fail(job_id, t_locale(locale or DEFAULT_LOCALE, "errors.job_worker_lost"))
+        return len(stale)
+
+    def update_progress(self, task_id, phase, phase_details):
+        """Set the current phase; the event carries only the new text when the
+        details of the same phase grew."""
+        with self._session_factory() as session:
+            job = session.get(Job, task_id)
+            if job is None or job.status != RUNNING or job.cancel_requested:
+                return
+            previous = job.phase_details or ""
+            text = phase_details or ""
+            if job.phase == phase and previous and text.startswith(previous):
+                if text == previous:
+                    return
+                event = ("phase_append", {"phase": phase, "text": text[len(previous):]})
+            else:
+                event = ("phase", {"phase": phase, "phase_details": phase_details})
+            job.phase, job.phase_details = phase, phase_details
+            self._add_event(session, task_id, *event)
+            session.commit()
+
+    def update_build_profile(self, task_id, build_profile):
+        self._update(task_id, {"build_profile": json.dumps(build_profile)},
+                     event=("build_profile", {"build_profile": build_profile}))
+
+    def update_solver_profile(self, task_id, name, params):
+        profile = {"name": name, "params": dict(params)}
+        self._update(task_id, {"solver_profile": json.dumps(profile)},
+                     event=("solver_profile", {"solver_profile": profile}))
+
+    def record_solution(self, task_id, entry, max_entries=200):
+        """Append an improving-solution entry (objective, bound, gap, wall_time)."""
+        with self._session_factory() as session:
+            job = session.get(Job, task_id)
+            if job is None or job.status != RUNNING or job.cancel_requested:
+                return
+            solutions = _loads(job.solutions, [])
+            solutions.append(entry)
+            if len(solutions) > max_entries:
+                del solutions[1:len(solutions) - max_entries + 1]
+            job.solutions = json.dumps(solutions)
+            self._add_event(session, task_id, "solution", entry)
+            session.commit()
+
+    def events_since(self, task_id, last_event_id=0, limit=500):
+        """Return the events of a job after ``last_event_id``, oldest first.
+
+        Returns:
+            list of dicts with id, event and data.
+        """
+        with self._session_factory() as session:
+            rows = (
+                session.query(JobEvent)
+                .filter(JobEvent.task_id == task_id, JobEvent.id > last_event_id)
+                .order_by(JobEvent.id)
+                .limit(limit)
+                .all()
+            )
+            return [{"id": row.id, "event": row.event, "data": _loads(row.data)} for row in rows]
+
+
+job_queue = JobQueue()
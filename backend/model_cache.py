@@ -0,0 +1,249 @@
+"""On-disk cache of built scheduling models, keyed by a fingerprint of their inputs.
+
+Building the CP-SAT model from the ORM objects takes longer than loading an
+already built one, and repeated runs often use exactly the same inputs (a
+different seed, a longer time budget, a warm start...). ``model_fingerprint``
+hashes everything ``_build_scheduling_model`` reads, and ``ModelCache``
+stores the built model proto together with the assignment key to variable
+index map under that fingerprint.
+
+Only the built model is cached: the solution hint and the frozen
+assignments of incremental re-solves are applied after loading, so runs that
+differ only in those share the same entry.
+
+Each entry is two files in the cache directory:
+  - ``<fingerprint>.txt``: the model proto in text format
+  - ``<fingerprint>.json``: assignment keys, their variable indices and the
+    build profile of the run that built the model
+The least recently used entries are evicted once the directory grows past
+``max_bytes``.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import time
+
+import ortools
+from ortools.sat.python import cp_model
+
+from .logging_config import build_log_extra
+from .parallel_diagnosis import snapshot_solver_inputs
+from .restrictions import AssignmentStore
+
+
+logger = logging.getLogger(__name__)
+
+MODEL_CACHE_DIR_ENV = "BACKEND_MODEL_CACHE_DIR"
+MODEL_CACHE_MAX_MB_ENV = "BACKEND_MODEL_CACHE_MAX_MB"
+DEFAULT_MODEL_CACHE_MAX_MB = 512
+# Bump when the model built from the same inputs changes (new restriction,
+# different encoding...) so stale entries are never loaded.
+MODEL_CACHE_VERSION = 1
+
+_MODEL_SUFFIX = ".txt"
+_META_SUFFIX = ".json"
+
+
+def _plain(namespace):
+    """Snapshot object as a dict, with nested subjects replaced by their ids."""
+    data = dict(vars(namespace))
+    if "subjects" in data:
+        data["subjects"] = [s.id for s in data["subjects"]]
+    return data
+
+
+def _sorted_or_none(values):
+    return sorted(values, key=str) if values is not None else None
+
+
+def model_fingerprint(all_teachers, all_subjects, all_groups, all_subjectgroups,
+                      num_days, num_hours, skip_restrictions=None,
+                      all_joint_classes=None, teacher_subject_lines=None,
+                      skip_subject_weekly_hours_for=None,
+                      skip_teacher_max_hours_for=None,
+                      prune_domains=True):
+    """Return a hex digest identifying the model built from these inputs.
+
+    Takes the keyword arguments of ``_build_scheduling_model``. Input order
+    is kept, since it decides the order of variables and constraints.
+    """
+    inputs = snapshot_solver_inputs(
+        all_teachers, all_subjects, all_subjectgroups, all_joint_classes,
+    )
+    payload = {
+        "version": MODEL_CACHE_VERSION,
+        "ortools": ortools.__version__,
+        "teachers": [_plain(t) for t in inputs["all_teachers"]],
+        "subjects": [_plain(s) for s in inputs["all_subjects"]],
+        "subjectgroups": [_plain(sg) for sg in inputs["all_subjectgroups"]],
+        "joint_classes": [_plain(jc) for jc in inputs["all_joint_classes"]],
+        "groups": list(all_groups),
+        "num_days": num_days,
+        "num_hours": num_hours,
+        "teacher_subject_lines": sorted(
+            ([list(key), lines] for key, lines in (teacher_subject_lines or {}).items()),
+            key=str,
+        ),
+        "skip_restrictions": _sorted_or_none(skip_restrictions or ()),
+        "skip_subject_weekly_hours_for": _sorted_or_none(skip_subject_weekly_hours_for),
+        "skip_teacher_max_hours_for": _sorted_or_none(skip_teacher_max_hours_for),
+        "prune_domains": bool(prune_domains),
+    }
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class ModelCache:
+    """Size-bounded directory of built models (see module docstring)."""
+
+    def __init__(self, directory, max_bytes):
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+    def _path(self, fingerprint, suffix):
+        return os.path.join(self.directory, fingerprint + suffix)
+
+    def load(self, fingerprint, task_id=None):
+        """Return (model, assignments, build_profile) for ``fingerprint``, or None.
+
+        Unreadable entries are removed and reported as misses.
+        """
+        model_path = self._path(fingerprint, _MODEL_SUFFIX)
+        meta_path = self._path(fingerprint, _META_SUFFIX)
+        if not os.path.exists(meta_path):
+            return None
+        started_at = time.perf_counter()
+        try:
+            with open(meta_path, encoding="utf-8") as f:
+                meta = json.load(f)
+            with open(model_path, encoding="utf-8") as f:
+                text = f.read()
+            model = cp_model.CpModel()
+            if not model.proto.parse_text_format(text):
+                raise ValueError("invalid model proto")
+            assignments = AssignmentStore()
+            for key, index in zip(meta["keys"], meta["var_indices"]):
+                assignments[tuple(key)] = model.GetBoolVarFromProtoIndex(index)
+            build_profile = meta["build_profile"]
+        except (OSError, ValueError, KeyError, TypeError):
+            logger.exception(
+                "Discarding unreadable model cache entry fingerprint=%s",
+                fingerprint,
+                extra=build_log_extra(task_id=task_id),
+            )
+            self._remove(fingerprint)
+            return None
+        # Mark the entry as recently used for eviction
+        try:
+            os.utime(meta_path)
+        except OSError:
+            pass
+        logger.info(
+            "Loaded cached model fingerprint=%s variables=%d load_ms=%.2f",
+            fingerprint,
+            len(assignments),
+            (time.perf_counter() - started_at) * 1000,
+            extra=build_log_extra(task_id=task_id),
+        )
+        return model, assignments, build_profile
+
+    def store(self, fingerprint, model, assignments, build_profile, task_id=None):
+        """Save a freshly built model (before any hint or freezing) under ``fingerprint``."""
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            # Per-process temporary names; export_to_file picks the text
+            # format from the ".txt" extension.
+            tmp = f".{os.getpid()}.tmp"
+            model_tmp = self._path(fingerprint, tmp + _MODEL_SUFFIX)
+            if not model.export_to_file(model_tmp):
+                raise OSError(f"could not write {model_tmp}")
+            os.replace(model_tmp, self._path(fingerprint, _MODEL_SUFFIX))
+            meta = {
+                "keys": list(assignments),
+                "var_indices": [var.Index() for var in assignments.values()],
+                "build_profile": build_profile,
+            }
+            meta_tmp = self._path(fingerprint, tmp + _META_SUFFIX)
+            with open(meta_tmp, "w", encoding="utf-8") as f:
+                json.dump(meta, f)
+            # The metadata file is written last: its presence marks a complete entry.
+            os.replace(meta_tmp, self._path(fingerprint, _META_SUFFIX))
+        except (OSError, TypeError, ValueError):
+            logger.exception(
+                "Failed to store model in cache fingerprint=%s",
+                fingerprint,
+                extra=build_log_extra(task_id=task_id),
+            )
+            self._remove(fingerprint)
+            return
+        logger.info(
+            "Stored model in cache fingerprint=%s variables=%d",
+            fingerprint,
+            len(assignments),
+            extra=build_log_extra(task_id=task_id),
+        )
+        self._evict(keep=fingerprint, task_id=task_id)
+
+    def _remove(self, fingerprint):
+        for suffix in (_META_SUFFIX, _MODEL_SUFFIX):
+            try:
+                os.remove(self._path(fingerprint, suffix))
+            except OSError:
+                pass
+
+    def _entries(self):
+        """Return [(last_used, size, fingerprint)] of the complete entries."""
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(_META_SUFFIX) or ".tmp." in name:
+                continue
+            fingerprint = name[:-len(_META_SUFFIX)]
+            try:
+                meta_stat = os.stat(self._path(fingerprint, _META_SUFFIX))
+                size = meta_stat.st_size + os.path.getsize(self._path(fingerprint, _MODEL_SUFFIX))
+            except OSError:
+                continue
+            entries.append((meta_stat.st_mtime, size, fingerprint))
+        return entries
+
+    def _evict(self, keep=None, task_id=None):
+        """Remove the least recently used entries until the cache fits in max_bytes."""
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, fingerprint in entries:
+            if total <= self.max_bytes:
+                break
+            if fingerprint == keep:
+                continue
+            self._remove(fingerprint)
+            total -= size
+            logger.info(
+                "Evicted cached model fingerprint=%s",
+                fingerprint,
+                extra=build_log_extra(task_id=task_id),
+            )
+
+
+def default_model_cache():
+    """Model cache configured from the environment, or None when disabled.
+
+    ``BACKEND_MODEL_CACHE_DIR`` sets the directory (default: a
+    ``school-agenda-model-cache`` directory in the system temp dir) and
+    ``BACKEND_MODEL_CACHE_MAX_MB`` its size limit (0 disables the cache).
+    """
+    raw = os.getenv(MODEL_CACHE_MAX_MB_ENV)
+    max_mb = DEFAULT_MODEL_CACHE_MAX_MB
+    if raw:
+        try:
+            max_mb = float(raw)
+        except ValueError:
+            logger.warning("Ignoring invalid %s=%r", MODEL_CACHE_MAX_MB_ENV, raw, extra=build_log_extra())
+    if max_mb <= 0:
+        return None
+    directory = os.getenv(MODEL_CACHE_DIR_ENV) or os.path.join(
+        tempfile.gettempdir(), "school-agenda-model-cache",
+    )
+    return ModelCache(directory, int(max_mb * 1024 * 1024))
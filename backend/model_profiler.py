@@ -0,0 +1,165 @@
+"""Instrumentation for CP-SAT model construction.
+
+Records, for each step of the model build (variable creation and every hard
+and soft restriction), how long it took, how many variables and constraints
+it added to the model and how much the resident memory of the process grew
+while it ran. The resulting profile is logged as a structured record and can
+be surfaced through the task status so slow restrictions on large schools
+are easy to spot.
+
+Step memory is the current resident set size (RSS) read before and after
+the step, so it includes the C++ side of the CP-SAT model, which
+tracemalloc does not see; it can be negative when a step frees more than it
+allocates. The summary's ``process_peak_rss_kb`` is the high-water mark of
+the whole process so far, not of the build.
+"""
+
+import logging
+import os
+import sys
+import time
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - not available on Windows
+    resource = None
+
+from .logging_config import build_log_extra
+
+
+logger = logging.getLogger(__name__)
+
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def _current_rss_kb():
+    """Return the current resident set size in KiB, or None where /proc is missing."""
+    try:
+        with open("/proc/self/statm") as fh:
+            return int(fh.read().split()[1]) * _PAGE_SIZE // 1024
+    except (OSError, IndexError, ValueError):
+        return None
+
+
+def _peak_rss_kb():
+    """Return the process peak resident set size in KiB, or None if unknown."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is reported in bytes on macOS and in KiB on Linux.
+    if sys.platform == "darwin":
+        peak //= 1024
+    return peak
+
+
+def _model_size(model):
+    proto = model.proto
+    return len(proto.variables), len(proto.constraints)
+
+
+def _count_bool_vars(model, start, end):
+    """Count variables in proto range [start, end) with a {0, 1} domain."""
+    variables = model.proto.variables
+    count = 0
+    for i in range(start, end):
+        domain = variables[i].domain
+        if len(domain) == 2 and domain[0] == 0 and domain[1] == 1:
+            count += 1
+    return count
+
+
+class ModelBuildProfiler:
+    """Collects per-step statistics while a CP-SAT model is being built."""
+
+    def __init__(self):
+        self.entries = []
+        self.pruning = None
+        self._started_at = time.perf_counter()
+
+    @contextmanager
+    def measure(self, model, name, kind):
+        """Measure one build step.
+
+        Args:
+            model: CpModel being built.
+            name: Step name (restriction class name or "assignments").
+            kind: "variables", "hard" or "soft".
+        """
+        vars_before, constraints_before = _model_size(model)
+        rss_before = _current_rss_kb()
+        started_at = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed_ms = (time.perf_counter() - started_at) * 1000
+            vars_after, constraints_after = _model_size(model)
+            rss_after = _current_rss_kb()
+            bool_vars = _count_bool_vars(model, vars_before, vars_after)
+            self.entries.append({
+                "name": name,
+                "kind": kind,
+                "skipped": False,
+                "elapsed_ms": round(elapsed_ms, 3),
+                "bool_vars": bool_vars,
+                "int_vars": (vars_after - vars_before) - bool_vars,
+                "constraints": constraints_after - constraints_before,
+                "rss_kb": rss_after,
+                "rss_growth_kb": (
+                    rss_after - rss_before
+                    if rss_after is not None and rss_before is not None
+                    else None
+                ),
+            })
+
+    def record_skipped(self, name, kind):
+        """Record a restriction that was disabled for this build."""
+        self.entries.append({
+            "name": name,
+            "kind": kind,
+            "skipped": True,
+            "elapsed_ms": 0.0,
+            "bool_vars": 0,
+            "int_vars": 0,
+            "constraints": 0,
+            "rss_kb": None,
+            "rss_growth_kb": None,
+        })
+
+    def record_pruning(self, pruning_summary):
+        """Attach the domain-pruning counters (see domain_pruning) to the profile."""
+        self.pruning = pruning_summary
+
+    def summary(self):
+        """Return the profile as a JSON-serializable dict."""
+        applied = [e for e in self.entries if not e["skipped"]]
+        return {
+            "total_ms": round((time.perf_counter() - self._started_at) * 1000, 3),
+            "bool_vars": sum(e["bool_vars"] for e in applied),
+            "int_vars": sum(e["int_vars"] for e in applied),
+            "constraints": sum(e["constraints"] for e in applied),
+            "process_peak_rss_kb": _peak_rss_kb(),
+            "pruning": self.pruning,
+            "steps": list(self.entries),
+        }
+
+    def log_summary(self, task_id=None):
+        """Emit the profile as a structured log record and return it."""
+        profile = self.summary()
+        slowest = sorted(
+            (e for e in profile["steps"] if not e["skipped"]),
+            key=lambda e: -e["elapsed_ms"],
+        )[:3]
+        extra = build_log_extra(task_id=task_id)
+        extra["build_profile"] = profile
+        logger.info(
+            "Model build profile total_ms=%.2f bool_vars=%d int_vars=%d constraints=%d slowest=%s",
+            profile["total_ms"],
+            profile["bool_vars"],
+            profile["int_vars"],
+            profile["constraints"],
+            ", ".join(f"{e['name']}:{e['elapsed_ms']:.1f}ms" for e in slowest),
+            extra=extra,
+        )
+        return profile
@@ -1,13 +1,42 @@
+import contextvars
 import json
-from sqlalchemy import create_engine, Column, Integer, String, Text, UniqueConstraint, inspect, text
-from sqlalchemy.orm import sessionmaker, declarative_base, relationship
+import uuid
+from itertools import chain
+from sqlalchemy import Column, Index, Integer, String, Text, UniqueConstraint, event, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import sessionmaker, declarative_base, relationship, Session as SASession
 from sqlalchemy import Table, ForeignKey, Column as SAColumn
-from sqlalchemy import Boolean
+from sqlalchemy import Boolean, Float
 
-ENGINE = create_engine("sqlite:///agenda.db",
-                       connect_args={"check_same_thread": False})
+try:
+    from .storage import create_sqlite_engine, migrate
+except ImportError:
+    # Imported as the top-level ``models`` module (see restrictions)
+    from storage import create_sqlite_engine, migrate
+
+ENGINE = create_sqlite_engine("agenda.db")
 Base = declarative_base()
-Session = sessionmaker(bind=ENGINE)
+
+# Engine of the scenario database selected for the current request or job
+# (see scenarios.py); None means the live database.
+current_engine = contextvars.ContextVar("current_engine", default=None)
+
+
+def active_engine():
+    """Return the engine of the selected scenario, or the live ENGINE."""
+    return current_engine.get() or ENGINE
+
+
+class _ScenarioSession(SASession):
+    """Session bound to the database selected when it is created."""
+
+    def __init__(self, bind=None, **kwargs):
+        super().__init__(bind=current_engine.get() or bind, **kwargs)
+
+
+Session = sessionmaker(bind=ENGINE, class_=_ScenarioSession)
+# Always bound to the live database (job queue state is shared by scenarios)
+LiveSession = sessionmaker(bind=ENGINE)
 
 
 def normalize_tutor_groups(value):
@@ -239,6 +268,10 @@ class Timeslot(Base):
     """
 
     __tablename__ = "timeslots"
+    __table_args__ = (
+        Index("ix_timeslots_day_hour", "day", "hour"),
+        Index("ix_timeslots_course_line", "course_id", "line"),
+    )
     id = Column(Integer, primary_key=True, autoincrement=True)
     day = Column(Integer, nullable=False)
     hour = Column(Integer, nullable=False)
@@ -271,9 +304,9 @@ class TimeSlotAssignment(Base):
 
     __tablename__ = "timeslot_assignments"
     id = Column(Integer, primary_key=True, autoincrement=True)
-    timeslot_id = Column(Integer, ForeignKey("timeslots.id"))
+    timeslot_id = Column(Integer, ForeignKey("timeslots.id"), index=True)
     subject_id = Column(String(20), ForeignKey("subjects.id"))
-    teacher_id = Column(Integer, ForeignKey("teachers.id"))
+    teacher_id = Column(Integer, ForeignKey("teachers.id"), index=True)
 
     timeslot = relationship("Timeslot", back_populates="timeslot_assignments")
     subject = relationship("Subject")
@@ -400,6 +433,9 @@ class TeacherBusySlot(Base):
     """
 
     __tablename__ = "teacher_busy_slots"
+    __table_args__ = (
+        Index("ix_teacher_busy_slots_teacher_day_hour", "teacher_id", "day", "hour"),
+    )
     id = Column(Integer, primary_key=True, autoincrement=True)
     teacher_id = Column(Integer, ForeignKey("teachers.id"), nullable=False)
     day = Column(Integer, nullable=False)
@@ -416,6 +452,8 @@ class Config(Base):
         id (int): Unique identifier for the config.
         classes_per_day (int): Number of classes per day.
         days_per_week (int): Number of days per week.
+        solver_profiles (str): JSON dict of custom solver profiles (name -> CP-SAT parameters).
+        solver_profile (str): Name of the solver profile used for generation.
     """
 
     __tablename__ = "config"
@@ -426,6 +464,8 @@ class Config(Base):
     day_indices = Column(String(2000), nullable=True)
     day_colors = Column(Text, nullable=True)
     disabled_restrictions = Column(String(5000), nullable=True)
+    solver_profiles = Column(Text, nullable=True)
+    solver_profile = Column(String(100), nullable=True)
 
     def to_dict(self):
         return {
@@ -436,6 +476,8 @@ class Config(Base):
             "day_indices": json.loads(self.day_indices) if self.day_indices else [],
             "day_colors": json.loads(self.day_colors) if self.day_colors else {},
             "disabled_restrictions": json.loads(self.disabled_restrictions) if self.disabled_restrictions else [],
+            "solver_profiles": json.loads(self.solver_profiles) if self.solver_profiles else {},
+            "solver_profile": self.solver_profile,
         }
 
 
@@ -459,6 +501,133 @@ class SchedulerError(Base):
         }
 
 
+class SolveResult(Base):
+    """
+    Stores the outcome of a timetable generation, keyed by a fingerprint of
+    its inputs and solver parameters (see result_store), so that generating
+    again with unchanged data can reuse it.
+
+    Attributes:
+        key (str): sha256 hex digest of the inputs, solver parameters and locale.
+        status (str): CP-SAT status name of the main solve.
+        solution (str): JSON list of active assignment keys (feasible runs).
+        diagnosis (str): JSON diagnosis dict (runs without a solution).
+        timings (str): JSON dict of the elapsed times of the original run.
+        created_at (str): ISO timestamp of the run.
+    """
+
+    __tablename__ = "solve_results"
+    key = Column(String(64), primary_key=True)
+    status = Column(String(20), nullable=False)
+    solution = Column(Text, nullable=True)
+    diagnosis = Column(Text, nullable=True)
+    timings = Column(Text, nullable=True)
+    created_at = Column(String(50), nullable=False)
+
+    def to_dict(self):
+        return {
+            "key": self.key,
+            "status": self.status,
+            "solution": (
+                [tuple(k) for k in json.loads(self.solution)] if self.solution else None
+            ),
+            "diagnosis": json.loads(self.diagnosis) if self.diagnosis else None,
+            "timings": json.loads(self.timings) if self.timings else {},
+            "created_at": self.created_at,
+        }
+
+
+class Job(Base):
+    """
+    A queued or running timetable generation, picked up by the solver worker
+    pool (see job_queue and worker_pool). Workers report progress and the
+    final outcome through this row, so job state survives server restarts.
+
+    Attributes:
+        id (str): Task id (uuid4) returned by the API.
+        status (str): queued, running, success, error or cancelled.
+        options (str): JSON keyword arguments for ``create_timetable``.
+        locale (str): Locale of the user-facing messages.
+        attempts (int): Number of times a worker started the job.
+        max_attempts (int): Attempts allowed before a crashed job fails.
+        cancel_requested (bool): Set by the API; the worker stops the job.
+        worker_pid (int): Process id of the process running the job.
+        error (str): Error message of a failed job.
+        details (str): Diagnosis markdown of a failed job.
+        phase (str): Current phase reported by the worker.
+        phase_details (str): Markdown of the current phase.
+        build_profile (str): JSON model build profile.
+        solver_profile (str): JSON solver profile (name and parameters).
+        solutions (str): JSON list of improving solutions.
+        scenario (str): Scenario database the job solves; None for the live one.
+        created_at, started_at, finished_at, heartbeat_at (float): Unix times.
+    """
+
+    __tablename__ = "jobs"
+    id = Column(String(36), primary_key=True)
+    status = Column(String(20), nullable=False, default="queued", index=True)
+    options = Column(Text, nullable=True)
+    locale = Column(String(10), nullable=True)
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=1)
+    cancel_requested = Column(Boolean, nullable=False, default=False)
+    worker_pid = Column(Integer, nullable=True)
+    error = Column(Text, nullable=True)
+    details = Column(Text, nullable=True)
+    phase = Column(String(50), nullable=True)
+    phase_details = Column(Text, nullable=True)
+    build_profile = Column(Text, nullable=True)
+    solver_profile = Column(Text, nullable=True)
+    solutions = Column(Text, nullable=True)
+    scenario = Column(String(64), nullable=True, index=True)
+    created_at = Column(Float, nullable=False)
+    started_at = Column(Float, nullable=True)
+    finished_at = Column(Float, nullable=True)
+    heartbeat_at = Column(Float, nullable=True)
+
+
+class JobEvent(Base):
+    """
+    A change of a job (status, phase, diagnosis text, solver progress),
+    streamed to clients as a server-sent event (see job_queue).
+
+    Attributes:
+        id (int): Increasing event id, used as the SSE event id.
+        task_id (str): Id of the job.
+        event (str): Event type (status, phase, phase_append, solution,
+            build_profile or solver_profile).
+        data (str): JSON payload of the event.
+        created_at (float): Unix time.
+    """
+
+    __tablename__ = "job_events"
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    task_id = Column(String(36), nullable=False, index=True)
+    event = Column(String(20), nullable=False)
+    data = Column(Text, nullable=True)
+    created_at = Column(Float, nullable=False)
+
+
+class DataGeneration(Base):
+    """
+    Single-row counter of changes to the school data and timetable, bumped
+    by every commit that writes them (see view_cache). Rendered timetable
+    views are cached under its value.
+
+    Attributes:
+        id (int): Always 1.
+        epoch (str): Random token set when the row is created, so a counter
+            restarting after the table is recreated never repeats a
+            previous generation.
+        value (int): Number of writes since the row was created.
+    """
+
+    __tablename__ = "data_generation"
+    id = Column(Integer, primary_key=True)
+    epoch = Column(String(32), nullable=False)
+    value = Column(Integer, nullable=False, default=0)
+
+
 class JointClass(Base):
     """
     Represents a joint class where multiple lines of a course share the same
@@ -525,6 +694,7 @@ class SupportAssignment(Base):
             "course_id", "line", "day", "hour", "subject_id",
             name="uq_support_per_class",
         ),
+        Index("ix_support_assignments_teacher_day_hour", "teacher_id", "day", "hour"),
     )
     id = Column(Integer, primary_key=True, autoincrement=True)
     teacher_id = Column(Integer, ForeignKey("teachers.id"), nullable=False)
@@ -539,15 +709,73 @@ class SupportAssignment(Base):
     course = relationship("Course")
 
 
-Base.metadata.create_all(ENGINE)
+# --- Data generation -------------------------------------------------------
+# Every commit of a ``Session`` that writes school data or the timetable bumps
+# the ``data_generation`` row in the same transaction: ORM flushes as well as
+# bulk and Core insert/update/delete statements count. Cached views are keyed
+# by the generation (see view_cache).
 
-# Migration: add day_colors to existing config table if missing
-try:
-    inspector = inspect(ENGINE)
-    existing_cols = [c["name"] for c in inspector.get_columns("config")]
-    if "day_colors" not in existing_cols:
-        with ENGINE.connect() as conn:
-            conn.execute(text("ALTER TABLE config ADD COLUMN day_colors TEXT"))
-            conn.commit()
-except Exception:
-    pass
+# Tables whose writes do not change any rendered view
+NON_VIEW_TABLES = frozenset({
+    "data_generation", "jobs", "job_events", "solve_results", "scheduler_errors",
+})
+
+_VIEW_DATA_CHANGED = "view_data_changed"
+
+
+def current_generation(session):
+    """Return the current data generation as ``"<epoch>-<value>"``."""
+    row = session.get(DataGeneration, 1)
+    if row is None:
+        session.add(DataGeneration(id=1, epoch=uuid.uuid4().hex, value=0))
+        try:
+            session.commit()
+        except IntegrityError:
+            # Created by a concurrent request
+            session.rollback()
+        row = session.get(DataGeneration, 1)
+    return f"{row.epoch}-{row.value}"
+
+
+def bump_generation(session):
+    """Increment the data generation in the current transaction of ``session``."""
+    changed = session.execute(
+        update(DataGeneration).where(DataGeneration.id == 1).values(value=DataGeneration.value + 1)
+    ).rowcount
+    if not changed:
+        session.add(DataGeneration(id=1, epoch=uuid.uuid4().hex, value=1))
+
+
+def _is_view_table(table):
+    return table is not None and table.name not in NON_VIEW_TABLES
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _track_statement_writes(state):
+    if state.is_insert or state.is_update or state.is_delete:
+        if _is_view_table(getattr(state.statement, "table", None)):
+            state.session.info[_VIEW_DATA_CHANGED] = True
+
+
+@event.listens_for(Session, "after_flush")
+def _track_flushed_writes(session, flush_context):
+    for obj in chain(session.new, session.dirty, session.deleted):
+        if _is_view_table(getattr(obj, "__table__", None)):
+            session.info[_VIEW_DATA_CHANGED] = True
+            return
+
+
+@event.listens_for(Session, "before_commit")
+def _bump_generation_on_commit(session):
+    # before_commit runs ahead of the final flush
+    session.flush()
+    if session.info.pop(_VIEW_DATA_CHANGED, False):
+        bump_generation(session)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_rolled_back_writes(session):
+    session.info.pop(_VIEW_DATA_CHANGED, None)
+
+
+migrate(ENGINE, Base.metadata)
@@ -0,0 +1,346 @@
+"""Execution of diagnosis isolation solves, sequentially or on a process pool.
+
+Phase 2 of ``diagnose_infeasibility`` and the bottleneck analyses solve the
+model many times, each time relaxing one restriction (or one course, subject
+or teacher). Every runner builds a single ``GatedDiagnosisModel`` (once per
+worker process) and answers each job with an assumption-based solve of that
+model. The solves are independent, so they can run concurrently in separate
+processes. Both runners share the same interface: a list of jobs in, a
+``{job_id: status}`` dict out, with a shared wall-clock deadline and an
+optional early-stop predicate.
+
+A job is a dict with:
+  - "id": hashable identifier returned in the results
+  - "relax": keyword arguments for ``GatedDiagnosisModel.solve`` that relax
+    part of the model (``skip_restrictions``, ``skip_subject_weekly_hours_for``,
+    ``skip_teacher_max_hours_for``)
+
+A result status of ``None`` means the job was not run, because the deadline
+passed, the early-stop predicate fired first or the task was cancelled.
+"""
+
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from types import SimpleNamespace
+
+from .cancellation import CancellationToken, SolveCancelled
+from .diagnosis_model import GatedDiagnosisModel
+from .logging_config import build_log_extra
+
+
+logger = logging.getLogger(__name__)
+
+DIAGNOSIS_WORKERS_ENV = "BACKEND_DIAGNOSIS_WORKERS"
+# Every worker builds its own copy of the gated model, so the default pool
+# stays small even on hosts with many cores.
+DEFAULT_MAX_WORKERS = 4
+ISOLATION_TIMEOUT_SECONDS = 10.0
+
+
+def available_workers():
+    """Number of isolation solves to run at once.
+
+    Defaults to the CPU cores available to this process, capped at
+    ``DEFAULT_MAX_WORKERS``; the ``BACKEND_DIAGNOSIS_WORKERS`` environment
+    variable overrides it (1 = sequential).
+    """
+    raw = os.getenv(DIAGNOSIS_WORKERS_ENV)
+    if raw:
+        try:
+            return max(1, int(raw))
+        except ValueError:
+            logger.warning("Ignoring invalid %s=%r", DIAGNOSIS_WORKERS_ENV, raw, extra=build_log_extra())
+    return min(os.process_cpu_count() or 1, DEFAULT_MAX_WORKERS)
+
+
+def _snapshot_subject(subject):
+    return SimpleNamespace(
+        id=subject.id,
+        name=getattr(subject, "name", subject.id),
+        course_id=subject.course_id,
+        weekly_hours=getattr(subject, "weekly_hours", 0),
+        max_hours_per_day=getattr(subject, "max_hours_per_day", 1),
+        consecutive_hours=getattr(subject, "consecutive_hours", True),
+        teach_every_day=getattr(subject, "teach_every_day", False),
+        linked_subject_id=getattr(subject, "linked_subject_id", None),
+        included_lines=getattr(subject, "included_lines", None),
+    )
+
+
+def snapshot_solver_inputs(all_teachers, all_subjects, all_subjectgroups,
+                           all_joint_classes=None):
+    """Copy ORM (or mock) solver inputs into plain picklable objects.
+
+    Object identity is preserved: a teacher's ``subjects`` list references
+    the same snapshot objects as the returned subject list, which is what
+    ``_create_assignments`` relies on.
+
+    Returns:
+        dict with keys all_teachers, all_subjects, all_subjectgroups,
+        all_joint_classes.
+    """
+    subjects_by_id = {}
+
+    def subject_snapshot(subject):
+        snap = subjects_by_id.get(subject.id)
+        if snap is None:
+            snap = _snapshot_subject(subject)
+            subjects_by_id[subject.id] = snap
+        return snap
+
+    subjects = [subject_snapshot(s) for s in all_subjects]
+    teachers = [
+        SimpleNamespace(
+            id=t.id,
+            name=t.name,
+            max_hours_week=t.max_hours_week,
+            coordination_hours=getattr(t, "coordination_hours", 0),
+            preferences=getattr(t, "preferences", None),
+            tutor_group=getattr(t, "tutor_group", None),
+            tutor_groups=getattr(t, "tutor_groups", None),
+            subjects=[subject_snapshot(s) for s in getattr(t, "subjects", [])],
+        )
+        for t in all_teachers
+    ]
+    subjectgroups = [
+        SimpleNamespace(
+            id=sg.id,
+            name=getattr(sg, "name", None),
+            included_lines=getattr(sg, "included_lines", None),
+            shared_hours=getattr(sg, "shared_hours", None),
+            subjects=[subject_snapshot(s) for s in getattr(sg, "subjects", [])],
+        )
+        for sg in all_subjectgroups
+    ]
+    joint_classes = [
+        SimpleNamespace(
+            id=jc.id,
+            name=getattr(jc, "name", None),
+            course_id=jc.course_id,
+            subject_id=jc.subject_id,
+            teacher_id=jc.teacher_id,
+            lines=jc.lines,
+            shared_hours=getattr(jc, "shared_hours", None),
+        )
+        for jc in all_joint_classes or []
+    ]
+    return {
+        "all_teachers": teachers,
+        "all_subjects": subjects,
+        "all_subjectgroups": subjectgroups,
+        "all_joint_classes": joint_classes,
+    }
+
+
+# How often the parallel runner checks for cancellation while waiting.
+CANCEL_POLL_SECONDS = 0.2
+
+
+def _solve_job(get_model, job, deadline, search_workers, cancel_token=None):
+    remaining = deadline - time.time() if deadline is not None else None
+    if remaining is not None and remaining <= 0:
+        return None
+    if cancel_token is not None and cancel_token.cancelled:
+        return None
+    diagnosis_model = get_model()
+    timeout = ISOLATION_TIMEOUT_SECONDS
+    if deadline is not None:
+        timeout = min(timeout, max(deadline - time.time(), 0.0))
+    try:
+        return diagnosis_model.solve(
+            time_limit_seconds=timeout,
+            num_search_workers=search_workers,
+            cancel_token=cancel_token,
+            **job["relax"],
+        )
+    except SolveCancelled:
+        return None
+
+
+_worker_inputs = None
+_worker_model = None
+# Shared with the parent: the last stopped ``run`` generation.
+_worker_stop = None
+# (generation, CancellationToken) of the job running in this worker.
+_worker_job = None
+
+
+def _init_worker(inputs, stop):
+    global _worker_inputs, _worker_model, _worker_stop
+    _worker_inputs = inputs
+    _worker_model = None
+    _worker_stop = stop
+    threading.Thread(target=_watch_stop, daemon=True).start()
+
+
+def _watch_stop():
+    """Stop the running solve once the parent stops its ``run`` generation."""
+    while True:
+        time.sleep(CANCEL_POLL_SECONDS)
+        job = _worker_job
+        if job is not None and _worker_stop.value >= job[0]:
+            job[1].cancel()
+
+
+def _get_worker_model():
+    global _worker_model
+    if _worker_model is None:
+        _worker_model = GatedDiagnosisModel(**_worker_inputs)
+    return _worker_model
+
+
+def _run_in_worker(job, generation, deadline, search_workers):
+    global _worker_job
+    if _worker_stop.value >= generation:
+        return job["id"], None
+    token = CancellationToken()
+    _worker_job = (generation, token)
+    try:
+        return job["id"], _solve_job(_get_worker_model, job, deadline, search_workers, token)
+    finally:
+        _worker_job = None
+
+
+class SequentialIsolationRunner:
+    """Run isolation solves one after another in the current process."""
+
+    workers = 1
+
+    def __init__(self, inputs, deadline=None, cancel_token=None):
+        self.inputs = inputs
+        self.deadline = deadline
+        self.cancel_token = cancel_token
+        self._model = None
+
+    def _get_model(self):
+        if self._model is None:
+            self._model = GatedDiagnosisModel(**self.inputs)
+        return self._model
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def run(self, jobs, stop_when=None, on_result=None):
+        results = {}
+        for job in jobs:
+            if stop_when and stop_when(results):
+                results[job["id"]] = None
+                continue
+            status = _solve_job(self._get_model, job, self.deadline, None, self.cancel_token)
+            results[job["id"]] = status
+            if on_result and status is not None:
+                on_result(job["id"], status)
+        return results
+
+
+class ParallelIsolationRunner:
+    """Run isolation solves concurrently on a pool of worker processes.
+
+    The pool is created once and reused for every ``run`` call, so the
+    process start-up cost and the model build are paid once per worker and
+    diagnosis. Each CP-SAT solve gets
+    an equal share of the available cores so the pool does not oversubscribe
+    the machine.
+
+    When ``run`` stops early (cancellation, deadline or ``stop_when``),
+    pending jobs are dropped and ``run`` returns at once. Each ``run`` call
+    is a numbered generation; stopping it publishes that number to the
+    workers through a shared value, and a watcher thread in each worker
+    interrupts the solve of a stopped generation with ``StopSearch``.
+    Leaving the context stops the last generation the same way.
+    """
+
+    def __init__(self, inputs, workers, deadline=None, cancel_token=None):
+        self.inputs = inputs
+        self.workers = workers
+        self.deadline = deadline
+        self.cancel_token = cancel_token
+        cores = os.process_cpu_count() or 1
+        self.search_workers = max(1, cores // workers)
+        self._executor = None
+        self._stop = None
+        self._generation = 0
+
+    def __enter__(self):
+        # "spawn" avoids forking a process that holds solver and DB threads.
+        context = multiprocessing.get_context("spawn")
+        self._stop = context.Value("i", 0)
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=context,
+            initializer=_init_worker,
+            initargs=(self.inputs, self._stop),
+        )
+        logger.info(
+            "Started diagnosis process pool workers=%d search_workers=%d",
+            self.workers,
+            self.search_workers,
+            extra=build_log_extra(),
+        )
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.value = self._generation
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self._executor = None
+        return False
+
+    def run(self, jobs, stop_when=None, on_result=None):
+        results = {job["id"]: None for job in jobs}
+        self._generation += 1
+        generation = self._generation
+        pending = {
+            self._executor.submit(_run_in_worker, job, generation, self.deadline, self.search_workers)
+            for job in jobs
+        }
+        finished = {}
+        watched = self.cancel_token is not None or self.deadline is not None
+        poll = CANCEL_POLL_SECONDS if watched else None
+        while pending:
+            done, pending = wait(pending, timeout=poll, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.cancelled():
+                    continue
+                job_id, status = future.result()
+                finished[job_id] = status
+                if on_result and status is not None:
+                    on_result(job_id, status)
+            cancelled = self.cancel_token is not None and self.cancel_token.cancelled
+            expired = self.deadline is not None and time.time() >= self.deadline
+            if pending and (cancelled or expired or (stop_when and stop_when(finished))):
+                for future in pending:
+                    future.cancel()
+                # Jobs already running are stopped by their worker's watcher;
+                # their results are discarded.
+                self._stop.value = generation
+                break
+        results.update(finished)
+        return results
+
+
+def isolation_runner(inputs, max_workers=None, deadline_seconds=None, cancel_token=None):
+    """Return a context-managed runner for isolation solves.
+
+    Args:
+        inputs: Dict of ``GatedDiagnosisModel`` keyword arguments shared by
+            every job (teachers, subjects, groups, ...). Must be picklable when
+            more than one worker is used (see ``snapshot_solver_inputs``).
+        max_workers: Number of concurrent solves; defaults to
+            ``available_workers()``. 1 = run sequentially in-process.
+        deadline_seconds: Optional wall-clock budget shared by all jobs run
+            through the returned runner.
+        cancel_token: Optional CancellationToken; once cancelled, remaining
+            jobs are not run (their status is None).
+    """
+    workers = max_workers if max_workers is not None else available_workers()
+    deadline = time.time() + deadline_seconds if deadline_seconds is not None else None
+    if workers > 1:
+        return ParallelIsolationRunner(inputs, workers, deadline=deadline, cancel_token=cancel_token)
+    return SequentialIsolationRunner(inputs, deadline=deadline, cancel_token=cancel_token)
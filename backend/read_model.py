@@ -0,0 +1,173 @@
+"""Flat read model of the stored timetable, shared by the timetable renderers.
+
+The markdown, teacher-grid and Excel renderers need every assignment with
+its timeslot, subject, subject-group colour and teacher. Walking the
+``TimeSlotAssignment`` relationships lazily costs extra SELECTs for every
+timeslot, subject, group and teacher not yet loaded. Each loader here reads
+one kind of row with a single joined, column-projected query into plain
+named tuples, so rendering a timetable runs a fixed number of queries
+whatever the size of the school.
+"""
+
+from typing import NamedTuple, Optional
+
+from .models import (
+    Subject,
+    SubjectGroup,
+    SupportAssignment,
+    Teacher,
+    TeacherBusySlot,
+    TeacherFixedSlotLabel,
+    TimeSlotAssignment,
+    Timeslot,
+)
+
+
+def course_line_name(course_id, line):
+    """Return the display name of a course line, e.g. ``"1ºA"``."""
+    return f"{course_id}{chr(ord('A') + line)}"
+
+
+class AssignmentRow(NamedTuple):
+    """A scheduled class with the names and colours the renderers show."""
+
+    course_id: str
+    line: int
+    day: int
+    hour: int
+    subject_id: str
+    subject_name: Optional[str]
+    subject_color: Optional[str]
+    group_color: Optional[str]
+    teacher_id: Optional[int]
+    teacher_name: Optional[str]
+
+    @property
+    def course_line(self):
+        return course_line_name(self.course_id, self.line)
+
+    @property
+    def line_letter(self):
+        return chr(ord('A') + self.line)
+
+    @property
+    def color(self):
+        """Colour of the cell: the subject group's, else the subject's."""
+        return self.group_color or self.subject_color
+
+
+class SupportRow(NamedTuple):
+    """A support hour of a teacher in a course line."""
+
+    id: int
+    course_id: str
+    line: int
+    day: int
+    hour: int
+    subject_id: str
+    subject_name: Optional[str]
+    subject_color: Optional[str]
+    teacher_id: int
+    teacher_name: Optional[str]
+
+    @property
+    def course_line(self):
+        return course_line_name(self.course_id, self.line)
+
+
+class BusySlotRow(NamedTuple):
+    """A non-teaching (coordination) hour of a teacher."""
+
+    teacher_id: int
+    teacher_name: Optional[str]
+    day: int
+    hour: int
+
+
+class TeacherFixedLabelRow(NamedTuple):
+    """A per-teacher label override of a fixed slot."""
+
+    teacher_name: Optional[str]
+    fixed_slot_id: int
+    day: int
+    label: str
+
+
+def load_assignments(session):
+    """Return all timetable assignments as ``AssignmentRow``s, in id order."""
+    rows = (
+        session.query(
+            Timeslot.course_id,
+            Timeslot.line,
+            Timeslot.day,
+            Timeslot.hour,
+            TimeSlotAssignment.subject_id,
+            Subject.name,
+            Subject.color,
+            SubjectGroup.color,
+            TimeSlotAssignment.teacher_id,
+            Teacher.name,
+        )
+        .select_from(TimeSlotAssignment)
+        .join(Timeslot, TimeSlotAssignment.timeslot_id == Timeslot.id)
+        .outerjoin(Subject, TimeSlotAssignment.subject_id == Subject.id)
+        .outerjoin(SubjectGroup, Timeslot.subject_group_id == SubjectGroup.id)
+        .outerjoin(Teacher, TimeSlotAssignment.teacher_id == Teacher.id)
+        .order_by(TimeSlotAssignment.id)
+    )
+    return [AssignmentRow(*row) for row in rows]
+
+
+def load_support_assignments(session):
+    """Return all support assignments as ``SupportRow``s, in id order."""
+    rows = (
+        session.query(
+            SupportAssignment.id,
+            SupportAssignment.course_id,
+            SupportAssignment.line,
+            SupportAssignment.day,
+            SupportAssignment.hour,
+            SupportAssignment.subject_id,
+            Subject.name,
+            Subject.color,
+            SupportAssignment.teacher_id,
+            Teacher.name,
+        )
+        .select_from(SupportAssignment)
+        .outerjoin(Subject, SupportAssignment.subject_id == Subject.id)
+        .outerjoin(Teacher, SupportAssignment.teacher_id == Teacher.id)
+        .order_by(SupportAssignment.id)
+    )
+    return [SupportRow(*row) for row in rows]
+
+
+def load_busy_slots(session):
+    """Return all teacher busy slots as ``BusySlotRow``s, in id order."""
+    rows = (
+        session.query(
+            TeacherBusySlot.teacher_id,
+            Teacher.name,
+            TeacherBusySlot.day,
+            TeacherBusySlot.hour,
+        )
+        .select_from(TeacherBusySlot)
+        .outerjoin(Teacher, TeacherBusySlot.teacher_id == Teacher.id)
+        .order_by(TeacherBusySlot.id)
+    )
+    return [BusySlotRow(*row) for row in rows]
+
+
+def load_teacher_fixed_slot_labels(session):
+    """Return the per-teacher fixed slot labels as ``TeacherFixedLabelRow``s."""
+    rows = (
+        session.query(
+            Teacher.name,
+            TeacherFixedSlotLabel.fixed_slot_id,
+            TeacherFixedSlotLabel.day,
+            TeacherFixedSlotLabel.label,
+        )
+        .select_from(TeacherFixedSlotLabel)
+        .outerjoin(Teacher, TeacherFixedSlotLabel.teacher_id == Teacher.id)
+        .order_by(TeacherFixedSlotLabel.id)
+    )
+    return [TeacherFixedLabelRow(*row) for row in rows]
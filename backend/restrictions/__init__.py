@@ -4,6 +4,8 @@ Each restriction implementation lives in its own module inside this package.
 """
 
 from .base import Restriction
+from .assignment_store import AssignmentIndex, AssignmentStore, index_of
+from .occupancy_channels import OccupancyChannels, channels_of
 
 from .group_subject_max_hours_per_day import GroupSubjectMaxHoursPerDay
 from .group_at_most_one_logical_assignment import GroupAtMostOneLogicalAssignment
@@ -35,6 +37,11 @@ from .joint_class_assignment import JointClassAssignment
 
 __all__ = [
     "Restriction",
+    "AssignmentIndex",
+    "AssignmentStore",
+    "index_of",
+    "OccupancyChannels",
+    "channels_of",
     "GroupSubjectMaxHoursPerDay",
     "GroupAtMostOneLogicalAssignment",
     "GroupSubjectAtMostOneTeacherPerTimeslot",
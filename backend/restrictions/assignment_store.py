@@ -0,0 +1,135 @@
+"""Indexed storage for assignment decision variables.
+
+Assignment keys are tuples ``(group, subject_id, teacher_id, day, hour)``.
+Restrictions frequently need every variable matching a subset of those
+fields (e.g. all vars of a teacher at a given day/hour). Scanning the whole
+dict for each lookup makes model construction quadratic, so this module
+provides an index that is built in a single pass per field combination and
+answers each lookup in O(1).
+"""
+
+from collections import defaultdict
+
+FIELDS = ("group", "subject", "teacher", "day", "hour")
+_FIELD_POS = {name: pos for pos, name in enumerate(FIELDS)}
+
+
+class AssignmentIndex:
+    """Lazy multi-field index over an assignments mapping.
+
+    Each distinct combination of queried fields gets its own bucket dict,
+    built on first use with one pass over the assignments. Bucket lists keep
+    the insertion order of the underlying mapping, so constraints built from
+    them are identical to the ones produced by a linear scan.
+    """
+
+    def __init__(self, assignments):
+        self._assignments = assignments
+        self._buckets = {}
+
+    def _bucket(self, positions):
+        bucket = self._buckets.get(positions)
+        if bucket is None:
+            bucket = defaultdict(list)
+            for key in self._assignments:
+                bucket[tuple(key[p] for p in positions)].append(key)
+            bucket = dict(bucket)
+            self._buckets[positions] = bucket
+        return bucket
+
+    def keys(self, **criteria):
+        """Return the assignment keys matching all given field values.
+
+        Supported fields: group, subject, teacher, day, hour.
+        """
+        if not criteria:
+            return list(self._assignments)
+        try:
+            positions = tuple(sorted(_FIELD_POS[name] for name in criteria))
+        except KeyError as exc:
+            raise ValueError(f"Unknown assignment field: {exc.args[0]}") from None
+        value = tuple(criteria[FIELDS[p]] for p in positions)
+        return self._bucket(positions).get(value, [])
+
+    def vars(self, **criteria):
+        """Return the decision variables matching all given field values."""
+        assignments = self._assignments
+        return [assignments[k] for k in self.keys(**criteria)]
+
+    def values_of(self, *fields, **criteria):
+        """Return the distinct values of ``fields`` among matching keys, in order.
+
+        Example: ``index.values_of("day", "hour", group="1-A")`` returns all
+        (day, hour) pairs that have at least one variable for group 1-A.
+        """
+        positions = [_FIELD_POS[name] for name in fields]
+        seen = {}
+        for key in self.keys(**criteria):
+            seen.setdefault(tuple(key[p] for p in positions), None)
+        return list(seen)
+
+
+class AssignmentStore(dict):
+    """Dict of assignment variables carrying a shared :class:`AssignmentIndex`.
+
+    Behaves exactly like the plain dict restrictions used to receive; the
+    index is invalidated whenever the mapping is modified. ``channels`` holds
+    the model's shared occupancy channels (see ``occupancy_channels``) and is
+    dropped together with the index.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._index = None
+        self.channels = None
+
+    def _invalidate(self):
+        self._index = None
+        self.channels = None
+
+    @property
+    def index(self):
+        if self._index is None:
+            self._index = AssignmentIndex(self)
+        return self._index
+
+    def __setitem__(self, key, value):
+        if key not in self:
+            self._invalidate()
+        super().__setitem__(key, value)
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        self._invalidate()
+
+    def update(self, *args, **kwargs):
+        super().update(*args, **kwargs)
+        self._invalidate()
+
+    def pop(self, *args):
+        self._invalidate()
+        return super().pop(*args)
+
+    def popitem(self):
+        self._invalidate()
+        return super().popitem()
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self._invalidate()
+        return super().setdefault(key, default)
+
+    def clear(self):
+        super().clear()
+        self._invalidate()
+
+
+def index_of(assignments):
+    """Return an :class:`AssignmentIndex` for ``assignments``.
+
+    Reuses the shared index of an :class:`AssignmentStore`; plain dicts (as
+    used by unit tests) get a fresh index, still built in linear time.
+    """
+    if isinstance(assignments, AssignmentStore):
+        return assignments.index
+    return AssignmentIndex(assignments)
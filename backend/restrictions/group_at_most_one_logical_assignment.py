@@ -7,7 +7,9 @@ on which other group members are active at that slot.
 
 import json as _json
 
+from .assignment_store import index_of
 from .base import Restriction
+from .occupancy_channels import channels_of
 
 
 def _is_line_included(entity, line_index):
@@ -36,6 +38,9 @@ def _get_subject_ids(sg):
 
 class GroupAtMostOneLogicalAssignment(Restriction):
     def apply(self, model, assignments, all_groups, num_days, num_hours, all_subjectgroups=None):
+        index = index_of(assignments)
+        channels = channels_of(model, assignments)
+        capped = set()
         for group in all_groups:
             _, line_letter = group.split("-")
             line_index = ord(line_letter) - ord("A")
@@ -59,10 +64,7 @@ class GroupAtMostOneLogicalAssignment(Restriction):
                             fully_shared_map[subj_id] = sg.id
             for d in range(num_days):
                 for h in range(num_hours):
-                    slot_assignments = [
-                        k for k in assignments
-                        if k[0] == group and k[3] == d and k[4] == h
-                    ]
+                    slot_assignments = index.keys(group=group, day=d, hour=h)
 
                     if not slot_assignments:
                         continue
@@ -97,32 +99,17 @@ class GroupAtMostOneLogicalAssignment(Restriction):
 
                     # --- Partial-share SGs: per-slot detection ---
                     for sg_id, subject_ids in partial_sgs:
-                        member_active = {}
-                        for subj_id in subject_ids:
-                            subj_vars = [
-                                assignments[k] for k in slot_assignments
-                                if k[1] == subj_id
-                            ]
-                            if subj_vars:
-                                active = model.NewBoolVar(
-                                    f"partial_mem_{sg_id}_{subj_id}_{group}_{d}_{h}"
-                                )
-                                model.Add(sum(subj_vars) == active)
-                                member_active[subj_id] = active
+                        member_active = {
+                            subj_id: channels.subject_active(group, subj_id, d, h, capped)
+                            for subj_id in subject_ids
+                            if index.keys(group=group, subject=subj_id, day=d, hour=h)
+                        }
 
                         if not member_active:
                             continue
 
                         if len(member_active) >= len(subject_ids):
-                            sg_present = model.NewBoolVar(
-                                f"partial_sg_{sg_id}_full_{group}_{d}_{h}"
-                            )
-                            active_list = list(member_active.values())
-                            for a in active_list:
-                                model.Add(sg_present <= a)
-                            model.Add(
-                                sg_present >= sum(active_list) - (len(active_list) - 1)
-                            )
+                            sg_present = channels.subjects_together(group, subject_ids, d, h)
                             logical_vars.append(sg_present)
 
                             for subj_id, active in member_active.items():
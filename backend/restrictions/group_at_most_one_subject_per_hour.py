@@ -1,5 +1,6 @@
 """Ensure a group has at most one subject assigned in any given day/hour, except for SubjectGroups."""
 
+from .assignment_store import index_of
 from .base import Restriction
 
 
@@ -27,14 +28,12 @@ class GroupAtMostOneSubjectPerHour(Restriction):
                         subject_to_groups[subject_id] = []
                     subject_to_groups[subject_id].append(sg.id)
 
+        index = index_of(assignments)
         for group in groups:
             for d in range(num_days):
                 for h in range(num_hours):
                     # Get all assignments for this group/day/hour
-                    slot_assignments = [
-                        k for k in assignments
-                        if k[0] == group and k[3] == d and k[4] == h
-                    ]
+                    slot_assignments = index.keys(group=group, day=d, hour=h)
                     
                     if not slot_assignments:
                         continue
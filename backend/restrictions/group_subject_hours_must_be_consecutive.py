@@ -1,6 +1,7 @@
 """Require that multiple hours of the same subject for a group on a day are consecutive."""
 
 from .base import Restriction
+from .occupancy_channels import channels_of
 
 
 class GroupSubjectHoursMustBeConsecutive(Restriction):
@@ -20,25 +21,18 @@ class GroupSubjectHoursMustBeConsecutive(Restriction):
     def _build_consecutive(self, model, assignments, groups, subjects,
                            num_days, num_hours, gate_assume):
         result = []
+        channels = channels_of(model, assignments)
+        capped = set()
         for group in groups:
             course = group.split('-')[0]
             for subject in subjects:
                 if subject.course_id == course:
                     for d in range(num_days):
-                        # 1) create aggregated variables y_h
-                        y_vars = []
-                        for h in range(num_hours):
-                            y = model.NewBoolVar(f"y_{group}_{subject.id}_d{d}_h{h}")
-                            assign_vars = [
-                                assignments[key]
-                                for key in assignments
-                                if key[0] == group and key[1] == subject.id and key[3] == d and key[4] == h
-                            ]
-                            if assign_vars:
-                                model.Add(sum(assign_vars) == y)
-                            else:
-                                model.Add(y == 0)
-                            y_vars.append(y)
+                        # 1) aggregated "subject taught at h" variables y_h
+                        y_vars = [
+                            channels.subject_active(group, subject.id, d, h, capped)
+                            for h in range(num_hours)
+                        ]
 
                         # 2) define starts: start_h = 1 if y_h == 1 and y_{h-1} == 0
                         starts = []
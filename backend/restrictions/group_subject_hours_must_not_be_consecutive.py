@@ -4,7 +4,9 @@ This is the inverse of GroupSubjectHoursMustBeConsecutive: if a subject is taugh
 more than one hour per day in a group, those hours must NOT be adjacent.
 """
 
+from .assignment_store import index_of
 from .base import Restriction
+from .occupancy_channels import channels_of
 
 
 class GroupSubjectHoursMustNotBeConsecutive(Restriction):
@@ -24,6 +26,9 @@ class GroupSubjectHoursMustNotBeConsecutive(Restriction):
     def _build_not_consecutive(self, model, assignments, groups, subjects,
                                 num_days, num_hours, gate_assume):
         result = []
+        index = index_of(assignments)
+        channels = channels_of(model, assignments)
+        capped = set()
         for group in groups:
             course = group.split("-")[0]
             for subject in subjects:
@@ -37,47 +42,22 @@ class GroupSubjectHoursMustNotBeConsecutive(Restriction):
                                 f"assume_ncons_{subject.id}_g{group}_d{d}"
                             )
 
+                        for h in range(num_hours):
+                            channels.cap_subject_teachers(group, subject.id, d, h, capped)
                         for h in range(num_hours - 1):
-                            # Build aggregated y_h for this subject/group/day/hour
-                            assign_vars_h = [
-                                assignments[key]
-                                for key in assignments
-                                if key[0] == group
-                                and key[1] == subject.id
-                                and key[3] == d
-                                and key[4] == h
-                            ]
-                            assign_vars_h1 = [
-                                assignments[key]
-                                for key in assignments
-                                if key[0] == group
-                                and key[1] == subject.id
-                                and key[3] == d
-                                and key[4] == h + 1
-                            ]
-
-                            if assign_vars_h:
-                                y_h = model.NewBoolVar(
-                                    f"yn_{group}_{subject.id}_d{d}_h{h}"
-                                )
-                                model.Add(sum(assign_vars_h) == y_h)
-                            else:
-                                y_h = None
-
-                            if assign_vars_h1:
-                                y_h1 = model.NewBoolVar(
-                                    f"yn_{group}_{subject.id}_d{d}_h{h + 1}"
-                                )
-                                model.Add(sum(assign_vars_h1) == y_h1)
+                            # Only pairs of hours where the subject can be taught
+                            if not (
+                                index.keys(group=group, subject=subject.id, day=d, hour=h)
+                                and index.keys(group=group, subject=subject.id, day=d, hour=h + 1)
+                            ):
+                                continue
+                            y_h = channels.subject_active(group, subject.id, d, h)
+                            y_h1 = channels.subject_active(group, subject.id, d, h + 1)
+                            has_constraints = True
+                            if assume is not None:
+                                model.Add(y_h + y_h1 <= 1).OnlyEnforceIf(assume)
                             else:
-                                y_h1 = None
-
-                            if y_h is not None and y_h1 is not None:
-                                has_constraints = True
-                                if assume is not None:
-                                    model.Add(y_h + y_h1 <= 1).OnlyEnforceIf(assume)
-                                else:
-                                    model.Add(y_h + y_h1 <= 1)
+                                model.Add(y_h + y_h1 <= 1)
 
                         if has_constraints and assume is not None:
                             result.append((assume, {
@@ -1,5 +1,6 @@
 """Enforce max hours per day for a subject in a group when taught by a teacher."""
 
+from .assignment_store import index_of
 from .base import Restriction
 
 
@@ -9,6 +10,7 @@ class GroupSubjectMaxHoursPerDay(Restriction):
     """
 
     def apply(self, model, assignments, groups, subjects, teachers, num_days):
+        index = index_of(assignments)
         for group in groups:
             course = group.split('-')[0]
             for subject in subjects:
@@ -16,15 +18,14 @@ class GroupSubjectMaxHoursPerDay(Restriction):
                     for teacher in teachers:
                         if subject in teacher.subjects:
                             for d in range(num_days):
-                                hour_vars = [
-                                    assignments[key]
-                                    for key in assignments
-                                    if key[0] == group and key[1] == subject.id and key[2] == teacher.id and key[3] == d
-                                ]
+                                hour_vars = index.vars(
+                                    group=group, subject=subject.id, teacher=teacher.id, day=d
+                                )
                                 model.Add(sum(hour_vars) <= subject.max_hours_per_day)
 
     def apply_with_assumptions(self, model, assignments, groups, subjects, teachers, num_days):
         result = []
+        index = index_of(assignments)
         for group in groups:
             course = group.split('-')[0]
             for subject in subjects:
@@ -32,11 +33,9 @@ class GroupSubjectMaxHoursPerDay(Restriction):
                     for teacher in teachers:
                         if subject in teacher.subjects:
                             for d in range(num_days):
-                                hour_vars = [
-                                    assignments[key]
-                                    for key in assignments
-                                    if key[0] == group and key[1] == subject.id and key[2] == teacher.id and key[3] == d
-                                ]
+                                hour_vars = index.vars(
+                                    group=group, subject=subject.id, teacher=teacher.id, day=d
+                                )
                                 if not hour_vars:
                                     continue
                                 assume = model.NewBoolVar(
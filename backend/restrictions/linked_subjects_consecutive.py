@@ -7,6 +7,7 @@ the constraint is also applied when evaluating B.
 """
 
 from .base import Restriction
+from .occupancy_channels import channels_of
 
 
 class LinkedSubjectsConsecutive(Restriction):
@@ -20,6 +21,8 @@ class LinkedSubjectsConsecutive(Restriction):
     def apply(self, model, assignments, groups, subjects, num_days, num_hours):
         # Build a mapping id->subject for quick lookup
         subj_map = {s.id: s for s in subjects}
+        channels = channels_of(model, assignments)
+        capped = set()
 
         for group in groups:
             course = group.split("-")[0]
@@ -43,37 +46,10 @@ class LinkedSubjectsConsecutive(Restriction):
                     y_t = []
                     z_day = []
                     for h in range(num_hours):
-                        ys = model.NewBoolVar(f"link_y_{group}_{s.id}_d{d}_h{h}")
-                        yt = model.NewBoolVar(f"link_y_{group}_{t.id}_d{d}_h{h}")
+                        ys = channels.subject_active(group, s.id, d, h, capped)
+                        yt = channels.subject_active(group, t.id, d, h, capped)
                         z = model.NewBoolVar(f"link_z_{group}_{s.id}_{t.id}_d{d}_h{h}")
 
-                        assign_vars_s = [
-                            assignments[k]
-                            for k in assignments
-                            if k[0] == group
-                            and k[1] == s.id
-                            and k[3] == d
-                            and k[4] == h
-                        ]
-                        assign_vars_t = [
-                            assignments[k]
-                            for k in assignments
-                            if k[0] == group
-                            and k[1] == t.id
-                            and k[3] == d
-                            and k[4] == h
-                        ]
-
-                        if assign_vars_s:
-                            model.Add(sum(assign_vars_s) == ys)
-                        else:
-                            model.Add(ys == 0)
-
-                        if assign_vars_t:
-                            model.Add(sum(assign_vars_t) == yt)
-                        else:
-                            model.Add(yt == 0)
-
                         # z marks that either linked subject is scheduled at this hour.
                         model.Add(z >= ys)
                         model.Add(z >= yt)
@@ -85,21 +61,12 @@ class LinkedSubjectsConsecutive(Restriction):
 
                     # Activate the linked-subject constraints only when BOTH
                     # linked subjects appear at least once on this day.
-                    present_s = model.NewBoolVar(f"link_present_{group}_{s.id}_d{d}")
-                    present_t = model.NewBoolVar(f"link_present_{group}_{t.id}_d{d}")
+                    present_s = channels.subject_present(group, s.id, d, num_hours)
+                    present_t = channels.subject_present(group, t.id, d, num_hours)
                     both_present = model.NewBoolVar(
                         f"link_both_present_{group}_{s.id}_{t.id}_d{d}"
                     )
 
-                    sum_s = sum(y_s)
-                    sum_t = sum(y_t)
-
-                    model.Add(sum_s >= 1).OnlyEnforceIf(present_s)
-                    model.Add(sum_s == 0).OnlyEnforceIf(present_s.Not())
-
-                    model.Add(sum_t >= 1).OnlyEnforceIf(present_t)
-                    model.Add(sum_t == 0).OnlyEnforceIf(present_t.Not())
-
                     model.AddBoolAnd([present_s, present_t]).OnlyEnforceIf(both_present)
                     model.AddBoolOr([present_s.Not(), present_t.Not()]).OnlyEnforceIf(
                         both_present.Not()
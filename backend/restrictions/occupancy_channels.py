@@ -0,0 +1,132 @@
+"""Shared occupancy channel variables built on top of the assignment variables.
+
+Several restrictions need the same derived booleans: "teacher t is busy at
+(d, h)", "subject s is taught to group g at (d, h)", "subject s is taught to
+group g on day d", "every subject of a SubjectGroup is taught at (d, h)".
+``OccupancyChannels`` creates each of them once per model, on first use, so
+restrictions share them instead of each adding its own copy.
+
+Every channel is a pure definition (an OR or an AND of other literals) and
+never restricts the assignments by itself. The indices of the constraints
+that define channels are kept in ``constraint_indices`` so that the gated
+diagnosis model can leave them ungated while it gates the restriction that
+happened to create them first.
+
+Restrictions that count ``subject_active`` as one hour of the subject also
+need at most one teacher per slot. They pass a ``capped`` set of their own,
+and the cap (an AtMostOne over the slot's assignments) is posted as one of
+their constraints. So it holds even when GroupSubjectAtMostOneTeacherPerTimeslot
+is disabled, and the diagnosis model relaxes it together with them.
+"""
+
+from .assignment_store import AssignmentStore, index_of
+
+
+class OccupancyChannels:
+    """Lazily created occupancy BoolVars of one model."""
+
+    def __init__(self, model, assignments):
+        self.model = model
+        self._index = index_of(assignments)
+        self._cache = {}
+        self.constraint_indices = set()
+
+    def _channel(self, key, name, literals, kind="or"):
+        channel = self._cache.get(key)
+        if channel is not None:
+            return channel
+        if not literals:
+            channel = self.model.NewConstant(0)
+        elif len(literals) == 1:
+            channel = literals[0]
+        else:
+            model = self.model
+            start = len(model.proto.constraints)
+            channel = model.NewBoolVar(name)
+            if kind == "or":
+                # channel == 1 iff at least one literal is 1
+                model.Add(channel <= sum(literals))
+                model.Add(sum(literals) <= len(literals) * channel)
+            else:
+                # channel == 1 iff every literal is 1
+                for literal in literals:
+                    model.Add(channel <= literal)
+                model.Add(channel >= sum(literals) - (len(literals) - 1))
+            self.constraint_indices.update(range(start, len(model.proto.constraints)))
+        self._cache[key] = channel
+        return channel
+
+    def teacher_busy(self, teacher_id, day, hour):
+        """1 iff the teacher has any assignment at (day, hour)."""
+        return self._channel(
+            ("teacher", teacher_id, day, hour),
+            f"busy_t{teacher_id}_d{day}_h{hour}",
+            self._index.vars(teacher=teacher_id, day=day, hour=hour),
+        )
+
+    def cap_subject_teachers(self, group, subject_id, day, hour, capped):
+        """Allow at most one teacher of the subject for the group at (day, hour).
+
+        Posted once per ``capped`` set (the caller's record of capped slots).
+        """
+        key = (group, subject_id, day, hour)
+        if key in capped:
+            return
+        capped.add(key)
+        literals = self._index.vars(group=group, subject=subject_id, day=day, hour=hour)
+        if len(literals) > 1:
+            self.model.AddAtMostOne(literals)
+
+    def subject_active(self, group, subject_id, day, hour, capped=None):
+        """1 iff the subject is taught to the group at (day, hour), by any teacher.
+
+        With ``capped``, also caps the slot at one teacher (see
+        ``cap_subject_teachers``).
+        """
+        if capped is not None:
+            self.cap_subject_teachers(group, subject_id, day, hour, capped)
+        return self._channel(
+            ("subject", group, subject_id, day, hour),
+            f"active_{group}_{subject_id}_d{day}_h{hour}",
+            self._index.vars(group=group, subject=subject_id, day=day, hour=hour),
+        )
+
+    def subject_present(self, group, subject_id, day, num_hours):
+        """1 iff the subject is taught to the group at any hour of the day."""
+        hours = [
+            self.subject_active(group, subject_id, day, hour)
+            for hour in range(num_hours)
+            if self._index.keys(group=group, subject=subject_id, day=day, hour=hour)
+        ]
+        return self._channel(
+            ("present", group, subject_id, day),
+            f"present_{group}_{subject_id}_d{day}",
+            hours,
+        )
+
+    def subjects_together(self, group, subject_ids, day, hour, capped=None):
+        """1 iff every subject in ``subject_ids`` is taught to the group at (day, hour)."""
+        subject_ids = tuple(subject_ids)
+        members = [self.subject_active(group, s, day, hour, capped) for s in subject_ids]
+        return self._channel(
+            ("together", group, subject_ids, day, hour),
+            f"together_{group}_{'+'.join(map(str, subject_ids))}_d{day}_h{hour}",
+            members,
+            kind="and",
+        )
+
+
+def channels_of(model, assignments):
+    """Return the :class:`OccupancyChannels` of ``model`` over ``assignments``.
+
+    An :class:`AssignmentStore` keeps one instance per model, so every
+    restriction applied to that model shares the same channels; plain dicts
+    (as used by unit tests) get a fresh instance.
+    """
+    if isinstance(assignments, AssignmentStore):
+        channels = assignments.channels
+        if channels is None or channels.model is not model:
+            channels = OccupancyChannels(model, assignments)
+            assignments.channels = channels
+        return channels
+    return OccupancyChannels(model, assignments)
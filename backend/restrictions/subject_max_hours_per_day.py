@@ -1,5 +1,6 @@
 """Restrict the maximum number of hours a subject can be scheduled per day across all groups."""
 
+from .assignment_store import index_of
 from .base import Restriction
 
 
@@ -22,13 +23,10 @@ class SubjectMaxHoursPerDay(Restriction):
             subjects: list of Subject objects.
             num_days: number of days in the week.
         """
+        index = index_of(assignments)
         for subject in subjects:
             max_hours = subject.max_hours_per_day
             for d in range(num_days):
-                daily_vars = [
-                    assignments[key]
-                    for key in assignments
-                    if key[1] == subject.id and key[3] == d
-                ]
+                daily_vars = index.vars(subject=subject.id, day=d)
                 if daily_vars:
                     model.Add(sum(daily_vars) <= max_hours)
\ No newline at end of file
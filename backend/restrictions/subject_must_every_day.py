@@ -5,6 +5,7 @@ that flag is True, forces the solver to schedule at least one assignment per
 day for each group belonging to the subject's course.
 """
 
+from .assignment_store import index_of
 from .base import Restriction
 
 
@@ -26,6 +27,7 @@ class SubjectMustEveryDay(Restriction):
 
         # Build a map of subject_id -> subject object to quickly check course membership
         subj_map = {s.id: s for s in all_subjects}
+        index = index_of(assignments)
         for group in all_groups:
             course = group.split("-")[0]
             for subject_id in daily_subject_ids:
@@ -37,11 +39,7 @@ class SubjectMustEveryDay(Restriction):
                     continue
                 for d in range(num_days):
                     # collect all vars for this group, subject_id and day across teachers/hours
-                    vars_for_day = [
-                        var
-                        for key, var in assignments.items()
-                        if key[0] == group and key[1] == subject_id and key[3] == d
-                    ]
+                    vars_for_day = index.vars(group=group, subject=subject_id, day=d)
                     if not vars_for_day:
                         # no variables for this combination, skip
                         continue
@@ -57,6 +55,7 @@ class SubjectMustEveryDay(Restriction):
             return result
 
         subj_map = {s.id: s for s in all_subjects}
+        index = index_of(assignments)
         for group in all_groups:
             course = group.split("-")[0]
             for subject_id in daily_subject_ids:
@@ -66,11 +65,7 @@ class SubjectMustEveryDay(Restriction):
                 if getattr(subject_obj, "course_id", None) != course:
                     continue
                 for d in range(num_days):
-                    vars_for_day = [
-                        var
-                        for key, var in assignments.items()
-                        if key[0] == group and key[1] == subject_id and key[3] == d
-                    ]
+                    vars_for_day = index.vars(group=group, subject=subject_id, day=d)
                     if not vars_for_day:
                         continue
                     assume = model.NewBoolVar(
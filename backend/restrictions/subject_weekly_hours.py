@@ -2,6 +2,7 @@
 
 import json as _json
 
+from .assignment_store import index_of
 from .base import Restriction
 
 
@@ -37,6 +38,7 @@ class SubjectWeeklyHours(Restriction):
                     diagnostic_mode=False, skip_subject_ids=None):
         skip_set = set(skip_subject_ids) if skip_subject_ids else set()
         assumptions = []
+        index = index_of(assignments)
         for group in all_groups:
             course, line_letter = group.split('-')
             line_index = ord(line_letter) - ord('A')
@@ -48,8 +50,7 @@ class SubjectWeeklyHours(Restriction):
                 if not _is_line_included(subject, line_index):
                     continue
                 # Sum all assignments for this group-subject combination
-                hours = sum(assignments[key] for key in assignments
-                            if key[0] == group and key[1] == subject.id)
+                hours = sum(index.vars(group=group, subject=subject.id))
                 if diagnostic_mode:
                     assume = model.NewBoolVar(
                         f"assume_weekly_{group}_{subject.id}")
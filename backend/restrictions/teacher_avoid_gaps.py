@@ -7,6 +7,7 @@ the day are not penalized — only gaps *between* busy hours.
 """
 
 from .base import Restriction
+from .occupancy_channels import channels_of
 
 
 class TeacherAvoidGaps(Restriction):
@@ -22,27 +23,14 @@ class TeacherAvoidGaps(Restriction):
 
     def apply(self, model, assignments, teachers, num_days, num_hours):
         self.preference_terms = []
+        channels = channels_of(model, assignments)
 
         for teacher in teachers:
             for d in range(num_days):
-                busy = []
-                for h in range(num_hours):
-                    b = model.NewBoolVar(f"b_t{teacher.id}_d{d}_h{h}")
-                    slot_vars = [
-                        assignments[k]
-                        for k in assignments
-                        if k[2] == teacher.id and k[3] == d and k[4] == h
-                    ]
-                    if slot_vars:
-                        # A joint class can activate more than one assignment var
-                        # for the same teacher/day/hour (one per group line).
-                        # Channel b as "teacher is busy at this slot" instead of
-                        # forcing equality with the raw sum.
-                        model.Add(b <= sum(slot_vars))
-                        model.Add(sum(slot_vars) <= len(slot_vars) * b)
-                    else:
-                        model.Add(b == 0)
-                    busy.append(b)
+                # "Busy" rather than the raw sum: a joint class can activate
+                # more than one assignment var for the same teacher/day/hour
+                # (one per group line).
+                busy = [channels.teacher_busy(teacher.id, d, h) for h in range(num_hours)]
 
                 starts = []
                 for h in range(num_hours):
@@ -1,6 +1,7 @@
 """Soft constraint: reward schedules where each teacher's free/unassigned
 hours are evenly distributed across the week."""
 from .base import Restriction
+from .occupancy_channels import channels_of
 
 
 class TeacherFreeHoursEvenDistribution(Restriction):
@@ -10,23 +11,11 @@ class TeacherFreeHoursEvenDistribution(Restriction):
 
     def apply(self, model, assignments, teachers, num_days, num_hours):
         self.preference_terms = []
+        channels = channels_of(model, assignments)
         for teacher in teachers:
             free_vars = []
             for d in range(num_days):
-                busy = []
-                for h in range(num_hours):
-                    b = model.NewBoolVar(f"fb_t{teacher.id}_d{d}_h{h}")
-                    slot_vars = [
-                        assignments[k]
-                        for k in assignments
-                        if k[2] == teacher.id and k[3] == d and k[4] == h
-                    ]
-                    if slot_vars:
-                        model.Add(b <= sum(slot_vars))
-                        model.Add(sum(slot_vars) <= len(slot_vars) * b)
-                    else:
-                        model.Add(b == 0)
-                    busy.append(b)
+                busy = [channels.teacher_busy(teacher.id, d, h) for h in range(num_hours)]
 
                 free_h = model.NewIntVar(0, num_hours, f"free_t{teacher.id}_d{d}")
                 model.Add(free_h == num_hours - sum(busy))
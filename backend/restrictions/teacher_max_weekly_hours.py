@@ -4,6 +4,7 @@ Joint classes (multiple groups sharing the same slot with the same teacher)
 are counted once, not once per group.
 """
 
+from .assignment_store import index_of
 from .base import Restriction
 
 
@@ -30,6 +31,7 @@ class TeacherMaxWeeklyHours(Restriction):
 
         skip_set = set(skip_teacher_ids) if skip_teacher_ids else set()
         assumptions = []
+        index = index_of(assignments)
         for teacher in teachers:
             if teacher.id in skip_set:
                 continue
@@ -38,27 +40,27 @@ class TeacherMaxWeeklyHours(Restriction):
 
             seen_joint_slots = set()
             terms = []
-            for key, var in assignments.items():
-                if key[2] == teacher.id:
-                    jc_key = (teacher.id, key[1], key[3], key[4])
-                    jc_info = joint_lookup.get(jc_key)
-                    jc_groups = jc_info.get("groups") if isinstance(jc_info, dict) else None
-                    is_joint_member = jc_info and (
-                        not jc_groups or key[0] in jc_groups
-                    )
+            for key in index.keys(teacher=teacher.id):
+                var = assignments[key]
+                jc_key = (teacher.id, key[1], key[3], key[4])
+                jc_info = joint_lookup.get(jc_key)
+                jc_groups = jc_info.get("groups") if isinstance(jc_info, dict) else None
+                is_joint_member = jc_info and (
+                    not jc_groups or key[0] in jc_groups
+                )
 
-                    if is_joint_member:
-                        slot_key = (
-                            "jc",
-                            jc_info.get("jc_id") if isinstance(jc_info, dict) else None,
-                            key[3],
-                            key[4],
-                        )
-                        if slot_key not in seen_joint_slots:
-                            seen_joint_slots.add(slot_key)
-                            terms.append(var)
-                    else:
+                if is_joint_member:
+                    slot_key = (
+                        "jc",
+                        jc_info.get("jc_id") if isinstance(jc_info, dict) else None,
+                        key[3],
+                        key[4],
+                    )
+                    if slot_key not in seen_joint_slots:
+                        seen_joint_slots.add(slot_key)
                         terms.append(var)
+                else:
+                    terms.append(var)
 
             total = sum(terms)
             if diagnostic_mode:
@@ -4,6 +4,7 @@ Joint classes (multiple groups sharing the same slot with the same teacher)
 are counted as a single logical unit.
 """
 
+from .assignment_store import index_of
 from .base import Restriction
 
 
@@ -18,14 +19,12 @@ class TeacherOneClassAtATime(Restriction):
               joint_lookup=None):
         if joint_lookup is None:
             joint_lookup = {}
+        index = index_of(assignments)
 
         for teacher in teachers:
             for d in range(num_days):
                 for h in range(num_hours):
-                    slot_keys = [
-                        k for k in assignments
-                        if k[2] == teacher.id and k[3] == d and k[4] == h
-                    ]
+                    slot_keys = index.keys(teacher=teacher.id, day=d, hour=h)
                     if not slot_keys:
                         continue
 
@@ -62,14 +61,12 @@ class TeacherOneClassAtATime(Restriction):
         result = []
         if joint_lookup is None:
             joint_lookup = {}
+        index = index_of(assignments)
 
         for teacher in teachers:
             for d in range(num_days):
                 for h in range(num_hours):
-                    slot_keys = [
-                        k for k in assignments
-                        if k[2] == teacher.id and k[3] == d and k[4] == h
-                    ]
+                    slot_keys = index.keys(teacher=teacher.id, day=d, hour=h)
                     if not slot_keys:
                         continue
 
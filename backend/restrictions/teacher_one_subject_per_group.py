@@ -1,5 +1,6 @@
 """Ensure at most one teacher is assigned per group-subject combination."""
 
+from .assignment_store import index_of
 from .base import Restriction
 
 
@@ -21,6 +22,7 @@ class TeacherOneSubjectPerGroup(Restriction):
     def _apply_impl(self, model, assignments, teachers, groups, subjects,
                     diagnostic_mode=False):
         assumptions = []
+        index = index_of(assignments)
         for group in groups:
             course = group.split("-")[0]
             for subject in subjects:
@@ -30,13 +32,9 @@ class TeacherOneSubjectPerGroup(Restriction):
                 # Build per-teacher activity indicators
                 teacher_active = []
                 for teacher in teachers:
-                    teacher_vars = [
-                        assignments[key]
-                        for key in assignments
-                        if key[0] == group
-                        and key[1] == subject.id
-                        and key[2] == teacher.id
-                    ]
+                    teacher_vars = index.vars(
+                        group=group, subject=subject.id, teacher=teacher.id
+                    )
                     if not teacher_vars:
                         continue
 
@@ -7,6 +7,7 @@ hours. Invalid data is ignored so it never blocks the solver.
 
 import json
 
+from .assignment_store import index_of
 from .base import Restriction
 
 WEEKDAYS = ["Lunes", "Martes", "Miércoles", "Jueves", "Viernes"]  # For backward compatibility
@@ -22,6 +23,7 @@ class TeacherPreferredTimes(Restriction):
     def apply(self, model, assignments, teachers, num_days, num_hours):
         self.preference_terms = []
         seen_slots = set()
+        index = index_of(assignments)
 
         for teacher in teachers:
             prefs_raw = getattr(teacher, "preferences", None)
@@ -77,11 +79,7 @@ class TeacherPreferredTimes(Restriction):
                     if slot_key in seen_slots:
                         continue
 
-                    vars_for_slot = [
-                        assignments[key]
-                        for key in assignments
-                        if key[2] == teacher.id and key[3] == d and key[4] == h
-                    ]
+                    vars_for_slot = index.vars(teacher=teacher.id, day=d, hour=h)
                     if not vars_for_slot:
                         continue
 
@@ -12,9 +12,55 @@ hour indices are ignored.
 
 import json
 
+from .assignment_store import index_of
 from .base import Restriction
 
 
+def unavailable_slots(teacher, num_days, num_hours):
+    """Return the (day, hour) slots a teacher marked as unavailable, in order.
+
+    Invalid preferences, days without entries and out-of-range hours are
+    ignored.
+    """
+    prefs_raw = getattr(teacher, 'preferences', None)
+    if not prefs_raw:
+        return []
+
+    # preferences are stored as a JSON string in the DB routes
+    try:
+        prefs = json.loads(prefs_raw) if isinstance(prefs_raw, str) else prefs_raw
+    except Exception:
+        # malformed preferences; skip this teacher
+        return []
+
+    if not isinstance(prefs, dict):
+        return []
+
+    slots = []
+    # For each weekday index, find matching key in preferences.
+    for d in range(num_days):
+        # Preferences use numeric keys for day indices
+        entry = prefs.get(str(d)) or prefs.get(d)
+        if not entry:
+            continue
+
+        unavailable = entry.get('unavailable', [])
+
+        # Normalize and deduplicate hours
+        try:
+            hours = sorted({int(x) for x in unavailable})
+        except Exception:
+            # If conversion fails, skip
+            continue
+
+        for h in hours:
+            if h < 0 or h >= num_hours:
+                # out of range hour index; ignore
+                continue
+            slots.append((d, h))
+    return slots
+
+
 class TeacherUnavailableTimes(Restriction):
     """Prevent assigning teachers to hours they marked as unavailable.
 
@@ -31,57 +77,23 @@ class TeacherUnavailableTimes(Restriction):
     def _apply_impl(self, model, assignments, teachers, num_days, num_hours,
                     diagnostic_mode=False):
         assumptions = []
+        index = index_of(assignments)
         for teacher in teachers:
-            prefs_raw = getattr(teacher, 'preferences', None)
-            if not prefs_raw:
-                continue
-
-            # preferences are stored as a JSON string in the DB routes
-            try:
-                prefs = json.loads(prefs_raw) if isinstance(prefs_raw, str) else prefs_raw
-            except Exception:
-                # malformed preferences; skip this teacher
-                continue
-
-            if not isinstance(prefs, dict):
-                continue
-
             assume = None  # lazy creation for diagnostic mode
 
-            # For each weekday index, find matching key in preferences.
-            for d in range(num_days):
-                # Preferences use numeric keys for day indices
-                entry = prefs.get(str(d)) or prefs.get(d)
-                if not entry:
-                    continue
-
-                unavailable = entry.get('unavailable', [])
-
-                # Normalize and deduplicate hours
-                try:
-                    hours = sorted({int(x) for x in unavailable})
-                except Exception:
-                    # If conversion fails, skip
+            for d, h in unavailable_slots(teacher, num_days, num_hours):
+                # Collect all assignment vars for this teacher at day d and hour h
+                vars_for_slot = index.vars(teacher=teacher.id, day=d, hour=h)
+                if not vars_for_slot:
                     continue
 
-                for h in hours:
-                    if h < 0 or h >= num_hours:
-                        # out of range hour index; ignore
-                        continue
-
-                    # Collect all assignment vars for this teacher at day d and hour h
-                    vars_for_slot = [assignments[key] for key in assignments
-                                     if key[2] == teacher.id and key[3] == d and key[4] == h]
-                    if not vars_for_slot:
-                        continue
-
-                    if diagnostic_mode:
-                        if assume is None:
-                            assume = model.NewBoolVar(f"assume_unavail_{teacher.id}")
-                        model.Add(sum(vars_for_slot) == 0).OnlyEnforceIf(assume)
-                    else:
-                        # Force none of the vars to be selected at this timeslot
-                        model.Add(sum(vars_for_slot) == 0)
+                if diagnostic_mode:
+                    if assume is None:
+                        assume = model.NewBoolVar(f"assume_unavail_{teacher.id}")
+                    model.Add(sum(vars_for_slot) == 0).OnlyEnforceIf(assume)
+                else:
+                    # Force none of the vars to be selected at this timeslot
+                    model.Add(sum(vars_for_slot) == 0)
 
             if diagnostic_mode and assume is not None:
                 assumptions.append((assume, {
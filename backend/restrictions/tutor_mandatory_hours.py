@@ -6,6 +6,7 @@ and the last hour (day=num_days-1,hour=num_hours-1). This is a soft constraint
 added as preference terms in the objective, so it never causes infeasibility.
 """
 
+from .assignment_store import index_of
 from .base import Restriction
 
 try:
@@ -73,6 +74,7 @@ class TutorMandatoryHours(Restriction):
                     subject_ids_in_groups.update(set(sg.subject_ids))
 
         assumptions = []
+        index = index_of(assignments)
 
         for teacher in teachers:
             tutor_groups = normalize_tutor_groups(getattr(teacher, "tutor_groups", None))
@@ -86,21 +88,15 @@ class TutorMandatoryHours(Restriction):
 
                 first_vars = [
                     assignments[k]
-                    for k in assignments
-                    if k[0] == normalized
-                    and k[2] == teacher.id
-                    and k[3] == first_day
-                    and k[4] == first_hour
-                    and k[1] not in subject_ids_in_groups
+                    for k in index.keys(group=normalized, teacher=teacher.id,
+                                        day=first_day, hour=first_hour)
+                    if k[1] not in subject_ids_in_groups
                 ]
                 last_vars = [
                     assignments[k]
-                    for k in assignments
-                    if k[0] == normalized
-                    and k[2] == teacher.id
-                    and k[3] == last_day
-                    and k[4] == last_hour
-                    and k[1] not in subject_ids_in_groups
+                    for k in index.keys(group=normalized, teacher=teacher.id,
+                                        day=last_day, hour=last_hour)
+                    if k[1] not in subject_ids_in_groups
                 ]
 
                 has_constraints = bool(first_vars) or bool(last_vars)
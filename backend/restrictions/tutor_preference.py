@@ -4,6 +4,7 @@ This soft restriction rewards assignments where a teacher who is assigned as a t
 for a group teaches subjects in that same group, prioritizing them over other teachers.
 """
 
+from .assignment_store import index_of
 from .base import Restriction
 
 try:
@@ -65,6 +66,7 @@ class TutorPreference(Restriction):
             teachers: List of all teachers.
         """
         self.preference_terms = []
+        index = index_of(assignments)
 
         for teacher in teachers:
             tutor_groups = normalize_tutor_groups(getattr(teacher, "tutor_groups", None))
@@ -76,11 +78,9 @@ class TutorPreference(Restriction):
             for tutor_group in tutor_groups:
                 normalized_tutor_group = normalize_group_name(tutor_group)
 
-                tutor_group_assignments = [
-                    assignments[key]
-                    for key in assignments
-                    if key[0] == normalized_tutor_group and key[2] == teacher.id
-                ]
+                tutor_group_assignments = index.vars(
+                    group=normalized_tutor_group, teacher=teacher.id
+                )
 
                 if not tutor_group_assignments:
                     continue
@@ -0,0 +1,108 @@
+"""Persistent store of timetable generation results for unchanged inputs.
+
+Generating twice with the same data runs the same solve, and on infeasible
+data the same multi-minute diagnosis, to produce the same outcome. Each
+result is saved in the ``solve_results`` table under a key built from the
+model fingerprint (see ``model_cache.model_fingerprint``), the solver
+parameters and the locale of the diagnosis messages. A later run with a
+matching key reuses it instead of solving; callers pass ``force`` to bypass it.
+
+A result holds the CP-SAT status name, the active assignment keys of a
+feasible run or the diagnosis dict of a run without solution, and the
+timings of the run that produced it. Only the newest
+``RESULT_STORE_MAX_ENTRIES`` results are kept.
+"""
+
+import hashlib
+import json
+import logging
+from datetime import datetime
+
+from .logging_config import build_log_extra
+from .models import SolveResult
+
+
+logger = logging.getLogger(__name__)
+
+RESULT_STORE_MAX_ENTRIES = 20
+
+
+def _to_json(value):
+    # Diagnosis extras may hold sets or tuples
+    return json.dumps(value, default=sorted, ensure_ascii=False)
+
+
+def result_key(fingerprint, solver_params, locale):
+    """Return the store key of a run with these inputs and solver parameters."""
+    payload = {
+        "fingerprint": fingerprint,
+        "solver_params": solver_params or {},
+        "locale": locale,
+    }
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def load_result(session, key, task_id=None):
+    """Return the stored result for ``key`` as a dict (see ``SolveResult.to_dict``), or None."""
+    row = session.get(SolveResult, key)
+    if row is None:
+        return None
+    try:
+        result = row.to_dict()
+    except (ValueError, TypeError):
+        logger.exception(
+            "Ignoring unreadable stored result key=%s",
+            key,
+            extra=build_log_extra(task_id=task_id),
+        )
+        return None
+    logger.info(
+        "Found stored result key=%s status=%s created_at=%s",
+        key,
+        result["status"],
+        result["created_at"],
+        extra=build_log_extra(task_id=task_id),
+    )
+    return result
+
+
+def save_result(session, key, status, solution=None, diagnosis=None, timings=None,
+                task_id=None):
+    """Store the result of a run under ``key``, replacing any previous one.
+
+    Failures are logged and rolled back: the store is an optimization and
+    never fails the generation that produced the result.
+    """
+    try:
+        session.merge(SolveResult(
+            key=key,
+            status=status,
+            solution=_to_json(list(solution)) if solution is not None else None,
+            diagnosis=_to_json(diagnosis) if diagnosis is not None else None,
+            timings=_to_json(timings or {}),
+            created_at=datetime.now().isoformat(),
+        ))
+        session.flush()
+        stale = (
+            session.query(SolveResult.key)
+            .order_by(SolveResult.created_at.desc())
+            .offset(RESULT_STORE_MAX_ENTRIES)
+            .all()
+        )
+        if stale:
+            session.query(SolveResult).filter(
+                SolveResult.key.in_([k for (k,) in stale])
+            ).delete(synchronize_session=False)
+        session.commit()
+    except Exception:
+        session.rollback()
+        logger.exception("Failed to store result key=%s", key, extra=build_log_extra(task_id=task_id))
+        return
+    logger.info(
+        "Stored result key=%s status=%s evicted=%d",
+        key,
+        status,
+        len(stale),
+        extra=build_log_extra(task_id=task_id),
+    )
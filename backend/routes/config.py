@@ -3,6 +3,7 @@ import json
 import logging
 from ..models import Session, Config
 from ..schemas import ConfigSchema
+from ..solver_profiles import BUILTIN_SOLVER_PROFILES, available_solver_profiles, validate_solver_profile
 from ..translations import t
 
 config_bp = Blueprint('config_bp', __name__)
@@ -11,6 +12,37 @@ logger = logging.getLogger(__name__)
 DEFAULT_HOUR_NAMES = ["9:00", "10:00", "11:00", "12:00", "13:00"]
 
 
+def _validated_solver_settings(data, config):
+    """Validate solver profile fields of a config update.
+
+    Returns:
+        (profiles_json, profile_name) to store; each is None when the field is
+        not part of the update. Aborts with 400 on invalid input.
+    """
+    profiles_json = None
+    stored = json.loads(config.solver_profiles) if config and config.solver_profiles else {}
+    if 'solver_profiles' in data:
+        raw = data.get('solver_profiles') or {}
+        if not isinstance(raw, dict):
+            abort(400, description=t('errors.invalid_solver_profile', name='solver_profiles', error='must be an object'))
+        stored = {}
+        for name, params in raw.items():
+            try:
+                stored[name] = validate_solver_profile(params)
+            except ValueError as exc:
+                logger.warning("Config update rejected due to invalid solver profile name=%s", name)
+                abort(400, description=t('errors.invalid_solver_profile', name=name, error=str(exc)))
+        profiles_json = json.dumps(stored)
+
+    profile_name = None
+    if 'solver_profile' in data:
+        profile_name = data.get('solver_profile')
+        if profile_name is not None and profile_name not in BUILTIN_SOLVER_PROFILES and profile_name not in stored:
+            logger.warning("Config update rejected due to unknown solver profile name=%s", profile_name)
+            abort(400, description=t('errors.unknown_solver_profile', name=profile_name))
+    return profiles_json, profile_name
+
+
 @config_bp.route('/config', methods=['GET'])
 def get_config():
     logger.info("Fetching config")
@@ -45,6 +77,7 @@ def get_config():
 
     day_names = [t(f'day.{i}') for i in day_indices]
     cfg['day_names'] = day_names
+    cfg['solver_profiles'] = available_solver_profiles(config)
 
     result = ConfigSchema(**cfg).model_dump()
     session.close()
@@ -69,92 +102,102 @@ def set_config():
         abort(400, description=t('errors.duplicate_days'))
     
     session = Session()
-    config = session.query(Config).first()
-    if not config:
+    try:
+        config = session.query(Config).first()
+        solver_profiles_json, solver_profile = _validated_solver_settings(data, config)
+        if not config:
         
-        hour_names = data.get('hour_names') or []
+            hour_names = data.get('hour_names') or []
         
-        if len(hour_names) < data['classes_per_day']:
-            for i in range(len(hour_names), data['classes_per_day']):
-                hour_names.append(DEFAULT_HOUR_NAMES[i] if i < len(DEFAULT_HOUR_NAMES) else f"Hora {i+1}")
-        elif len(hour_names) > data['classes_per_day']:
-            hour_names = hour_names[:data['classes_per_day']]
-
-        day_indices = data.get('day_indices') or []
-        if not day_indices:
-            day_indices = list(range(data['days_per_week']))
-        elif len(day_indices) < data['days_per_week']:
-            for i in range(len(day_indices), data['days_per_week']):
-                day_indices.append(i)
-        elif len(day_indices) > data['days_per_week']:
-            day_indices = day_indices[:data['days_per_week']]
-
-        day_colors = data.get('day_colors')
-        disabled = data.get('disabled_restrictions')
-        config = Config(
-            classes_per_day=data['classes_per_day'],
-            days_per_week=data['days_per_week'],
-            hour_names=json.dumps(hour_names),
-            day_indices=json.dumps(day_indices),
-            day_colors=json.dumps(day_colors) if day_colors is not None else None,
-            disabled_restrictions=json.dumps(disabled) if disabled is not None else None,
-        )
-        session.add(config)
-        logger.info("Created config classes_per_day=%d days_per_week=%d", data['classes_per_day'], data['days_per_week'])
-    else:
-        config.classes_per_day = data['classes_per_day']
-        config.days_per_week = data['days_per_week']
-        hour_names = data.get('hour_names')
-        if hour_names is None:
-            
-            existing = json.loads(config.hour_names) if config.hour_names else []
-            if len(existing) < config.classes_per_day:
-                for i in range(len(existing), config.classes_per_day):
-                    existing.append(DEFAULT_HOUR_NAMES[i] if i < len(DEFAULT_HOUR_NAMES) else f"Hora {i+1}")
-            elif len(existing) > config.classes_per_day:
-                existing = existing[:config.classes_per_day]
-            config.hour_names = json.dumps(existing)
-        else:
-            
-            if len(hour_names) < config.classes_per_day:
-                for i in range(len(hour_names), config.classes_per_day):
+            if len(hour_names) < data['classes_per_day']:
+                for i in range(len(hour_names), data['classes_per_day']):
                     hour_names.append(DEFAULT_HOUR_NAMES[i] if i < len(DEFAULT_HOUR_NAMES) else f"Hora {i+1}")
-            elif len(hour_names) > config.classes_per_day:
-                hour_names = hour_names[:config.classes_per_day]
-            config.hour_names = json.dumps(hour_names)
-
-        day_indices = data.get('day_indices')
-        if day_indices is None:
-            existing = json.loads(config.day_indices) if config.day_indices else []
-            if not existing:
-                existing = list(range(config.days_per_week))
-            elif len(existing) < config.days_per_week:
-                for i in range(len(existing), config.days_per_week):
-                    existing.append(i)
-            elif len(existing) > config.days_per_week:
-                existing = existing[:config.days_per_week]
-            config.day_indices = json.dumps(existing)
-        else:
+            elif len(hour_names) > data['classes_per_day']:
+                hour_names = hour_names[:data['classes_per_day']]
+
+            day_indices = data.get('day_indices') or []
             if not day_indices:
-                day_indices = list(range(config.days_per_week))
-            elif len(day_indices) < config.days_per_week:
-                for i in range(len(day_indices), config.days_per_week):
+                day_indices = list(range(data['days_per_week']))
+            elif len(day_indices) < data['days_per_week']:
+                for i in range(len(day_indices), data['days_per_week']):
                     day_indices.append(i)
-            elif len(day_indices) > config.days_per_week:
-                day_indices = day_indices[:config.days_per_week]
-            config.day_indices = json.dumps(day_indices)
-
-        if 'day_colors' in data:
-            config.day_colors = json.dumps(data['day_colors'])
-        if 'disabled_restrictions' in data:
-            config.disabled_restrictions = json.dumps(data['disabled_restrictions'])
-        logger.info("Updated existing config classes_per_day=%d days_per_week=%d", config.classes_per_day, config.days_per_week)
-
-    session.commit()
-    cfg_dict = config.to_dict()
-    day_names = [t(f'day.{i}') for i in cfg_dict.get('day_indices', [])]
-    cfg_dict['day_names'] = day_names
-    result = ConfigSchema(**cfg_dict).model_dump()
-    session.close()
+            elif len(day_indices) > data['days_per_week']:
+                day_indices = day_indices[:data['days_per_week']]
+
+            day_colors = data.get('day_colors')
+            disabled = data.get('disabled_restrictions')
+            config = Config(
+                classes_per_day=data['classes_per_day'],
+                days_per_week=data['days_per_week'],
+                hour_names=json.dumps(hour_names),
+                day_indices=json.dumps(day_indices),
+                day_colors=json.dumps(day_colors) if day_colors is not None else None,
+                disabled_restrictions=json.dumps(disabled) if disabled is not None else None,
+                solver_profiles=solver_profiles_json,
+                solver_profile=solver_profile,
+            )
+            session.add(config)
+            logger.info("Created config classes_per_day=%d days_per_week=%d", data['classes_per_day'], data['days_per_week'])
+        else:
+            config.classes_per_day = data['classes_per_day']
+            config.days_per_week = data['days_per_week']
+            hour_names = data.get('hour_names')
+            if hour_names is None:
+            
+                existing = json.loads(config.hour_names) if config.hour_names else []
+                if len(existing) < config.classes_per_day:
+                    for i in range(len(existing), config.classes_per_day):
+                        existing.append(DEFAULT_HOUR_NAMES[i] if i < len(DEFAULT_HOUR_NAMES) else f"Hora {i+1}")
+                elif len(existing) > config.classes_per_day:
+                    existing = existing[:config.classes_per_day]
+                config.hour_names = json.dumps(existing)
+            else:
+            
+                if len(hour_names) < config.classes_per_day:
+                    for i in range(len(hour_names), config.classes_per_day):
+                        hour_names.append(DEFAULT_HOUR_NAMES[i] if i < len(DEFAULT_HOUR_NAMES) else f"Hora {i+1}")
+                elif len(hour_names) > config.classes_per_day:
+                    hour_names = hour_names[:config.classes_per_day]
+                config.hour_names = json.dumps(hour_names)
+
+            day_indices = data.get('day_indices')
+            if day_indices is None:
+                existing = json.loads(config.day_indices) if config.day_indices else []
+                if not existing:
+                    existing = list(range(config.days_per_week))
+                elif len(existing) < config.days_per_week:
+                    for i in range(len(existing), config.days_per_week):
+                        existing.append(i)
+                elif len(existing) > config.days_per_week:
+                    existing = existing[:config.days_per_week]
+                config.day_indices = json.dumps(existing)
+            else:
+                if not day_indices:
+                    day_indices = list(range(config.days_per_week))
+                elif len(day_indices) < config.days_per_week:
+                    for i in range(len(day_indices), config.days_per_week):
+                        day_indices.append(i)
+                elif len(day_indices) > config.days_per_week:
+                    day_indices = day_indices[:config.days_per_week]
+                config.day_indices = json.dumps(day_indices)
+
+            if 'day_colors' in data:
+                config.day_colors = json.dumps(data['day_colors'])
+            if 'disabled_restrictions' in data:
+                config.disabled_restrictions = json.dumps(data['disabled_restrictions'])
+            if 'solver_profiles' in data:
+                config.solver_profiles = solver_profiles_json
+            if 'solver_profile' in data:
+                config.solver_profile = solver_profile
+            logger.info("Updated existing config classes_per_day=%d days_per_week=%d", config.classes_per_day, config.days_per_week)
+
+        session.commit()
+        cfg_dict = config.to_dict()
+        day_names = [t(f'day.{i}') for i in cfg_dict.get('day_indices', [])]
+        cfg_dict['day_names'] = day_names
+        cfg_dict['solver_profiles'] = available_solver_profiles(config)
+        result = ConfigSchema(**cfg_dict).model_dump()
+    finally:
+        session.close()
     logger.info("Config update completed")
     return jsonify(result)
@@ -1,15 +1,16 @@
-from flask import Blueprint, request, jsonify, Response, abort
+from flask import Blueprint, request, jsonify, Response, abort, stream_with_context
+from pydantic import ValidationError
 from sqlalchemy.orm import joinedload
 import json
 import logging
+import zlib
 from ..populate_db import init_config
 from ..translations import t
 from ..models import (
     Session,
     teacher_subject,
     subjectgroup_subject,
-    Base,
-    ENGINE,
+    active_engine,
     TimeSlotAssignment,
     Timeslot,
     Teacher,
@@ -28,26 +29,53 @@ from .. import export_import as shared_export_import
 export_import_bp = Blueprint("export_import", __name__)
 logger = logging.getLogger(__name__)
 
+EXPORT_GZIP_LEVEL = 6
+
+
+def _gzip_chunks(chunks):
+    """Compress a stream of byte chunks into one gzip stream."""
+    compressor = zlib.compressobj(EXPORT_GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
 
 @export_import_bp.route("/export", methods=["GET"])
 def export_json():
+    """Stream the whole database as a JSON document.
+
+    The document is sent in chunks while it is read (see
+    ``export_import.iter_export_json``), gzip-compressed when the client
+    accepts it.
+    """
+    # Bound to the selected scenario now; the body is produced after returning
     session = Session()
     logger.info("Export request started")
-    try:
-        data = shared_export_import.dump_db(session)
-        json_str = json.dumps(data, indent=2, ensure_ascii=False)
-        headers = {
-            "Content-Type": "application/json; charset=utf-8",
-            "Content-Disposition": "attachment; filename=agenda_export.json",
-            "Cache-Control": "no-store, no-cache, must-revalidate, max-age=0",
-            "Pragma": "no-cache",
-            "Expires": "0",
-        }
-        # Return explicit 200 to avoid 304 responses from intermediate caches
-        logger.info("Export request completed")
-        return Response(json_str, headers=headers, status=200)
-    finally:
-        session.close()
+
+    def generate():
+        try:
+            for chunk in shared_export_import.iter_export_json(session):
+                yield chunk.encode("utf-8")
+            logger.info("Export request completed")
+        finally:
+            session.close()
+
+    headers = {
+        "Content-Type": "application/json; charset=utf-8",
+        "Content-Disposition": "attachment; filename=agenda_export.json",
+        "Cache-Control": "no-store, no-cache, must-revalidate, max-age=0",
+        "Pragma": "no-cache",
+        "Expires": "0",
+        "Vary": "Accept-Encoding",
+    }
+    body = generate()
+    if "gzip" in request.accept_encodings:
+        headers["Content-Encoding"] = "gzip"
+        body = _gzip_chunks(body)
+    # Return explicit 200 to avoid 304 responses from intermediate caches
+    return Response(stream_with_context(body), headers=headers, status=200)
 
 
 @export_import_bp.route("/import", methods=["POST"])
@@ -70,31 +98,20 @@ def import_json():
         logger.warning("Import payload parsing failed: %s", str(e))
         abort(400, description=t("errors.json_parse_error", error=str(e)))
 
-    # Recreate schema (drop and create) to ensure clean import
+    # Validated and staged before the database is touched; swapped in atomically
     try:
-        Base.metadata.drop_all(ENGINE)
-        Base.metadata.create_all(ENGINE)
-    except Exception as e:
-        logger.warning("Schema recreation failed before import: %s", str(e))
-
-    try:
-        session = Session()
-        try:
-            shared_export_import.import_payload(session, payload)
-            session.commit()
-            logger.info("Import request completed successfully")
-            return jsonify(
-                {"status": "ok", "message": t("success.import_completed")}
-            ), 200
-        except Exception as e:
-            session.rollback()
-            logger.exception("Import request failed during transaction")
-            abort(500, description=t("errors.import_failed", error=str(e)))
-        finally:
-            session.close()
+        shared_export_import.import_database(payload, active_engine())
+    except ValidationError as e:
+        logger.warning("Import payload validation failed: %s", str(e))
+        return jsonify({
+            "error": t("errors.import_invalid"),
+            "details": e.errors(include_url=False, include_context=False),
+        }), 400
     except Exception as e:
-        logger.exception("Import request failed before transaction initialization")
+        logger.exception("Import request failed")
         abort(500, description=t("errors.import_failed", error=str(e)))
+    logger.info("Import request completed successfully")
+    return jsonify({"status": "ok", "message": t("success.import_completed")}), 200
 
 
 @export_import_bp.route("/clear-all", methods=["DELETE"])
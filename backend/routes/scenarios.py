@@ -0,0 +1,77 @@
+import logging
+
+from flask import Blueprint, jsonify, request
+
+from .. import scenarios
+from ..job_queue import job_queue
+from ..logging_config import build_log_extra
+from ..translations import t
+
+
+scenarios_bp = Blueprint('scenarios_bp', __name__)
+logger = logging.getLogger(__name__)
+
+
+@scenarios_bp.route('/scenarios', methods=['GET'])
+def list_scenarios():
+    """List the stored scenarios with their running or latest generation."""
+    result = []
+    for scenario in scenarios.list_scenarios():
+        name = scenario["name"]
+        scenario["task"] = job_queue.get_current_status(name) or job_queue.get_latest_status(name)
+        result.append(scenario)
+    return jsonify(result), 200
+
+
+@scenarios_bp.route('/scenarios', methods=['POST'])
+def create_scenario():
+    """Clone the live database into a new scenario.
+
+    JSON body: ``{"name": "extra-teacher", "source": "other-scenario"}``;
+    without ``source`` the scenario is a copy of the live database.
+    """
+    body = request.get_json(silent=True) or {}
+    name = body.get("name")
+    source = body.get("source")
+    try:
+        created = scenarios.create_scenario(name, source=source)
+    except ValueError:
+        return jsonify({'error': t('errors.scenario_invalid_name', name=name)}), 400
+    except FileExistsError:
+        return jsonify({'error': t('errors.scenario_exists', name=name)}), 409
+    except FileNotFoundError:
+        return jsonify({'error': t('errors.scenario_not_found', name=source)}), 404
+    return jsonify(created), 201
+
+
+def _busy(name):
+    """Return a 409 response if a generation is queued or running for ``name``."""
+    if job_queue.get_current_status(name):
+        return jsonify({'error': t('errors.scenario_busy', name=name or 'live')}), 409
+    return None
+
+
+@scenarios_bp.route('/scenarios/<name>', methods=['DELETE'])
+def delete_scenario(name):
+    busy = _busy(name)
+    if busy:
+        return busy
+    try:
+        scenarios.delete_scenario(name)
+    except (ValueError, FileNotFoundError):
+        return jsonify({'error': t('errors.scenario_not_found', name=name)}), 404
+    return jsonify({'status': 'ok', 'message': t('success.scenario_deleted', name=name)}), 200
+
+
+@scenarios_bp.route('/scenarios/<name>/promote', methods=['POST'])
+def promote_scenario(name):
+    """Replace the live data with the scenario, keeping the scenario itself."""
+    busy = _busy(name) or _busy(None)
+    if busy:
+        return busy
+    try:
+        scenarios.promote_scenario(name)
+    except (ValueError, FileNotFoundError):
+        return jsonify({'error': t('errors.scenario_not_found', name=name)}), 404
+    logger.info("Scenario promoted through the API name=%s", name, extra=build_log_extra())
+    return jsonify({'status': 'ok', 'message': t('success.scenario_promoted', name=name)}), 200
@@ -1,14 +1,24 @@
-import threading
+import json
 import logging
+import time
 from datetime import datetime
 
-from flask import Blueprint, jsonify, request, Response
+from flask import Blueprint, jsonify, request, Response, send_file, stream_with_context
+from sqlalchemy import func
 from ..translations import t
-from ..models import Session as DbSession, TimeSlotAssignment, SchedulerError, SupportAssignment, TeacherFixedSlotLabel
+from ..models import (
+    Session as DbSession, Config, Course, Teacher, TimeSlotAssignment, SchedulerError,
+    SupportAssignment, TeacherFixedSlotLabel,
+)
 from ..timetable import print_markdown_timetable_from_assignments, print_markdown_timetable_per_teacher
 from ..markdown_utils import align_tables_in_text
-from ..scheduler import create_timetable
-from ..task_manager import task_manager
+from ..excel_jobs import excel_exports
+from ..job_queue import TERMINAL_STATUSES, job_queue
+from ..scenarios import current_scenario, use_scenario
+from ..solver_jobs import clear_scheduler_error
+from ..solver_profiles import available_solver_profiles
+from ..view_cache import view_cache, view_etag, view_key
+from ..worker_pool import worker_pool
 from ..logging_config import build_log_extra
 from ..translations import get_current_locale
 
@@ -16,174 +26,208 @@ from ..translations import get_current_locale
 timetable_bp = Blueprint('timetable_bp', __name__)
 logger = logging.getLogger(__name__)
 
+# Server-sent events: how often the stream checks for new job events, and
+# how long it stays silent before sending a keep-alive comment.
+EVENT_POLL_SECONDS = 0.5
+EVENT_KEEPALIVE_SECONDS = 15.0
+# Delay before the browser reconnects a dropped stream.
+EVENT_RETRY_MS = 2000
 
-def _persist_scheduler_error(message, details):
-    """Save or update the single-row scheduler error in the database."""
-    session = DbSession()
-    try:
-        error = session.query(SchedulerError).filter_by(id=1).first()
-        if error:
-            error.message = message
-            error.details = details
-            error.created_at = datetime.now().isoformat()
-        else:
-            error = SchedulerError(
-                id=1,
-                message=message,
-                details=details,
-                created_at=datetime.now().isoformat(),
-            )
-            session.add(error)
-        session.commit()
-        logger.info("Persisted scheduler error: %s", message)
-    except Exception as e:
-        logger.exception("Failed to persist scheduler error: %s", e)
-        session.rollback()
-    finally:
-        session.close()
 
+def _cached_view(view, params, render, conditional=True):
+    """Respond with a rendered timetable view, from the view cache when possible.
+
+    ``render(session)`` returns the ``(body, mimetype)`` of the view; it only
+    runs when the cache has no entry for the current data generation. The
+    response carries an ETag, and with ``conditional`` a matching
+    ``If-None-Match`` gets a 304 without rendering.
 
-def _clear_scheduler_error():
-    """Remove the persisted scheduler error from the database."""
+    Returns:
+        The Response, or None when no timetable is stored.
+    """
     session = DbSession()
     try:
-        session.query(SchedulerError).filter_by(id=1).delete()
-        session.commit()
-        logger.info("Cleared persisted scheduler error")
-    except Exception as e:
-        logger.exception("Failed to clear scheduler error: %s", e)
-        session.rollback()
+        key = view_key(session, view, params)
+        etag = view_etag(key)
+        if conditional and request.if_none_match.contains(etag):
+            response = Response(status=304)
+            response.set_etag(etag)
+            return response
+        cached = view_cache.get(key)
+        if cached is None:
+            if not session.query(TimeSlotAssignment).first():
+                return None
+            cached = render(session)
+            view_cache.put(key, cached)
+            logger.debug("Rendered timetable view=%s", view, extra=build_log_extra())
     finally:
         session.close()
+    body, mimetype = cached
+    response = Response(body, mimetype=mimetype)
+    response.set_etag(etag)
+    # Cacheable, but revalidated on every use
+    response.headers["Cache-Control"] = "no-cache"
+    return response
 
 
-def _run_solver_in_background(task_id, locale):
-    """Run the OR-Tools solver in a background thread.
-    Checks cancellation before/after solve to avoid unnecessary DB writes.
-    """
-    if task_manager.is_cancelled(task_id):
-        logger.info("Skipping solver start because task was already cancelled", extra=build_log_extra(task_id=task_id))
-        return
-
-    def progress_callback(phase, phase_details):
-        task_manager.update_progress(task_id, phase, phase_details)
-        logger.info(
-            "Task progress updated phase=%s details_length=%d",
-            phase,
-            len(phase_details or ""),
-            extra=build_log_extra(task_id=task_id),
-        )
+def _parse_index_ranges(value):
+    """Parse ``"0-2,4"`` into ``[(0, 2), (4, 4)]``; None when absent.
 
-    session = DbSession()
-    logger.info("Background solver thread started", extra=build_log_extra(task_id=task_id))
-    try:
-        timetable_result = create_timetable(
-            session,
-            progress_callback=progress_callback,
-            task_id=task_id,
-            locale=locale,
-        )
-
-        if task_manager.is_cancelled(task_id):
-            logger.info("Task cancelled after solver completion", extra=build_log_extra(task_id=task_id))
-            return
-
-        if timetable_result:
-            task_manager.fail_task(
-                task_id,
-                error=t('timetable.generate_failed'),
-                details=timetable_result,
-            )
-            _persist_scheduler_error(
-                message=t('timetable.generate_failed'),
-                details=timetable_result,
-            )
-            logger.warning("Task failed with diagnostic output", extra=build_log_extra(task_id=task_id))
-        else:
-            task_manager.complete_task(task_id)
-            _clear_scheduler_error()
-            logger.info("Task completed successfully", extra=build_log_extra(task_id=task_id))
-    except Exception as e:
-        if not task_manager.is_cancelled(task_id):
-            task_manager.fail_task(
-                task_id,
-                error=t('errors.timetable_generation_error', error=str(e)),
-            )
-            _persist_scheduler_error(
-                message=t('errors.timetable_generation_error', error=str(e)),
-                details=None,
-            )
-            logger.exception("Task failed with unexpected exception", extra=build_log_extra(task_id=task_id))
-    finally:
-        try:
-            session.close()
-        except Exception:
-            pass
-        logger.info("Background solver thread finished", extra=build_log_extra(task_id=task_id))
+    Raises:
+        ValueError: if an item is not a non-negative integer or range.
+    """
+    if value is None or value.strip() == "":
+        return None
+    ranges = set()
+    for item in value.split(","):
+        first, _, last = item.strip().partition("-")
+        start = int(first)
+        end = int(last) if last else start
+        if start < 0 or end < start:
+            raise ValueError(item)
+        ranges.add((start, end))
+    return sorted(ranges)
+
+
+def _expand_index_ranges(ranges, limit):
+    """Indices covered by ``ranges`` below ``limit``, so a range never expands
+    past the domain being filtered; None when there is no filter."""
+    if ranges is None:
+        return None
+    indices = set()
+    for start, end in ranges:
+        indices.update(range(start, min(end + 1, limit)))
+    return sorted(indices)
+
+
+def _grid_filter_limits(session):
+    """Upper bounds (exclusive) of the day positions and teacher ids."""
+    config = session.query(Config).first()
+    max_teacher_id = session.query(func.max(Teacher.id)).scalar()
+    return (config.days_per_week if config else 5), (max_teacher_id or 0) + 1
 
 
 @timetable_bp.route('/timetable/teacher-grid', methods=['GET'])
 def get_teacher_grid():
-    session = DbSession()
-    existing_assignments = session.query(TimeSlotAssignment).first()
-    if not existing_assignments:
-        session.close()
+    """Teacher grid of the stored timetable.
+
+    Query parameters: ``format=compact`` for the sparse encoding of
+    ``get_teacher_grid_compact``; ``days`` (day positions, e.g. ``0-2,4``) and
+    ``teachers`` (teacher ids, e.g. ``3,7``) restrict the grid.
+    """
+    from ..timetable import get_teacher_grid_compact, get_teacher_grid_data
+
+    compact = request.args.get('format') == 'compact'
+    try:
+        day_ranges = _parse_index_ranges(request.args.get('days'))
+        teacher_ranges = _parse_index_ranges(request.args.get('teachers'))
+    except ValueError:
+        return jsonify({'error': t('errors.invalid_grid_filter')}), 400
+
+    build = get_teacher_grid_compact if compact else get_teacher_grid_data
+
+    def render(session):
+        # Clamped only on a cache miss: a revalidation costs no extra queries
+        day_limit, teacher_limit = _grid_filter_limits(session)
+        days = _expand_index_ranges(day_ranges, day_limit)
+        teacher_ids = _expand_index_ranges(teacher_ranges, teacher_limit)
+        return jsonify(build(session, days=days, teacher_ids=teacher_ids)).get_data(), "application/json"
+
+    response = _cached_view(
+        "teacher-grid", {"compact": compact, "days": day_ranges, "teachers": teacher_ranges}, render,
+    )
+    if response is None:
         return jsonify({'error': t('timetable.no_schedule')}), 404
-    from ..timetable import get_teacher_grid_data
-    data = get_teacher_grid_data(session)
-    session.close()
-    return jsonify(data), 200
+    return response
+
+
+def _render_markdown(session):
+    courses_markdown = print_markdown_timetable_from_assignments(session)
+    teachers_markdown = print_markdown_timetable_per_teacher(session)
+    return courses_markdown + "\n\n" + teachers_markdown, "text/plain"
 
 
 @timetable_bp.route('/timetable', methods=['GET'])
 def get_timetable_markdown():
-    session = DbSession()
-
-    existing_assignments = session.query(TimeSlotAssignment).first()
-    if not existing_assignments:
-        session.close()
+    response = _cached_view("markdown", None, _render_markdown)
+    if response is None:
         return jsonify({'error': t('timetable.no_schedule')}), 404
+    return response
+
+
+XLSX_MIMETYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
 
-    courses_markdown = print_markdown_timetable_from_assignments(session)
-    teachers_markdown = print_markdown_timetable_per_teacher(session)
-    markdown = courses_markdown + "\n\n" + teachers_markdown
-    session.close()
-    return markdown, 200, {'Content-Type': 'text/plain; charset=utf-8'}
+
+def _excel_filename():
+    return f"horario-{datetime.now():%Y%m%d}.xlsx"
 
 
 @timetable_bp.route('/timetable/excel', methods=['POST'])
 def get_timetable_excel():
     """Generate an ``.xlsx`` workbook with sheets per selected course
-    and teacher, preserving cell colours."""
+    and teacher, preserving cell colours.
+
+    With ``"async": true`` the workbook is built in the background: the
+    response is the export status, and the file is downloaded from
+    ``/timetable/excel/<export_id>/download`` once it succeeded.
+    """
     body = request.get_json(silent=True) or {}
-    course_lines = body.get("course_lines")
-    teacher_names = body.get("teacher_names")
-    teacher_grouped = body.get("teacher_grouped", True)
+    params = {
+        "course_lines": body.get("course_lines"),
+        "teacher_names": body.get("teacher_names"),
+        "teacher_grouped": body.get("teacher_grouped", True),
+    }
+    if body.get("async"):
+        return _start_excel_export(params)
+
+    def render(session):
+        from ..excel_export import generate_excel_timetable
+
+        buffer = generate_excel_timetable(session, **params)
+        return buffer.getvalue(), XLSX_MIMETYPE
+
+    # A POST is never answered with 304: the ETag only identifies the workbook
+    response = _cached_view("excel", params, render, conditional=False)
+    if response is None:
+        return jsonify({"error": t("timetable.no_schedule")}), 404
+    response.headers["Content-Disposition"] = f'attachment; filename="{_excel_filename()}"'
+    return response
+
+
+def _excel_export_response(status):
+    status = dict(status, download_url=f"/timetable/excel/{status['export_id']}/download")
+    return jsonify(status), 200 if status["status"] != "running" else 202
 
+
+def _start_excel_export(params):
     session = DbSession()
-    if not session.query(TimeSlotAssignment).first():
+    try:
+        if not session.query(TimeSlotAssignment).first():
+            return jsonify({"error": t("timetable.no_schedule")}), 404
+        key = view_key(session, "excel", params)
+    finally:
         session.close()
-        return jsonify({"error": t("timetable.no_schedule")}), 404
+    status = excel_exports.submit(key, params, scenario=current_scenario(), locale=get_current_locale())
+    return _excel_export_response(status)
 
-    from ..excel_export import generate_excel_timetable
 
-    buffer = generate_excel_timetable(
-        session,
-        course_lines=course_lines,
-        teacher_names=teacher_names,
-        teacher_grouped=teacher_grouped,
-    )
-    session.close()
+@timetable_bp.route('/timetable/excel/<export_id>', methods=['GET'])
+def get_excel_export_status(export_id):
+    status = excel_exports.get_status(export_id)
+    if status is None:
+        return jsonify({"error": t("errors.export_not_found")}), 404
+    return _excel_export_response(status)
 
-    filename = f"horario-{datetime.now():%Y%m%d}.xlsx"
-    return Response(
-        buffer.getvalue(),
-        mimetype=(
-            "application/vnd.openxmlformats-officedocument"
-            ".spreadsheetml.sheet"
-        ),
-        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
-    )
+
+@timetable_bp.route('/timetable/excel/<export_id>/download', methods=['GET'])
+def download_excel_export(export_id):
+    status = excel_exports.get_status(export_id)
+    if status is None:
+        return jsonify({"error": t("errors.export_not_found")}), 404
+    path = excel_exports.file_path(export_id)
+    if path is None:
+        return jsonify(dict(status, error=status["error"] or t("errors.export_not_ready"))), 409
+    return send_file(path, mimetype=XLSX_MIMETYPE, as_attachment=True, download_name=_excel_filename())
 
 
 @timetable_bp.route('/timetable/exists', methods=['GET'])
@@ -212,36 +256,129 @@ def get_persisted_error():
         return jsonify({"error": "Failed to read persisted error"}), 500
 
 
-@timetable_bp.route('/timetable', methods=['POST'])
-def generate_timetable():
-    """Start asynchronous timetable generation. Returns existing running task when present."""
-    running_status = task_manager.get_current_status()
-    if running_status:
-        task_id = running_status.get("task_id")
+def _unknown_solver_profile(name):
+    """400 response when ``name`` is neither a built-in nor a stored solver profile; None otherwise."""
+    if name is None:
+        return None
+    session = DbSession()
+    try:
+        profiles = available_solver_profiles(session.query(Config).first())
+    finally:
+        session.close()
+    if isinstance(name, str) and name in profiles:
+        return None
+    logger.warning("Timetable generation rejected due to unknown solver profile name=%s", name)
+    return jsonify({'error': t('errors.unknown_solver_profile', name=name)}), 400
+
+
+def _start_solver_task(solve_options):
+    """Queue a solver job unless one is already queued or running for the selected scenario."""
+    scenario = current_scenario()
+    clear_scheduler_error()
+    locale = get_current_locale()
+    task_id = job_queue.create_task(solve_options, locale=locale, scenario=scenario)
+    if task_id is None:
+        # The active job may have finished since: report it anyway
+        running_status = job_queue.get_current_status(scenario) or job_queue.get_latest_status(scenario)
         logger.info(
             "Timetable generation requested while another task is running",
-            extra=build_log_extra(task_id=task_id),
+            extra=build_log_extra(task_id=running_status.get("task_id")),
         )
         return jsonify(running_status), 202
 
-    _clear_scheduler_error()
-    task_id = task_manager.create_task()
-    locale = get_current_locale()
-    logger.info("Timetable generation task created locale=%s", locale, extra=build_log_extra(task_id=task_id))
-    thread = threading.Thread(
-        target=_run_solver_in_background,
-        args=(task_id, locale),
-        daemon=True,
+    worker_pool.notify()
+    logger.info(
+        "Timetable generation job queued locale=%s scenario=%s options=%s",
+        locale,
+        scenario,
+        solve_options,
+        extra=build_log_extra(task_id=task_id),
     )
-    thread.start()
-    logger.info("Timetable generation thread started", extra=build_log_extra(task_id=task_id))
-    return jsonify(task_manager.get_status(task_id)), 202
+    return jsonify(job_queue.get_status(task_id)), 202
+
+
+@timetable_bp.route('/timetable', methods=['POST'])
+def generate_timetable():
+    """Start asynchronous timetable generation. Returns existing running task when present.
+
+    Optional JSON body: ``{"warm_start": bool, "keep_hint": bool}`` to start the
+    solver from the currently stored timetable, and ``"solver_profile": name``
+    to run a solver profile other than the one selected in the config.
+    ``"persist_best_solution": true`` saves the best timetable found so far
+    while the solver runs, so a cancelled run still leaves a timetable.
+    A run with the same data and solver profile as a stored one reuses its
+    timetable or diagnosis; ``"force": true`` solves again.
+    """
+    body = request.get_json(silent=True) or {}
+    rejected = _unknown_solver_profile(body.get("solver_profile"))
+    if rejected is not None:
+        return rejected
+    return _start_solver_task({
+        "warm_start": bool(body.get("warm_start", False)),
+        "keep_hint": bool(body.get("keep_hint", False)),
+        "solver_profile": body.get("solver_profile"),
+        "persist_best_solution": bool(body.get("persist_best_solution", False)),
+        "force": bool(body.get("force", False)),
+    })
+
+
+@timetable_bp.route('/timetable/resolve', methods=['POST'])
+def resolve_timetable_subset():
+    """Re-solve only some groups and/or teachers, keeping the rest of the stored timetable.
+
+    JSON body: ``{"groups": ["1º-A", ...], "teachers": [teacher_id, ...]}``;
+    groups are course lines and teachers are the ids of existing teachers.
+    Every assignment outside that scope is frozen to the stored timetable and
+    only the timeslots that change are written back.
+    """
+    body = request.get_json(silent=True)
+    if not isinstance(body, dict):
+        body = {}
+    groups = body.get("groups") or []
+    teachers = body.get("teachers") or []
+    if not groups and not teachers:
+        return jsonify({'error': t('errors.resolve_scope_required')}), 400
+    if (
+        not isinstance(groups, list) or not isinstance(teachers, list)
+        or not all(isinstance(group, str) for group in groups)
+        # bool is an int subclass, but true/false are not teacher ids
+        or not all(isinstance(teacher, int) and not isinstance(teacher, bool) for teacher in teachers)
+    ):
+        return jsonify({'error': t('errors.invalid_resolve_scope')}), 400
+
+    session = DbSession()
+    try:
+        if session.query(TimeSlotAssignment).first() is None:
+            return jsonify({'error': t('timetable.no_schedule')}), 404
+        known_groups = {
+            f"{course_id}-{chr(ord('A') + line)}"
+            for course_id, num_lines in session.query(Course.id, Course.num_lines)
+            for line in range(num_lines)
+        }
+        unknown = set(groups) - known_groups
+        if teachers:
+            found = {row[0] for row in session.query(Teacher.id).filter(Teacher.id.in_(set(teachers)))}
+            unknown |= {str(teacher) for teacher in set(teachers) - found}
+    finally:
+        session.close()
+    if unknown:
+        return jsonify({'error': t('errors.invalid_resolve_scope_items', items=", ".join(sorted(unknown)))}), 400
+    rejected = _unknown_solver_profile(body.get("solver_profile"))
+    if rejected is not None:
+        return rejected
+
+    return _start_solver_task({
+        "free_groups": set(groups),
+        "free_teachers": set(teachers),
+        "solver_profile": body.get("solver_profile"),
+    })
 
 
 @timetable_bp.route('/timetable/status/current', methods=['GET'])
 def get_current_task_status():
     """Poll current active task, or latest known task if nothing is running."""
-    status = task_manager.get_current_status() or task_manager.get_latest_status()
+    scenario = current_scenario()
+    status = job_queue.get_current_status(scenario) or job_queue.get_latest_status(scenario)
     if status is None:
         logger.debug("Current task status requested with no known tasks", extra=build_log_extra())
         return jsonify({"status": "idle", "task_id": None}), 200
@@ -257,7 +394,7 @@ def get_current_task_status():
 @timetable_bp.route('/timetable/status/<task_id>', methods=['GET'])
 def get_task_status(task_id):
     """Poll task status. Returns running/success/error/cancelled."""
-    status = task_manager.get_status(task_id)
+    status = job_queue.get_status(task_id)
     if status is None:
         logger.warning("Task status requested for unknown task", extra=build_log_extra(task_id=task_id))
         return jsonify({"error": "Task not found"}), 404
@@ -265,14 +402,91 @@ def get_task_status(task_id):
     return jsonify(status), 200
 
 
+def _format_event(event):
+    data = json.dumps(event["data"], ensure_ascii=False)
+    return f"id: {event['id']}\nevent: {event['event']}\ndata: {data}\n\n"
+
+
+@timetable_bp.route('/timetable/<task_id>/events', methods=['GET'])
+def stream_task_events(task_id):
+    """Stream the events of a task as server-sent events.
+
+    Events: ``status`` (status changes, with error and details on failure),
+    ``phase`` (new phase and its details), ``phase_append`` (text appended
+    to the details of the current phase), ``solution`` (improving solution)
+    and ``build_profile``/``solver_profile``. Their data updates the payload
+    of ``GET /timetable/status/<task_id>``. A reconnecting client sends the
+    ``Last-Event-ID`` header (or ``?last_event_id=``) to resume. The stream
+    ends after the final status event.
+    """
+    if job_queue.get_status(task_id) is None:
+        return jsonify({"error": "Task not found"}), 404
+    raw_last_id = request.headers.get("Last-Event-ID") or request.args.get("last_event_id") or 0
+    try:
+        last_event_id = int(raw_last_id)
+    except ValueError:
+        last_event_id = 0
+
+    def generate(last_event_id):
+        yield f"retry: {EVENT_RETRY_MS}\n\n"
+        last_sent = time.monotonic()
+        while True:
+            events = job_queue.events_since(task_id, last_event_id)
+            for event in events:
+                yield _format_event(event)
+                last_event_id = event["id"]
+                if event["event"] == "status" and event["data"].get("status") in TERMINAL_STATUSES:
+                    return
+            if events:
+                last_sent = time.monotonic()
+                continue
+            status = job_queue.get_status(task_id)
+            if status is None or status["status"] in TERMINAL_STATUSES:
+                # Finished since the last read, resumed after the final
+                # event, or its events were pruned
+                for event in job_queue.events_since(task_id, last_event_id):
+                    yield _format_event(event)
+                return
+            if time.monotonic() - last_sent >= EVENT_KEEPALIVE_SECONDS:
+                yield ": keep-alive\n\n"
+                last_sent = time.monotonic()
+            time.sleep(EVENT_POLL_SECONDS)
+
+    logger.info("Task event stream opened last_event_id=%d", last_event_id, extra=build_log_extra(task_id=task_id))
+    return Response(
+        stream_with_context(generate(last_event_id)),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @timetable_bp.route('/timetable/<task_id>/cancel', methods=['POST'])
 def cancel_generation(task_id):
-    """Mark a running generation task as cancelled."""
-    task_manager.cancel_task(task_id)
+    """Cancel a queued generation task, or stop the worker running it."""
+    job_queue.cancel_task(task_id)
     logger.info("Task cancellation requested", extra=build_log_extra(task_id=task_id))
     return jsonify({"status": "cancelled"}), 200
 
 
+@timetable_bp.route('/timetable/<task_id>/retry', methods=['POST'])
+def retry_generation(task_id):
+    """Queue a failed or cancelled generation task again, with the same options."""
+    status = job_queue.get_status(task_id)
+    if status is None:
+        return jsonify({"error": "Task not found"}), 404
+    new_task_id = job_queue.retry_task(task_id)
+    if new_task_id is None:
+        running_status = job_queue.get_current_status(status["scenario"])
+        if running_status:
+            return jsonify(running_status), 202
+        return jsonify({'error': t('errors.task_not_retryable')}), 409
+    with use_scenario(status["scenario"]):
+        clear_scheduler_error()
+    worker_pool.notify()
+    logger.info("Task retry queued new_task_id=%s", new_task_id, extra=build_log_extra(task_id=task_id))
+    return jsonify(job_queue.get_status(new_task_id)), 202
+
+
 @timetable_bp.route('/timetable', methods=['DELETE'])
 def clear_assignments():
     """Delete all timetable assignments and persisted error."""
@@ -283,6 +497,6 @@ def clear_assignments():
     session.query(TeacherFixedSlotLabel).delete()
     session.commit()
     session.close()
-    _clear_scheduler_error()
+    clear_scheduler_error()
     logger.info("Timetable assignments, support assignments, teacher fixed slot labels, and persisted error cleared", extra=build_log_extra())
     return jsonify({'status': 'ok', 'message': t('timetable.assignments_cleared')}), 200
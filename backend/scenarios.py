@@ -0,0 +1,256 @@
+"""Named what-if scenarios stored as copies of the live database.
+
+A scenario is a separate SQLite file in the scenario directory, cloned from
+the live ``agenda.db`` (or from another scenario) with the SQLite backup
+API. Requests select a scenario with the ``X-Scenario`` header and every
+session they open (``models.Session``) is then bound to its database, so the
+usual routes edit and solve the scenario without touching the live
+timetable. Solver jobs record the scenario they belong to (see
+``job_queue``), and jobs of different scenarios run in parallel on the
+worker pool.
+
+``promote_scenario`` replaces the data of the live database with the one of
+a scenario in a single transaction. The ``jobs`` and ``job_events`` tables
+are left out: the job queue is shared by all scenarios and always lives in
+the live database.
+
+Set ``BACKEND_SCENARIO_DIR`` to choose the directory (default: ``scenarios``
+next to the live database).
+"""
+
+import contextlib
+import contextvars
+import logging
+import os
+import re
+import sqlite3
+import threading
+from datetime import datetime
+
+from .logging_config import build_log_extra
+from .models import ENGINE, Base, DataGeneration, Job, JobEvent, current_engine
+from .storage import create_sqlite_engine, migrate
+
+
+logger = logging.getLogger(__name__)
+
+SCENARIO_DIR_ENV = "BACKEND_SCENARIO_DIR"
+SCENARIO_SUFFIX = ".db"
+SCENARIO_NAME_RE = re.compile(r"^[A-Za-z0-9][A-Za-z0-9_-]{0,63}$")
+# Tables copied by neither clone nor promote. A clone starts its own data
+# generation, and promoting bumps the live one.
+LIVE_ONLY_TABLES = (Job.__tablename__, JobEvent.__tablename__, DataGeneration.__tablename__)
+
+_current_name = contextvars.ContextVar("current_scenario", default=None)
+_engines = {}
+_engines_lock = threading.Lock()
+
+
+def live_database_path():
+    return os.path.abspath(ENGINE.url.database)
+
+
+def scenario_dir():
+    directory = os.getenv(SCENARIO_DIR_ENV)
+    if not directory:
+        directory = os.path.join(os.path.dirname(live_database_path()), "scenarios")
+    return directory
+
+
+def validate_name(name):
+    """Raise ValueError unless ``name`` is a valid scenario name."""
+    if not isinstance(name, str) or not SCENARIO_NAME_RE.match(name):
+        raise ValueError(f"Invalid scenario name: {name!r}")
+    return name
+
+
+def scenario_path(name):
+    return os.path.join(scenario_dir(), validate_name(name) + SCENARIO_SUFFIX)
+
+
+def _existing_path(name):
+    path = scenario_path(name)
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Scenario not found: {name}")
+    return path
+
+
+def list_scenarios():
+    """Return ``[{name, size_bytes, modified_at}]`` of the stored scenarios, by name."""
+    directory = scenario_dir()
+    if not os.path.isdir(directory):
+        return []
+    scenarios = []
+    for filename in sorted(os.listdir(directory)):
+        name, suffix = os.path.splitext(filename)
+        if suffix != SCENARIO_SUFFIX or not SCENARIO_NAME_RE.match(name):
+            continue
+        stat = os.stat(os.path.join(directory, filename))
+        scenarios.append({
+            "name": name,
+            "size_bytes": stat.st_size,
+            "modified_at": datetime.fromtimestamp(stat.st_mtime).isoformat(),
+        })
+    return scenarios
+
+
+def create_scenario(name, source=None):
+    """Clone the live database (or scenario ``source``) into a new scenario.
+
+    Raises:
+        ValueError: invalid name.
+        FileExistsError: a scenario with this name exists.
+        FileNotFoundError: ``source`` does not exist.
+    """
+    path = scenario_path(name)
+    source_path = _existing_path(source) if source is not None else live_database_path()
+    if os.path.exists(path):
+        raise FileExistsError(f"Scenario already exists: {name}")
+    os.makedirs(scenario_dir(), exist_ok=True)
+
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    src = sqlite3.connect(source_path)
+    dst = sqlite3.connect(tmp_path)
+    try:
+        # Consistent snapshot even while the source is being written
+        src.backup(dst)
+        tables = {row[0] for row in dst.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        for table in LIVE_ONLY_TABLES:
+            if table in tables:
+                dst.execute(f'DELETE FROM "{table}"')
+        dst.commit()
+    except Exception:
+        dst.close()
+        os.remove(tmp_path)
+        raise
+    finally:
+        src.close()
+    dst.close()
+    os.replace(tmp_path, path)
+    logger.info(
+        "Scenario created name=%s source=%s",
+        name,
+        source or "live",
+        extra=build_log_extra(),
+    )
+    return {"name": name, "source": source}
+
+
+def _dispose_engine(path):
+    with _engines_lock:
+        engine = _engines.pop(path, None)
+    if engine is not None:
+        engine.dispose()
+
+
+def delete_scenario(name):
+    """Remove a scenario database. Raises FileNotFoundError if it does not exist."""
+    path = _existing_path(name)
+    _dispose_engine(path)
+    for suffix in ("", "-journal", "-wal", "-shm"):
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(path + suffix)
+    logger.info("Scenario deleted name=%s", name, extra=build_log_extra())
+
+
+def engine_for(name):
+    """Return the (cached) engine of a scenario database."""
+    path = _existing_path(name)
+    with _engines_lock:
+        engine = _engines.get(path)
+        if engine is None:
+            engine = create_sqlite_engine(path)
+            # Tables and migrations added since the scenario was cloned
+            migrate(engine, Base.metadata)
+            _engines[path] = engine
+    return engine
+
+
+def current_scenario():
+    """Name of the selected scenario, or None for the live database."""
+    return _current_name.get()
+
+
+def activate_scenario(name):
+    """Bind new sessions of the current context to scenario ``name`` (None = live).
+
+    Returns a token for ``deactivate_scenario``.
+    """
+    engine = engine_for(name) if name is not None else None
+    return current_engine.set(engine), _current_name.set(name)
+
+
+def deactivate_scenario(token):
+    engine_token, name_token = token
+    current_engine.reset(engine_token)
+    _current_name.reset(name_token)
+
+
+@contextlib.contextmanager
+def use_scenario(name):
+    """Context manager selecting scenario ``name`` (None = live) for new sessions."""
+    token = activate_scenario(name)
+    try:
+        yield
+    finally:
+        deactivate_scenario(token)
+
+
+def replace_database(target_path, source_path):
+    """Replace the data of the SQLite database ``target_path`` with the one
+    of ``source_path``.
+
+    All tables except ``LIVE_ONLY_TABLES`` are copied in one transaction, so
+    readers of the target see either the old or the new data, and its data
+    generation is bumped.
+    """
+    conn = sqlite3.connect(target_path, isolation_level=None)
+    try:
+        conn.execute("ATTACH DATABASE ? AS source", (source_path,))
+        try:
+            source_tables = {
+                row[0] for row in conn.execute(
+                    "SELECT name FROM source.sqlite_master WHERE type = 'table'"
+                )
+            }
+            tables = [
+                table for table in Base.metadata.sorted_tables
+                if table.name not in LIVE_ONLY_TABLES and table.name in source_tables
+            ]
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                # Children first, so foreign keys hold if they are enforced
+                for table in reversed(tables):
+                    conn.execute(f'DELETE FROM main."{table.name}"')
+                for table in tables:
+                    source_columns = {
+                        row[1] for row in conn.execute(f'PRAGMA source.table_info("{table.name}")')
+                    }
+                    columns = ", ".join(
+                        f'"{column.name}"' for column in table.columns if column.name in source_columns
+                    )
+                    conn.execute(
+                        f'INSERT INTO main."{table.name}" ({columns}) '
+                        f'SELECT {columns} FROM source."{table.name}"'
+                    )
+                conn.execute(
+                    f'UPDATE main."{DataGeneration.__tablename__}" SET value = value + 1'
+                )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        finally:
+            conn.execute("DETACH DATABASE source")
+    finally:
+        conn.close()
+
+
+def promote_scenario(name):
+    """Replace the data of the live database with the one of scenario ``name``.
+
+    See ``replace_database``: readers of the live database see either the
+    old or the new data.
+    """
+    replace_database(live_database_path(), _existing_path(name))
+    logger.info("Scenario promoted to live name=%s", name, extra=build_log_extra())
@@ -4,6 +4,8 @@ import logging
 import time
 
 from ortools.sat.python import cp_model
+from sqlalchemy import delete, insert, select, update
+
 from .models import (
     Teacher,
     Subject,
@@ -19,12 +21,26 @@ from .models import (
     CourseFixedSlotLabel,
 )
 from .logging_config import build_log_extra
+from .model_profiler import ModelBuildProfiler
+from .parallel_diagnosis import isolation_runner, snapshot_solver_inputs
+from .solver_profiles import apply_solver_profile, resolve_solver_profile
+from .solve_progress import DEFAULT_BEST_SOLUTION_INTERVAL_SECONDS, SolutionProgressCallback
+from .cancellation import SolveCancelled, check_cancelled, solving
+from .domain_pruning import DomainPruning
+from .model_cache import default_model_cache, model_fingerprint
+from .result_store import load_result, result_key, save_result
 from .constants import DEFAULT_LOCALE
 from .translations import t_locale
 
 
 logger = logging.getLogger(__name__)
 
+# Diagnosis run after an infeasible generation: wall-clock budget of the
+# phase 2 isolation and bottleneck solves, and number of confirmed suspects
+# after which the remaining isolation tests are skipped.
+DIAGNOSIS_DEADLINE_SECONDS = 120.0
+DIAGNOSIS_MAX_SUSPECTS = 3
+
 
 def _is_line_included(entity, line_index):
     """Check whether a Subject or SubjectGroup applies to the given line index.
@@ -92,135 +108,365 @@ from .restrictions import (
     TeacherAvoidGaps,
     TeacherFreeHoursEvenDistribution,
     JointClassAssignment,
+    AssignmentStore,
 )
 from .restrictions.joint_class_assignment import build_joint_class_lookup
 
 
-def save_solution_to_db(session, solver, assignments, groups, num_days, num_hours, task_id=None):
+def _active_assignment_keys(solver, assignments):
+    """Return the assignment keys set to 1 in the solution, in key order.
+
+    Reads the whole solution vector from the solver response once and indexes
+    it by variable, instead of calling ``solver.Value`` per key. Solvers that
+    do not expose a response (e.g. test doubles) fall back to ``Value``.
+    """
+    response = getattr(solver, "response_proto", None)
+    if response is not None:
+        solution = response.solution
+        return [key for key, var in assignments.items() if solution[var.Index()]]
+    return [key for key, var in assignments.items() if solver.Value(var) == 1]
+
+
+def load_previous_solution(session):
+    """Read the persisted timetable as a set of assignment keys.
+
+    Returns:
+        set of (group, subject_id, teacher_id, day, hour) tuples, matching the
+        keys of ``_create_assignments``. Empty when no timetable is stored.
+    """
+    rows = (
+        session.query(
+            Timeslot.course_id,
+            Timeslot.line,
+            Timeslot.day,
+            Timeslot.hour,
+            TimeSlotAssignment.subject_id,
+            TimeSlotAssignment.teacher_id,
+        )
+        .join(TimeSlotAssignment, TimeSlotAssignment.timeslot_id == Timeslot.id)
+        .all()
+    )
+    return {
+        (f"{course_id}-{chr(ord('A') + line)}", subject_id, teacher_id, day, hour)
+        for course_id, line, day, hour, subject_id, teacher_id in rows
+    }
+
+
+def _add_solution_hint(model, assignments, solution_hint, keep_hint, solver, task_id=None):
+    """Hint every assignment variable with its value in ``solution_hint``.
+
+    Variables whose key is in the hint are hinted to 1, every other variable
+    to 0, so CP-SAT starts from a complete assignment. Keys of the previous
+    timetable that no longer exist in the model (removed teacher, subject or
+    line) are ignored. With ``keep_hint`` the solver is asked to repair the
+    hint when it is infeasible rather than discard it.
+    """
+    matched = 0
+    for key, var in assignments.items():
+        if key in solution_hint:
+            model.AddHint(var, 1)
+            matched += 1
+        else:
+            model.AddHint(var, 0)
+    if keep_hint:
+        solver.parameters.repair_hint = True
+        solver.parameters.hint_conflict_limit = 10_000
     logger.info(
-        "Persisting timetable solution groups=%d days=%d hours=%d",
-        len(groups),
-        num_days,
-        num_hours,
+        "Added solution hint hinted_active=%d previous_active=%d keep_hint=%s",
+        matched,
+        len(solution_hint),
+        keep_hint,
         extra=build_log_extra(task_id=task_id),
     )
-    assignment_count = 0
-    timeslot_count = 0
 
-    all_subjectgroups = session.query(SubjectGroup).all()
+
+def _load_subjectgroup_signatures(session):
+    """Map SubjectGroup id -> its subject ids and line filter, for slot matching."""
     subjectgroup_signatures = {}
-    for sg in all_subjectgroups:
+    for sg in session.query(SubjectGroup).all():
         subject_ids = frozenset(s.id for s in sg.subjects)
         if subject_ids:
             subjectgroup_signatures[sg.id] = {
                 "subject_ids": subject_ids,
                 "included_lines": sg,
             }
+    return subjectgroup_signatures
+
+
+def _match_subject_group(subjectgroup_signatures, active_assignments, group, d, h, task_id=None):
+    """Return the SubjectGroup id taught in a slot, or None if none/ambiguous."""
+    line_num = _get_line_index(group)
+    matching_groups = []
+    active_subject_ids = frozenset(a[1] for a in active_assignments)
+    if active_subject_ids:
+        for sg_id, signature in subjectgroup_signatures.items():
+            if signature["subject_ids"] != active_subject_ids:
+                continue
+            if _is_line_included(signature["included_lines"], line_num):
+                matching_groups.append(sg_id)
+
+    if len(matching_groups) > 1:
+        logger.warning(
+            "Ambiguous SubjectGroup mapping while persisting slot group=%s day=%d hour=%d candidates=%s",
+            group,
+            d,
+            h,
+            matching_groups,
+            extra=build_log_extra(task_id=task_id),
+        )
+
+    return matching_groups[0] if len(matching_groups) == 1 else None
+
+
+def save_solution_to_db(session, solver, assignments, groups, num_days, num_hours, task_id=None):
+    """Replace the stored timetable with the solver's solution.
+
+    Active assignments are read in a single pass, then written by
+    ``save_assignment_keys_to_db``.
+    """
+    save_assignment_keys_to_db(
+        session, _active_assignment_keys(solver, assignments),
+        groups, num_days, num_hours, task_id=task_id,
+    )
+
+
+def save_assignment_keys_to_db(session, active_keys, groups, num_days, num_hours, task_id=None):
+    """Replace the stored timetable with the given active assignment keys.
+
+    Keys are bucketed by (group, day, hour). Timeslot and TimeSlotAssignment
+    rows are then written with bulk inserts; clearing the previous timetable
+    and writing the new one happen in one transaction.
+    """
+    logger.info(
+        "Persisting timetable solution groups=%d days=%d hours=%d",
+        len(groups),
+        num_days,
+        num_hours,
+        extra=build_log_extra(task_id=task_id),
+    )
+    started_at = time.perf_counter()
+
+    subjectgroup_signatures = _load_subjectgroup_signatures(session)
+
+    active_by_slot = defaultdict(list)
+    for key in active_keys:
+        group, _, _, d, h = key
+        active_by_slot[(group, d, h)].append(key)
+
+    timeslot_rows = []
+    slot_assignments = []
+    for d in range(num_days):
+        for h in range(num_hours):
+            for group in groups:
+                course_id, line_str = group.split("-")
+                line_num = ord(line_str) - ord("A")
+
+                active_assignments = active_by_slot.get((group, d, h), [])
+                subject_group_id = _match_subject_group(
+                    subjectgroup_signatures, active_assignments, group, d, h, task_id=task_id,
+                )
+
+                # store day as integer index `d` (0 = first weekday)
+                timeslot_rows.append({
+                    "day": d,
+                    "hour": h,
+                    "course_id": course_id,
+                    "line": line_num,
+                    "subject_group_id": subject_group_id,
+                })
+                slot_assignments.append(active_assignments)
 
     try:
         # Clear previous schedule
         session.query(TimeSlotAssignment).delete()
         session.query(Timeslot).delete()
-        session.commit()
         logger.debug("Cleared previous timetable data", extra=build_log_extra(task_id=task_id))
 
-        for d in range(num_days):
-            for h in range(num_hours):
-                for group in groups:
-                    course_id, line_str = group.split("-")
-                    line_num = ord(line_str) - ord("A")
-
-                    active_assignments = []
-                    for key in assignments:
-                        if (
-                            key[0] == group
-                            and key[3] == d
-                            and key[4] == h
-                            and solver.Value(assignments[key]) == 1
-                        ):
-                            active_assignments.append(key)
-
-                    matching_groups = []
-                    active_subject_ids = frozenset(a[1] for a in active_assignments)
-                    if active_subject_ids:
-                        for sg_id, signature in subjectgroup_signatures.items():
-                            if signature["subject_ids"] != active_subject_ids:
-                                continue
-                            if _is_line_included(signature["included_lines"], line_num):
-                                matching_groups.append(sg_id)
-
-                    if len(matching_groups) > 1:
-                        logger.warning(
-                            "Ambiguous SubjectGroup mapping while persisting slot group=%s day=%d hour=%d candidates=%s",
-                            group,
-                            d,
-                            h,
-                            matching_groups,
-                            extra=build_log_extra(task_id=task_id),
-                        )
+        assignment_rows = []
+        if timeslot_rows:
+            timeslot_ids = session.scalars(
+                insert(Timeslot).returning(Timeslot.id, sort_by_parameter_order=True),
+                timeslot_rows,
+            ).all()
+            for timeslot_id, active_assignments in zip(timeslot_ids, slot_assignments):
+                for _, subject_id, teacher_id, _, _ in active_assignments:
+                    assignment_rows.append({
+                        "timeslot_id": timeslot_id,
+                        "subject_id": subject_id,
+                        "teacher_id": teacher_id,
+                    })
+        if assignment_rows:
+            session.execute(insert(TimeSlotAssignment), assignment_rows)
 
-                    subject_group_id = matching_groups[0] if len(matching_groups) == 1 else None
+        session.commit()
+        logger.info(
+            "Timetable persisted successfully timeslots=%d assignments=%d elapsed_ms=%.2f",
+            len(timeslot_rows),
+            len(assignment_rows),
+            (time.perf_counter() - started_at) * 1000,
+            extra=build_log_extra(task_id=task_id),
+        )
+    except Exception:
+        session.rollback()
+        logger.exception("Failed to persist timetable solution", extra=build_log_extra(task_id=task_id))
+        raise
 
-                    # store day as integer index `d` (0 = first weekday)
-                    timeslot = Timeslot(
-                        day=d,
-                        hour=h,
-                        course_id=course_id,
-                        line=line_num,
-                        subject_group_id=subject_group_id,
-                    )
-                    session.add(timeslot)
-                    timeslot_count += 1
-
-                    for _, subject_id, teacher_id, _, _ in active_assignments:
-                        assignment = TimeSlotAssignment(
-                            timeslot=timeslot,
-                            subject_id=subject_id,
-                            teacher_id=teacher_id,
-                        )
-                        session.add(assignment)
-                        assignment_count += 1
 
+def save_solution_changes(session, solver, assignments, previous_solution, task_id=None):
+    """Write back only the timeslots whose assignments differ from the stored ones.
+
+    The affected timeslots are loaded with one query; missing ones are
+    inserted in bulk and the assignments of the others are cleared with a
+    single DELETE before the new assignments are inserted.
+
+    Args:
+        previous_solution: Set of active assignment keys currently stored
+            (see ``load_previous_solution``).
+
+    Returns:
+        Number of (group, day, hour) slots that were rewritten.
+    """
+    current = set(_active_assignment_keys(solver, assignments))
+    changed = current ^ previous_solution
+    changed_slots = {(key[0], key[3], key[4]) for key in changed}
+    if not changed_slots:
+        logger.info("Incremental solve left the timetable unchanged", extra=build_log_extra(task_id=task_id))
+        return 0
+
+    active_by_slot = defaultdict(list)
+    for key in assignments:
+        if key in current and (key[0], key[3], key[4]) in changed_slots:
+            active_by_slot[(key[0], key[3], key[4])].append(key)
+    subjectgroup_signatures = _load_subjectgroup_signatures(session)
+
+    slot_rows = {}
+    for group, d, h in changed_slots:
+        course_id, _ = group.split("-")
+        active_assignments = active_by_slot.get((group, d, h), [])
+        slot_rows[(d, h, course_id, _get_line_index(group))] = (
+            _match_subject_group(subjectgroup_signatures, active_assignments, group, d, h, task_id=task_id),
+            active_assignments,
+        )
+
+    try:
+        # One query for the timeslots of the affected courses, then bulk
+        # statements for the rows that change.
+        timeslot_ids = {
+            (day, hour, course_id, line): timeslot_id
+            for timeslot_id, day, hour, course_id, line in session.execute(
+                select(Timeslot.id, Timeslot.day, Timeslot.hour, Timeslot.course_id, Timeslot.line)
+                .where(Timeslot.course_id.in_({slot[2] for slot in slot_rows}))
+            )
+            if (day, hour, course_id, line) in slot_rows
+        }
+        existing = [slot for slot in slot_rows if slot in timeslot_ids]
+        missing = [slot for slot in slot_rows if slot not in timeslot_ids]
+        if existing:
+            session.execute(update(Timeslot), [
+                {"id": timeslot_ids[slot], "subject_group_id": slot_rows[slot][0]} for slot in existing
+            ])
+            session.execute(
+                delete(TimeSlotAssignment)
+                .where(TimeSlotAssignment.timeslot_id.in_([timeslot_ids[slot] for slot in existing]))
+            )
+        if missing:
+            created = session.scalars(
+                insert(Timeslot).returning(Timeslot.id, sort_by_parameter_order=True),
+                [
+                    {"day": d, "hour": h, "course_id": course_id, "line": line,
+                     "subject_group_id": slot_rows[(d, h, course_id, line)][0]}
+                    for d, h, course_id, line in missing
+                ],
+            ).all()
+            timeslot_ids.update(zip(missing, created))
+
+        assignment_rows = [
+            {"timeslot_id": timeslot_ids[slot], "subject_id": subject_id, "teacher_id": teacher_id}
+            for slot, (_, active_assignments) in slot_rows.items()
+            for _, subject_id, teacher_id, _, _ in active_assignments
+        ]
+        if assignment_rows:
+            session.execute(insert(TimeSlotAssignment), assignment_rows)
         session.commit()
         logger.info(
-            "Timetable persisted successfully timeslots=%d assignments=%d",
-            timeslot_count,
-            assignment_count,
+            "Timetable changes persisted slots=%d assignments=%d",
+            len(changed_slots),
+            len(assignment_rows),
             extra=build_log_extra(task_id=task_id),
         )
     except Exception:
         session.rollback()
-        logger.exception("Failed to persist timetable solution", extra=build_log_extra(task_id=task_id))
+        logger.exception("Failed to persist timetable changes", extra=build_log_extra(task_id=task_id))
         raise
+    return len(changed_slots)
+
+
+def _freeze_assignments(model, assignments, frozen_solution, free_groups, free_teachers):
+    """Fix every assignment outside the free groups/teachers to its frozen value.
+
+    The variable domains are narrowed to a single value, so presolve removes
+    them and the search only explores the free part of the timetable.
+
+    Returns:
+        Number of frozen variables.
+    """
+    free_groups = set(free_groups or ())
+    free_teachers = set(free_teachers or ())
+    variables = model.proto.variables
+    frozen = 0
+    for key, var in assignments.items():
+        group, _, teacher_id, _, _ = key
+        if group in free_groups or teacher_id in free_teachers:
+            continue
+        value = 1 if key in frozen_solution else 0
+        # Assignment variables are booleans, so the domain is [lower, upper].
+        domain = variables[var.Index()].domain
+        domain[0] = value
+        domain[1] = value
+        frozen += 1
+    return frozen
 
 
 def _create_assignments(model, all_teachers, all_subjects, all_groups, num_days, num_hours,
-                        teacher_subject_lines=None):
+                        teacher_subject_lines=None, pruning=None):
     """Create decision variables (group, subject_id, teacher_id, day, hour).
 
     Args:
         teacher_subject_lines: Optional dict[(teacher_id, subject_id)] -> list[int] | None
             Restricts which line indices the teacher can teach the subject to.
             None = all lines allowed.
+        pruning: Optional domain_pruning.DomainPruning; variables it reports
+            as statically 0 are not created.
+
+    Returns:
+        AssignmentStore: dict of BoolVars with a shared lookup index that
+        restrictions use instead of scanning every key.
     """
-    assignments = {}
+    assignments = AssignmentStore()
     for group in all_groups:
         course, line_letter = group.split("-")
         line_index = ord(line_letter) - ord("A")
         for subject in all_subjects:
             if subject.course_id == course and _is_line_included(subject, line_index):
+                candidates = []
                 for teacher in all_teachers:
                     if subject in teacher.subjects:
                         ts_key = (teacher.id, subject.id)
                         ts_lines = teacher_subject_lines.get(ts_key) if teacher_subject_lines else None
                         if ts_lines is not None and line_index not in ts_lines:
                             continue
-                        for d in range(num_days):
-                            for h in range(num_hours):
-                                key = (group, subject.id, teacher.id, d, h)
-                                assignments[key] = model.NewBoolVar(
-                                    f"g:{group} sub:{subject.id} t:{teacher.name} d:{d} h:{h}"
-                                )
+                        candidates.append(teacher)
+                candidate_ids = [t.id for t in candidates]
+                for teacher in candidates:
+                    if pruning is not None:
+                        slots = pruning.allowed_slots(subject.id, teacher.id, candidate_ids)
+                    else:
+                        slots = [(d, h) for d in range(num_days) for h in range(num_hours)]
+                    for d, h in slots:
+                        key = (group, subject.id, teacher.id, d, h)
+                        assignments[key] = model.NewBoolVar(
+                            f"g:{group} sub:{subject.id} t:{teacher.name} d:{d} h:{h}"
+                        )
     return assignments
 
 
@@ -263,36 +509,22 @@ def _build_soft_restrictions(model, assignments, all_teachers,
     ]
 
 
-def solve_scheduling_model(
+def _build_scheduling_model(
     all_teachers, all_subjects, all_groups, all_subjectgroups, num_days, num_hours,
-    skip_restrictions=None, diagnostic_mode=False, task_id=None,
+    skip_restrictions, diagnostic_mode=False, task_id=None,
     all_joint_classes=None, teacher_subject_lines=None,
     skip_subject_weekly_hours_for=None,
     skip_teacher_max_hours_for=None,
+    prune_domains=True,
 ):
-    """
-    Builds and solves the scheduling model without requiring a database session.
-
-    Args:
-        all_teachers: List of Teacher objects
-        all_subjects: List of Subject objects
-        all_groups: List of group identifiers (e.g., "1-A", "1-B")
-        all_subjectgroups: List of SubjectGroup objects
-        num_days: Number of days per week
-        num_hours: Number of hours per day
-        skip_restrictions: Set of restriction class names to skip (optional)
-        diagnostic_mode: If True, use shorter timeout (default: False)
+    """Build the CP-SAT model of ``solve_scheduling_model`` (variables,
+    restrictions and objective).
 
     Returns:
-        Tuple of (status, assignments, solver) where:
-        - status: CP-SAT solver status (OPTIMAL, FEASIBLE, or INFEASIBLE)
-        - assignments: Dictionary of decision variables
-        - solver: The solver object with the solution
+        Tuple of (model, assignments, build_profile). ``model`` and
+        ``build_profile`` are None when the pre-solve sanity checks fail.
     """
-    # --- 1. Model Initialization ---
     model = cp_model.CpModel()
-    if skip_restrictions is None:
-        skip_restrictions = set()
     logger.info(
         "Building scheduling model teachers=%d subjects=%d groups=%d days=%d hours=%d diagnostic_mode=%s skipped=%d",
         len(all_teachers),
@@ -305,11 +537,35 @@ def solve_scheduling_model(
         extra=build_log_extra(task_id=task_id),
     )
 
+    profiler = ModelBuildProfiler()
+
+    # Drop variables that restrictions would force to 0 anyway
+    pruning = None
+    if prune_domains:
+        pruning = DomainPruning(
+            all_teachers, all_subjects, all_subjectgroups, num_days, num_hours,
+            skip_restrictions=skip_restrictions,
+            skip_teacher_max_hours_for=skip_teacher_max_hours_for,
+        )
+
     # Create decision variables (group-subject-teacher-day-hour)
-    assignments = _create_assignments(
-        model, all_teachers, all_subjects, all_groups, num_days, num_hours,
-        teacher_subject_lines=teacher_subject_lines,
-    )
+    with profiler.measure(model, "assignments", "variables"):
+        assignments = _create_assignments(
+            model, all_teachers, all_subjects, all_groups, num_days, num_hours,
+            teacher_subject_lines=teacher_subject_lines,
+            pruning=pruning,
+        )
+    if pruning is not None:
+        pruning_summary = pruning.summary()
+        profiler.record_pruning(pruning_summary)
+        logger.info(
+            "Domain pruning skipped variables pruned=%d created=%d ratio=%.3f by_reason=%s",
+            pruning_summary["pruned"],
+            pruning_summary["created"],
+            pruning_summary["pruned_ratio"],
+            pruning_summary["by_reason"],
+            extra=build_log_extra(task_id=task_id),
+        )
     logger.debug(
         "Created assignment decision variables count=%d",
         len(assignments),
@@ -330,7 +586,7 @@ def solve_scheduling_model(
             len(sanity_issues),
             extra=build_log_extra(task_id=task_id),
         )
-        return cp_model.INFEASIBLE, assignments, cp_model.CpSolver()
+        return None, assignments, None
 
     # Build joint class lookup for joint-aware restrictions
     joint_lookup = build_joint_class_lookup(
@@ -349,15 +605,17 @@ def solve_scheduling_model(
     for name, restriction, args in hard_restrictions:
         if name not in skip_restrictions:
             logger.debug("Applying hard restriction=%s", name, extra=build_log_extra(task_id=task_id))
-            if name == "SubjectWeeklyHours" and skip_subject_weekly_hours_for is not None:
-                restriction.apply(*args, skip_subject_ids=skip_subject_weekly_hours_for)
-            elif name == "TeacherMaxWeeklyHours" and skip_teacher_max_hours_for is not None:
-                restriction.apply(*args, skip_teacher_ids=skip_teacher_max_hours_for)
-            else:
-                restriction.apply(*args)
+            with profiler.measure(model, name, "hard"):
+                if name == "SubjectWeeklyHours" and skip_subject_weekly_hours_for is not None:
+                    restriction.apply(*args, skip_subject_ids=skip_subject_weekly_hours_for)
+                elif name == "TeacherMaxWeeklyHours" and skip_teacher_max_hours_for is not None:
+                    restriction.apply(*args, skip_teacher_ids=skip_teacher_max_hours_for)
+                else:
+                    restriction.apply(*args)
             hard_applied += 1
         else:
             hard_skipped += 1
+            profiler.record_skipped(name, "hard")
             logger.info("Skipping hard restriction=%s", name, extra=build_log_extra(task_id=task_id))
 
     # Soft constraints (preferences) — never cause infeasibility on their own
@@ -371,11 +629,13 @@ def solve_scheduling_model(
     for name, restriction, args in soft_restrictions:
         if name not in skip_restrictions:
             logger.debug("Applying soft restriction=%s", name, extra=build_log_extra(task_id=task_id))
-            restriction.apply(*args)
+            with profiler.measure(model, name, "soft"):
+                restriction.apply(*args)
             preference_terms.extend(restriction.preference_terms)
             soft_applied += 1
         else:
             soft_skipped += 1
+            profiler.record_skipped(name, "soft")
             logger.debug("Skipping soft restriction=%s", name, extra=build_log_extra(task_id=task_id))
     if preference_terms:
         model.Maximize(sum(preference_terms))
@@ -388,19 +648,154 @@ def solve_scheduling_model(
         len(preference_terms),
         extra=build_log_extra(task_id=task_id),
     )
+    return model, assignments, profiler.log_summary(task_id=task_id)
+
+
+def solve_scheduling_model(
+    all_teachers, all_subjects, all_groups, all_subjectgroups, num_days, num_hours,
+    skip_restrictions=None, diagnostic_mode=False, task_id=None,
+    all_joint_classes=None, teacher_subject_lines=None,
+    skip_subject_weekly_hours_for=None,
+    skip_teacher_max_hours_for=None,
+    build_profile_callback=None,
+    solver_params=None,
+    solution_hint=None,
+    keep_hint=False,
+    frozen_solution=None,
+    free_groups=None,
+    free_teachers=None,
+    solution_progress_callback=None,
+    best_solution_callback=None,
+    best_solution_interval_seconds=DEFAULT_BEST_SOLUTION_INTERVAL_SECONDS,
+    cancel_token=None,
+    prune_domains=True,
+    model_cache=None,
+):
+    """
+    Builds and solves the scheduling model without requiring a database session.
+
+    Args:
+        all_teachers: List of Teacher objects
+        all_subjects: List of Subject objects
+        all_groups: List of group identifiers (e.g., "1-A", "1-B")
+        all_subjectgroups: List of SubjectGroup objects
+        num_days: Number of days per week
+        num_hours: Number of hours per day
+        skip_restrictions: Set of restriction class names to skip (optional)
+        diagnostic_mode: If True, use shorter timeout (default: False)
+        build_profile_callback: Optional callable(profile: dict) called once the
+            model is built (before solving) with per-restriction build timings
+            and variable/constraint counts.
+        solver_params: Optional solver profile parameters (see
+            ``solver_profiles``). ``max_time_in_seconds`` defaults to 10 s in
+            diagnostic_mode and 60 s otherwise; other parameters keep the
+            CP-SAT defaults.
+        solution_hint: Optional set of assignment keys that were active in a
+            previous solution (see ``load_previous_solution``), used to warm
+            start the solver.
+        keep_hint: If True, ask CP-SAT to repair an infeasible hint instead of
+            dropping it, so the result stays as close to it as possible.
+        frozen_solution: Optional set of active assignment keys of a stored
+            timetable. When given, every assignment that involves neither a
+            group in ``free_groups`` nor a teacher in ``free_teachers`` is
+            fixed to its value in this solution (incremental re-solve).
+        free_groups: Groups to re-optimise when ``frozen_solution`` is given.
+        free_teachers: Teacher ids to re-optimise when ``frozen_solution`` is given.
+        solution_progress_callback: Optional callable(entry: dict) called on
+            every improving solution with its objective, bound, gap and wall
+            time (see ``solve_progress.SolutionProgressCallback``).
+        best_solution_callback: Optional callable(solution, assignments)
+            called with the current solution at most once every
+            ``best_solution_interval_seconds`` while the search runs;
+            ``solution`` can be read like a solver (``Value``).
+        cancel_token: Optional CancellationToken; cancelling it stops the
+            running search (the status is then that of the interrupted
+            search) and raises SolveCancelled if the search has not started.
+        prune_domains: If True (default), do not create assignment variables
+            that active restrictions force to 0 (see ``domain_pruning``).
+        model_cache: Optional ``model_cache.ModelCache``. The built model is
+            loaded from it when the inputs match a cached one, and stored in
+            it otherwise; the build profile gets a ``model_cache`` entry.
+
+    Returns:
+        Tuple of (status, assignments, solver) where:
+        - status: CP-SAT solver status (OPTIMAL, FEASIBLE, or INFEASIBLE)
+        - assignments: Dictionary of decision variables
+        - solver: The solver object with the solution
+    """
+    # --- 1. Model Initialization ---
+    if skip_restrictions is None:
+        skip_restrictions = set()
+    build_args = dict(
+        all_teachers=all_teachers, all_subjects=all_subjects, all_groups=all_groups,
+        all_subjectgroups=all_subjectgroups, num_days=num_days, num_hours=num_hours,
+        skip_restrictions=skip_restrictions,
+        all_joint_classes=all_joint_classes,
+        teacher_subject_lines=teacher_subject_lines,
+        skip_subject_weekly_hours_for=skip_subject_weekly_hours_for,
+        skip_teacher_max_hours_for=skip_teacher_max_hours_for,
+        prune_domains=prune_domains,
+    )
+    cached = None
+    fingerprint = None
+    if model_cache is not None:
+        fingerprint = model_fingerprint(**build_args)
+        cached = model_cache.load(fingerprint, task_id=task_id)
+    if cached is not None:
+        model, assignments, build_profile = cached
+        build_profile["model_cache"] = {"hit": True, "fingerprint": fingerprint}
+    else:
+        model, assignments, build_profile = _build_scheduling_model(
+            **build_args, diagnostic_mode=diagnostic_mode, task_id=task_id,
+        )
+        if model is None:
+            return cp_model.INFEASIBLE, assignments, cp_model.CpSolver()
+        if model_cache is not None:
+            model_cache.store(fingerprint, model, assignments, build_profile, task_id=task_id)
+            build_profile["model_cache"] = {"hit": False, "fingerprint": fingerprint}
+    if build_profile_callback:
+        build_profile_callback(build_profile)
+
+    if frozen_solution is not None:
+        frozen = _freeze_assignments(model, assignments, frozen_solution, free_groups, free_teachers)
+        logger.info(
+            "Froze assignments outside the re-solved scope frozen=%d free=%d free_groups=%d free_teachers=%d",
+            frozen,
+            len(assignments) - frozen,
+            len(free_groups or ()),
+            len(free_teachers or ()),
+            extra=build_log_extra(task_id=task_id),
+        )
 
     # --- 2. Solve ---
     logger.info("Starting CP-SAT solver", extra=build_log_extra(task_id=task_id))
     solver = cp_model.CpSolver()
     solver.parameters.max_time_in_seconds = 10.0 if diagnostic_mode else 60.0
+    apply_solver_profile(solver, solver_params)
+    if solution_hint:
+        _add_solution_hint(model, assignments, solution_hint, keep_hint, solver, task_id=task_id)
+    solution_callback = None
+    if solution_progress_callback or best_solution_callback:
+        solution_callback = SolutionProgressCallback(
+            on_solution=solution_progress_callback,
+            on_best_solution=(
+                (lambda solution: best_solution_callback(solution, assignments))
+                if best_solution_callback else None
+            ),
+            best_solution_interval_seconds=best_solution_interval_seconds,
+            task_id=task_id,
+        )
     started_at = time.perf_counter()
-    status = solver.Solve(model)
+    with solving(cancel_token, solver):
+        status = solver.Solve(model, solution_callback)
     elapsed_ms = (time.perf_counter() - started_at) * 1000
     logger.info(
-        "Solver finished status=%s elapsed_ms=%.2f timeout_seconds=%.1f",
+        "Solver finished status=%s elapsed_ms=%.2f timeout_seconds=%.1f workers=%d seed=%d",
         solver.StatusName(status),
         elapsed_ms,
         solver.parameters.max_time_in_seconds,
+        solver.parameters.num_search_workers,
+        solver.parameters.random_seed,
         extra=build_log_extra(task_id=task_id),
     )
 
@@ -667,7 +1062,8 @@ def _run_sanity_checks(all_teachers, all_subjects, all_groups,
 
 def _run_entity_diagnosis(suspects, all_teachers, all_subjects, all_groups,
                           all_subjectgroups, num_days, num_hours,
-                          all_joint_classes=None, teacher_subject_lines=None):
+                          all_joint_classes=None, teacher_subject_lines=None,
+                          cancel_token=None):
     """Phase 3: entity-level diagnosis using assumptions.
 
     Builds a model with suspect restrictions gated by per-entity assumption
@@ -718,7 +1114,9 @@ def _run_entity_diagnosis(suspects, all_teachers, all_subjects, all_groups,
     solver = cp_model.CpSolver()
     timeout_seconds = 300.0
     solver.parameters.max_time_in_seconds = timeout_seconds
-    status = solver.Solve(model)
+    with solving(cancel_token, solver):
+        status = solver.Solve(model)
+    check_cancelled(cancel_token)
 
     if status == cp_model.INFEASIBLE:
         core_indices = set(solver.SufficientAssumptionsForInfeasibility())
@@ -755,24 +1153,42 @@ def _run_entity_diagnosis(suspects, all_teachers, all_subjects, all_groups,
 def diagnose_infeasibility(
     all_teachers, all_subjects, all_groups, all_subjectgroups, num_days, num_hours,
     progress_callback=None, all_joint_classes=None, teacher_subject_lines=None,
-    locale=DEFAULT_LOCALE,
+    locale=DEFAULT_LOCALE, max_workers=None, deadline_seconds=None,
+    max_suspects=None, cancel_token=None,
 ):
     """Diagnose which restrictions cause infeasibility.
 
     Phase 1: Capacity sanity checks (instant).
-    Phase 2: Isolation testing — re-solve without each restriction
-             (10 s timeout per test).
+    Phase 2: Isolation testing — solve without each restriction
+             (10 s timeout per test), followed by course/subject/teacher
+             bottleneck analysis for SubjectWeeklyHours/TeacherMaxWeeklyHours.
+             The model is built once with every hard restriction gated by an
+             enforcement literal (see diagnosis_model.GatedDiagnosisModel);
+             each test is an assumption-based solve of that model.
     Phase 3: Entity-level diagnosis using assumptions on suspect
              restrictions (1 solve).
 
     Args:
         progress_callback: Optional callable(phase: str, partial_markdown: str)
-                           called after each phase with accumulated results.
+                           called after each phase with accumulated results,
+                           and during phase 2 whenever a new suspect is found.
+        max_workers: Number of isolation solves run concurrently on a process
+                     pool (default: see parallel_diagnosis.available_workers).
+                     1 = sequential.
+        deadline_seconds: Optional wall-clock budget shared by all phase 2
+                          isolation and bottleneck solves. Solves that cannot
+                          start before the deadline are reported as untested.
+        max_suspects: Stop phase 2 isolation once this many suspects are
+                      confirmed; remaining restrictions are reported as untested.
+        cancel_token: Optional CancellationToken. Running solves are stopped
+                      and SolveCancelled is raised between phases once it is
+                      cancelled.
 
     Returns a dict with keys:
       - sanity_issues: list[str] — Phase 1 issues (empty = all clear)
       - suspects: list[str] — restrictions that cause infeasibility when active
       - cleared: list[str] — restrictions that did NOT cause issues individually
+      - untested: list[str] — restrictions skipped by the deadline or early stop
       - entity_conflicts: dict — Phase 3 entity-level results
       - phase3_timed_out: bool — True if Phase 3 timed out without conclusive result
     """
@@ -780,6 +1196,7 @@ def diagnose_infeasibility(
         "sanity_issues": [],
         "suspects": [],
         "cleared": [],
+        "untested": [],
         "entity_conflicts": {},
         "phase3_timed_out": False,
         "bottleneck_info": [],
@@ -802,6 +1219,8 @@ def diagnose_infeasibility(
         logger.info("Diagnosis ended in phase 1 due to sanity issues=%d", len(sanity_issues), extra=build_log_extra())
         return result
 
+    check_cancelled(cancel_token)
+
     # Phase 2: isolation testing (hard restrictions only)
     hard_names = [
         "SubjectWeeklyHours",
@@ -820,54 +1239,81 @@ def diagnose_infeasibility(
         "TeacherOneSubjectPerGroup",
     ]
     logger.info("Diagnosis phase 2 started", extra=build_log_extra())
-    for name in hard_names:
-        status, _, _ = solve_scheduling_model(
-            all_teachers, all_subjects, all_groups, all_subjectgroups,
-            num_days, num_hours,
-            skip_restrictions={name}, diagnostic_mode=True,
-            all_joint_classes=all_joint_classes,
-            teacher_subject_lines=teacher_subject_lines,
+    runner = _make_isolation_runner(
+        all_teachers, all_subjects, all_groups, all_subjectgroups,
+        num_days, num_hours,
+        all_joint_classes=all_joint_classes,
+        teacher_subject_lines=teacher_subject_lines,
+        max_workers=max_workers,
+        deadline_seconds=deadline_seconds,
+        cancel_token=cancel_token,
+    )
+    with runner:
+        def on_isolation_result(name, status):
+            if _is_feasible(status) and progress_callback:
+                partial = dict(result, suspects=result["suspects"] + [name])
+                progress_callback("phase2", _build_diagnosis_message(partial, locale=locale))
+
+        def enough_suspects(statuses):
+            if max_suspects is None:
+                return False
+            return sum(1 for s in statuses.values() if _is_feasible(s)) >= max_suspects
+
+        statuses = runner.run(
+            [{"id": name, "relax": {"skip_restrictions": {name}}} for name in hard_names],
+            stop_when=enough_suspects,
+            on_result=on_isolation_result,
         )
-        if status == cp_model.OPTIMAL or status == cp_model.FEASIBLE:
-            result["suspects"].append(name)
-        else:
-            result["cleared"].append(name)
+        check_cancelled(cancel_token)
+        for name in hard_names:
+            status = statuses.get(name)
+            if status is None:
+                result["untested"].append(name)
+            elif _is_feasible(status):
+                result["suspects"].append(name)
+            else:
+                result["cleared"].append(name)
 
-    logger.info(
-        "Diagnosis phase 2 completed suspects=%d cleared=%d",
-        len(result["suspects"]),
-        len(result["cleared"]),
-        extra=build_log_extra(),
-    )
+        logger.info(
+            "Diagnosis phase 2 completed suspects=%d cleared=%d untested=%d workers=%d",
+            len(result["suspects"]),
+            len(result["cleared"]),
+            len(result["untested"]),
+            runner.workers,
+            extra=build_log_extra(),
+        )
 
-    if result["suspects"]:
-        if "SubjectWeeklyHours" in result["suspects"]:
-            result["bottleneck_info"] = _find_weekly_hours_bottleneck(
-                all_teachers, all_subjects, all_groups, all_subjectgroups,
-                num_days, num_hours,
-                all_joint_classes=all_joint_classes,
-                teacher_subject_lines=teacher_subject_lines,
-                locale=locale,
-            )
-            logger.info(
-                "Bottleneck analysis completed candidates=%d",
-                len(result["bottleneck_info"]),
-                extra=build_log_extra(),
-            )
+        if result["suspects"]:
+            if "SubjectWeeklyHours" in result["suspects"]:
+                result["bottleneck_info"] = _find_weekly_hours_bottleneck(
+                    all_teachers, all_subjects, all_groups, all_subjectgroups,
+                    num_days, num_hours,
+                    all_joint_classes=all_joint_classes,
+                    teacher_subject_lines=teacher_subject_lines,
+                    locale=locale,
+                    runner=runner,
+                )
+                logger.info(
+                    "Bottleneck analysis completed candidates=%d",
+                    len(result["bottleneck_info"]),
+                    extra=build_log_extra(),
+                )
 
-        if "TeacherMaxWeeklyHours" in result["suspects"]:
-            result["teacher_bottleneck_info"] = _find_teacher_max_hours_bottleneck(
-                all_teachers, all_subjects, all_groups, all_subjectgroups,
-                num_days, num_hours,
-                all_joint_classes=all_joint_classes,
-                teacher_subject_lines=teacher_subject_lines,
-                locale=locale,
-            )
-            logger.info(
-                "Teacher bottleneck analysis completed candidates=%d",
-                len(result["teacher_bottleneck_info"]),
-                extra=build_log_extra(),
-            )
+            if "TeacherMaxWeeklyHours" in result["suspects"]:
+                result["teacher_bottleneck_info"] = _find_teacher_max_hours_bottleneck(
+                    all_teachers, all_subjects, all_groups, all_subjectgroups,
+                    num_days, num_hours,
+                    all_joint_classes=all_joint_classes,
+                    teacher_subject_lines=teacher_subject_lines,
+                    locale=locale,
+                    runner=runner,
+                )
+                logger.info(
+                    "Teacher bottleneck analysis completed candidates=%d",
+                    len(result["teacher_bottleneck_info"]),
+                    extra=build_log_extra(),
+                )
+        check_cancelled(cancel_token)
 
     if progress_callback:
         msg = _build_diagnosis_message(result, locale=locale)
@@ -881,6 +1327,7 @@ def diagnose_infeasibility(
             all_subjectgroups, num_days, num_hours,
             all_joint_classes=all_joint_classes,
             teacher_subject_lines=teacher_subject_lines,
+            cancel_token=cancel_token,
         )
         result["entity_conflicts"] = entity_conflicts
         result["phase3_timed_out"] = phase3_timed_out
@@ -898,11 +1345,41 @@ def diagnose_infeasibility(
     return result
 
 
+def _is_feasible(status):
+    return status == cp_model.OPTIMAL or status == cp_model.FEASIBLE
+
+
+def _make_isolation_runner(all_teachers, all_subjects, all_groups,
+                           all_subjectgroups, num_days, num_hours,
+                           all_joint_classes=None, teacher_subject_lines=None,
+                           max_workers=None, deadline_seconds=None,
+                           cancel_token=None):
+    """Create the runner used for isolation solves (see parallel_diagnosis).
+
+    Inputs are snapshotted into picklable objects so the same runner can
+    dispatch solves to worker processes.
+    """
+    inputs = snapshot_solver_inputs(
+        all_teachers, all_subjects, all_subjectgroups, all_joint_classes,
+    )
+    inputs.update(
+        all_groups=list(all_groups),
+        num_days=num_days,
+        num_hours=num_hours,
+        teacher_subject_lines=teacher_subject_lines,
+    )
+    return isolation_runner(
+        inputs, max_workers=max_workers, deadline_seconds=deadline_seconds,
+        cancel_token=cancel_token,
+    )
+
+
 def _find_weekly_hours_bottleneck(all_teachers, all_subjects, all_groups,
                                    all_subjectgroups, num_days, num_hours,
                                    all_joint_classes=None,
                                    teacher_subject_lines=None,
-                                   locale=DEFAULT_LOCALE):
+                                   locale=DEFAULT_LOCALE,
+                                   runner=None):
     """Identify which course(s) and subject(s) make SubjectWeeklyHours infeasible.
 
     Phase 2b strategy:
@@ -910,6 +1387,9 @@ def _find_weekly_hours_bottleneck(all_teachers, all_subjects, all_groups,
     2. Per course: relax SubjectWeeklyHours for all its subjects → feasible?
     3. Per bottleneck course: relax one subject at a time → find specific bottleneck.
 
+    Each step's solves are independent and go through ``runner`` (sequential
+    in-process runner when None).
+
     Returns a list of bottleneck info dicts with keys:
       - course: str (course ID)
       - subject_name: str
@@ -919,6 +1399,14 @@ def _find_weekly_hours_bottleneck(all_teachers, all_subjects, all_groups,
       - flags: list[str] (teach_every_day, linked, etc.)
     """
     logger.info("Bottleneck analysis started", extra=build_log_extra())
+    if runner is None:
+        runner = isolation_runner({
+            "all_teachers": all_teachers, "all_subjects": all_subjects,
+            "all_groups": all_groups, "all_subjectgroups": all_subjectgroups,
+            "num_days": num_days, "num_hours": num_hours,
+            "all_joint_classes": all_joint_classes,
+            "teacher_subject_lines": teacher_subject_lines,
+        }, max_workers=1)
 
     course_subjects = {}
     for s in all_subjects:
@@ -927,32 +1415,29 @@ def _find_weekly_hours_bottleneck(all_teachers, all_subjects, all_groups,
     bottleneck_entries = []
 
     # Step 1: per-course relaxation
-    for course_id in sorted(course_subjects.keys()):
-        course_subj_ids = {s.id for s in course_subjects[course_id]}
-        status, _, _ = solve_scheduling_model(
-            all_teachers, all_subjects, all_groups, all_subjectgroups,
-            num_days, num_hours,
-            diagnostic_mode=True,
-            all_joint_classes=all_joint_classes,
-            teacher_subject_lines=teacher_subject_lines,
-            skip_subject_weekly_hours_for=course_subj_ids,
-        )
-        if status != cp_model.OPTIMAL and status != cp_model.FEASIBLE:
-            continue
-
+    course_ids = sorted(course_subjects.keys())
+    course_statuses = runner.run([
+        {
+            "id": course_id,
+            "relax": {"skip_subject_weekly_hours_for": {s.id for s in course_subjects[course_id]}},
+        }
+        for course_id in course_ids
+    ])
+    bottleneck_courses = [c for c in course_ids if _is_feasible(course_statuses.get(c))]
+    for course_id in bottleneck_courses:
         logger.info("Bottleneck: relaxing course=%s makes model feasible", course_id, extra=build_log_extra())
 
-        # Step 2: per-subject within this course
+    # Step 2: per-subject within each bottleneck course
+    subject_jobs = [
+        {"id": subject.id, "relax": {"skip_subject_weekly_hours_for": {subject.id}}}
+        for course_id in bottleneck_courses
+        for subject in course_subjects[course_id]
+    ]
+    subject_statuses = runner.run(subject_jobs) if subject_jobs else {}
+
+    for course_id in bottleneck_courses:
         for subject in sorted(course_subjects[course_id], key=lambda s: -s.weekly_hours):
-            status_s, _, _ = solve_scheduling_model(
-                all_teachers, all_subjects, all_groups, all_subjectgroups,
-                num_days, num_hours,
-                diagnostic_mode=True,
-                all_joint_classes=all_joint_classes,
-                teacher_subject_lines=teacher_subject_lines,
-                skip_subject_weekly_hours_for={subject.id},
-            )
-            if status_s == cp_model.OPTIMAL or status_s == cp_model.FEASIBLE:
+            if _is_feasible(subject_statuses.get(subject.id)):
                 flags = _bottleneck_flags(subject)
                 bottleneck_entries.append({
                     "course": course_id,
@@ -992,11 +1477,13 @@ def _find_teacher_max_hours_bottleneck(all_teachers, all_subjects, all_groups,
                                         all_subjectgroups, num_days, num_hours,
                                         all_joint_classes=None,
                                         teacher_subject_lines=None,
-                                        locale=DEFAULT_LOCALE):
+                                        locale=DEFAULT_LOCALE,
+                                        runner=None):
     """Identify which teacher(s) make TeacherMaxWeeklyHours infeasible.
 
     Strategy: relax TeacherMaxWeeklyHours one teacher at a time.
     Any teacher whose relaxation makes the model feasible is a bottleneck.
+    The per-teacher solves go through ``runner`` (sequential when None).
 
     Returns a list of bottleneck info dicts with keys:
       - teacher_name: str
@@ -1009,6 +1496,14 @@ def _find_teacher_max_hours_bottleneck(all_teachers, all_subjects, all_groups,
       - group_count: int
     """
     logger.info("TeacherMaxWeeklyHours bottleneck analysis started", extra=build_log_extra())
+    if runner is None:
+        runner = isolation_runner({
+            "all_teachers": all_teachers, "all_subjects": all_subjects,
+            "all_groups": all_groups, "all_subjectgroups": all_subjectgroups,
+            "num_days": num_days, "num_hours": num_hours,
+            "all_joint_classes": all_joint_classes,
+            "teacher_subject_lines": teacher_subject_lines,
+        }, max_workers=1)
 
     bottleneck_entries = []
 
@@ -1025,20 +1520,19 @@ def _find_teacher_max_hours_bottleneck(all_teachers, all_subjects, all_groups,
             "coord": coord,
         }
 
-    for teacher in sorted(all_teachers, key=lambda t: -(teacher_stats[t.id]["load"])):
-        stats = teacher_stats[teacher.id]
-        if stats["load"] <= stats["effective_max"]:
-            continue
+    overloaded = [
+        teacher
+        for teacher in sorted(all_teachers, key=lambda t: -(teacher_stats[t.id]["load"]))
+        if teacher_stats[teacher.id]["load"] > teacher_stats[teacher.id]["effective_max"]
+    ]
+    statuses = runner.run([
+        {"id": teacher.id, "relax": {"skip_teacher_max_hours_for": {teacher.id}}}
+        for teacher in overloaded
+    ]) if overloaded else {}
 
-        status, _, _ = solve_scheduling_model(
-            all_teachers, all_subjects, all_groups, all_subjectgroups,
-            num_days, num_hours,
-            diagnostic_mode=True,
-            all_joint_classes=all_joint_classes,
-            teacher_subject_lines=teacher_subject_lines,
-            skip_teacher_max_hours_for={teacher.id},
-        )
-        if status != cp_model.OPTIMAL and status != cp_model.FEASIBLE:
+    for teacher in overloaded:
+        stats = teacher_stats[teacher.id]
+        if not _is_feasible(statuses.get(teacher.id)):
             continue
 
         groups = set()
@@ -1141,6 +1635,11 @@ def _build_diagnosis_message(diagnosis, locale=DEFAULT_LOCALE):
         for name in diagnosis["cleared"]:
             msg.append(f"  - {name}")
         msg.append("")
+    if diagnosis.get("untested"):
+        msg.append(t_locale(locale, "diagnosis.untested_title"))
+        for name in diagnosis["untested"]:
+            msg.append(f"  - {name}")
+        msg.append("")
     if not diagnosis["sanity_issues"] and not diagnosis["suspects"]:
         msg.append(t_locale(locale, "diagnosis.no_conclusion"))
     return "\n".join(msg) + "\n"
@@ -1204,7 +1703,15 @@ def _persist_coordination_slots(session, all_teachers, num_days, num_hours, task
     )
 
 
-def create_timetable(session, progress_callback=None, task_id=None, locale=DEFAULT_LOCALE) -> str | None:
+def create_timetable(session, progress_callback=None, task_id=None, locale=DEFAULT_LOCALE,
+                     build_profile_callback=None, warm_start=False,
+                     keep_hint=False, free_groups=None,
+                     free_teachers=None, solver_profile=None,
+                     solver_profile_callback=None,
+                     solution_progress_callback=None,
+                     persist_best_solution=False,
+                     cancel_token=None,
+                     force=False) -> str | None:
     """
     Generates the school timetable using the OR-Tools CP-SAT solver.
 
@@ -1219,9 +1726,39 @@ def create_timetable(session, progress_callback=None, task_id=None, locale=DEFAU
                            called after each diagnosis phase completes.
         task_id: Optional task ID for logging.
         locale: Language code for user-facing messages (default: DEFAULT_LOCALE).
+        build_profile_callback: Optional callable(profile: dict) receiving the
+                                model build profile of the main solve.
+        warm_start: If True, hint the solver with the currently stored timetable.
+        keep_hint: With warm_start, keep the result as close to the stored
+                   timetable as possible (see solve_scheduling_model).
+        free_groups: Optional groups to re-solve incrementally. When this or
+                     free_teachers is given, every other assignment is frozen
+                     to the stored timetable and only changed slots are saved.
+        free_teachers: Optional teacher ids to re-solve incrementally.
+        solver_profile: Optional solver profile name overriding the one
+                        selected in Config.
+        solver_profile_callback: Optional callable(name: str, params: dict)
+                                 receiving the solver profile that runs.
+        solution_progress_callback: Optional callable(entry: dict) receiving
+                                    every improving solution of the main solve.
+        persist_best_solution: If True, save the best solution found so far
+                               while the search runs (throttled), so stopping
+                               early keeps a usable timetable. Ignored for
+                               incremental re-solves.
+        cancel_token: Optional CancellationToken. Cancelling it stops the
+                      running solve or diagnosis; SolveCancelled is raised
+                      instead of returning. The interrupted solve's best
+                      solution is only saved with persist_best_solution.
+        force: If True, solve (and diagnose) even when a result for the same
+               inputs and solver parameters is stored (see result_store). The
+               new result replaces the stored one. Incremental re-solves and
+               warm starts depend on the stored timetable and never use the
+               result store.
     """
+    incremental = bool(free_groups or free_teachers)
 
     logger.info("Timetable generation started", extra=build_log_extra(task_id=task_id))
+    check_cancelled(cancel_token)
 
     # Clear support assignments — they are invalid after regeneration
     session.query(SupportAssignment).delete()
@@ -1280,6 +1817,16 @@ def create_timetable(session, progress_callback=None, task_id=None, locale=DEFAU
     skip_restrictions = set(_json.loads(disabled_raw)) if disabled_raw else set()
     logger.info("Loaded disabled restrictions count=%d", len(skip_restrictions), extra=build_log_extra(task_id=task_id))
 
+    profile_name, solver_params = resolve_solver_profile(config, solver_profile)
+    logger.info(
+        "Using solver profile name=%s params=%s",
+        profile_name,
+        solver_params,
+        extra=build_log_extra(task_id=task_id),
+    )
+    if solver_profile_callback:
+        solver_profile_callback(profile_name, solver_params)
+
     # Load teacher-subject line restrictions
     teacher_subject_lines = _load_teacher_subject_lines(session)
     logger.debug(
@@ -1288,26 +1835,116 @@ def create_timetable(session, progress_callback=None, task_id=None, locale=DEFAU
         extra=build_log_extra(task_id=task_id),
     )
 
+    frozen_solution = None
+    if incremental:
+        frozen_solution = load_previous_solution(session)
+        logger.info(
+            "Incremental re-solve groups=%s teachers=%s stored_assignments=%d",
+            sorted(free_groups or ()),
+            sorted(free_teachers or ()),
+            len(frozen_solution),
+            extra=build_log_extra(task_id=task_id),
+        )
+
+    solution_hint = None
+    if warm_start or incremental:
+        solution_hint = frozen_solution if incremental else load_previous_solution(session)
+        logger.info(
+            "Loaded previous timetable for warm start assignments=%d",
+            len(solution_hint),
+            extra=build_log_extra(task_id=task_id),
+        )
+
+    # Reuse the stored result of a run with the same inputs, if any
+    stored_result_key = None
+    if not incremental and not warm_start:
+        stored_result_key = result_key(
+            model_fingerprint(
+                all_teachers=all_teachers, all_subjects=all_subjects, all_groups=all_groups,
+                all_subjectgroups=all_subjectgroups, num_days=num_days, num_hours=num_hours,
+                skip_restrictions=skip_restrictions,
+                all_joint_classes=all_joint_classes,
+                teacher_subject_lines=teacher_subject_lines,
+            ),
+            solver_params, locale,
+        )
+        stored = None if force else load_result(session, stored_result_key, task_id=task_id)
+        if stored is not None:
+            logger.info(
+                "Reusing stored result status=%s timings=%s",
+                stored["status"],
+                stored["timings"],
+                extra=build_log_extra(task_id=task_id),
+            )
+            if stored["solution"] is not None:
+                save_assignment_keys_to_db(
+                    session, stored["solution"], all_groups, num_days, num_hours, task_id=task_id,
+                )
+                _persist_coordination_slots(session, all_teachers, num_days, num_hours, task_id=task_id)
+                session.close()
+                return None
+            return _build_diagnosis_message(stored["diagnosis"], locale=locale)
+
+    def persist_best(solution, solution_assignments):
+        try:
+            save_solution_to_db(
+                session, solution, solution_assignments,
+                all_groups, num_days, num_hours, task_id=task_id,
+            )
+        except Exception:
+            # Keep searching; the final solution is saved after the solve.
+            logger.exception("Failed to persist best-so-far solution", extra=build_log_extra(task_id=task_id))
+
     # --- 2. Solve the scheduling model ---
+    solve_started_at = time.perf_counter()
     status, assignments, solver = solve_scheduling_model(
         all_teachers, all_subjects, all_groups, all_subjectgroups, num_days, num_hours,
         skip_restrictions=skip_restrictions, task_id=task_id,
         all_joint_classes=all_joint_classes,
         teacher_subject_lines=teacher_subject_lines,
+        build_profile_callback=build_profile_callback,
+        solver_params=solver_params,
+        solution_hint=solution_hint,
+        keep_hint=keep_hint,
+        frozen_solution=frozen_solution,
+        free_groups=free_groups,
+        free_teachers=free_teachers,
+        solution_progress_callback=solution_progress_callback,
+        best_solution_callback=persist_best if persist_best_solution and not incremental else None,
+        cancel_token=cancel_token,
+        model_cache=default_model_cache(),
     )
 
+    if cancel_token is not None and cancel_token.cancelled:
+        if persist_best_solution and not incremental and _is_feasible(status):
+            logger.info("Solve cancelled; keeping best solution found", extra=build_log_extra(task_id=task_id))
+            save_solution_to_db(
+                session, solver, assignments, all_groups, num_days, num_hours, task_id=task_id,
+            )
+            _persist_coordination_slots(session, all_teachers, num_days, num_hours, task_id=task_id)
+        raise SolveCancelled()
+    timings = {"solve_ms": round((time.perf_counter() - solve_started_at) * 1000, 3)}
+
     # --- 3. Solution Processing ---
     if status == cp_model.OPTIMAL or status == cp_model.FEASIBLE:
         logger.info("Solver returned feasible solution status=%s", solver.StatusName(status), extra=build_log_extra(task_id=task_id))
-        save_solution_to_db(
-            session,
-            solver,
-            assignments,
-            all_groups,
-            num_days,
-            num_hours,
-            task_id=task_id,
-        )
+        if incremental:
+            save_solution_changes(session, solver, assignments, frozen_solution, task_id=task_id)
+        else:
+            active_keys = _active_assignment_keys(solver, assignments)
+            save_assignment_keys_to_db(
+                session,
+                active_keys,
+                all_groups,
+                num_days,
+                num_hours,
+                task_id=task_id,
+            )
+            if stored_result_key is not None:
+                save_result(
+                    session, stored_result_key, solver.StatusName(status),
+                    solution=active_keys, timings=timings, task_id=task_id,
+                )
 
         # Persist coordination hours into teacher_busy_slots
         _persist_coordination_slots(session, all_teachers, num_days, num_hours, task_id=task_id)
@@ -1315,10 +1952,20 @@ def create_timetable(session, progress_callback=None, task_id=None, locale=DEFAU
         session.close()
         logger.info("Timetable generation finished successfully", extra=build_log_extra(task_id=task_id))
         return None
+    elif incremental:
+        # Diagnosing the full model would not explain a conflict with the
+        # frozen part of the timetable, so only report the scope.
+        scope = ", ".join(
+            [str(g) for g in sorted(free_groups or ())]
+            + [t.name for t in all_teachers if t.id in set(free_teachers or ())]
+        )
+        logger.warning("Incremental re-solve found no solution", extra=build_log_extra(task_id=task_id))
+        return t_locale(locale, "timetable.partial_infeasible", scope=scope)
     else:
         logger.warning("No feasible timetable found. Starting diagnosis", extra=build_log_extra(task_id=task_id))
         if progress_callback:
             progress_callback("infeasible", t_locale(locale, "diagnosis.infeasible_phase"))
+        diagnosis_started_at = time.perf_counter()
         diagnosis = diagnose_infeasibility(
             all_teachers, all_subjects, all_groups,
             all_subjectgroups, num_days, num_hours,
@@ -1326,7 +1973,16 @@ def create_timetable(session, progress_callback=None, task_id=None, locale=DEFAU
             all_joint_classes=all_joint_classes,
             teacher_subject_lines=teacher_subject_lines,
             locale=locale,
+            deadline_seconds=DIAGNOSIS_DEADLINE_SECONDS,
+            max_suspects=DIAGNOSIS_MAX_SUSPECTS,
+            cancel_token=cancel_token,
         )
+        timings["diagnosis_ms"] = round((time.perf_counter() - diagnosis_started_at) * 1000, 3)
+        if stored_result_key is not None:
+            save_result(
+                session, stored_result_key, solver.StatusName(status),
+                diagnosis=diagnosis, timings=timings, task_id=task_id,
+            )
         msg = _build_diagnosis_message(diagnosis, locale=locale)
         logger.warning("Timetable generation finished without solution", extra=build_log_extra(task_id=task_id))
         return msg
@@ -1,5 +1,5 @@
-from typing import List, Optional, Dict, Union
-from pydantic import BaseModel, Field, RootModel
+from typing import Any, List, Optional, Dict, Union
+from pydantic import BaseModel, Field, RootModel, model_validator
 
 
 class CourseSchema(BaseModel):
@@ -151,3 +151,168 @@ class ConfigSchema(BaseModel):
     day_names: List[str] = []
     day_colors: Dict[str, str] = {}
     disabled_restrictions: List[str] = []
+    solver_profiles: Dict[str, Dict[str, Any]] = {}
+    solver_profile: Optional[str] = None
+
+
+# ---------------------------------------------------------------------------
+# Import payload (the document written by GET /export)
+# ---------------------------------------------------------------------------
+
+
+class ImportCourse(BaseModel):
+    id: str
+    num_lines: int = 1
+
+
+class ImportSubject(BaseModel):
+    id: str
+    name: str
+    color: str = "#dbeafe"
+    weekly_hours: int = 1
+    max_hours_per_day: int = 2
+    consecutive_hours: bool = True
+    teach_every_day: bool = False
+    # Exports carry the course as a dict; older payloads as an id
+    course: Optional[Union[Dict[str, Any], str]] = None
+    course_id: Optional[str] = None
+    linked_subject_id: Optional[str] = None
+    included_lines: Optional[List[int]] = None
+
+    def course_ref(self):
+        if isinstance(self.course, dict):
+            return self.course.get("id")
+        if "course_id" in self.model_fields_set:
+            return self.course_id
+        return self.course
+
+
+class ImportSubjectGroup(BaseModel):
+    id: Optional[int] = None
+    name: Optional[str] = None
+    color: str = "#fef3c7"
+    subjects: List[str] = []
+    included_lines: Optional[List[int]] = None
+    shared_hours: Optional[int] = None
+
+
+class ImportTeacher(BaseModel):
+    id: Optional[int] = None
+    name: str
+    subjects: List[str] = []
+    teacher_subject_lines: Optional[Dict[str, Optional[List[int]]]] = None
+    preferences: Optional[Union[str, Dict[str, Any]]] = None
+    coordination_hours: int = 0
+    max_hours_week: int = 1
+    tutor_group: Optional[str] = None
+    tutor_groups: Optional[Union[List[str], str]] = None
+
+    def tutor_groups_value(self):
+        if "tutor_groups" in self.model_fields_set:
+            return self.tutor_groups
+        return self.tutor_group
+
+
+class ImportTimeslot(BaseModel):
+    id: Optional[int] = None
+    day: int
+    hour: int
+    course_id: str
+    line: int
+    subject_group_id: Optional[int] = None
+
+
+class ImportAssignment(BaseModel):
+    timeslot_id: Optional[int] = None
+    subject_id: Optional[str] = None
+    teacher_id: Optional[int] = None
+    # Used to find the timeslot when timeslot_id is missing or unknown
+    day: Optional[int] = None
+    hour: Optional[int] = None
+    course_id: Optional[str] = None
+    line: Optional[int] = None
+
+
+class ImportConfig(BaseModel):
+    classes_per_day: int = 5
+    days_per_week: int = 5
+    hour_names: Optional[List[str]] = None
+    day_indices: List[int] = []
+    day_colors: Optional[Dict[str, str]] = None
+    disabled_restrictions: Optional[List[str]] = None
+    solver_profiles: Optional[Dict[str, Dict[str, Any]]] = None
+    solver_profile: Optional[str] = None
+
+
+class ImportFixedSlot(BaseModel):
+    id: Optional[int] = None
+    slot_type: str
+    position: int
+    label: str
+    time_range: str
+    color: str = "#f1f5f9"
+
+
+class ImportTeacherFixedSlotLabel(BaseModel):
+    teacher_id: int
+    fixed_slot_id: int
+    day: int
+    label: str = ""
+
+
+class ImportCourseFixedSlotLabel(BaseModel):
+    course_line: str
+    fixed_slot_id: int
+    day: int
+    label: str = ""
+
+
+class ImportTeacherBusySlot(BaseModel):
+    teacher_id: Optional[int] = None
+    day: int = 0
+    hour: int = 0
+    slot_type: str = "coordinacion"
+
+
+class ImportJointClass(BaseModel):
+    name: Optional[str] = None
+    course_id: str
+    subject_id: str
+    teacher_id: Optional[int] = None
+    lines: Union[List[Any], str] = []
+    shared_hours: Optional[int] = None
+
+
+class ImportSupportAssignment(BaseModel):
+    teacher_id: int
+    day: int
+    hour: int
+    subject_id: str
+    course_id: str
+    line: int
+
+
+class ImportPayload(BaseModel):
+    """A backup document; sections that are missing or null are empty."""
+
+    config: Optional[ImportConfig] = None
+    fixed_slots: Optional[List[ImportFixedSlot]] = None
+    teacher_fixed_slot_labels: Optional[List[ImportTeacherFixedSlotLabel]] = None
+    course_fixed_slot_labels: Optional[List[ImportCourseFixedSlotLabel]] = None
+    courses: Optional[List[ImportCourse]] = None
+    subjects: Optional[List[ImportSubject]] = None
+    subject_groups: Optional[List[ImportSubjectGroup]] = None
+    teachers: Optional[List[ImportTeacher]] = None
+    timeslots: Optional[List[ImportTimeslot]] = None
+    assignments: Optional[List[ImportAssignment]] = None
+    teacher_busy_slots: Optional[List[ImportTeacherBusySlot]] = None
+    joint_classes: Optional[List[ImportJointClass]] = None
+    support_assignments: Optional[List[ImportSupportAssignment]] = None
+
+    @model_validator(mode="before")
+    @classmethod
+    def _empty_config_is_none(cls, data):
+        # An empty config object means "no config", as in older exports
+        if isinstance(data, dict) and not data.get("config"):
+            data = {**data, "config": None}
+        return data
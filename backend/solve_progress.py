@@ -0,0 +1,82 @@
+"""Live progress of the main CP-SAT solve.
+
+``SolutionProgressCallback`` is attached to the solver and fires on every
+improving solution. It reports the objective, the best bound, the relative
+gap and the wall time, and can hand the solution to a "best so far" callback
+at a throttled interval, so a long optimisation can be followed (and stopped)
+without losing the timetable found so far.
+"""
+
+import logging
+import time
+
+from ortools.sat.python import cp_model
+
+from .logging_config import build_log_extra
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BEST_SOLUTION_INTERVAL_SECONDS = 10.0
+
+
+def relative_gap(objective, bound):
+    """Relative distance between the objective and the best bound (0 = proven optimal)."""
+    return abs(bound - objective) / max(1.0, abs(objective))
+
+
+class SolutionProgressCallback(cp_model.CpSolverSolutionCallback):
+    """Record improving solutions and forward them to the caller.
+
+    Args:
+        on_solution: Optional callable(entry: dict) called for every solution
+            with keys solution, objective, bound, gap and wall_time.
+        on_best_solution: Optional callable(callback) called with this
+            callback (a solution view, usable with ``Value``/``response_proto``)
+            at most once every ``best_solution_interval_seconds``.
+        best_solution_interval_seconds: Throttle for ``on_best_solution``.
+        task_id: Optional task ID for logging.
+    """
+
+    def __init__(self, on_solution=None, on_best_solution=None,
+                 best_solution_interval_seconds=DEFAULT_BEST_SOLUTION_INTERVAL_SECONDS,
+                 task_id=None):
+        super().__init__()
+        self.on_solution = on_solution
+        self.on_best_solution = on_best_solution
+        self.best_solution_interval_seconds = best_solution_interval_seconds
+        self.task_id = task_id
+        self.entries = []
+        self._last_best_at = None
+
+    def on_solution_callback(self):
+        objective = self.ObjectiveValue()
+        bound = self.BestObjectiveBound()
+        entry = {
+            "solution": len(self.entries) + 1,
+            "objective": objective,
+            "bound": bound,
+            "gap": round(relative_gap(objective, bound), 6),
+            "wall_time": round(self.WallTime(), 3),
+        }
+        self.entries.append(entry)
+        logger.info(
+            "Improving solution solution=%d objective=%.1f bound=%.1f gap=%.4f wall_time=%.2f",
+            entry["solution"],
+            objective,
+            bound,
+            entry["gap"],
+            entry["wall_time"],
+            extra=build_log_extra(task_id=self.task_id),
+        )
+        if self.on_solution:
+            self.on_solution(entry)
+
+        if self.on_best_solution:
+            now = time.monotonic()
+            if (
+                self._last_best_at is None
+                or now - self._last_best_at >= self.best_solution_interval_seconds
+            ):
+                self._last_best_at = now
+                self.on_best_solution(self)
@@ -0,0 +1,149 @@
+"""Run one timetable generation job and report its outcome.
+
+``run_timetable_job`` is what a solver worker process executes for each job
+of the queue (see ``worker_pool``). Progress, build and solver profiles and
+improving solutions are reported to the ``JobQueue``, and the last failure
+is persisted as the ``SchedulerError`` row shown by the UI.
+"""
+
+import logging
+from datetime import datetime
+
+from .cancellation import SolveCancelled
+from .logging_config import build_log_extra
+from .models import Session as DbSession, SchedulerError
+from .scheduler import create_timetable
+from .translations import t_locale
+
+
+logger = logging.getLogger(__name__)
+
+
+def persist_scheduler_error(message, details):
+    """Save or update the single-row scheduler error in the database."""
+    session = DbSession()
+    try:
+        error = session.query(SchedulerError).filter_by(id=1).first()
+        if error:
+            error.message = message
+            error.details = details
+            error.created_at = datetime.now().isoformat()
+        else:
+            error = SchedulerError(
+                id=1,
+                message=message,
+                details=details,
+                created_at=datetime.now().isoformat(),
+            )
+            session.add(error)
+        session.commit()
+        logger.info("Persisted scheduler error: %s", message)
+    except Exception as e:
+        logger.exception("Failed to persist scheduler error: %s", e)
+        session.rollback()
+    finally:
+        session.close()
+
+
+def clear_scheduler_error():
+    """Remove the persisted scheduler error from the database."""
+    session = DbSession()
+    try:
+        session.query(SchedulerError).filter_by(id=1).delete()
+        session.commit()
+        logger.info("Cleared persisted scheduler error")
+    except Exception as e:
+        logger.exception("Failed to clear scheduler error: %s", e)
+        session.rollback()
+    finally:
+        session.close()
+
+
+def run_timetable_job(task_id, locale, solve_options=None, tasks=None, cancel_token=None):
+    """Run ``create_timetable`` for a task and record the result in ``tasks``.
+
+    Checks cancellation before/after the solve to avoid unnecessary DB writes.
+
+    Args:
+        task_id: Id of the task in ``tasks``.
+        locale: Locale of the user-facing messages.
+        solve_options: Extra keyword arguments for ``create_timetable``
+            (warm start, incremental scope...).
+        tasks: ``JobQueue`` receiving progress and the outcome.
+        cancel_token: Optional CancellationToken that stops the generation.
+    """
+    if tasks.is_cancelled(task_id):
+        logger.info("Skipping solver start because task was already cancelled", extra=build_log_extra(task_id=task_id))
+        return
+
+    def progress_callback(phase, phase_details):
+        tasks.update_progress(task_id, phase, phase_details)
+        logger.info(
+            "Task progress updated phase=%s details_length=%d",
+            phase,
+            len(phase_details or ""),
+            extra=build_log_extra(task_id=task_id),
+        )
+
+    def build_profile_callback(build_profile):
+        tasks.update_build_profile(task_id, build_profile)
+
+    def solver_profile_callback(name, params):
+        tasks.update_solver_profile(task_id, name, params)
+
+    def solution_progress_callback(entry):
+        tasks.record_solution(task_id, entry)
+
+    session = DbSession()
+    logger.info("Solver job started", extra=build_log_extra(task_id=task_id))
+    try:
+        timetable_result = create_timetable(
+            session,
+            progress_callback=progress_callback,
+            task_id=task_id,
+            locale=locale,
+            build_profile_callback=build_profile_callback,
+            solver_profile_callback=solver_profile_callback,
+            solution_progress_callback=solution_progress_callback,
+            cancel_token=cancel_token,
+            **(solve_options or {}),
+        )
+
+        if tasks.is_cancelled(task_id):
+            logger.info("Task cancelled after solver completion", extra=build_log_extra(task_id=task_id))
+            return
+
+        if timetable_result:
+            tasks.fail_task(
+                task_id,
+                error=t_locale(locale, 'timetable.generate_failed'),
+                details=timetable_result,
+            )
+            persist_scheduler_error(
+                message=t_locale(locale, 'timetable.generate_failed'),
+                details=timetable_result,
+            )
+            logger.warning("Task failed with diagnostic output", extra=build_log_extra(task_id=task_id))
+        else:
+            tasks.complete_task(task_id)
+            clear_scheduler_error()
+            logger.info("Task completed successfully", extra=build_log_extra(task_id=task_id))
+    except SolveCancelled:
+        logger.info("Solver stopped by cancellation", extra=build_log_extra(task_id=task_id))
+    except Exception as e:
+        if not tasks.is_cancelled(task_id):
+            tasks.fail_task(
+                task_id,
+                error=t_locale(locale, 'errors.timetable_generation_error', error=str(e)),
+            )
+            persist_scheduler_error(
+                message=t_locale(locale, 'errors.timetable_generation_error', error=str(e)),
+                details=None,
+            )
+            logger.exception("Task failed with unexpected exception", extra=build_log_extra(task_id=task_id))
+    finally:
+        try:
+            session.close()
+        except Exception:
+            pass
+        logger.info("Solver job finished", extra=build_log_extra(task_id=task_id))
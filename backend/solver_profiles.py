@@ -0,0 +1,106 @@
+"""Named CP-SAT parameter sets ("solver profiles") for timetable generation.
+
+A profile is a dict with any of the keys in ``SOLVER_PROFILE_FIELDS``; keys
+that are missing (or None) keep the CP-SAT default. Built-in profiles are
+always available; schools can add their own or override a built-in one by
+storing profiles in ``Config.solver_profiles`` and pick the active one with
+``Config.solver_profile``.
+"""
+
+import json
+import logging
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SOLVER_PROFILE = "default"
+
+# Field name -> (type, minimum, maximum). None bounds are open.
+SOLVER_PROFILE_FIELDS = {
+    "num_search_workers": (int, 0, None),
+    "max_time_in_seconds": (float, 0.0, None),
+    "relative_gap_limit": (float, 0.0, 1.0),
+    "linearization_level": (int, 0, 2),
+    "symmetry_level": (int, 0, 4),
+    "random_seed": (int, 0, None),
+}
+
+BUILTIN_SOLVER_PROFILES = {
+    # CP-SAT defaults: all cores, 60 s.
+    "default": {
+        "max_time_in_seconds": 60.0,
+    },
+    # Single worker with a fixed seed: the same input gives the same timetable.
+    "deterministic": {
+        "num_search_workers": 1,
+        "max_time_in_seconds": 60.0,
+        "random_seed": 0,
+    },
+    # Longer search that stops once within 1% of the best bound.
+    "thorough": {
+        "max_time_in_seconds": 300.0,
+        "relative_gap_limit": 0.01,
+        "linearization_level": 2,
+    },
+}
+
+
+def validate_solver_profile(profile):
+    """Return a normalized copy of ``profile`` or raise ValueError."""
+    if not isinstance(profile, dict):
+        raise ValueError("solver profile must be an object")
+    normalized = {}
+    for key, value in profile.items():
+        if key not in SOLVER_PROFILE_FIELDS:
+            raise ValueError(f"unknown solver parameter '{key}'")
+        if value is None:
+            continue
+        kind, minimum, maximum = SOLVER_PROFILE_FIELDS[key]
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            raise ValueError(f"'{key}' must be a number")
+        if kind is int and int(value) != value:
+            raise ValueError(f"'{key}' must be an integer")
+        value = kind(value)
+        if (minimum is not None and value < minimum) or (maximum is not None and value > maximum):
+            raise ValueError(f"'{key}' is out of range")
+        normalized[key] = value
+    return normalized
+
+
+def available_solver_profiles(config=None):
+    """Built-in profiles merged with (and overridden by) the ones stored in ``config``."""
+    profiles = {name: dict(params) for name, params in BUILTIN_SOLVER_PROFILES.items()}
+    raw = getattr(config, "solver_profiles", None)
+    if raw:
+        try:
+            stored = json.loads(raw)
+        except ValueError:
+            logger.warning("Ignoring unreadable stored solver profiles")
+            stored = {}
+        for name, params in stored.items():
+            try:
+                profiles[name] = validate_solver_profile(params)
+            except ValueError as exc:
+                logger.warning("Ignoring invalid solver profile name=%s error=%s", name, exc)
+    return profiles
+
+
+def resolve_solver_profile(config=None, name=None):
+    """Return ``(name, params)`` of the profile to run.
+
+    ``name`` takes precedence over ``Config.solver_profile``; unknown names
+    fall back to the default profile.
+    """
+    profiles = available_solver_profiles(config)
+    requested = name or getattr(config, "solver_profile", None) or DEFAULT_SOLVER_PROFILE
+    if requested not in profiles:
+        logger.warning("Unknown solver profile name=%s, using %s", requested, DEFAULT_SOLVER_PROFILE)
+        requested = DEFAULT_SOLVER_PROFILE
+    return requested, profiles[requested]
+
+
+def apply_solver_profile(solver, params):
+    """Set the profile parameters on a ``cp_model.CpSolver``."""
+    for key, value in (params or {}).items():
+        if value is not None:
+            setattr(solver.parameters, key, value)
@@ -0,0 +1,141 @@
+"""SQLite engines and versioned schema migrations.
+
+Every database file (the live ``agenda.db`` and the scenario copies) is
+opened through ``create_sqlite_engine``, which configures each new
+connection with ``CONNECTION_PRAGMAS``. The journal is kept in WAL mode, so
+the solver writing a timetable does not block requests reading the old
+one; with WAL, ``synchronous = NORMAL`` is still safe against corruption
+and only avoids an fsync per commit.
+
+Set ``BACKEND_SQLITE_JOURNAL_MODE`` to use another journal mode (e.g.
+``DELETE`` when the database lives on a network filesystem, where WAL is not
+supported).
+
+``migrate`` brings an existing database up to date: missing tables are
+created from the models, then the pending steps of ``MIGRATIONS`` run in one
+transaction. The schema version is stored in SQLite's ``user_version``
+header, so each step runs once per database file.
+"""
+
+import logging
+import os
+
+from sqlalchemy import create_engine, event
+
+try:
+    from .logging_config import build_log_extra
+except ImportError:
+    from logging_config import build_log_extra
+
+
+logger = logging.getLogger(__name__)
+
+JOURNAL_MODE_ENV = "BACKEND_SQLITE_JOURNAL_MODE"
+DEFAULT_JOURNAL_MODE = "WAL"
+CONNECTION_PRAGMAS = (
+    "synchronous = NORMAL",
+    # Negative: size in KiB (32 MiB of page cache per connection)
+    "cache_size = -32000",
+    "mmap_size = 268435456",
+    "temp_store = MEMORY",
+)
+BUSY_TIMEOUT_MS = 10000
+
+
+def _journal_mode():
+    mode = os.getenv(JOURNAL_MODE_ENV, DEFAULT_JOURNAL_MODE).strip().upper()
+    if mode not in ("WAL", "DELETE", "TRUNCATE", "PERSIST", "MEMORY", "OFF"):
+        logger.warning("Ignoring invalid %s=%r", JOURNAL_MODE_ENV, mode, extra=build_log_extra())
+        mode = DEFAULT_JOURNAL_MODE
+    return mode
+
+
+def _configure_connection(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    try:
+        # Before switching the journal mode, which may wait for other writers
+        cursor.execute(f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}")
+        cursor.execute(f"PRAGMA journal_mode = {_journal_mode()}")
+        for pragma in CONNECTION_PRAGMAS:
+            cursor.execute(f"PRAGMA {pragma}")
+    finally:
+        cursor.close()
+
+
+def create_sqlite_engine(path):
+    """Return an engine for the SQLite file ``path`` with tuned connections."""
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+    event.listen(engine, "connect", _configure_connection)
+    return engine
+
+
+# --- Migrations -------------------------------------------------------------
+# Each step gets a connection inside the migration transaction and the model
+# metadata. Steps must also work on a database just created by create_all,
+# which already has the latest schema (user_version 0).
+
+def _columns(conn, table):
+    return {row[1] for row in conn.exec_driver_sql(f'PRAGMA table_info("{table}")')}
+
+
+def _add_settings_columns(conn, metadata):
+    """Columns added to ``config`` and ``jobs`` after their first release."""
+    for table, column, ddl in (
+        ("config", "day_colors", "TEXT"),
+        ("config", "solver_profiles", "TEXT"),
+        ("config", "solver_profile", "VARCHAR(100)"),
+        ("jobs", "scenario", "VARCHAR(64)"),
+    ):
+        if column not in _columns(conn, table):
+            conn.exec_driver_sql(f'ALTER TABLE "{table}" ADD COLUMN {column} {ddl}')
+
+
+def _create_indexes(conn, metadata):
+    """Indexes declared on the models (timeslot, assignment and busy-slot lookups)."""
+    for table in metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(conn, checkfirst=True)
+    conn.exec_driver_sql("ANALYZE")
+
+
+MIGRATIONS = (
+    (1, "config and jobs columns", _add_settings_columns),
+    (2, "lookup indexes", _create_indexes),
+)
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+def schema_version(conn):
+    return conn.exec_driver_sql("PRAGMA user_version").scalar()
+
+
+def migrate(engine, metadata):
+    """Create the missing tables of ``metadata`` and apply pending migrations.
+
+    Concurrent callers (e.g. the API and the solver worker processes starting
+    together) are serialised by the write lock taken before the version is
+    read.
+
+    Returns:
+        The schema version of the database.
+    """
+    metadata.create_all(engine)
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        if schema_version(conn) >= SCHEMA_VERSION:
+            return schema_version(conn)
+        conn.exec_driver_sql("BEGIN IMMEDIATE")
+        try:
+            version = schema_version(conn)
+            for number, description, step in MIGRATIONS:
+                if number > version:
+                    step(conn, metadata)
+                    logger.info(
+                        "Database migrated version=%d (%s) database=%s",
+                        number, description, engine.url.database, extra=build_log_extra(),
+                    )
+            conn.exec_driver_sql(f"PRAGMA user_version = {max(version, SCHEMA_VERSION)}")
+            conn.exec_driver_sql("COMMIT")
+        except Exception:
+            conn.exec_driver_sql("ROLLBACK")
+            raise
+        return schema_version(conn)
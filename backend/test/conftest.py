@@ -1,7 +1,30 @@
 import os
 import sys
 
+import pytest
+
 # Make backend package importable when tests are run from the test directory
 ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 if ROOT not in sys.path:
     sys.path.insert(0, ROOT)
+
+# Tests queue solver jobs without starting worker processes in the API app
+os.environ.setdefault("BACKEND_SOLVER_WORKERS", "0")
+
+
+@pytest.fixture(autouse=True)
+def _isolated_model_cache(tmp_path, monkeypatch):
+    """Keep the on-disk model cache of create_timetable inside each test's tmp dir."""
+    monkeypatch.setenv("BACKEND_MODEL_CACHE_DIR", str(tmp_path / "model-cache"))
+
+
+@pytest.fixture(autouse=True)
+def _isolated_scenarios(tmp_path, monkeypatch):
+    """Store scenario databases inside each test's tmp dir."""
+    monkeypatch.setenv("BACKEND_SCENARIO_DIR", str(tmp_path / "scenarios"))
+
+
+@pytest.fixture(autouse=True)
+def _isolated_exports(tmp_path, monkeypatch):
+    """Write background Excel exports inside each test's tmp dir."""
+    monkeypatch.setenv("BACKEND_EXPORT_DIR", str(tmp_path / "exports"))
@@ -0,0 +1,75 @@
+from ortools.sat.python import cp_model
+
+
+def _build(store_cls=dict):
+    model = cp_model.CpModel()
+    assignments = store_cls()
+    for g in ("1-A", "1-B"):
+        for s in ("M", "L"):
+            for t in (1, 2):
+                for d in range(2):
+                    for h in range(3):
+                        assignments[(g, s, t, d, h)] = model.NewBoolVar(f"{g}{s}{t}{d}{h}")
+    return assignments
+
+
+def test_index_keys_match_linear_scan():
+    from restrictions import index_of
+
+    assignments = _build()
+    index = index_of(assignments)
+
+    expected = [k for k in assignments if k[2] == 1 and k[3] == 0 and k[4] == 2]
+    assert index.keys(teacher=1, day=0, hour=2) == expected
+
+    expected = [k for k in assignments if k[0] == "1-B" and k[1] == "L"]
+    assert index.keys(group="1-B", subject="L") == expected
+    assert index.vars(group="1-B", subject="L") == [assignments[k] for k in expected]
+
+    assert index.keys(subject="X", day=0) == []
+
+
+def test_index_values_of_returns_distinct_slots_in_order():
+    from restrictions import index_of
+
+    assignments = _build()
+    slots = index_of(assignments).values_of("day", "hour", group="1-A")
+    assert slots == [(d, h) for d in range(2) for h in range(3)]
+
+
+def test_store_reuses_index_and_invalidates_on_insert():
+    from restrictions import AssignmentStore
+
+    assignments = _build(AssignmentStore)
+    index = assignments.index
+    assert assignments.index is index
+    assert len(index.keys(group="1-A", day=0, hour=0)) == 4
+
+    model = cp_model.CpModel()
+    assignments[("1-A", "X", 3, 0, 0)] = model.NewBoolVar("extra")
+    assert assignments.index is not index
+    assert len(assignments.index.keys(group="1-A", day=0, hour=0)) == 5
+
+
+def test_create_assignments_returns_indexed_store():
+    from backend.restrictions import AssignmentStore
+    from backend.scheduler import _create_assignments
+
+    class Subject:
+        def __init__(self, id, course_id):
+            self.id = id
+            self.course_id = course_id
+            self.included_lines = None
+
+    class Teacher:
+        def __init__(self, id, subjects):
+            self.id = id
+            self.name = f"T{id}"
+            self.subjects = subjects
+
+    math = Subject("M1", "1")
+    teacher = Teacher(1, [math])
+    assignments = _create_assignments(cp_model.CpModel(), [teacher], [math], ["1-A"], 2, 2)
+
+    assert isinstance(assignments, AssignmentStore)
+    assert len(assignments.index.keys(teacher=1, day=1, hour=0)) == 1
@@ -0,0 +1,125 @@
+import pytest
+from ortools.sat.python import cp_model
+
+
+class MockTeacher:
+    def __init__(self, teacher_id):
+        self.id = teacher_id
+        self.name = str(teacher_id)
+
+
+def _build(store_cls=dict):
+    model = cp_model.CpModel()
+    assignments = store_cls()
+    for g in ("1-A", "1-B"):
+        for t in (1, 2):
+            for d in range(2):
+                for h in range(3):
+                    assignments[(g, "M", t, d, h)] = model.NewBoolVar(f"{g}{t}{d}{h}")
+    return model, assignments
+
+
+def test_store_shares_channels_per_model():
+    from restrictions import AssignmentStore, channels_of
+
+    model, assignments = _build(AssignmentStore)
+    channels = channels_of(model, assignments)
+
+    assert channels_of(model, assignments) is channels
+    assert channels.teacher_busy(1, 0, 0) is channels.teacher_busy(1, 0, 0)
+    assert channels_of(cp_model.CpModel(), assignments) is not channels
+
+
+def test_channels_reuse_single_literals_and_constants():
+    from restrictions import channels_of
+
+    model = cp_model.CpModel()
+    x = model.NewBoolVar("x")
+    channels = channels_of(model, {("1-A", "M", 1, 0, 0): x})
+
+    assert channels.subject_active("1-A", "M", 0, 0) is x
+    before = len(model.proto.constraints)
+    channels.subject_active("1-A", "M", 0, 1)
+    assert len(model.proto.constraints) == before
+    assert channels.constraint_indices == set()
+
+
+def test_busy_and_together_channels_follow_the_assignments():
+    from restrictions import channels_of
+
+    model, assignments = _build()
+    channels = channels_of(model, assignments)
+    busy = channels.teacher_busy(1, 0, 0)
+    present = channels.subject_present("1-A", "M", 1, 3)
+    model.Add(assignments[("1-B", "M", 1, 0, 0)] == 1)
+    model.Add(sum(v for k, v in assignments.items() if k[0] == "1-A" and k[3] == 1) == 0)
+
+    solver = cp_model.CpSolver()
+    assert solver.Solve(model) == cp_model.OPTIMAL
+    assert solver.Value(busy) == 1
+    assert solver.Value(present) == 0
+    assert channels.constraint_indices
+
+
+def test_teacher_soft_restrictions_share_busy_variables():
+    from restrictions import AssignmentStore, TeacherAvoidGaps, TeacherFreeHoursEvenDistribution
+
+    teachers = [MockTeacher(1), MockTeacher(2)]
+
+    def count_vars(restrictions):
+        model, assignments = _build(AssignmentStore)
+        before = len(model.proto.variables)
+        for restriction in restrictions:
+            restriction.apply(model, assignments, teachers, 2, 3)
+        return len(model.proto.variables) - before
+
+    gaps = count_vars([TeacherAvoidGaps()])
+    free = count_vars([TeacherFreeHoursEvenDistribution()])
+    both = count_vars([TeacherAvoidGaps(), TeacherFreeHoursEvenDistribution()])
+
+    busy_vars = len(teachers) * 2 * 3
+    assert both == gaps + free - busy_vars
+
+
+class MockSubject:
+    def __init__(self, subject_id, linked_subject_id=None):
+        self.id = subject_id
+        self.name = subject_id
+        self.course_id = "1"
+        self.weekly_hours = 2
+        self.linked_subject_id = linked_subject_id
+
+
+class MockSubjectGroup:
+    def __init__(self, subject_ids, shared_hours):
+        self.id = 1
+        self.subjects = [MockSubject(s) for s in subject_ids]
+        self.shared_hours = shared_hours
+        self.included_lines = None
+
+
+@pytest.mark.parametrize("name, args", [
+    ("GroupSubjectHoursMustBeConsecutive", (["1-A"], [MockSubject("M")], 1, 3)),
+    ("GroupSubjectHoursMustNotBeConsecutive", (["1-A"], [MockSubject("M")], 1, 3)),
+    ("LinkedSubjectsConsecutive",
+     (["1-A"], [MockSubject("M", linked_subject_id="L"), MockSubject("L")], 1, 3)),
+    ("SubjectGroupAssignment", (["1-A"], [], [MockSubjectGroup(["M", "L"], shared_hours=1)])),
+    ("GroupAtMostOneLogicalAssignment",
+     (["1-A"], 1, 3, [MockSubjectGroup(["M", "L"], shared_hours=1)])),
+])
+def test_restrictions_reading_subject_channels_allow_one_teacher_per_slot(name, args):
+    # GroupSubjectAtMostOneTeacherPerTimeslot is not applied: the restriction
+    # alone must reject two teachers of M for 1-A at (0, 0).
+    import restrictions
+
+    model = cp_model.CpModel()
+    assignments = restrictions.AssignmentStore()
+    for subject in ("M", "L"):
+        for teacher in (1, 2):
+            for h in range(3):
+                assignments[("1-A", subject, teacher, 0, h)] = model.NewBoolVar(f"{subject}{teacher}{h}")
+    getattr(restrictions, name)().apply(model, assignments, *args)
+    model.Add(assignments[("1-A", "M", 1, 0, 0)] == 1)
+    model.Add(assignments[("1-A", "M", 2, 0, 0)] == 1)
+
+    assert cp_model.CpSolver().Solve(model) == cp_model.INFEASIBLE
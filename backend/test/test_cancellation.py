@@ -0,0 +1,101 @@
+"""Tests for cooperative cancellation of solves and diagnosis."""
+
+import multiprocessing
+import threading
+import time
+
+import pytest
+from ortools.sat.python import cp_model
+
+from backend import parallel_diagnosis
+from backend.cancellation import CancellationToken, SolveCancelled, solving
+from backend.parallel_diagnosis import isolation_runner
+from backend.scheduler import diagnose_infeasibility
+from backend.test.test_diagnosis_model import _case
+from backend.test.test_job_queue import memory_queue
+from backend.worker_pool import _watch_cancellation
+
+
+def _slow_model():
+    model = cp_model.CpModel()
+    xs = [model.NewIntVar(0, 100, f"x{i}") for i in range(60)]
+    model.AddAllDifferent(xs)
+    model.Maximize(sum(x * (i % 7) for i, x in enumerate(xs)))
+    return model
+
+
+def test_cancel_stops_running_solve():
+    token = CancellationToken()
+    solver = cp_model.CpSolver()
+    solver.parameters.max_time_in_seconds = 30.0
+    threading.Timer(0.3, token.cancel).start()
+
+    started = time.monotonic()
+    with token.solving(solver):
+        solver.Solve(_slow_model())
+
+    assert time.monotonic() - started < 10
+    assert token.cancelled
+
+
+def test_cancelled_token_refuses_to_start_a_solve():
+    token = CancellationToken()
+    token.cancel()
+    with pytest.raises(SolveCancelled):
+        with token.solving(cp_model.CpSolver()):
+            pass
+
+
+def test_runner_skips_jobs_after_cancellation():
+    token = CancellationToken()
+    token.cancel()
+    jobs = [{"id": "TeacherUnavailableTimes", "relax": {"skip_restrictions": {"TeacherUnavailableTimes"}}}]
+
+    with isolation_runner(_case(), max_workers=1, cancel_token=token) as runner:
+        assert runner.run(jobs) == {"TeacherUnavailableTimes": None}
+
+
+def test_stopping_a_runner_generation_stops_the_worker_solve(monkeypatch):
+    class SlowModel:
+        def solve(self, time_limit_seconds, num_search_workers, cancel_token=None):
+            solver = cp_model.CpSolver()
+            solver.parameters.max_time_in_seconds = 30.0
+            with solving(cancel_token, solver):
+                return solver.Solve(_slow_model())
+
+    # Run the worker side in this process, as a pool worker would
+    stop = multiprocessing.get_context("spawn").Value("i", 0)
+    for name in ("_worker_inputs", "_worker_model", "_worker_stop"):
+        monkeypatch.setattr(parallel_diagnosis, name, None)
+    parallel_diagnosis._init_worker({}, stop)
+    monkeypatch.setattr(parallel_diagnosis, "_get_worker_model", SlowModel)
+    threading.Timer(0.3, lambda: setattr(stop, "value", 1)).start()
+
+    started = time.monotonic()
+    parallel_diagnosis._run_in_worker({"id": "slow", "relax": {}}, 1, None, 1)
+    assert time.monotonic() - started < 10
+    # Jobs of a stopped generation are not started
+    assert parallel_diagnosis._run_in_worker({"id": "next", "relax": {}}, 1, None, 1) == ("next", None)
+
+
+def test_diagnosis_raises_when_cancelled():
+    token = CancellationToken()
+    token.cancel()
+    with pytest.raises(SolveCancelled):
+        diagnose_infeasibility(**_case(), max_workers=1, cancel_token=token)
+
+
+def test_cancelling_a_job_cancels_its_worker_token():
+    queue = memory_queue()
+    task_id = queue.create_task()
+    queue.claim(worker_pid=10)
+    token = CancellationToken()
+    stop = threading.Event()
+    watcher = threading.Thread(target=_watch_cancellation, args=(queue, task_id, token, stop))
+    watcher.start()
+
+    queue.cancel_task(task_id)
+    watcher.join(timeout=5)
+    stop.set()
+
+    assert token.cancelled
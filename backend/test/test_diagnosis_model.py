@@ -0,0 +1,102 @@
+"""Tests for the single-model, assumption-based isolation engine."""
+
+from ortools.sat.python import cp_model
+
+from backend.diagnosis_model import GatedDiagnosisModel
+from backend.scheduler import solve_scheduling_model
+
+
+class MockTeacher:
+    def __init__(self, id, name, max_hours_week=10, subjects=None, preferences=None):
+        self.id = id
+        self.name = name
+        self.max_hours_week = max_hours_week
+        self.subjects = subjects or []
+        self.tutor_group = None
+        self.preferences = preferences
+        self.coordination_hours = 0
+
+
+class MockSubject:
+    def __init__(self, id, name, course_id, weekly_hours=1, max_hours_per_day=1):
+        self.id = id
+        self.name = name
+        self.course_id = course_id
+        self.weekly_hours = weekly_hours
+        self.max_hours_per_day = max_hours_per_day
+        self.consecutive_hours = True
+        self.teach_every_day = False
+        self.linked_subject_id = None
+        self.included_lines = None
+
+
+def _feasible(status):
+    return status in (cp_model.OPTIMAL, cp_model.FEASIBLE)
+
+
+def _case():
+    """Two courses; Ana is unavailable at hour 0, so course 1 cannot get 3 hours."""
+    math = MockSubject("M1", "Math", "1", weekly_hours=3, max_hours_per_day=3)
+    lang = MockSubject("L2", "Lang", "2", weekly_hours=2, max_hours_per_day=2)
+    ana = MockTeacher(1, "Ana", subjects=[math], preferences='{"0": {"unavailable": [0]}}')
+    luis = MockTeacher(2, "Luis", subjects=[lang])
+    return dict(
+        all_teachers=[ana, luis], all_subjects=[math, lang],
+        all_groups=["1-A", "2-A"], all_subjectgroups=[],
+        num_days=1, num_hours=3,
+    )
+
+
+def test_gated_model_is_infeasible_with_everything_enforced():
+    assert GatedDiagnosisModel(**_case()).solve() == cp_model.INFEASIBLE
+
+
+def test_gated_model_matches_rebuilt_model_per_restriction():
+    inputs = _case()
+    gated = GatedDiagnosisModel(**inputs)
+    for name in gated.restriction_literals:
+        rebuilt, _, _ = solve_scheduling_model(
+            **inputs, skip_restrictions={name}, diagnostic_mode=True,
+        )
+        assert _feasible(gated.solve(skip_restrictions={name})) == _feasible(rebuilt), name
+
+
+def test_gated_model_relaxes_single_subjects_and_teachers():
+    gated = GatedDiagnosisModel(**_case())
+
+    assert _feasible(gated.solve(skip_subject_weekly_hours_for={"M1"}))
+    assert not _feasible(gated.solve(skip_subject_weekly_hours_for={"L2"}))
+    assert not _feasible(gated.solve(skip_teacher_max_hours_for={1, 2}))
+
+
+def test_gated_model_keeps_shared_channels_when_their_creator_is_relaxed():
+    # Math must be consecutive and alternate with its linked Lang; nobody can
+    # teach at hour 1. LinkedSubjectsConsecutive is infeasible whether or not
+    # GroupSubjectHoursMustBeConsecutive is enforced, and it reads the "Math
+    # active" channels that GroupSubjectHoursMustBeConsecutive created first.
+    math = MockSubject("M1", "Math", "1", weekly_hours=2, max_hours_per_day=2)
+    lang = MockSubject("L1", "Lang", "1", weekly_hours=1, max_hours_per_day=1)
+    math.linked_subject_id = "L1"
+    unavailable = '{"0": {"unavailable": [1]}}'
+    inputs = dict(
+        all_teachers=[
+            MockTeacher(1, "Ana", subjects=[math], preferences=unavailable),
+            MockTeacher(2, "Eva", subjects=[math], preferences=unavailable),
+            MockTeacher(3, "Luis", subjects=[lang], preferences=unavailable),
+        ],
+        all_subjects=[math, lang], all_groups=["1-A"], all_subjectgroups=[],
+        num_days=1, num_hours=4,
+    )
+    gated = GatedDiagnosisModel(**inputs)
+
+    for skipped in (
+        {"GroupSubjectHoursMustBeConsecutive"},
+        {"LinkedSubjectsConsecutive"},
+        {"GroupSubjectHoursMustBeConsecutive", "LinkedSubjectsConsecutive"},
+    ):
+        rebuilt, _, _ = solve_scheduling_model(
+            **inputs, skip_restrictions=skipped, diagnostic_mode=True,
+        )
+        assert _feasible(gated.solve(skip_restrictions=skipped)) == _feasible(rebuilt), skipped
+    assert not _feasible(gated.solve(skip_restrictions={"GroupSubjectHoursMustBeConsecutive"}))
+    assert _feasible(gated.solve(skip_restrictions={"LinkedSubjectsConsecutive"}))
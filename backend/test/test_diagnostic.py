@@ -1,5 +1,11 @@
 """Tests for the infeasibility diagnostic pre-checks (Phase 1 sanity checks)."""
 
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from backend import parallel_diagnosis, scheduler
+from backend.models import Base, Config, Course, Subject, Teacher
+from backend.parallel_diagnosis import DIAGNOSIS_WORKERS_ENV
 from backend.scheduler import (
     _check_subjectgroup_weekly_hours_consistency,
     _check_teacher_capacity_vs_load,
@@ -174,3 +180,84 @@ def test_diagnose_infeasibility_returns_all_keys():
     assert "cleared" in result
 
 
+
+
+def _unavailable_teacher_case():
+    math = MockSubject("M1", "Math", "1", weekly_hours=3, max_hours_per_day=3)
+    teacher = MockTeacher(1, "Ana", max_hours_week=10, subjects=[math],
+                          preferences='{"0": {"unavailable": [0]}}')
+    return [teacher], [math]
+
+
+def test_diagnose_infeasibility_parallel_matches_sequential():
+    teachers, subjects = _unavailable_teacher_case()
+    sequential = diagnose_infeasibility(teachers, subjects, ["1-A"], [], 1, 3,
+                                        locale="en", max_workers=1)
+    parallel = diagnose_infeasibility(teachers, subjects, ["1-A"], [], 1, 3,
+                                      locale="en", max_workers=2)
+    assert "TeacherUnavailableTimes" in sequential["suspects"]
+    assert sorted(parallel["suspects"]) == sorted(sequential["suspects"])
+    assert sorted(parallel["cleared"]) == sorted(sequential["cleared"])
+    assert parallel["untested"] == []
+
+
+def test_diagnose_infeasibility_stops_after_max_suspects():
+    teachers, subjects = _unavailable_teacher_case()
+    phases = []
+    result = diagnose_infeasibility(
+        teachers, subjects, ["1-A"], [], 1, 3, locale="en", max_workers=1,
+        max_suspects=1,
+        progress_callback=lambda phase, _msg: phases.append(phase),
+    )
+    assert len(result["suspects"]) == 1
+    assert result["untested"]
+    assert "phase2" in phases
+
+
+def test_diagnose_infeasibility_deadline_marks_untested():
+    teachers, subjects = _unavailable_teacher_case()
+    result = diagnose_infeasibility(teachers, subjects, ["1-A"], [], 1, 3,
+                                    locale="en", max_workers=1, deadline_seconds=0)
+    assert result["suspects"] == []
+    assert "SubjectWeeklyHours" in result["untested"]
+
+
+def test_generation_diagnosis_uses_deadline_and_early_stop(monkeypatch):
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    # Math needs all 3 hours of the only day, but Ana is unavailable at hour 0
+    session.add(Course(id="1º", num_lines=1))
+    math = Subject(id="M1", name="Math", weekly_hours=3, max_hours_per_day=3, course_id="1º")
+    session.add(Teacher(id=1, name="Ana", max_hours_week=10, subjects=[math],
+                        preferences='{"0": {"unavailable": [0]}}'))
+    session.add(Config(classes_per_day=3, days_per_week=1))
+    session.commit()
+
+    monkeypatch.setenv(DIAGNOSIS_WORKERS_ENV, "1")
+    monkeypatch.setattr(scheduler, "DIAGNOSIS_MAX_SUSPECTS", 1)
+    calls = []
+
+    def recording_diagnosis(*args, **kwargs):
+        calls.append(kwargs)
+        result = diagnose_infeasibility(*args, **kwargs)
+        calls.append(result)
+        return result
+
+    monkeypatch.setattr(scheduler, "diagnose_infeasibility", recording_diagnosis)
+    message = scheduler.create_timetable(session, locale="en")
+    session.close()
+
+    kwargs, result = calls
+    assert kwargs["deadline_seconds"] == scheduler.DIAGNOSIS_DEADLINE_SECONDS
+    assert len(result["suspects"]) == 1
+    assert result["untested"]
+    assert "Restrictions not tested" in message
+
+
+def test_default_diagnosis_workers_are_capped(monkeypatch):
+    monkeypatch.delenv(DIAGNOSIS_WORKERS_ENV, raising=False)
+    monkeypatch.setattr(parallel_diagnosis.os, "process_cpu_count", lambda: 64)
+    assert parallel_diagnosis.available_workers() == parallel_diagnosis.DEFAULT_MAX_WORKERS
+    monkeypatch.setenv(DIAGNOSIS_WORKERS_ENV, "8")
+    assert parallel_diagnosis.available_workers() == 8
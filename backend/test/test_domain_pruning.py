@@ -0,0 +1,116 @@
+"""Tests for static domain pruning of assignment variables."""
+
+from ortools.sat.python import cp_model
+
+from backend.domain_pruning import DomainPruning
+from backend.scheduler import solve_scheduling_model
+
+
+class MockTeacher:
+    def __init__(self, id, name, max_hours_week=10, subjects=None, preferences=None):
+        self.id = id
+        self.name = name
+        self.max_hours_week = max_hours_week
+        self.subjects = subjects or []
+        self.tutor_group = None
+        self.preferences = preferences
+        self.coordination_hours = 0
+
+
+class MockSubject:
+    def __init__(self, id, name, course_id, weekly_hours=1, max_hours_per_day=1,
+                 teach_every_day=False):
+        self.id = id
+        self.name = name
+        self.course_id = course_id
+        self.weekly_hours = weekly_hours
+        self.max_hours_per_day = max_hours_per_day
+        self.consecutive_hours = True
+        self.teach_every_day = teach_every_day
+        self.linked_subject_id = None
+        self.included_lines = None
+
+
+def _case(ana_preferences='{"0": {"unavailable": [0, 1]}}', teach_every_day=False,
+          second_teacher_hours=0):
+    """Ana and a second teacher (without weekly hours by default) can teach Math."""
+    math = MockSubject("M1", "Math", "1", weekly_hours=2, max_hours_per_day=2,
+                       teach_every_day=teach_every_day)
+    ana = MockTeacher(1, "Ana", subjects=[math], preferences=ana_preferences)
+    bea = MockTeacher(2, "Bea", max_hours_week=second_teacher_hours, subjects=[math],
+                      preferences='{"0": {"unavailable": [0, 1, 2]}}')
+    return dict(
+        all_teachers=[ana, bea], all_subjects=[math],
+        all_groups=["1-A"], all_subjectgroups=[],
+        num_days=2, num_hours=3,
+    )
+
+
+def test_pruning_skips_unavailable_slots_and_teachers_without_hours():
+    inputs = _case()
+    pruning = DomainPruning(
+        inputs["all_teachers"], inputs["all_subjects"], inputs["all_subjectgroups"],
+        inputs["num_days"], inputs["num_hours"],
+    )
+
+    assert pruning.allowed_slots("M1", 1, [1, 2]) == [(0, 2), (1, 0), (1, 1), (1, 2)]
+    assert pruning.allowed_slots("M1", 2, [1, 2]) == []
+    assert pruning.summary() == {
+        "candidates": 12,
+        "created": 4,
+        "pruned": 8,
+        "pruned_ratio": 0.6667,
+        "by_reason": {"teacher_unavailable": 2, "teacher_max_weekly_hours": 6},
+    }
+
+
+def test_pruning_follows_skipped_restrictions():
+    inputs = _case()
+    pruning = DomainPruning(
+        inputs["all_teachers"], inputs["all_subjects"], inputs["all_subjectgroups"],
+        inputs["num_days"], inputs["num_hours"],
+        skip_restrictions={"TeacherUnavailableTimes"},
+        skip_teacher_max_hours_for={2},
+    )
+
+    assert len(pruning.allowed_slots("M1", 1, [1, 2])) == 6
+    assert len(pruning.allowed_slots("M1", 2, [1, 2])) == 6
+
+
+def test_every_day_subject_keeps_slots_no_teacher_can_cover():
+    inputs = _case(ana_preferences='{"0": {"unavailable": [0, 1, 2]}}', teach_every_day=True)
+    pruning = DomainPruning(
+        inputs["all_teachers"], inputs["all_subjects"], inputs["all_subjectgroups"],
+        inputs["num_days"], inputs["num_hours"],
+    )
+
+    # Day 0 has no possible teacher: its variables stay so that
+    # SubjectMustEveryDay still reports the subject as missing that day.
+    assert pruning.allowed_slots("M1", 1, [1, 2]) == [(0, 0), (0, 1), (0, 2), (1, 0), (1, 1), (1, 2)]
+    assert pruning.allowed_slots("M1", 2, [1, 2]) == [(0, 0), (0, 1), (0, 2)]
+
+
+def test_pruned_model_matches_unpruned_model():
+    for case in (
+        _case(second_teacher_hours=10),
+        _case(ana_preferences='{"0": {"unavailable": [0, 1, 2]}}', teach_every_day=True,
+              second_teacher_hours=10),
+    ):
+        pruned_status, pruned, _ = solve_scheduling_model(**case, diagnostic_mode=True)
+        full_status, full, _ = solve_scheduling_model(
+            **case, diagnostic_mode=True, prune_domains=False,
+        )
+        assert pruned_status == full_status
+        assert len(pruned) <= len(full)
+
+
+def test_build_profile_reports_pruning():
+    profiles = []
+    status, assignments, solver = solve_scheduling_model(
+        **_case(second_teacher_hours=10), build_profile_callback=profiles.append,
+    )
+
+    assert status in (cp_model.OPTIMAL, cp_model.FEASIBLE)
+    assert profiles[0]["pruning"]["by_reason"] == {"teacher_unavailable": 5}
+    assert not any(key[2] == 1 and key[3:] in {(0, 0), (0, 1)} for key in assignments)
+    assert not any(key[2] == 2 and key[3] == 0 for key in assignments)
@@ -1,11 +1,12 @@
 """Tests that export/import (backup/restore) preserves all Subject fields."""
 import json
 import pytest
-from sqlalchemy import create_engine
+from pydantic import ValidationError
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker
 
-from backend.models import Base, Subject, Course
-from backend.export_import import dump_db, import_payload
+from backend.models import Base, Subject, Course, Teacher
+from backend.export_import import dump_db, import_database, import_payload, iter_export_json
 
 
 @pytest.fixture()
@@ -91,3 +92,59 @@ def test_subject_fields_round_trip(memory_session):
     assert restored2.teach_every_day is False
     assert restored2.color == "#abcdef"
     assert restored2.included_lines is None
+
+
+def _export_query_count(session):
+    statements = []
+
+    def before_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    engine = session.get_bind()
+    event.listen(engine, "before_cursor_execute", before_execute)
+    try:
+        text = "".join(iter_export_json(session))
+    finally:
+        event.remove(engine, "before_cursor_execute", before_execute)
+    return text, len(statements)
+
+
+def test_streamed_export_matches_the_document_with_a_fixed_number_of_queries(memory_session):
+    _seed(memory_session)
+    maths = memory_session.get(Subject, "MAT1")
+    memory_session.add(Teacher(id=1, name="Ana", max_hours_week=10, subjects=[maths]))
+    memory_session.flush()
+    text, few_teachers = _export_query_count(memory_session)
+    assert text == json.dumps(dump_db(memory_session), indent=2, ensure_ascii=False)
+
+    for teacher_id in range(2, 30):
+        memory_session.add(Teacher(id=teacher_id, name=f"T{teacher_id}", max_hours_week=10, subjects=[maths]))
+    memory_session.flush()
+    text, many_teachers = _export_query_count(memory_session)
+    assert many_teachers == few_teachers
+    assert len(json.loads(text)["teachers"]) == 29
+    assert json.loads(text)["subjects"][0]["teachers"][0] == {"id": 1, "name": "Ana"}
+
+
+def test_import_database_swaps_in_a_valid_payload_only(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'agenda.db'}")
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine)
+    with Session() as session:
+        _seed(session)
+        session.commit()
+        payload = dump_db(session)
+
+    payload["subjects"] = [s for s in payload["subjects"] if s["id"] == "MAT1"]
+    import_database(payload, engine)
+    with Session() as session:
+        assert [s.id for s in session.query(Subject)] == ["MAT1"]
+        assert json.loads(session.get(Subject, "MAT1").included_lines) == [0, 1]
+
+    payload["subjects"][0]["weekly_hours"] = "five"
+    with pytest.raises(ValidationError):
+        import_database(payload, engine)
+    with Session() as session:
+        assert session.get(Subject, "MAT1").weekly_hours == 5
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["agenda.db"]
+    engine.dispose()
@@ -0,0 +1,160 @@
+"""Tests for the persistent solver job queue."""
+
+import threading
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from backend import solver_jobs
+from backend.job_queue import JobQueue
+from backend.models import Base, Job
+from backend.storage import create_sqlite_engine
+
+
+def memory_queue():
+    # One shared connection, so threads see the same in-memory database
+    engine = create_engine(
+        "sqlite:///:memory:", connect_args={"check_same_thread": False}, poolclass=StaticPool,
+    )
+    Base.metadata.create_all(engine)
+    return JobQueue(sessionmaker(bind=engine))
+
+
+def run_job(queue, monkeypatch, create_timetable):
+    """Run a claimed job through ``run_timetable_job`` with a fake ``create_timetable``.
+
+    Returns the status of the job in ``queue``.
+    """
+    monkeypatch.setattr(solver_jobs, "create_timetable", create_timetable)
+    task_id = queue.create_task(locale="en")
+    queue.claim(worker_pid=10)
+    solver_jobs.run_timetable_job(task_id, "en", tasks=queue)
+    return queue.get_status(task_id)
+
+
+@pytest.fixture()
+def queue():
+    return memory_queue()
+
+
+def test_jobs_are_claimed_once_in_creation_order(queue):
+    first = queue.create_task({"free_groups": {"1-B", "1-A"}}, locale="en")
+    second = queue.create_task(scenario="b")
+
+    claimed = queue.claim(worker_pid=10)
+    assert claimed == {
+        "task_id": first, "options": {"free_groups": ["1-A", "1-B"]}, "locale": "en", "attempts": 1,
+        "scenario": None,
+    }
+    assert queue.claim(worker_pid=11)["task_id"] == second
+    assert queue.claim(worker_pid=12) is None
+    assert queue.get_current_status()["task_id"] == first
+
+
+def test_only_one_job_per_scenario_is_active(tmp_path):
+    engine = create_sqlite_engine(tmp_path / "agenda.db")
+    Base.metadata.create_all(engine)
+    queue = JobQueue(sessionmaker(bind=engine))
+    barrier = threading.Barrier(8)
+    created = []
+
+    def request():
+        barrier.wait()
+        created.append(queue.create_task())
+
+    threads = [threading.Thread(target=request) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len([task_id for task_id in created if task_id is not None]) == 1
+    assert queue.create_task(scenario="other") is not None
+    queue.claim(worker_pid=10)
+    assert queue.create_task() is None
+    engine.dispose()
+
+
+def test_queued_job_reports_running_with_queued_phase(queue):
+    task_id = queue.create_task()
+    status = queue.get_status(task_id)
+    assert (status["status"], status["phase"]) == ("running", "queued")
+
+    queue.claim(worker_pid=10)
+    queue.update_progress(task_id, "infeasible", "details")
+    queue.update_solver_profile(task_id, "default", {"num_search_workers": 8})
+    queue.record_solution(task_id, {"solution": 1, "objective": 5})
+    queue.complete_task(task_id)
+
+    status = queue.get_status(task_id)
+    assert status["status"] == "success"
+    assert status["phase"] == "infeasible"
+    assert status["solver_profile"] == {"name": "default", "params": {"num_search_workers": 8}}
+    assert status["solutions"] == [{"solution": 1, "objective": 5}]
+    assert queue.get_current_status() is None
+    assert queue.get_latest_status()["task_id"] == task_id
+
+
+def test_cancelled_job_ignores_worker_reports_and_can_be_retried(queue):
+    task_id = queue.create_task({"warm_start": True}, locale="en")
+    queue.claim(worker_pid=10)
+    queue.cancel_task(task_id)
+
+    assert queue.is_cancelled(task_id)
+    queue.update_progress(task_id, "phase1", "late")
+    queue.fail_task(task_id, error="late failure")
+    status = queue.get_status(task_id)
+    assert (status["status"], status["phase"], status["error"]) == ("cancelled", None, None)
+
+    retried = queue.retry_task(task_id)
+    assert retried != task_id
+    assert queue.claim(worker_pid=11)["options"] == {"warm_start": True}
+    assert queue.retry_task(retried) is None
+
+
+def test_crashed_job_is_requeued_until_attempts_run_out(queue):
+    task_id = queue.create_task(max_attempts=2)
+    queue.claim(worker_pid=10)
+    assert queue.requeue_or_fail(task_id, "crashed") == "queued"
+
+    assert queue.claim(worker_pid=11)["attempts"] == 2
+    assert queue.requeue_or_fail(task_id, "crashed") == "error"
+    assert queue.get_status(task_id)["error"] == "crashed"
+    assert queue.requeue_or_fail(task_id, "crashed") is None
+
+
+def test_stale_running_jobs_are_recovered(queue):
+    stale = queue.create_task(locale="en")
+    queue.claim(worker_pid=10)
+    fresh = queue.create_task(scenario="b")
+    queue.claim(worker_pid=11)
+    with queue._session_factory() as session:
+        session.get(Job, stale).heartbeat_at = 0
+        session.commit()
+
+    assert queue.recover_stale(stale_after_seconds=30) == 1
+    assert queue.get_status(stale)["phase"] == "queued"
+    assert queue.get_status(fresh)["phase"] is None
+
+
+def test_events_carry_status_changes_and_appended_phase_text(queue):
+    task_id = queue.create_task()
+    queue.claim(worker_pid=10)
+    queue.update_progress(task_id, "phase2", "## Phase 2\n")
+    queue.update_progress(task_id, "phase2", "## Phase 2\n- A\n")
+    queue.update_progress(task_id, "phase2", "## Phase 2\n- A\n")
+    queue.update_progress(task_id, "phase3", "## Phase 3\n")
+    queue.record_solution(task_id, {"solution": 1})
+    queue.fail_task(task_id, error="failed", details="## Phase 3\n")
+
+    events = queue.events_since(task_id)
+    assert [(e["event"], e["data"].get("status")) for e in events] == [
+        ("status", "running"), ("status", "running"), ("phase", None), ("phase_append", None),
+        ("phase", None), ("solution", None), ("status", "error"),
+    ]
+    assert events[0]["data"]["phase"] == "queued"
+    assert events[3]["data"] == {"phase": "phase2", "text": "- A\n"}
+    assert events[-1]["data"]["error"] == "failed"
+    assert queue.events_since(task_id, events[4]["id"]) == events[5:]
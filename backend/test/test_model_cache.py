@@ -0,0 +1,126 @@
+"""Tests for the on-disk cache of built scheduling models."""
+
+import os
+
+from ortools.sat.python import cp_model
+
+from backend.model_cache import ModelCache, default_model_cache, model_fingerprint
+from backend.scheduler import solve_scheduling_model
+
+
+class MockTeacher:
+    def __init__(self, id, name, max_hours_week=10, subjects=None, preferences=None):
+        self.id = id
+        self.name = name
+        self.max_hours_week = max_hours_week
+        self.subjects = subjects or []
+        self.tutor_group = None
+        self.preferences = preferences
+        self.coordination_hours = 0
+
+
+class MockSubject:
+    def __init__(self, id, name, course_id, weekly_hours=1, max_hours_per_day=1):
+        self.id = id
+        self.name = name
+        self.course_id = course_id
+        self.weekly_hours = weekly_hours
+        self.max_hours_per_day = max_hours_per_day
+        self.consecutive_hours = True
+        self.teach_every_day = False
+        self.linked_subject_id = None
+        self.included_lines = None
+
+
+def _case(math_hours=3, ana_preferences=None):
+    math = MockSubject("M1", "Math", "1", weekly_hours=math_hours, max_hours_per_day=2)
+    lang = MockSubject("L1", "Lang", "1", weekly_hours=2, max_hours_per_day=1)
+    ana = MockTeacher(1, "Ana", subjects=[math, lang], preferences=ana_preferences)
+    luis = MockTeacher(2, "Luis", subjects=[math])
+    return dict(
+        all_teachers=[ana, luis], all_subjects=[math, lang],
+        all_groups=["1-A"], all_subjectgroups=[],
+        num_days=2, num_hours=4,
+    )
+
+
+def _solve(cache, **overrides):
+    profiles = []
+    args = dict(_case(), diagnostic_mode=True, model_cache=cache,
+                build_profile_callback=profiles.append)
+    args.update(overrides)
+    status, assignments, solver = solve_scheduling_model(**args)
+    return status, assignments, solver, profiles[0]
+
+
+def test_fingerprint_changes_with_solver_inputs():
+    base = model_fingerprint(**_case())
+
+    assert model_fingerprint(**_case()) == base
+    assert model_fingerprint(**_case(math_hours=4)) != base
+    assert model_fingerprint(**_case(ana_preferences='{"0": {"unavailable": [0]}}')) != base
+    assert model_fingerprint(**_case(), skip_restrictions={"TeacherAvoidGaps"}) != base
+
+
+def test_repeat_solve_loads_the_cached_model(tmp_path):
+    cache = ModelCache(str(tmp_path), 64 * 1024 * 1024)
+
+    status, assignments, solver, profile = _solve(cache)
+    assert profile["model_cache"]["hit"] is False
+
+    cached_status, cached_assignments, cached_solver, cached_profile = _solve(
+        cache, solver_params={"random_seed": 7},
+    )
+    assert cached_profile["model_cache"] == {"hit": True, "fingerprint": profile["model_cache"]["fingerprint"]}
+    assert cached_profile["constraints"] == profile["constraints"]
+    assert list(cached_assignments) == list(assignments)
+    assert cached_status == status == cp_model.OPTIMAL
+    assert cached_solver.ObjectiveValue() == solver.ObjectiveValue()
+
+
+def test_cached_model_is_not_changed_by_hints_or_freezing(tmp_path):
+    cache = ModelCache(str(tmp_path), 64 * 1024 * 1024)
+    _, assignments, solver, _ = _solve(cache)
+    active = {key for key, var in assignments.items() if solver.Value(var)}
+
+    _solve(cache, frozen_solution=active, free_groups=[], free_teachers=[], solution_hint=active)
+    model, _, _ = cache.load(model_fingerprint(**_case()))
+
+    assert not model.proto.solution_hint.vars
+    variables = model.proto.variables
+    assert all(list(variables[i].domain) == [0, 1] for i in range(len(assignments)))
+
+
+def test_unreadable_entry_is_discarded(tmp_path):
+    cache = ModelCache(str(tmp_path), 64 * 1024 * 1024)
+    _, _, _, profile = _solve(cache)
+    fingerprint = profile["model_cache"]["fingerprint"]
+    (tmp_path / f"{fingerprint}.txt").write_text("not a model")
+
+    assert cache.load(fingerprint) is None
+    assert not os.listdir(tmp_path)
+    assert _solve(cache)[3]["model_cache"]["hit"] is False
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = ModelCache(str(tmp_path), 64 * 1024 * 1024)
+    first = _solve(cache)[3]["model_cache"]["fingerprint"]
+    entry_size = sum(f.stat().st_size for f in tmp_path.iterdir())
+    os.utime(tmp_path / f"{first}.json", (0, 0))
+
+    cache.max_bytes = int(entry_size * 1.5)
+    second = _solve(cache, skip_restrictions={"TeacherAvoidGaps"})[3]["model_cache"]["fingerprint"]
+
+    assert cache.load(first) is None
+    assert cache.load(second) is not None
+
+
+def test_default_model_cache_follows_the_environment(tmp_path, monkeypatch):
+    monkeypatch.setenv("BACKEND_MODEL_CACHE_DIR", str(tmp_path))
+    monkeypatch.setenv("BACKEND_MODEL_CACHE_MAX_MB", "2")
+    cache = default_model_cache()
+    assert cache.directory == str(tmp_path)
+    assert cache.max_bytes == 2 * 1024 * 1024
+
+    monkeypatch.setenv("BACKEND_MODEL_CACHE_MAX_MB", "0")
+    assert default_model_cache() is None
@@ -0,0 +1,102 @@
+"""Tests for the model-build profiler and its wiring into the scheduler."""
+
+import os
+
+import pytest
+from ortools.sat.python import cp_model
+
+from backend.model_profiler import ModelBuildProfiler
+from backend.scheduler import solve_scheduling_model
+from backend.test.test_job_queue import memory_queue, run_job
+
+
+class MockTeacher:
+    def __init__(self, id, name, max_hours_week=10, subjects=None):
+        self.id = id
+        self.name = name
+        self.max_hours_week = max_hours_week
+        self.subjects = subjects or []
+        self.tutor_group = None
+        self.preferences = None
+        self.coordination_hours = 0
+
+
+class MockSubject:
+    def __init__(self, id, name, course_id, weekly_hours=1, max_hours_per_day=1):
+        self.id = id
+        self.name = name
+        self.course_id = course_id
+        self.weekly_hours = weekly_hours
+        self.max_hours_per_day = max_hours_per_day
+        self.consecutive_hours = True
+        self.teach_every_day = False
+        self.linked_subject_id = None
+        self.included_lines = None
+
+
+def test_profiler_counts_variables_and_constraints():
+    model = cp_model.CpModel()
+    profiler = ModelBuildProfiler()
+
+    with profiler.measure(model, "step", "hard"):
+        x = model.NewBoolVar("x")
+        y = model.NewIntVar(0, 5, "y")
+        model.Add(x + y <= 3)
+        model.Add(y >= 1)
+    profiler.record_skipped("other", "soft")
+
+    summary = profiler.summary()
+    step, skipped = summary["steps"]
+    assert step["name"] == "step"
+    assert step["bool_vars"] == 1
+    assert step["int_vars"] == 1
+    assert step["constraints"] == 2
+    assert step["elapsed_ms"] >= 0
+    assert skipped["skipped"] is True
+    assert summary["bool_vars"] == 1
+    assert summary["constraints"] == 2
+
+
+@pytest.mark.skipif(not os.path.exists("/proc/self/statm"), reason="needs /proc")
+def test_step_memory_is_measured_from_current_rss():
+    model = cp_model.CpModel()
+    profiler = ModelBuildProfiler()
+    # Raise the process peak first: a peak-based delta would then read 0
+    spike = b"x" * (128 << 20)
+    del spike
+
+    with profiler.measure(model, "step", "hard"):
+        kept = b"x" * (64 << 20)
+
+    step = profiler.summary()["steps"][0]
+    assert step["rss_growth_kb"] >= 48 << 10
+    assert step["rss_kb"] > 0
+    del kept
+
+
+def test_solve_reports_build_profile_for_every_restriction():
+    math = MockSubject("M1", "Math", "1", weekly_hours=3)
+    teacher = MockTeacher(1, "Ana", subjects=[math])
+    profiles = []
+
+    status, _, _ = solve_scheduling_model(
+        [teacher], [math], ["1-A"], [], 5, 5,
+        skip_restrictions={"TeacherAvoidGaps"},
+        build_profile_callback=profiles.append,
+    )
+
+    assert status in (cp_model.OPTIMAL, cp_model.FEASIBLE)
+    assert len(profiles) == 1
+    steps = {e["name"]: e for e in profiles[0]["steps"]}
+    assert steps["assignments"]["bool_vars"] == 25
+    assert steps["SubjectWeeklyHours"]["constraints"] == 1
+    assert steps["TeacherAvoidGaps"]["skipped"] is True
+    assert "TeacherFreeHoursEvenDistribution" in steps
+
+
+def test_job_status_includes_build_profile(monkeypatch):
+    def create_timetable(session, build_profile_callback, **kwargs):
+        build_profile_callback({"total_ms": 1.0, "steps": []})
+
+    status = run_job(memory_queue(), monkeypatch, create_timetable)
+    assert status["build_profile"] == {"total_ms": 1.0, "steps": []}
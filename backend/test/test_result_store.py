@@ -0,0 +1,91 @@
+"""Tests for the persistent store of generation results."""
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from backend import result_store, scheduler
+from backend.models import Base, Config, Course, SolveResult, Subject, Teacher, TimeSlotAssignment
+from backend.result_store import load_result, result_key, save_result
+from backend.scheduler import create_timetable
+
+
+@pytest.fixture()
+def memory_session():
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine)
+    session = Session()
+    yield session
+    session.close()
+
+
+def _seed(session, max_hours_week=10):
+    """One course line, Math 2 h/week, taught by Ana, 2 days of 2 hours."""
+    session.add(Course(id="1º", num_lines=1))
+    math = Subject(id="M1", name="Math", weekly_hours=2, max_hours_per_day=1, course_id="1º")
+    session.add(math)
+    session.add(Teacher(id=1, name="Ana", max_hours_week=max_hours_week, subjects=[math]))
+    session.add(Config(classes_per_day=2, days_per_week=2))
+    session.commit()
+
+
+def _fail_solve(*args, **kwargs):
+    raise AssertionError("solve_scheduling_model should not run")
+
+
+def test_result_round_trip_and_eviction(memory_session, monkeypatch):
+    monkeypatch.setattr(result_store, "RESULT_STORE_MAX_ENTRIES", 2)
+    key = result_key("fp", {"random_seed": 1}, "en")
+    assert key != result_key("fp", {"random_seed": 2}, "en")
+    assert key != result_key("fp", {"random_seed": 1}, "es")
+
+    save_result(memory_session, key, "OPTIMAL", solution=[("1-A", "M1", 1, 0, 0)],
+                timings={"solve_ms": 5.0})
+    stored = load_result(memory_session, key)
+    assert stored["solution"] == [("1-A", "M1", 1, 0, 0)]
+    assert stored["diagnosis"] is None
+    assert stored["timings"] == {"solve_ms": 5.0}
+
+    save_result(memory_session, "second", "INFEASIBLE", diagnosis={"suspects": ["X"]})
+    save_result(memory_session, "third", "INFEASIBLE", diagnosis={"suspects": ["Y"]})
+    assert memory_session.query(SolveResult).count() == 2
+    assert load_result(memory_session, "third")["diagnosis"] == {"suspects": ["Y"]}
+
+
+def test_generation_reuses_stored_solution(memory_session, monkeypatch):
+    _seed(memory_session)
+    assert create_timetable(memory_session) is None
+    saved = memory_session.query(TimeSlotAssignment).count()
+    assert saved == 2
+
+    memory_session.query(TimeSlotAssignment).delete()
+    memory_session.commit()
+    monkeypatch.setattr(scheduler, "solve_scheduling_model", _fail_solve)
+
+    assert create_timetable(memory_session) is None
+    assert memory_session.query(TimeSlotAssignment).count() == saved
+    with pytest.raises(AssertionError):
+        create_timetable(memory_session, force=True)
+    with pytest.raises(AssertionError):
+        create_timetable(memory_session, warm_start=True)
+
+
+def test_generation_reuses_stored_diagnosis(memory_session, monkeypatch):
+    _seed(memory_session, max_hours_week=1)
+    calls = []
+
+    def fake_diagnosis(*args, **kwargs):
+        calls.append(args)
+        return {
+            "sanity_issues": [], "suspects": ["TeacherMaxWeeklyHours"], "cleared": [],
+            "untested": [], "entity_conflicts": {}, "phase3_timed_out": False,
+        }
+
+    monkeypatch.setattr(scheduler, "diagnose_infeasibility", fake_diagnosis)
+    message = create_timetable(memory_session)
+    assert "TeacherMaxWeeklyHours" in message
+
+    monkeypatch.setattr(scheduler, "solve_scheduling_model", _fail_solve)
+    assert create_timetable(memory_session) == message
+    assert len(calls) == 1
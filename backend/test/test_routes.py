@@ -84,14 +84,145 @@ def test_timetable_endpoints_empty_and_clear():
     assert resp2.status_code == 200
 
 
+def test_teacher_grid_compact_format_and_filters():
+    from backend.models import Session, Subject, Teacher, TimeSlotAssignment, Timeslot
+
+    c = client()
+    assert c.get('/timetable/teacher-grid?days=x').status_code == 400
+    assert c.get('/timetable/teacher-grid?teachers=3-1').status_code == 400
+    session = Session()
+    ts = session.query(Timeslot).filter_by(day=1).first()
+    ts.hour = 2  # populate_db numbers timeslot hours from 8
+    teacher_id = session.query(Teacher).first().id
+    session.add(TimeSlotAssignment(timeslot=ts, subject_id=session.query(Subject).first().id, teacher_id=teacher_id))
+    session.commit()
+    session.close()
+
+    resp = c.get(f'/timetable/teacher-grid?format=compact&days=0-1&teachers={teacher_id}')
+    assert resp.status_code == 200
+    data = resp.get_json()
+    assert data["format"] == "compact"
+    assert [t["id"] for t in data["teachers"]] == [teacher_id]
+    assert [row[:3] for row in data["cells"]] == [[1, 2, 0]]
+    resp = c.get('/timetable/teacher-grid?days=0')
+    assert list(resp.get_json()["grid"]) == ["0"]
+    # Ranges are clamped to the configured days and the existing teacher ids
+    resp = c.get('/timetable/teacher-grid?days=0-1000000000&teachers=0-1000000000')
+    assert resp.status_code == 200
+    assert len(resp.get_json()["grid"]) == 5
+
+
+def test_teacher_grid_revalidation_skips_filter_clamping(monkeypatch):
+    from backend.models import Session, Subject, Teacher, TimeSlotAssignment, Timeslot
+
+    c = client()
+    session = Session()
+    session.add(TimeSlotAssignment(
+        timeslot=session.query(Timeslot).first(),
+        subject_id=session.query(Subject).first().id,
+        teacher_id=session.query(Teacher).first().id,
+    ))
+    session.commit()
+    session.close()
+    limits = []
+    grid_filter_limits = timetable_routes._grid_filter_limits
+    monkeypatch.setattr(
+        timetable_routes, '_grid_filter_limits', lambda session: limits.append(1) or grid_filter_limits(session),
+    )
+
+    url = '/timetable/teacher-grid?days=0-1000&teachers=0-1000'
+    etag = c.get(url).headers['ETag']
+    assert c.get(url, headers={'If-None-Match': etag}).status_code == 304
+    assert c.get(url).status_code == 200
+    assert len(limits) == 1
+
+
+def test_timetable_excel_async_export_is_built_in_background_and_downloaded():
+    from io import BytesIO
+
+    from openpyxl import load_workbook
+
+    from backend.models import Session, Subject, Teacher, TimeSlotAssignment, Timeslot
+
+    c = client()
+    assert c.post('/timetable/excel', json={"async": True}).status_code == 404
+    session = Session()
+    session.add(TimeSlotAssignment(
+        timeslot=session.query(Timeslot).first(),
+        subject_id=session.query(Subject).first().id,
+        teacher_id=session.query(Teacher).first().id,
+    ))
+    session.commit()
+    session.close()
+
+    body = {"async": True, "teacher_grouped": True}
+    resp = c.post('/timetable/excel', json=body, headers={"X-Locale": "en"})
+    assert resp.status_code in (200, 202)
+    export_id = resp.get_json()["export_id"]
+    deadline = time.monotonic() + 30
+    while resp.get_json()["status"] == "running" and time.monotonic() < deadline:
+        time.sleep(0.05)
+        resp = c.get(f'/timetable/excel/{export_id}')
+    assert (resp.status_code, resp.get_json()["status"]) == (200, "success")
+    # The same workbook is not exported twice
+    assert c.post('/timetable/excel', json=body, headers={"X-Locale": "en"}).get_json()["export_id"] == export_id
+
+    download = c.get(resp.get_json()["download_url"])
+    assert download.status_code == 200
+    assert "attachment" in download.headers["Content-Disposition"]
+    # Built in the background, in the locale of the request
+    assert "Professors" in load_workbook(BytesIO(download.data)).sheetnames
+    download.close()
+    assert c.get('/timetable/excel/unknown').status_code == 404
+    assert c.get('/timetable/excel/unknown/download').status_code == 404
+
+
+def test_export_streams_json_and_gzip_on_request():
+    import gzip
+    import json
+
+    c = client()
+    plain = c.get('/export')
+    assert plain.is_streamed and "Content-Encoding" not in plain.headers
+    data = json.loads(plain.data)
+    assert data["courses"] and data["config"]["days_per_week"] == 5
+
+    compressed = c.get('/export', headers={"Accept-Encoding": "gzip"})
+    assert compressed.headers["Content-Encoding"] == "gzip"
+    assert json.loads(gzip.decompress(compressed.data)) == data
+
+
+def test_import_round_trips_export_and_rejects_invalid_payload():
+    import json
+
+    c = client()
+    exported = json.loads(c.get('/export').data)
+    _add_job('kept-job', 'success')
+
+    exported["courses"][0]["num_lines"] = 3
+    resp = c.post('/import', json=exported)
+    assert resp.status_code == 200
+    assert json.loads(c.get('/export').data)["courses"][0]["num_lines"] == 3
+    assert c.get('/timetable/status/kept-job').status_code == 200
+
+    resp = c.post('/import', json={"courses": [{"id": "1º", "num_lines": "many"}]})
+    assert resp.status_code == 400
+    assert resp.get_json()["details"][0]["loc"] == ["courses", 0, "num_lines"]
+    assert json.loads(c.get('/export').data)["courses"] == exported["courses"]
+
+
+def _add_job(task_id, status):
+    from backend.models import Job, Session
+
+    session = Session()
+    session.add(Job(id=task_id, status=status, created_at=time.time()))
+    session.commit()
+    session.close()
+
+
 def test_timetable_status_current_idle_when_no_tasks():
+    # populate_db recreates an empty jobs table
     c = client()
-    tm = timetable_routes.task_manager
-    with tm._lock:
-        tm._tasks.clear()
-        tm._cancelled.clear()
-        tm._current_task_id = None
-        tm._last_task_id = None
 
     resp = c.get('/timetable/status/current')
     assert resp.status_code == 200
@@ -102,19 +233,8 @@ def test_timetable_status_current_idle_when_no_tasks():
 
 def test_timetable_post_is_idempotent_with_running_task():
     c = client()
-    tm = timetable_routes.task_manager
     running_task_id = 'running-task-id'
-    with tm._lock:
-        tm._tasks.clear()
-        tm._cancelled.clear()
-        tm._tasks[running_task_id] = {
-            'status': 'running',
-            'error': None,
-            'details': None,
-            'created_at': time.time(),
-        }
-        tm._current_task_id = running_task_id
-        tm._last_task_id = running_task_id
+    _add_job(running_task_id, 'running')
 
     resp = c.post('/timetable')
     assert resp.status_code == 202
@@ -125,22 +245,92 @@ def test_timetable_post_is_idempotent_with_running_task():
 
 def test_timetable_status_current_returns_latest_terminal_task():
     c = client()
-    tm = timetable_routes.task_manager
     latest_task_id = 'latest-task-id'
-    with tm._lock:
-        tm._tasks.clear()
-        tm._cancelled.clear()
-        tm._tasks[latest_task_id] = {
-            'status': 'success',
-            'error': None,
-            'details': None,
-            'created_at': time.time(),
-        }
-        tm._current_task_id = None
-        tm._last_task_id = latest_task_id
+    _add_job(latest_task_id, 'success')
 
     resp = c.get('/timetable/status/current')
     assert resp.status_code == 200
     data = resp.get_json()
     assert data['task_id'] == latest_task_id
     assert data['status'] == 'success'
+
+
+def test_timetable_post_queues_job_that_can_be_cancelled_and_retried():
+    c = client()
+    resp = c.post('/timetable', json={'warm_start': True})
+    assert resp.status_code == 202
+    task_id = resp.get_json()['task_id']
+    # No worker runs in tests: the job stays queued
+    assert resp.get_json()['phase'] == 'queued'
+    assert c.post(f'/timetable/{task_id}/retry').status_code == 202
+
+    c.post(f'/timetable/{task_id}/cancel')
+    assert c.get(f'/timetable/status/{task_id}').get_json()['status'] == 'cancelled'
+
+    resp = c.post(f'/timetable/{task_id}/retry')
+    assert resp.status_code == 202
+    retried = resp.get_json()
+    assert retried['task_id'] != task_id
+    assert timetable_routes.job_queue.claim(worker_pid=1)['options']['warm_start'] is True
+
+
+def test_timetable_events_stream_until_final_status_and_resume():
+    c = client()
+    queue = timetable_routes.job_queue
+    task_id = c.post('/timetable').get_json()['task_id']
+    queue.claim(worker_pid=1)
+    queue.update_progress(task_id, 'phase1', 'checks')
+    queue.complete_task(task_id)
+
+    resp = c.get(f'/timetable/{task_id}/events')
+    assert resp.status_code == 200
+    assert resp.mimetype == 'text/event-stream'
+    blocks = [b for b in resp.get_data(as_text=True).split('\n\n') if b.startswith('id:')]
+    assert [b.split('\n')[1] for b in blocks] == [
+        'event: status', 'event: status', 'event: phase', 'event: status',
+    ]
+    assert '"status": "success"' in blocks[-1]
+
+    second_id = blocks[1].split('\n')[0][len('id: '):]
+    resumed = c.get(f'/timetable/{task_id}/events', headers={'Last-Event-ID': second_id})
+    assert resumed.get_data(as_text=True).count('id:') == 2
+    assert c.get('/timetable/unknown/events').status_code == 404
+
+
+def test_timetable_resolve_requires_scope_and_stored_timetable():
+    c = client()
+    resp = c.post('/timetable/resolve', json={})
+    assert resp.status_code == 400
+
+    # populate_db leaves no generated timetable
+    resp = c.post('/timetable/resolve', json={'groups': ['1-A']})
+    assert resp.status_code == 404
+
+
+def test_timetable_resolve_rejects_unknown_or_malformed_scope():
+    from backend.models import Session, Subject, Teacher, TimeSlotAssignment, Timeslot
+
+    c = client()
+    session = Session()
+    teacher_id = session.query(Teacher).first().id
+    session.add(TimeSlotAssignment(
+        timeslot=session.query(Timeslot).first(),
+        subject_id=session.query(Subject).first().id,
+        teacher_id=teacher_id,
+    ))
+    session.commit()
+    session.close()
+
+    for body in (
+        {'teachers': [[1]]},
+        {'teachers': ['1']},
+        {'teachers': [True]},
+        {'groups': '1º-A'},
+        {'groups': [{'id': '1º-A'}]},
+        {'groups': ['1º-Z']},
+        {'teachers': [teacher_id], 'solver_profile': 'nope'},
+        {'teachers': [teacher_id, 999999]},
+    ):
+        resp = c.post('/timetable/resolve', json=body)
+        assert resp.status_code == 400, body
+    assert '999999' in resp.get_json()['error']
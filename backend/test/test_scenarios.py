@@ -0,0 +1,93 @@
+"""Tests for scenario databases cloned from the live one."""
+
+import pytest
+
+from backend import scenarios
+from backend.app import app
+from backend.job_queue import job_queue
+from backend.models import Job, LiveSession, Session, Teacher
+from backend.populate_db import populate_db
+
+
+def _teacher_names():
+    session = Session()
+    try:
+        return {teacher.name for teacher in session.query(Teacher)}
+    finally:
+        session.close()
+
+
+def test_scenario_is_an_isolated_copy_of_the_live_database():
+    populate_db()
+    live_teachers = _teacher_names()
+    job_queue.create_task()
+
+    scenarios.create_scenario("extra")
+    with pytest.raises(FileExistsError):
+        scenarios.create_scenario("extra")
+    with pytest.raises(ValueError):
+        scenarios.create_scenario("../live")
+    assert [s["name"] for s in scenarios.list_scenarios()] == ["extra"]
+
+    with scenarios.use_scenario("extra"):
+        assert scenarios.current_scenario() == "extra"
+        assert _teacher_names() == live_teachers
+        # The job queue is not cloned
+        session = Session()
+        assert session.query(Job).count() == 0
+        session.add(Teacher(name="Scenario teacher", max_hours_week=10))
+        session.commit()
+        session.close()
+        # The queue always uses the live database
+        live = LiveSession()
+        assert live.query(Job).count() == 1
+        live.close()
+    assert scenarios.current_scenario() is None
+    assert "Scenario teacher" not in _teacher_names()
+
+    scenarios.create_scenario("copy", source="extra")
+    with scenarios.use_scenario("copy"):
+        assert "Scenario teacher" in _teacher_names()
+
+    scenarios.delete_scenario("copy")
+    with pytest.raises(FileNotFoundError):
+        scenarios.engine_for("copy")
+
+
+def test_scenario_routes_edit_solve_and_promote():
+    populate_db()
+    c = app.test_client()
+    assert c.post('/scenarios', json={'name': 'bad name'}).status_code == 400
+    assert c.post('/scenarios', json={'name': 'extra'}).status_code == 201
+    assert c.post('/scenarios', json={'name': 'extra'}).status_code == 409
+    assert c.get('/courses', headers={'X-Scenario': 'missing'}).status_code == 404
+
+    headers = {'X-Scenario': 'extra'}
+    resp = c.post('/teachers', json={'name': 'Scenario teacher', 'max_hours_week': 5}, headers=headers)
+    assert resp.status_code == 201
+    assert 'Scenario teacher' not in [teacher['name'] for teacher in c.get('/teachers').get_json()]
+
+    # One job per scenario: the scenario and the live database solve independently
+    scenario_task = c.post('/timetable', headers=headers).get_json()
+    live_task = c.post('/timetable').get_json()
+    assert scenario_task['task_id'] != live_task['task_id']
+    assert scenario_task['scenario'] == 'extra' and live_task['scenario'] is None
+    assert c.post('/timetable', headers=headers).get_json()['task_id'] == scenario_task['task_id']
+    assert c.get('/timetable/status/current', headers=headers).get_json()['task_id'] == scenario_task['task_id']
+    assert c.get('/scenarios').get_json()[0]['task']['task_id'] == scenario_task['task_id']
+
+    assert c.post('/scenarios/extra/promote').status_code == 409
+    assert c.delete('/scenarios/extra').status_code == 409
+    c.post(f"/timetable/{scenario_task['task_id']}/cancel")
+    assert c.post('/scenarios/extra/promote').status_code == 409
+    c.post(f"/timetable/{live_task['task_id']}/cancel")
+
+    resp = c.post('/scenarios/extra/promote')
+    assert resp.status_code == 200
+    assert 'Scenario teacher' in [teacher['name'] for teacher in c.get('/teachers').get_json()]
+    # The live job history is kept
+    assert c.get(f"/timetable/status/{live_task['task_id']}").get_json()['status'] == 'cancelled'
+
+    assert c.delete('/scenarios/extra').status_code == 200
+    assert c.delete('/scenarios/extra').status_code == 404
+    assert c.post('/scenarios/extra/promote').status_code == 404
@@ -18,3 +18,43 @@ def test_hard_restrictions_include_group_subject_teacher_timeslot_limit():
 
     names = [name for name, _restriction, _args in hard_restrictions]
     assert "GroupSubjectAtMostOneTeacherPerTimeslot" in names
+
+
+def test_solution_hint_covers_every_assignment_variable():
+    from backend.scheduler import _add_solution_hint
+
+    model = cp_model.CpModel()
+    assignments = {
+        ("1-A", "M1", 1, d, h): model.NewBoolVar(f"x{d}{h}")
+        for d in range(2) for h in range(2)
+    }
+    previous = {("1-A", "M1", 1, 1, 0), ("1-A", "GONE", 9, 0, 0)}
+    solver = cp_model.CpSolver()
+
+    _add_solution_hint(model, assignments, previous, keep_hint=True, solver=solver)
+
+    hint = dict(zip(model.proto.solution_hint.vars, model.proto.solution_hint.values))
+    assert len(hint) == len(assignments)
+    for key, var in assignments.items():
+        assert hint[var.Index()] == (1 if key in previous else 0)
+    assert solver.parameters.repair_hint is True
+
+
+def test_freeze_assignments_fixes_everything_outside_the_free_scope():
+    from backend.scheduler import _freeze_assignments
+
+    model = cp_model.CpModel()
+    assignments = {
+        (g, "M1", t, 0, h): model.NewBoolVar(f"{g}{t}{h}")
+        for g in ("1-A", "1-B") for t in (1, 2) for h in range(2)
+    }
+    stored = {("1-B", "M1", 1, 0, 0)}
+
+    frozen = _freeze_assignments(model, assignments, stored, free_groups={"1-A"}, free_teachers={2})
+
+    assert frozen == 2
+    domains = {k: list(model.proto.variables[v.Index()].domain) for k, v in assignments.items()}
+    assert domains[("1-B", "M1", 1, 0, 0)] == [1, 1]
+    assert domains[("1-B", "M1", 1, 0, 1)] == [0, 0]
+    assert domains[("1-A", "M1", 1, 0, 0)] == [0, 1]
+    assert domains[("1-B", "M1", 2, 0, 0)] == [0, 1]
@@ -80,3 +80,95 @@ def test_save_solution_sets_subject_group_id_for_grouped_slot():
     slot = session.query(Timeslot).filter_by(day=0, hour=0, course_id=course_id, line=line_num).one()
     assert slot.subject_group_id == subject_group.id
     session.close()
+
+
+def test_save_solution_reads_values_from_real_solver():
+    from ortools.sat.python import cp_model
+    from backend.models import Course
+
+    populate_db()
+    session = Session()
+    groups = []
+    for course in session.query(Course).all():
+        for i in range(course.num_lines):
+            groups.append(f"{course.id}-{chr(ord('A') + i)}")
+    subject = session.query(Subject).first()
+    teacher = session.query(Teacher).first()
+
+    model = cp_model.CpModel()
+    on_key = (groups[0], subject.id, teacher.id, 1, 2)
+    off_key = (groups[0], subject.id, teacher.id, 0, 0)
+    assignments = {on_key: model.NewBoolVar("on"), off_key: model.NewBoolVar("off")}
+    model.Add(assignments[on_key] == 1)
+    model.Add(assignments[off_key] == 0)
+    solver = cp_model.CpSolver()
+    assert solver.Solve(model) == cp_model.OPTIMAL
+
+    save_solution_to_db(session, solver, assignments, groups, num_days=5, num_hours=5)
+
+    assert session.query(Timeslot).count() == 5 * 5 * len(groups)
+    saved = session.query(TimeSlotAssignment).all()
+    assert len(saved) == 1
+    assert (saved[0].timeslot.day, saved[0].timeslot.hour) == (1, 2)
+    assert saved[0].subject_id == subject.id
+    session.close()
+
+
+def test_load_previous_solution_round_trips_saved_keys():
+    from backend.models import Course
+    from backend.scheduler import load_previous_solution
+
+    populate_db()
+    session = Session()
+    groups = []
+    for course in session.query(Course).all():
+        for i in range(course.num_lines):
+            groups.append(f"{course.id}-{chr(ord('A') + i)}")
+    subject = session.query(Subject).first()
+    teacher = session.query(Teacher).first()
+
+    keys = {(groups[-1], subject.id, teacher.id, 2, 3), (groups[0], subject.id, teacher.id, 0, 1)}
+    save_solution_to_db(session, FakeSolver(ones=keys), {k: k for k in keys}, groups, 5, 5)
+
+    assert load_previous_solution(session) == keys
+    session.close()
+
+
+def test_save_solution_changes_rewrites_only_changed_slots():
+    from backend.models import Course
+    from backend.scheduler import load_previous_solution, save_solution_changes
+
+    populate_db()
+    session = Session()
+    groups = []
+    for course in session.query(Course).all():
+        for i in range(course.num_lines):
+            groups.append(f"{course.id}-{chr(ord('A') + i)}")
+    subject = session.query(Subject).first()
+    teacher = session.query(Teacher).first()
+
+    kept = (groups[1], subject.id, teacher.id, 0, 0)
+    moved_from = (groups[0], subject.id, teacher.id, 1, 1)
+    moved_to = (groups[0], subject.id, teacher.id, 2, 2)
+    assignments = {k: k for k in (kept, moved_from, moved_to)}
+    save_solution_to_db(session, FakeSolver(ones=[kept, moved_from]), assignments, groups, 5, 5)
+    kept_slot_id = session.query(TimeSlotAssignment).join(Timeslot).filter(Timeslot.day == 0).one().id
+
+    previous = load_previous_solution(session)
+    changed = save_solution_changes(session, FakeSolver(ones=[kept, moved_to]), assignments, previous)
+
+    assert changed == 2
+    assert load_previous_solution(session) == {kept, moved_to}
+    # Untouched slots keep their rows
+    assert session.query(TimeSlotAssignment).join(Timeslot).filter(Timeslot.day == 0).one().id == kept_slot_id
+
+    # A slot outside the stored grid gets its timeslot created
+    added = (groups[0], subject.id, teacher.id, 6, 0)
+    assignments[added] = added
+    previous = load_previous_solution(session)
+    changed = save_solution_changes(session, FakeSolver(ones=[kept, moved_to, added]), assignments, previous)
+
+    assert changed == 1
+    assert load_previous_solution(session) == {kept, moved_to, added}
+    assert session.query(Timeslot).filter_by(day=6).count() == 1
+    session.close()
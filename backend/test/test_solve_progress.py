@@ -0,0 +1,82 @@
+"""Tests for live solution progress of the main solve."""
+
+from ortools.sat.python import cp_model
+
+from backend.scheduler import _active_assignment_keys, solve_scheduling_model
+from backend.solve_progress import relative_gap
+from backend.test.test_job_queue import memory_queue, run_job
+
+
+class MockTeacher:
+    def __init__(self, id, name, subjects=None, preferences=None):
+        self.id = id
+        self.name = name
+        self.max_hours_week = 10
+        self.subjects = subjects or []
+        self.tutor_group = None
+        self.preferences = preferences
+        self.coordination_hours = 0
+
+
+class MockSubject:
+    def __init__(self, id, name, course_id, weekly_hours=1):
+        self.id = id
+        self.name = name
+        self.course_id = course_id
+        self.weekly_hours = weekly_hours
+        self.max_hours_per_day = 2
+        self.consecutive_hours = True
+        self.teach_every_day = False
+        self.linked_subject_id = None
+        self.included_lines = None
+
+
+def test_relative_gap():
+    assert relative_gap(10, 10) == 0
+    assert relative_gap(8, 10) == 0.25
+    assert relative_gap(0, 3) == 3
+
+
+def test_solve_reports_improving_solutions_and_best_so_far():
+    math = MockSubject("M1", "Math", "1", weekly_hours=3)
+    teacher = MockTeacher(1, "Ana", subjects=[math], preferences='{"0": {"preferred": [0, 1]}}')
+    entries = []
+    best = []
+
+    status, assignments, solver = solve_scheduling_model(
+        [teacher], [math], ["1-A"], [], 3, 3,
+        solver_params={"num_search_workers": 1, "random_seed": 0},
+        solution_progress_callback=entries.append,
+        best_solution_callback=lambda solution, keys: best.append(
+            set(_active_assignment_keys(solution, keys))
+        ),
+        best_solution_interval_seconds=0,
+    )
+
+    assert status in (cp_model.OPTIMAL, cp_model.FEASIBLE)
+    assert entries
+    assert [e["solution"] for e in entries] == list(range(1, len(entries) + 1))
+    assert set(entries[-1]) == {"solution", "objective", "bound", "gap", "wall_time"}
+    assert len(best) == len(entries)
+    assert best[-1] == set(_active_assignment_keys(solver, assignments))
+
+
+def test_job_status_keeps_first_and_latest_solutions():
+    queue = memory_queue()
+    task_id = queue.create_task()
+    queue.claim(worker_pid=10)
+    for i in range(1, 6):
+        queue.record_solution(task_id, {"solution": i}, max_entries=3)
+
+    solutions = queue.get_status(task_id)["solutions"]
+    assert [s["solution"] for s in solutions] == [1, 4, 5]
+
+
+def test_job_reports_improving_solutions(monkeypatch):
+    def create_timetable(session, solution_progress_callback, **kwargs):
+        for i in (1, 2):
+            solution_progress_callback({"solution": i, "objective": 10 - i})
+
+    status = run_job(memory_queue(), monkeypatch, create_timetable)
+    assert status["status"] == "success"
+    assert status["solutions"] == [{"solution": 1, "objective": 9}, {"solution": 2, "objective": 8}]
@@ -0,0 +1,116 @@
+"""Tests for named solver profiles and their configuration endpoint."""
+
+import json
+
+import pytest
+from ortools.sat.python import cp_model
+
+from backend.app import app
+from backend.populate_db import populate_db
+from backend.routes import config as config_routes
+from backend.solver_profiles import (
+    apply_solver_profile,
+    resolve_solver_profile,
+    validate_solver_profile,
+)
+from backend.test.test_job_queue import memory_queue, run_job
+
+
+class StoredConfig:
+    def __init__(self, solver_profiles=None, solver_profile=None):
+        self.solver_profiles = json.dumps(solver_profiles) if solver_profiles else None
+        self.solver_profile = solver_profile
+
+
+def test_validate_solver_profile_normalizes_and_rejects():
+    assert validate_solver_profile({"num_search_workers": 8.0, "random_seed": None}) == {
+        "num_search_workers": 8,
+    }
+    with pytest.raises(ValueError):
+        validate_solver_profile({"presolve": True})
+    with pytest.raises(ValueError):
+        validate_solver_profile({"relative_gap_limit": 2})
+    with pytest.raises(ValueError):
+        validate_solver_profile({"num_search_workers": 1.5})
+
+
+def test_resolve_prefers_explicit_then_config_then_default():
+    config = StoredConfig({"ci": {"num_search_workers": 1, "random_seed": 7}}, solver_profile="ci")
+
+    assert resolve_solver_profile(config) == ("ci", {"num_search_workers": 1, "random_seed": 7})
+    assert resolve_solver_profile(config, "deterministic")[0] == "deterministic"
+    assert resolve_solver_profile(None)[0] == "default"
+    assert resolve_solver_profile(config, "missing")[0] == "default"
+
+
+def test_apply_solver_profile_sets_cp_sat_parameters():
+    solver = cp_model.CpSolver()
+    apply_solver_profile(solver, {
+        "num_search_workers": 2,
+        "max_time_in_seconds": 5.0,
+        "relative_gap_limit": 0.05,
+        "linearization_level": 2,
+        "symmetry_level": 1,
+        "random_seed": 3,
+    })
+    params = solver.parameters
+    assert params.num_search_workers == 2
+    assert params.max_time_in_seconds == 5.0
+    assert params.relative_gap_limit == pytest.approx(0.05)
+    assert params.linearization_level == 2
+    assert params.symmetry_level == 1
+    assert params.random_seed == 3
+
+
+def test_config_endpoint_stores_and_selects_solver_profiles():
+    populate_db()
+    c = app.test_client()
+    base = {"classes_per_day": 5, "days_per_week": 5}
+
+    resp = c.post('/config', json={**base, "solver_profiles": {"ci": {"num_search_workers": 1}}, "solver_profile": "ci"})
+    assert resp.status_code == 200
+
+    data = c.get('/config').get_json()
+    assert data["solver_profile"] == "ci"
+    assert data["solver_profiles"]["ci"] == {"num_search_workers": 1}
+    assert "deterministic" in data["solver_profiles"]
+
+    assert c.post('/config', json={**base, "solver_profile": "nope"}).status_code == 400
+    assert c.post('/config', json={**base, "solver_profiles": {"x": {"bogus": 1}}}).status_code == 400
+
+
+def test_rejected_config_update_closes_its_session(monkeypatch):
+    populate_db()
+    sessions = []
+    session_factory = config_routes.Session
+
+    def tracked_session():
+        sessions.append(session_factory())
+        return sessions[-1]
+
+    monkeypatch.setattr(config_routes, "Session", tracked_session)
+    resp = app.test_client().post('/config', json={"classes_per_day": 5, "days_per_week": 5, "solver_profile": "nope"})
+    assert resp.status_code == 400
+    assert sessions and not sessions[0].in_transaction()
+
+
+def test_generation_rejects_unknown_solver_profile():
+    populate_db()
+    c = app.test_client()
+    c.post('/config', json={"classes_per_day": 5, "days_per_week": 5, "solver_profiles": {"ci": {"num_search_workers": 1}}})
+
+    resp = c.post('/timetable', json={"solver_profile": "nope"})
+    assert resp.status_code == 400
+    assert "nope" in resp.get_json()["error"]
+    assert c.post('/timetable', json={"solver_profile": "ci"}).status_code == 202
+
+
+def test_job_status_reports_solver_profile(monkeypatch):
+    def create_timetable(session, solver_profile_callback, **kwargs):
+        solver_profile_callback("deterministic", {"num_search_workers": 1})
+
+    status = run_job(memory_queue(), monkeypatch, create_timetable)
+    assert status["solver_profile"] == {
+        "name": "deterministic",
+        "params": {"num_search_workers": 1},
+    }
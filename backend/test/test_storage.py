@@ -0,0 +1,75 @@
+"""Tests for SQLite connection setup and versioned migrations."""
+import sqlite3
+
+from sqlalchemy import text
+
+from backend.models import Base
+from backend.storage import SCHEMA_VERSION, create_sqlite_engine, migrate
+
+
+def _legacy_database(path):
+    """A database as created before migrations: no newer columns, no indexes."""
+    conn = sqlite3.connect(path)
+    conn.executescript(
+        """
+        CREATE TABLE config (id INTEGER PRIMARY KEY, classes_per_day INTEGER NOT NULL,
+                             days_per_week INTEGER NOT NULL);
+        CREATE TABLE jobs (id VARCHAR(36) PRIMARY KEY, status VARCHAR(20) NOT NULL,
+                           created_at FLOAT NOT NULL);
+        CREATE TABLE timeslots (id INTEGER PRIMARY KEY, day INTEGER NOT NULL, hour INTEGER NOT NULL,
+                                course_id VARCHAR(50) NOT NULL, line INTEGER NOT NULL,
+                                subject_group_id INTEGER);
+        INSERT INTO config VALUES (1, 6, 5);
+        INSERT INTO timeslots VALUES (1, 0, 1, '1º', 0, NULL);
+        """
+    )
+    conn.close()
+
+
+def test_connections_use_wal_and_tuned_pragmas(tmp_path):
+    engine = create_sqlite_engine(tmp_path / "agenda.db")
+    with engine.connect() as conn:
+        assert conn.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+        assert conn.execute(text("PRAGMA synchronous")).scalar() == 1  # NORMAL
+        assert conn.execute(text("PRAGMA cache_size")).scalar() == -32000
+    engine.dispose()
+
+
+def test_journal_mode_can_be_overridden(tmp_path, monkeypatch):
+    monkeypatch.setenv("BACKEND_SQLITE_JOURNAL_MODE", "delete")
+    engine = create_sqlite_engine(tmp_path / "agenda.db")
+    with engine.connect() as conn:
+        assert conn.execute(text("PRAGMA journal_mode")).scalar() == "delete"
+    engine.dispose()
+
+
+def test_migrate_upgrades_a_legacy_database_once(tmp_path):
+    path = tmp_path / "agenda.db"
+    _legacy_database(path)
+    engine = create_sqlite_engine(path)
+
+    assert migrate(engine, Base.metadata) == SCHEMA_VERSION
+    with engine.connect() as conn:
+        config_columns = {row[1] for row in conn.execute(text("PRAGMA table_info(config)"))}
+        assert {"day_colors", "solver_profiles", "solver_profile"} <= config_columns
+        assert "scenario" in {row[1] for row in conn.execute(text("PRAGMA table_info(jobs)"))}
+        assert conn.execute(text("SELECT classes_per_day FROM config")).scalar() == 6
+        plan = " ".join(
+            row[3] for row in conn.execute(
+                text("EXPLAIN QUERY PLAN SELECT id FROM timeslots WHERE day = 0 AND hour = 1")
+            )
+        )
+        assert "ix_timeslots_day_hour" in plan
+
+    # Already up to date: nothing to run
+    assert migrate(engine, Base.metadata) == SCHEMA_VERSION
+    engine.dispose()
+
+
+def test_new_database_gets_the_latest_schema_version(tmp_path):
+    engine = create_sqlite_engine(tmp_path / "agenda.db")
+    assert migrate(engine, Base.metadata) == SCHEMA_VERSION
+    with engine.connect() as conn:
+        indexes = {row[1] for row in conn.execute(text("PRAGMA index_list(support_assignments)"))}
+    assert "ix_support_assignments_teacher_day_hour" in indexes
+    engine.dispose()
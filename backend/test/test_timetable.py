@@ -1,8 +1,15 @@
 import json
+from contextlib import contextmanager
 
+from sqlalchemy import event
+
+from backend.excel_export import _get_course_data, _get_teacher_data
 from backend.populate_db import populate_db
 from backend.models import (
+    ENGINE,
     Session,
+    SupportAssignment,
+    TeacherBusySlot,
     TimeSlotAssignment,
     Timeslot,
     Subject,
@@ -11,6 +18,10 @@ from backend.models import (
     JointClass,
 )
 from backend.timetable import (
+    GRID_CELL_SUPPORT,
+    GRID_CELL_UNAVAILABLE,
+    get_teacher_grid_compact,
+    get_teacher_grid_data,
     get_timetables_from_db,
     get_teacher_timetables_from_db,
     print_markdown_timetable_from_assignments,
@@ -151,3 +162,107 @@ def test_get_teacher_timetables_shows_joint_class_name():
     assert "1ºB: Matemáticas Avanzadas" in entries[0]
 
     session.close()
+
+
+@contextmanager
+def _count_queries():
+    statements = []
+
+    def before_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(ENGINE, "before_cursor_execute", before_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(ENGINE, "before_cursor_execute", before_execute)
+
+
+def _render_query_counts():
+    counts = {}
+    for renderer in (
+        print_markdown_timetable_from_assignments,
+        print_markdown_timetable_per_teacher,
+        get_teacher_grid_data,
+        _get_course_data,
+        _get_teacher_data,
+    ):
+        session = Session()
+        with _count_queries() as statements:
+            renderer(session)
+        session.close()
+        counts[renderer.__name__] = len(statements)
+    return counts
+
+
+def _seed_timetable(num_timeslots):
+    """Assign each of the first timeslots a different subject and teacher."""
+    populate_db()
+    session = Session()
+    subjects = session.query(Subject).all()
+    teachers = session.query(Teacher).all()
+    groups = session.query(SubjectGroup).all()
+    for i, ts in enumerate(session.query(Timeslot).limit(num_timeslots)):
+        ts.subject_group = groups[i % len(groups)] if groups and i % 2 else None
+        subject, teacher = subjects[i % len(subjects)], teachers[i % len(teachers)]
+        session.add(TimeSlotAssignment(timeslot=ts, subject_id=subject.id, teacher_id=teacher.id))
+        if i < len(teachers):
+            session.add(SupportAssignment(
+                teacher_id=teacher.id, day=0, hour=i, subject_id=subject.id,
+                course_id=subject.course_id, line=0,
+            ))
+            session.add(TeacherBusySlot(teacher_id=teacher.id, day=1, hour=i))
+    session.commit()
+    session.close()
+
+
+def test_renderers_run_a_fixed_number_of_queries():
+    _seed_timetable(num_timeslots=1)
+    small = _render_query_counts()
+    _seed_timetable(num_timeslots=200)
+    large = _render_query_counts()
+
+    assert large == small
+
+
+def _expand_compact(compact):
+    """Rebuild the non-empty dense cells from a compact teacher grid."""
+    cells = {}
+    for d, h, ti, si, ci, flags in compact["cells"]:
+        key = (str(d), str(h), str(compact["teachers"][ti]["id"]))
+        if flags & GRID_CELL_UNAVAILABLE:
+            cells[key] = {"is_unavailable": True}
+        else:
+            cells[key] = {
+                "subject_code": compact["subjects"][si],
+                "is_support": bool(flags & GRID_CELL_SUPPORT),
+                "course_line": compact["course_lines"][ci],
+            }
+    return cells
+
+
+def test_compact_teacher_grid_holds_the_non_empty_cells_of_the_dense_grid():
+    _seed_timetable(num_timeslots=40)
+    session = Session()
+    dense = get_teacher_grid_data(session)
+    compact = get_teacher_grid_compact(session)
+
+    dense_cells = {
+        (d, h, tid): cell
+        for d, hours in dense["grid"].items()
+        for h, teachers in hours.items()
+        for tid, cell in teachers.items()
+        if cell is not None
+    }
+    assert dense_cells and _expand_compact(compact) == dense_cells
+    assert compact["teachers"] == dense["teachers"]
+    assert len(compact["subjects"]) == len(set(compact["subjects"]))
+
+    teacher_id = dense["teachers"][0]["id"]
+    filtered = get_teacher_grid_compact(session, days=[0], teacher_ids=[teacher_id])
+    assert filtered["teachers"] == [dense["teachers"][0]]
+    assert _expand_compact(filtered) == {
+        key: cell for key, cell in dense_cells.items() if key[0] == "0" and key[2] == str(teacher_id)
+    }
+    assert list(get_teacher_grid_data(session, days=[0], teacher_ids=[teacher_id])["grid"]) == ["0"]
+    session.close()
@@ -0,0 +1,78 @@
+"""Tests for the data generation counter and the cached timetable views."""
+
+from unittest.mock import patch
+
+from backend.app import app
+from backend.models import Session, Subject, Teacher, TimeSlotAssignment, Timeslot, current_generation
+from backend.populate_db import populate_db
+from backend.routes import timetable as timetable_routes
+from backend.view_cache import ViewCache
+
+
+def _generation():
+    session = Session()
+    try:
+        return current_generation(session)
+    finally:
+        session.close()
+
+
+def _seed_assignment():
+    populate_db()
+    session = Session()
+    subject = session.query(Subject).first()
+    teacher = session.query(Teacher).first()
+    session.add(TimeSlotAssignment(
+        timeslot=session.query(Timeslot).first(), subject=subject, teacher=teacher,
+        subject_id=subject.id, teacher_id=teacher.id,
+    ))
+    session.commit()
+    session.close()
+
+
+def test_generation_changes_only_on_committed_view_data_writes():
+    populate_db()
+    start = _generation()
+
+    session = Session()
+    session.query(Teacher).first().max_hours_week += 1
+    session.rollback()
+    session.commit()
+    assert _generation() == start
+
+    session.query(Teacher).first().max_hours_week += 1
+    session.commit()
+    after_flush = _generation()
+    assert after_flush != start
+
+    # Bulk statements count too
+    session.query(TimeSlotAssignment).delete()
+    session.commit()
+    session.close()
+    assert _generation() not in (start, after_flush)
+
+
+def test_timetable_view_is_rendered_once_per_generation_and_revalidated():
+    _seed_assignment()
+    c = app.test_client()
+    render = timetable_routes._render_markdown
+    with patch.object(timetable_routes, "_render_markdown", wraps=render) as spy, \
+            patch.object(timetable_routes, "view_cache", ViewCache()):
+        first = c.get('/timetable')
+        assert first.status_code == 200
+        etag = first.headers['ETag']
+        second = c.get('/timetable')
+        assert second.get_data() == first.get_data()
+        not_modified = c.get('/timetable', headers={'If-None-Match': etag})
+        assert not_modified.status_code == 304
+        assert spy.call_count == 1
+
+        # Any write route invalidates the view
+        assert c.post('/teachers', json={'name': 'Nueva', 'max_hours_week': 5}).status_code == 201
+        changed = c.get('/timetable', headers={'If-None-Match': etag})
+        assert changed.status_code == 200
+        assert changed.headers['ETag'] != etag
+        assert spy.call_count == 2
+
+        assert c.delete('/timetable').status_code == 200
+        assert c.get('/timetable').status_code == 404
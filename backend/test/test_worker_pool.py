@@ -0,0 +1,111 @@
+"""Tests for the solver worker pool (jobs run in separate processes)."""
+
+import time
+
+import pytest
+
+from backend.job_queue import JobQueue
+from backend.models import (
+    ENGINE, Base, Config, Course, Session, SchedulerError, Subject, Teacher, TimeSlotAssignment,
+)
+from backend.scenarios import create_scenario, use_scenario
+from backend.worker_pool import MEMORY_LIMIT_SUPPORTED, WorkerPool
+
+
+def _seed_small_school():
+    """Replace the database with one course line, Math 2 h/week taught by Ana."""
+    Base.metadata.drop_all(ENGINE)
+    Base.metadata.create_all(ENGINE)
+    session = Session()
+    session.add(Course(id="1º", num_lines=1))
+    math = Subject(id="M1", name="Math", weekly_hours=2, max_hours_per_day=1, course_id="1º")
+    session.add(math)
+    session.add(Teacher(id=1, name="Ana", max_hours_week=10, subjects=[math]))
+    session.add(Config(classes_per_day=2, days_per_week=2))
+    session.commit()
+    session.close()
+
+
+def _wait_until_finished(queue, task_id, timeout=120):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        status = queue.get_status(task_id)
+        if status["status"] != "running":
+            return status
+        time.sleep(0.2)
+    raise AssertionError(f"job {task_id} did not finish")
+
+
+def test_pool_runs_queued_job_in_worker_process():
+    _seed_small_school()
+    queue = JobQueue()
+    task_id = queue.create_task({"solver_profile": "deterministic"}, locale="en")
+    pool = WorkerPool(queue, workers=1, memory_limit_mb=0, poll_seconds=0.1)
+    pool.start()
+    try:
+        status = _wait_until_finished(queue, task_id)
+    finally:
+        pool.stop()
+
+    assert status["status"] == "success"
+    assert status["attempts"] == 1
+    assert status["build_profile"]["bool_vars"] > 0
+    assert status["solver_profile"]["name"] == "deterministic"
+    session = Session()
+    assert session.query(TimeSlotAssignment).count() == 2
+    session.close()
+
+
+def test_scenario_jobs_run_in_parallel_on_their_own_databases():
+    _seed_small_school()
+    create_scenario("a")
+    create_scenario("b")
+    queue = JobQueue()
+    task_ids = [queue.create_task(locale="en", scenario=name) for name in ("a", "b")]
+    pool = WorkerPool(queue, workers=2, memory_limit_mb=0, poll_seconds=0.1)
+    pool.start()
+    try:
+        statuses = [_wait_until_finished(queue, task_id) for task_id in task_ids]
+    finally:
+        pool.stop()
+
+    assert [status["status"] for status in statuses] == ["success", "success"]
+    for name in ("a", "b"):
+        with use_scenario(name):
+            session = Session()
+            assert session.query(TimeSlotAssignment).count() == 2
+            session.close()
+    session = Session()
+    assert session.query(TimeSlotAssignment).count() == 0
+    session.close()
+
+
+def test_job_over_its_time_limit_is_killed_and_fails():
+    _seed_small_school()
+    queue = JobQueue()
+    task_id = queue.create_task(locale="en")
+    pool = WorkerPool(queue, workers=1, time_limit_seconds=0.2, memory_limit_mb=0, poll_seconds=0.05)
+
+    pool.run_job(queue.claim(worker_pid=1))
+
+    status = queue.get_status(task_id)
+    assert status["status"] == "error"
+    assert "time limit" in status["error"]
+    session = Session()
+    assert session.query(SchedulerError).one().message == status["error"]
+    session.close()
+
+
+@pytest.mark.skipif(not MEMORY_LIMIT_SUPPORTED, reason="needs /proc")
+def test_job_over_its_memory_limit_is_killed_and_fails():
+    _seed_small_school()
+    queue = JobQueue()
+    task_id = queue.create_task(locale="en")
+    # Any Python process has more than 1 MB resident
+    pool = WorkerPool(queue, workers=1, memory_limit_mb=1, poll_seconds=0.05)
+
+    pool.run_job(queue.claim(worker_pid=1))
+
+    status = queue.get_status(task_id)
+    assert status["status"] == "error"
+    assert "memory limit of 1 MB" in status["error"]
@@ -13,16 +13,18 @@ from html import escape
 import json
 import re
 from .models import (
-    TimeSlotAssignment,
-    Timeslot,
     Config,
     Teacher,
     FixedSlot,
-    TeacherBusySlot,
     JointClass,
-    SupportAssignment,
     normalize_tutor_groups,
 )
+from .read_model import (
+    load_assignments,
+    load_busy_slots,
+    load_support_assignments,
+    load_teacher_fixed_slot_labels,
+)
 
 from .translations import t
 from .markdown_utils import align_tables_in_text
@@ -116,32 +118,17 @@ def get_timetables_from_db(session):
             {course_line: {(hour, day_index): [subject_teacher_strings]}}
     """
     timetable = defaultdict(lambda: defaultdict(list))
-    assignments = session.query(TimeSlotAssignment).all()
-    for assignment in assignments:
-        timeslot: Timeslot = assignment.timeslot
-        course_line = (
-            f"{timeslot.course_id}{chr(ord('A') + timeslot.line)}"  # e.g., "1ºA"
-        )
-        hour = timeslot.hour  # e.g., 1, 2, ...
+    for row in load_assignments(session):
         # weekday stored as an index (0 = first weekday)
-        weekday = timeslot.day
-        subject_name = assignment.subject.name
-        teacher_name = assignment.teacher.name
-        group_color = None
-        if timeslot.subject_group is not None:
-            group_color = getattr(timeslot.subject_group, "color", None)
-        subject_color = group_color or assignment.subject.color
-        timetable[course_line][(hour, weekday)].append(
-            _build_colored_assignment_html(subject_name, teacher_name, subject_color)
+        timetable[row.course_line][(row.hour, row.day)].append(
+            _build_colored_assignment_html(row.subject_name, row.teacher_name, row.color)
         )
 
     # Append support assignments to course timetable cells
-    support_assignments = session.query(SupportAssignment).all()
-    for sa in support_assignments:
-        course_line = f"{sa.course_id}{chr(ord('A') + sa.line)}"
-        support_label = f"{sa.teacher.name} ({t('timetable.support_label')})"
-        timetable[course_line][(sa.hour, sa.day)].append(
-            _build_colored_label_html(support_label, sa.subject.color)
+    for sa in load_support_assignments(session):
+        support_label = f"{sa.teacher_name} ({t('timetable.support_label')})"
+        timetable[sa.course_line][(sa.hour, sa.day)].append(
+            _build_colored_label_html(support_label, sa.subject_color)
         )
 
     return timetable
@@ -330,11 +317,9 @@ def print_markdown_timetable_from_assignments(session) -> str:
         course_fixed_slot_labels.setdefault(row.course_line, {}).setdefault(row.fixed_slot_id, {})[row.day] = row.label
 
     # Count support hours per course_line
-    support_assignments = session.query(SupportAssignment).all()
     support_hours_dict = {}
-    for sa in support_assignments:
-        cl = f"{sa.course_id}{chr(ord('A') + sa.line)}"
-        support_hours_dict[cl] = support_hours_dict.get(cl, 0) + 1
+    for sa in load_support_assignments(session):
+        support_hours_dict[sa.course_line] = support_hours_dict.get(sa.course_line, 0) + 1
 
     return generate_markdown_timetable_by_course(
         timetable, tutors_dict, cfg_dict,
@@ -365,30 +350,18 @@ def get_teacher_timetables_from_db(session):
 
     # First pass: collect raw items per (teacher, hour, day) cell
     cell_items = defaultdict(list)
-    assignments = session.query(TimeSlotAssignment).all()
-    for assignment in assignments:
-        timeslot = assignment.timeslot
-        teacher_name = assignment.teacher.name
-        subject_name = assignment.subject.name
-        course_line = f"{timeslot.course_id}{chr(ord('A') + timeslot.line)}"
-
-        line_letter = chr(ord('A') + timeslot.line)
+    for row in load_assignments(session):
         matched_jc = None
-        for jc in jc_lookup.get((timeslot.course_id, assignment.subject_id, line_letter), []):
-            if jc.teacher_id is None or jc.teacher_id == assignment.teacher_id:
+        for jc in jc_lookup.get((row.course_id, row.subject_id, row.line_letter), []):
+            if jc.teacher_id is None or jc.teacher_id == row.teacher_id:
                 matched_jc = jc
                 break
 
-        group_color = None
-        if timeslot.subject_group is not None:
-            group_color = getattr(timeslot.subject_group, "color", None)
-        subject_color = group_color or assignment.subject.color
-
-        cell_items[(teacher_name, timeslot.hour, timeslot.day)].append({
+        cell_items[(row.teacher_name, row.hour, row.day)].append({
             "jc": matched_jc,
-            "subject_name": subject_name,
-            "course_line": course_line,
-            "subject_color": subject_color,
+            "subject_name": row.subject_name,
+            "course_line": row.course_line,
+            "subject_color": row.color,
         })
 
     # Build teacher preferences lookup for unavailable slots
@@ -448,14 +421,12 @@ def get_teacher_timetables_from_db(session):
                         )
 
     # Support assignments
-    support_assignments = session.query(SupportAssignment).all()
-    for sa in support_assignments:
-        teacher_name = sa.teacher.name
-        course_line = f"{sa.course_id}{chr(ord('A') + sa.line)}"
-        label = f"{course_line}: {sa.subject.name} ({t('timetable.support_label')})"
+    for sa in load_support_assignments(session):
+        teacher_name = sa.teacher_name
+        label = f"{sa.course_line}: {sa.subject_name} ({t('timetable.support_label')})"
         data = {
             "support-id": sa.id,
-            "teacher": sa.teacher.name,
+            "teacher": sa.teacher_name,
             "day": sa.day,
             "hour": sa.hour,
         }
@@ -463,7 +434,7 @@ def get_teacher_timetables_from_db(session):
         if (sa.day, sa.hour) in unavailable:
             data["conflict"] = "1"
             safe_label = escape(label)
-            safe_color = _safe_hex_color(sa.subject.color)
+            safe_color = _safe_hex_color(sa.subject_color)
             base_class = "tt-support-entry tt-support-conflict tt-subject-entry"
             attrs = " ".join(f'data-{k}="{escape(str(v))}"' for k, v in data.items())
             if safe_color:
@@ -483,16 +454,15 @@ def get_teacher_timetables_from_db(session):
             teacher_timetable[teacher_name][(sa.hour, sa.day)].append(html)
         else:
             teacher_timetable[teacher_name][(sa.hour, sa.day)].append(
-                _build_colored_label_html_with_data(label, sa.subject.color, data)
+                _build_colored_label_html_with_data(label, sa.subject_color, data)
             )
 
     # Non-teaching busy slots (coordination, etc.)
-    busy_slots = session.query(TeacherBusySlot).all()
-    for slot in busy_slots:
+    for slot in load_busy_slots(session):
         coord_label = _build_colored_label_html(
             t("timetable.coordination_label"), COORDINATION_COLOR
         )
-        teacher_timetable[slot.teacher.name][(slot.hour, slot.day)].append(coord_label)
+        teacher_timetable[slot.teacher_name][(slot.hour, slot.day)].append(coord_label)
 
     # Fill remaining gaps
     cfg = session.query(Config).first()
@@ -698,12 +668,9 @@ def print_markdown_timetable_per_teacher(session) -> str:
     teacher_fixed_slots = session.query(FixedSlot).filter_by(slot_type="teacher").all()
 
     # Load per-teacher fixed slot label overrides
-    from .models import TeacherFixedSlotLabel
-    override_rows = session.query(TeacherFixedSlotLabel).all()
     teacher_fixed_labels = {}
-    for row in override_rows:
-        t_name = row.teacher.name
-        teacher_fixed_labels.setdefault(t_name, {}).setdefault(row.fixed_slot_id, {})[row.day] = row.label
+    for row in load_teacher_fixed_slot_labels(session):
+        teacher_fixed_labels.setdefault(row.teacher_name, {}).setdefault(row.fixed_slot_id, {})[row.day] = row.label
 
     return generate_markdown_timetable_by_teacher(
         teacher_timetable, teachers_info, teachers_tutors,
@@ -717,13 +684,22 @@ def print_markdown_timetable_per_teacher(session) -> str:
     )
 
 
-def get_teacher_grid_data(session):
+# Flags of a compact teacher-grid cell
+GRID_CELL_SUPPORT = 1
+GRID_CELL_UNAVAILABLE = 2
+
+
+def _teacher_grid_cells(session, days=None, teacher_ids=None):
     """
-    Builds a structured JSON-friendly dict of timetable data organised
-    by day and teacher, suitable for the "Teaching staff" tab.
+    Collects the non-empty cells of the teacher grid.
+    Args:
+        days: Day positions (0..days_per_week-1) to include; None = all.
+        teacher_ids: Teacher ids to include; None = all.
     Returns:
-        dict with keys: teachers, day_indices, day_names, day_colors,
-                        hour_names, grid
+        (meta, teachers, cells): ``meta`` holds day_indices, day_names,
+        day_colors, hour_names, num_days and num_hours; ``teachers`` the
+        included teachers sorted by name; ``cells`` maps (day, hour,
+        teacher_id) to the cell dict of the dense grid.
     """
     cfg = session.query(Config).first()
 
@@ -738,21 +714,35 @@ def get_teacher_grid_data(session):
     if len(hour_names) < num_hours:
         hour_names += [t("hours.label").format(n=i + 1) for i in range(len(hour_names), num_hours)]
 
+    meta = {
+        "day_indices": day_indices,
+        "day_names": day_names,
+        "day_colors": day_colors,
+        "hour_names": hour_names,
+        "num_days": num_days,
+        "num_hours": num_hours,
+    }
+    included_days = set(range(num_days)) if days is None else {d for d in days if 0 <= d < num_days}
+
     # Teachers sorted by name
     teachers = session.query(Teacher).order_by(Teacher.name).all()
-    teacher_list = [{"id": t.id, "name": t.name} for t in teachers]
-    teacher_ids = {t.id for t in teachers}
+    if teacher_ids is not None:
+        wanted = set(teacher_ids)
+        teachers = [teacher for teacher in teachers if teacher.id in wanted]
+    included_teachers = {teacher.id for teacher in teachers}
+
+    def included(d, h, tid):
+        return d in included_days and h < num_hours and tid in included_teachers
 
     # Build support lookup: (day, hour, teacher_id) -> True
     support_lookup = set()
-    support_assignments = session.query(SupportAssignment).all()
+    support_assignments = load_support_assignments(session)
     for sa in support_assignments:
         support_lookup.add((sa.day, sa.hour, sa.teacher_id))
 
     # Build busy-slot set: (day, hour, teacher_id) -> True
-    busy_slots = session.query(TeacherBusySlot).all()
     busy_lookup = set()
-    for bs in busy_slots:
+    for bs in load_busy_slots(session):
         busy_lookup.add((bs.day, bs.hour, bs.teacher_id))
 
     # Build unavailable slots from teacher preferences
@@ -769,70 +759,131 @@ def get_teacher_grid_data(session):
                 for h in day_prefs["unavailable"]:
                     unavailable_lookup.add((int(day_str), h, teacher.id))
 
-    # Initialise empty grid: day -> hour -> teacher_id -> None
-    # We use a nested defaultdict-of-dicts for sparse access.
-    grid = {}
-    for d in range(num_days):
-        day_grid = {}
-        for h in range(num_hours):
-            cell = {}
-            for t_id in teacher_ids:
-                cell[str(t_id)] = None
-            day_grid[str(h)] = cell
-        grid[str(d)] = day_grid
-
+    cells = {}
     # Fill in assignments
-    assignments = session.query(TimeSlotAssignment).all()
-    for a in assignments:
-        ts = a.timeslot
-        d, h = ts.day, ts.hour
-        if d >= num_days or h >= num_hours:
+    for a in load_assignments(session):
+        if a.teacher_id is None or not included(a.day, a.hour, a.teacher_id):
             continue
-        if a.teacher_id is None or a.teacher_id not in teacher_ids:
+        key = (a.day, a.hour, a.teacher_id)
+        if key in busy_lookup:
             continue
-        is_support = (d, h, a.teacher_id) in support_lookup
-        is_busy = (d, h, a.teacher_id) in busy_lookup
-        if is_busy:
-            continue
-        course_line = f"{a.timeslot.course_id}{chr(ord('A') + a.timeslot.line)}"
-        grid[str(d)][str(h)][str(a.teacher_id)] = {
-            "subject_code": a.subject.id,
-            "is_support": is_support,
-            "course_line": course_line,
+        cells[key] = {
+            "subject_code": a.subject_id,
+            "is_support": key in support_lookup,
+            "course_line": a.course_line,
         }
 
     # Override with support assignments (they get the subject they support)
     for sa in support_assignments:
-        d, h, tid = sa.day, sa.hour, sa.teacher_id
-        if d >= num_days or h >= num_hours:
-            continue
-        if tid not in teacher_ids:
+        if not included(sa.day, sa.hour, sa.teacher_id):
             continue
-        support_course_line = f"{sa.course_id}{chr(ord('A') + sa.line)}"
-        grid[str(d)][str(h)][str(tid)] = {
-            "subject_code": sa.subject.id,
+        cells[(sa.day, sa.hour, sa.teacher_id)] = {
+            "subject_code": sa.subject_id,
             "is_support": True,
-            "course_line": support_course_line,
+            "course_line": sa.course_line,
         }
 
     # Mark unavailable slots with red X
     for d, h, tid in unavailable_lookup:
-        if d >= num_days or h >= num_hours:
+        if not included(d, h, tid):
             continue
-        grid[str(d)][str(h)][str(tid)] = {
+        cells[(d, h, tid)] = {
             "is_unavailable": True,
         }
 
+    return meta, teachers, cells
+
+
+def get_teacher_grid_data(session, days=None, teacher_ids=None):
+    """
+    Builds a structured JSON-friendly dict of timetable data organised
+    by day and teacher, suitable for the "Teaching staff" tab.
+    Args:
+        days: Day positions to include in the grid; None = all.
+        teacher_ids: Teacher ids to include; None = all.
+    Returns:
+        dict with keys: teachers, day_indices, day_names, day_colors,
+                        hour_names, grid
+    """
+    meta, teachers, cells = _teacher_grid_cells(session, days=days, teacher_ids=teacher_ids)
+    teacher_ids = {teacher.id for teacher in teachers}
+    included_days = range(meta["num_days"]) if days is None else sorted(
+        {d for d in days if 0 <= d < meta["num_days"]}
+    )
+
+    # Dense grid: day -> hour -> teacher_id -> cell or None
+    grid = {}
+    for d in included_days:
+        day_grid = {}
+        for h in range(meta["num_hours"]):
+            cell = {}
+            for t_id in teacher_ids:
+                cell[str(t_id)] = cells.get((d, h, t_id))
+            day_grid[str(h)] = cell
+        grid[str(d)] = day_grid
+
     return {
-        "teachers": teacher_list,
-        "day_indices": day_indices,
-        "day_names": day_names,
-        "day_colors": day_colors,
-        "hour_names": hour_names,
+        "teachers": [{"id": teacher.id, "name": teacher.name} for teacher in teachers],
+        "day_indices": meta["day_indices"],
+        "day_names": meta["day_names"],
+        "day_colors": meta["day_colors"],
+        "hour_names": meta["hour_names"],
         "grid": grid,
     }
 
 
+def get_teacher_grid_compact(session, days=None, teacher_ids=None):
+    """
+    Builds the teacher grid in compact form: only the non-empty cells, as
+    rows of indices into the teacher, subject and course-line tables.
+    Args:
+        days: Day positions to include; None = all.
+        teacher_ids: Teacher ids to include; None = all.
+    Returns:
+        dict with keys: format ("compact"), teachers, day_indices,
+        day_names, day_colors, hour_names, subjects, course_lines and cells,
+        a list of ``[day, hour, teacher_index, subject_index,
+        course_line_index, flags]`` rows sorted by day, hour and teacher.
+        ``flags`` combines GRID_CELL_SUPPORT and GRID_CELL_UNAVAILABLE;
+        unavailable cells have subject and course-line index -1.
+    """
+    meta, teachers, cells = _teacher_grid_cells(session, days=days, teacher_ids=teacher_ids)
+    teacher_index = {teacher.id: i for i, teacher in enumerate(teachers)}
+    subjects, subject_index = [], {}
+    course_lines, course_line_index = [], {}
+
+    def intern(value, values, index):
+        if value not in index:
+            index[value] = len(values)
+            values.append(value)
+        return index[value]
+
+    rows = []
+    for (d, h, tid), cell in cells.items():
+        if cell.get("is_unavailable"):
+            rows.append([d, h, teacher_index[tid], -1, -1, GRID_CELL_UNAVAILABLE])
+            continue
+        rows.append([
+            d, h, teacher_index[tid],
+            intern(cell["subject_code"], subjects, subject_index),
+            intern(cell["course_line"], course_lines, course_line_index),
+            GRID_CELL_SUPPORT if cell["is_support"] else 0,
+        ])
+    rows.sort(key=lambda row: row[:3])
+
+    return {
+        "format": "compact",
+        "teachers": [{"id": teacher.id, "name": teacher.name} for teacher in teachers],
+        "day_indices": meta["day_indices"],
+        "day_names": meta["day_names"],
+        "day_colors": meta["day_colors"],
+        "hour_names": meta["hour_names"],
+        "subjects": subjects,
+        "course_lines": course_lines,
+        "cells": rows,
+    }
+
+
 # Example usage:
 if __name__ == "__main__":
     session = Session()
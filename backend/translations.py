@@ -5,6 +5,9 @@ dictionary with messages in Spanish and English. The app can import t and use
 it for user-facing messages. For a full solution consider integrating Flask-Babel.
 """
 
+import contextlib
+import contextvars
+
 from flask import g, has_request_context
 from .constants import DEFAULT_LOCALE
 
@@ -21,6 +24,7 @@ _LOCALES = {
         "diagnosis.entity_conflict": "- **{name}** — Conflicts involve:",
         "diagnosis.tutor_of_group": ", tutor of group {group}",
         "diagnosis.cleared_title": "Restrictions that did NOT cause issues individually:",
+        "diagnosis.untested_title": "Restrictions not tested (time budget exhausted or enough suspects found):",
         "diagnosis.no_conclusion": "Could not isolate a single restriction. The infeasibility may arise from the interaction of multiple restrictions, or from data configuration.",
         "diagnosis.capacity_issue": "  - **Group {group}**: requires {required}h/week but only {available} slots available ({days} days × {hours} hours). Possible cause: **SubjectWeeklyHours**.",
         "diagnosis.subject_no_teacher": "  - **Subject \"{name}\" (id={id})** in **Group {group}** has no teacher assigned.",
@@ -82,17 +86,38 @@ _LOCALES = {
         "errors.json_no_content": "No JSON content provided",
         "errors.json_parse_error": "JSON parse error: {error}",
         "errors.import_failed": "Import failed: {error}",
+        "errors.import_invalid": "The file is not a valid backup",
         "errors.clear_data_failed": "Clear data failed: {error}",
         "errors.fixed_slot_position_occupied": "A fixed row of type '{slot_type}' already exists at position {position}.",
         "errors.support_already_exists": "A support assignment already exists for this class",
         "errors.timetable_generation_error": "Error generating timetable: {error}",
+        "errors.resolve_scope_required": "Provide at least one group or teacher to re-solve",
+        "errors.invalid_resolve_scope": "groups must be a list of course lines (e.g. \"1º-A\") and teachers a list of teacher ids",
+        "errors.invalid_resolve_scope_items": "Unknown groups or teachers: {items}",
+        "errors.invalid_solver_profile": "Invalid solver profile '{name}': {error}",
+        "errors.unknown_solver_profile": "Unknown solver profile '{name}'",
+        "errors.job_time_limit": "Timetable generation stopped after exceeding its time limit of {seconds} s",
+        "errors.job_worker_crashed": "The solver worker stopped unexpectedly (exit code {code})",
+        "errors.job_memory_limit": "Timetable generation stopped after exceeding its memory limit of {mb} MB",
+        "errors.job_worker_lost": "The solver worker running this task stopped",
+        "errors.task_not_retryable": "Only failed or cancelled tasks can be retried",
+        "errors.export_not_found": "Excel export not found or expired",
+        "errors.export_not_ready": "The Excel export is not ready yet",
+        "errors.invalid_grid_filter": "Invalid filter: use comma-separated numbers or ranges such as 0-2,4",
+        "errors.scenario_invalid_name": "Invalid scenario name \"{name}\": use up to 64 letters, digits, \"-\" or \"_\"",
+        "errors.scenario_exists": "Scenario \"{name}\" already exists",
+        "errors.scenario_not_found": "Scenario \"{name}\" not found",
+        "errors.scenario_busy": "A timetable generation is running for \"{name}\"",
         "success.deleted": "{entity} with ID {id} deleted successfully",
         "success.import_completed": "Import completed",
+        "success.scenario_deleted": "Scenario \"{name}\" deleted",
+        "success.scenario_promoted": "Scenario \"{name}\" is now the live timetable",
         "success.data_cleared": "All data cleared successfully",
         "timetable.no_schedule": "No timetables generated. Please generate a timetable first.",
         "timetable.generate_failed": "Could not generate a valid timetable",
         "timetable.generated_success": "Timetable generated successfully",
         "timetable.assignments_cleared": "Assignments cleared",
+        "timetable.partial_infeasible": "No valid timetable exists for {scope} while keeping the rest of the timetable fixed. Widen the selection or generate the full timetable.",
         "timetable.by_course": "Courses",
         "timetable.by_teacher": "Teachers",
         "timetable.teacher_hours": "({assigned}/{max} hours)",
@@ -132,6 +157,7 @@ _LOCALES = {
         "diagnosis.entity_conflict": "- **{name}** — Conflictos involucran:",
         "diagnosis.tutor_of_group": ", tutor del grupo {group}",
         "diagnosis.cleared_title": "Restricciones que NO causaron problemas individualmente:",
+        "diagnosis.untested_title": "Restricciones no evaluadas (tiempo agotado o suficientes sospechosas encontradas):",
         "diagnosis.no_conclusion": "No se pudo aislar una restricción única. La inviabilidad puede deberse a la interacción de múltiples restricciones o a la configuración de datos.",
         "diagnosis.capacity_issue": "  - **Grupo {group}**: requiere {required}h/semana pero solo hay {available} espacios disponibles ({days} días × {hours} horas). Posible causa: **SubjectWeeklyHours**.",
         "diagnosis.subject_no_teacher": "  - **Asignatura \"{name}\" (id={id})** en **Grupo {group}** no tiene profesor asignado.",
@@ -194,17 +220,38 @@ _LOCALES = {
         "errors.json_no_content": "No se proporcionó contenido JSON",
         "errors.json_parse_error": "Error de análisis JSON: {error}",
         "errors.import_failed": "Importación fallida: {error}",
+        "errors.import_invalid": "El archivo no es una copia de seguridad válida",
         "errors.clear_data_failed": "Error al limpiar datos: {error}",
         "errors.fixed_slot_position_occupied": "Ya existe una fila fija de tipo '{slot_type}' en la posición {position}.",
         "errors.support_already_exists": "Ya existe un apoyo asignado para esta clase",
         "errors.timetable_generation_error": "Error al generar el horario: {error}",
+        "errors.resolve_scope_required": "Indique al menos un grupo o docente para recalcular",
+        "errors.invalid_resolve_scope": "groups debe ser una lista de líneas de curso (p. ej. \"1º-A\") y teachers una lista de ids de docentes",
+        "errors.invalid_resolve_scope_items": "Grupos o docentes desconocidos: {items}",
+        "errors.invalid_solver_profile": "Perfil de solver '{name}' no válido: {error}",
+        "errors.unknown_solver_profile": "Perfil de solver desconocido '{name}'",
+        "errors.job_time_limit": "La generación del horario se detuvo al superar su límite de tiempo de {seconds} s",
+        "errors.job_worker_crashed": "El proceso del solver terminó inesperadamente (código de salida {code})",
+        "errors.job_memory_limit": "La generación del horario se detuvo al superar su límite de memoria de {mb} MB",
+        "errors.job_worker_lost": "El proceso del solver que ejecutaba esta tarea se detuvo",
+        "errors.task_not_retryable": "Solo se pueden reintentar tareas fallidas o canceladas",
+        "errors.export_not_found": "Exportación a Excel no encontrada o caducada",
+        "errors.export_not_ready": "La exportación a Excel aún no está lista",
+        "errors.invalid_grid_filter": "Filtro no válido: usa números o rangos separados por comas, como 0-2,4",
+        "errors.scenario_invalid_name": "Nombre de escenario no válido \"{name}\": usa hasta 64 letras, dígitos, \"-\" o \"_\"",
+        "errors.scenario_exists": "El escenario \"{name}\" ya existe",
+        "errors.scenario_not_found": "No se encontró el escenario \"{name}\"",
+        "errors.scenario_busy": "Hay una generación de horario en curso para \"{name}\"",
         "success.deleted": "{entity} con ID {id} eliminado correctamente",
         "success.import_completed": "Importación completada",
+        "success.scenario_deleted": "Escenario \"{name}\" eliminado",
+        "success.scenario_promoted": "El escenario \"{name}\" es ahora el horario en uso",
         "success.data_cleared": "Todos los datos eliminados correctamente",
         "timetable.no_schedule": "No hay horarios generados. Por favor, genere un horario primero.",
         "timetable.generate_failed": "No se pudo generar un horario válido",
         "timetable.generated_success": "Horario generado exitosamente",
         "timetable.assignments_cleared": "Assignments eliminadas",
+        "timetable.partial_infeasible": "No existe un horario válido para {scope} manteniendo fijo el resto del horario. Amplíe la selección o genere el horario completo.",
         "timetable.by_course": "Cursos",
         "timetable.by_teacher": "Docentes",
         "timetable.teacher_hours": "({assigned}/{max} horas)",
@@ -237,14 +284,30 @@ _LOCALES = {
 # default locale for backend responses
 _DEFAULT_LOCALE = DEFAULT_LOCALE
 
+# Locale set outside a request (e.g. by a background export thread)
+_context_locale = contextvars.ContextVar("locale", default=None)
+
 
 def get_current_locale():
     """Get the current locale for this request."""
+    locale = _context_locale.get()
+    if locale is not None:
+        return locale
     if has_request_context():
         return getattr(g, "locale", _DEFAULT_LOCALE)
     return _DEFAULT_LOCALE
 
 
+@contextlib.contextmanager
+def use_locale(locale):
+    """Make ``t`` translate into ``locale`` within the block, request or not."""
+    token = _context_locale.set(locale if locale in _LOCALES else _DEFAULT_LOCALE)
+    try:
+        yield
+    finally:
+        _context_locale.reset(token)
+
+
 def set_locale(l):
     """Set the locale for the current request."""
     if l in _LOCALES:
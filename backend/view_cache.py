@@ -0,0 +1,75 @@
+"""Cache of rendered timetable views, invalidated by the data generation.
+
+The markdown timetable, the teacher grid and the Excel workbook are rebuilt
+from all the assignments on every request, although they only change when
+the data does. Every commit of a ``models.Session`` that writes school data
+or the timetable bumps the ``data_generation`` counter in the same
+transaction (see ``models.current_generation``), so the API routes and the
+solver workers that save timetables invalidate the cache without calling it.
+
+Rendered views are kept in memory under ``(scenario, view, locale,
+parameters, generation)``; the ETag of a response is derived from the same
+key, so a client revalidating an unchanged view gets a 304 for the cost of
+reading the counter.
+"""
+
+import hashlib
+import json
+import logging
+import threading
+from collections import OrderedDict
+
+from .models import current_generation
+from .scenarios import current_scenario
+from .translations import get_current_locale
+
+
+logger = logging.getLogger(__name__)
+
+VIEW_CACHE_MAX_ENTRIES = 32
+
+
+def view_key(session, view, params=None):
+    """Return the cache key of ``view`` rendered with ``params`` for the
+    selected scenario and locale at the current data generation."""
+    return (
+        current_scenario(),
+        view,
+        get_current_locale(),
+        json.dumps(params or {}, sort_keys=True, default=str),
+        current_generation(session),
+    )
+
+
+def view_etag(key):
+    return hashlib.sha256(repr(key).encode("utf-8")).hexdigest()[:32]
+
+
+class ViewCache:
+    """Thread-safe LRU map of view keys to rendered ``(body, mimetype)`` pairs."""
+
+    def __init__(self, max_entries=VIEW_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+view_cache = ViewCache()
@@ -0,0 +1,337 @@
+"""Pool of solver worker processes that run the jobs of the ``jobs`` queue.
+
+Building and solving a model is CPU-heavy Python that holds the GIL, so it
+never runs in the API process. Each pool slot is a supervisor thread that
+claims a queued job (see ``job_queue``) and runs it in a fresh process,
+which reports progress and the outcome through the database. The
+supervisor only waits on that process, and enforces per job:
+
+  - a wall-clock limit: the process is killed and the job fails;
+  - an optional memory limit: the resident memory of the job process and
+    its children (the diagnosis process pool) is sampled from ``/proc`` and
+    the whole process tree is killed when it grows over the limit. It
+    bounds real memory, unlike ``RLIMIT_AS``, which counts the address space
+    that CP-SAT threads and SQLite's memory map reserve without using;
+  - cancellation: the process stops its solver when the job is cancelled
+    and is killed if it has not exited ``CANCEL_GRACE_SECONDS`` later.
+
+A job whose process dies without reporting a result (crash, OOM kill) is
+queued again until it reaches its ``max_attempts``. A job of a scenario (see
+``scenarios``) runs with every session bound to the scenario database.
+
+The API process starts ``BACKEND_SOLVER_WORKERS`` slots (default 1). With 0
+it only queues jobs, and ``python -m backend.worker_pool`` runs the workers
+as a separate service. ``BACKEND_JOB_MEMORY_LIMIT_MB`` enables the memory
+limit (default 0: none; only enforced where ``/proc`` exists).
+"""
+
+import contextlib
+import logging
+import multiprocessing
+import os
+import signal
+import threading
+import time
+
+from .cancellation import CancellationToken
+from .job_queue import JobQueue, job_queue
+from .logging_config import build_log_extra, setup_logging
+from .scenarios import use_scenario
+from .solver_jobs import persist_scheduler_error, run_timetable_job
+from .translations import t_locale
+
+
+logger = logging.getLogger(__name__)
+
+SOLVER_WORKERS_ENV = "BACKEND_SOLVER_WORKERS"
+JOB_TIME_LIMIT_ENV = "BACKEND_JOB_TIME_LIMIT_SECONDS"
+JOB_MEMORY_LIMIT_ENV = "BACKEND_JOB_MEMORY_LIMIT_MB"
+DEFAULT_SOLVER_WORKERS = 1
+DEFAULT_JOB_TIME_LIMIT_SECONDS = 3600
+DEFAULT_JOB_MEMORY_LIMIT_MB = 0
+
+# How often supervisors poll the queue and their running job.
+POLL_SECONDS = 0.5
+# Running jobs refresh their heartbeat this often; a job whose heartbeat is
+# older than STALE_AFTER_SECONDS has lost its supervisor.
+HEARTBEAT_SECONDS = 5.0
+STALE_AFTER_SECONDS = 30.0
+CANCEL_GRACE_SECONDS = 10.0
+# The memory limit reads resident sizes from /proc (Linux)
+MEMORY_LIMIT_SUPPORTED = os.path.exists("/proc/self/statm")
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def _env_int(name, default):
+    raw = os.getenv(name)
+    if not raw:
+        return default
+    try:
+        return max(0, int(raw))
+    except ValueError:
+        logger.warning("Ignoring invalid %s=%r", name, raw, extra=build_log_extra())
+        return default
+
+
+def _process_tree(pid):
+    """Return ``pid`` followed by the ids of its live descendants.
+
+    Reads the parent of every process from ``/proc``; where it does not
+    exist, only ``pid`` is returned.
+    """
+    try:
+        entries = os.listdir("/proc")
+    except OSError:
+        return [pid]
+    children = {}
+    for entry in entries:
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat", "rb") as fh:
+                stat = fh.read()
+            # Fields after the parenthesised command name: state, ppid, ...
+            ppid = int(stat.rsplit(b")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        children.setdefault(ppid, []).append(int(entry))
+    tree, pending = [], [pid]
+    while pending:
+        current = pending.pop()
+        tree.append(current)
+        pending.extend(children.get(current, ()))
+    return tree
+
+
+def _resident_bytes(pids):
+    """Sum of the resident memory of ``pids`` (processes that exited count 0)."""
+    total = 0
+    for pid in pids:
+        try:
+            with open(f"/proc/{pid}/statm") as fh:
+                total += int(fh.read().split()[1]) * _PAGE_SIZE
+        except (OSError, IndexError, ValueError):
+            pass
+    return total
+
+
+def _watch_cancellation(queue, task_id, cancel_token, stop):
+    while not stop.wait(POLL_SECONDS):
+        if queue.is_cancelled(task_id):
+            cancel_token.cancel()
+            return
+
+
+def _job_process_main(task_id, locale, options, scenario=None):
+    """Entry point of the process that runs one job."""
+    setup_logging()
+    queue = JobQueue()
+    cancel_token = CancellationToken()
+    stop = threading.Event()
+    watcher = threading.Thread(
+        target=_watch_cancellation, args=(queue, task_id, cancel_token, stop), daemon=True,
+    )
+    watcher.start()
+    try:
+        with use_scenario(scenario):
+            run_timetable_job(task_id, locale, options, tasks=queue, cancel_token=cancel_token)
+    finally:
+        stop.set()
+
+
+class WorkerPool:
+    """Supervisor threads running queued jobs in separate processes."""
+
+    def __init__(self, queue=job_queue, workers=DEFAULT_SOLVER_WORKERS,
+                 time_limit_seconds=DEFAULT_JOB_TIME_LIMIT_SECONDS,
+                 memory_limit_mb=DEFAULT_JOB_MEMORY_LIMIT_MB,
+                 poll_seconds=POLL_SECONDS):
+        self.queue = queue
+        self.workers = workers
+        self.time_limit_seconds = time_limit_seconds
+        self.memory_limit_mb = memory_limit_mb
+        self.poll_seconds = poll_seconds
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._threads = []
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, queue=job_queue):
+        """Pool configured by BACKEND_SOLVER_WORKERS, BACKEND_JOB_TIME_LIMIT_SECONDS
+        and BACKEND_JOB_MEMORY_LIMIT_MB (0 = no limit)."""
+        return cls(
+            queue,
+            workers=_env_int(SOLVER_WORKERS_ENV, DEFAULT_SOLVER_WORKERS),
+            time_limit_seconds=_env_int(JOB_TIME_LIMIT_ENV, DEFAULT_JOB_TIME_LIMIT_SECONDS),
+            memory_limit_mb=_env_int(JOB_MEMORY_LIMIT_ENV, DEFAULT_JOB_MEMORY_LIMIT_MB),
+        )
+
+    def start(self):
+        """Recover jobs left running by a stopped worker and start the supervisors.
+
+        Does nothing once the pool is running, so it can be called per request.
+        """
+        if self._threads or not self.workers:
+            return
+        with self._lock:
+            if self._threads or not self.workers:
+                return
+            self._stopped.clear()
+            self._recover()
+            for index in range(self.workers):
+                thread = threading.Thread(
+                    target=self._supervise, name=f"solver-worker-{index}", daemon=True,
+                )
+                thread.start()
+                self._threads.append(thread)
+        if self.memory_limit_mb and not MEMORY_LIMIT_SUPPORTED:
+            logger.warning(
+                "Job memory limit not enforced: /proc is not available", extra=build_log_extra(),
+            )
+        logger.info(
+            "Solver worker pool started workers=%d time_limit_seconds=%d memory_limit_mb=%d",
+            self.workers,
+            self.time_limit_seconds,
+            self.memory_limit_mb,
+            extra=build_log_extra(),
+        )
+
+    def stop(self, timeout=None):
+        """Stop claiming jobs and wait for the supervisors (running jobs finish first)."""
+        self._stopped.set()
+        self._wakeup.set()
+        with self._lock:
+            threads, self._threads = self._threads, []
+        for thread in threads:
+            thread.join(timeout)
+
+    def notify(self):
+        """Wake idle supervisors after a job has been queued."""
+        self._wakeup.set()
+
+    def _recover(self):
+        recovered = self.queue.recover_stale(STALE_AFTER_SECONDS)
+        if recovered:
+            logger.warning("Recovered stale jobs count=%d", recovered, extra=build_log_extra())
+
+    def _supervise(self):
+        last_recovery = time.monotonic()
+        while not self._stopped.is_set():
+            try:
+                job = self.queue.claim(os.getpid())
+            except Exception:
+                logger.exception("Failed to claim a job", extra=build_log_extra())
+                job = None
+            if job is None:
+                self._wakeup.wait(self.poll_seconds)
+                self._wakeup.clear()
+                if time.monotonic() - last_recovery > STALE_AFTER_SECONDS:
+                    self._recover()
+                    last_recovery = time.monotonic()
+                continue
+            try:
+                self.run_job(job)
+            except Exception:
+                logger.exception("Solver worker failed", extra=build_log_extra(task_id=job["task_id"]))
+
+    def run_job(self, job):
+        """Run a claimed job in a new process and wait for it within the limits."""
+        task_id, locale = job["task_id"], job["locale"]
+        memory_limit_bytes = self.memory_limit_mb * 1024 * 1024 if MEMORY_LIMIT_SUPPORTED else 0
+        # Not a daemon: the job process starts its own diagnosis process pool.
+        process = multiprocessing.get_context("spawn").Process(
+            target=_job_process_main,
+            args=(task_id, locale, job["options"], job.get("scenario")),
+            name=f"solver-job-{task_id}",
+        )
+        process.start()
+        self.queue.set_worker(task_id, process.pid)
+        logger.info(
+            "Solver job process started pid=%d attempt=%d",
+            process.pid,
+            job["attempts"],
+            extra=build_log_extra(task_id=task_id),
+        )
+
+        started_at = last_heartbeat = time.monotonic()
+        cancelled_at = None
+        while True:
+            process.join(self.poll_seconds)
+            if not process.is_alive():
+                break
+            now = time.monotonic()
+            if now - last_heartbeat >= HEARTBEAT_SECONDS:
+                self.queue.heartbeat(task_id)
+                last_heartbeat = now
+            if self.time_limit_seconds and now - started_at > self.time_limit_seconds:
+                message = t_locale(locale, "errors.job_time_limit", seconds=self.time_limit_seconds)
+                logger.warning("Solver job exceeded its time limit", extra=build_log_extra(task_id=task_id))
+                self._kill(process)
+                self.queue.fail_task(task_id, error=message)
+                self._persist_error(job, message)
+                return
+            if memory_limit_bytes and _resident_bytes(_process_tree(process.pid)) > memory_limit_bytes:
+                message = t_locale(locale, "errors.job_memory_limit", mb=self.memory_limit_mb)
+                logger.warning("Solver job exceeded its memory limit", extra=build_log_extra(task_id=task_id))
+                self._kill(process)
+                self.queue.fail_task(task_id, error=message)
+                self._persist_error(job, message)
+                return
+            if cancelled_at is None:
+                if self.queue.is_cancelled(task_id):
+                    cancelled_at = now
+            elif now - cancelled_at > CANCEL_GRACE_SECONDS:
+                logger.warning("Solver job ignored cancellation; killing it", extra=build_log_extra(task_id=task_id))
+                self._kill(process)
+                return
+
+        if process.exitcode != 0:
+            message = t_locale(locale, "errors.job_worker_crashed", code=process.exitcode)
+            status = self.queue.requeue_or_fail(task_id, message)
+            if status == "error":
+                self._persist_error(job, message)
+            elif status == "queued":
+                self.notify()
+        logger.info(
+            "Solver job process exited exitcode=%s",
+            process.exitcode,
+            extra=build_log_extra(task_id=task_id),
+        )
+
+    @staticmethod
+    def _persist_error(job, message):
+        with use_scenario(job.get("scenario")):
+            persist_scheduler_error(message, None)
+
+    @staticmethod
+    def _kill(process):
+        """Kill the job process and its children (e.g. its diagnosis pool)."""
+        children = _process_tree(process.pid)[1:]
+        process.kill()
+        for pid in children:
+            with contextlib.suppress(OSError):
+                os.kill(pid, getattr(signal, "SIGKILL", signal.SIGTERM))
+        process.join()
+
+
+worker_pool = WorkerPool.from_env()
+
+
+def main():
+    """Run the solver workers as a standalone service (``python -m backend.worker_pool``)."""
+    setup_logging()
+    pool = WorkerPool.from_env()
+    if not pool.workers:
+        pool.workers = DEFAULT_SOLVER_WORKERS
+    pool.start()
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        logger.info("Stopping solver worker pool", extra=build_log_extra())
+        pool.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -238,6 +238,7 @@ function MarkdownTimetable({ preselectTeacher, preselectCourseGroups, preselectT
   const allCoursesCheckboxRef = useRef(null);
   const allTeachersCheckboxRef = useRef(null);
   const pollingRef = useRef(null);
+  const eventSourceRef = useRef(null);
   const elapsedRef = useRef(null);
   const startTimeRef = useRef(null);
 
@@ -246,6 +247,10 @@ function MarkdownTimetable({ preselectTeacher, preselectCourseGroups, preselectT
       clearTimeout(pollingRef.current);
       pollingRef.current = null;
     }
+    if (eventSourceRef.current) {
+      eventSourceRef.current.close();
+      eventSourceRef.current = null;
+    }
     if (elapsedRef.current) {
       clearInterval(elapsedRef.current);
       elapsedRef.current = null;
@@ -386,6 +391,37 @@ function MarkdownTimetable({ preselectTeacher, preselectCourseGroups, preselectT
     return result;
   }, [fetchTimetable, pickRandomInfeasibleMessage, pickRandomGeneratingMessage, startElapsedTimer, stopGeneration]);
 
+  // Follow a running task through its server-sent event stream, which
+  // replays its events and then pushes each change. Returns false when the
+  // browser has no EventSource, so the caller keeps polling instead.
+  const followTaskEvents = useCallback((initialStatus, onClosed) => {
+    if (typeof EventSource === 'undefined' || !initialStatus?.task_id) return false;
+    if (eventSourceRef.current) eventSourceRef.current.close();
+
+    const status = { ...initialStatus };
+    const source = new EventSource(`${api.API_BASE}/timetable/${initialStatus.task_id}/events`);
+    eventSourceRef.current = source;
+    const handle = (update) => (message) => {
+      update(JSON.parse(message.data));
+      applyStatus({ ...status });
+    };
+    source.addEventListener('status', handle((data) => Object.assign(status, data)));
+    source.addEventListener('phase', handle((data) => Object.assign(status, data)));
+    source.addEventListener('phase_append', handle((data) => {
+      status.phase = data.phase;
+      status.phase_details = (status.phase_details || '') + data.text;
+    }));
+    // The browser reconnects dropped streams by itself (resuming from the
+    // last event id); it only gives up on error responses.
+    source.onerror = () => {
+      if (source.readyState === EventSource.CLOSED && eventSourceRef.current === source) {
+        eventSourceRef.current = null;
+        onClosed();
+      }
+    };
+    return true;
+  }, [applyStatus]);
+
   const pollTaskStatus = useCallback(async () => {
     try {
       const result = await api.get('/timetable/status/current');
@@ -396,12 +432,17 @@ function MarkdownTimetable({ preselectTeacher, preselectCourseGroups, preselectT
 
       applyStatus(result);
       if (result.status === 'running') {
-        pollingRef.current = setTimeout(() => pollTaskStatus(), POLL_INTERVAL_MS);
+        const following = followTaskEvents(result, () => {
+          pollingRef.current = setTimeout(() => pollTaskStatus(), POLL_RETRY_MS);
+        });
+        if (!following) {
+          pollingRef.current = setTimeout(() => pollTaskStatus(), POLL_INTERVAL_MS);
+        }
       }
     } catch {
       pollingRef.current = setTimeout(() => pollTaskStatus(), POLL_RETRY_MS);
     }
-  }, [applyStatus]);
+  }, [applyStatus, followTaskEvents]);
 
   useEffect(() => {
     return () => {
@@ -13,6 +13,27 @@ const DEFAULT_DAY_COLORS = {
   '6': '#fff8e1',
 };
 
+const CELL_SUPPORT = 1;
+const CELL_UNAVAILABLE = 2;
+
+// Expand the compact teacher grid (non-empty cells as index rows) into the
+// day -> hour -> teacher id lookup the tables read.
+function expandCompactGrid(res) {
+  const grid = {};
+  for (const [d, h, ti, si, ci, flags] of res.cells) {
+    const day = (grid[String(d)] ??= {});
+    const hour = (day[String(h)] ??= {});
+    hour[String(res.teachers[ti].id)] = flags & CELL_UNAVAILABLE
+      ? { is_unavailable: true }
+      : {
+        subject_code: res.subjects[si],
+        is_support: Boolean(flags & CELL_SUPPORT),
+        course_line: res.course_lines[ci],
+      };
+  }
+  return { ...res, grid };
+}
+
 const TeacherGridTimetable = forwardRef(function TeacherGridTimetable({ onViewTeacherTimetable }, ref) {
   const [data, setData] = useState(null);
   const [loading, setLoading] = useState(true);
@@ -21,9 +42,9 @@ const TeacherGridTimetable = forwardRef(function TeacherGridTimetable({ onViewTe
   useEffect(() => {
     setLoading(true);
     setError(null);
-    api.get('/timetable/teacher-grid')
+    api.get('/timetable/teacher-grid?format=compact')
       .then(res => {
-        setData(res);
+        setData(res.format === 'compact' ? expandCompactGrid(res) : res);
         setSelectedDays(new Set(res.day_indices.map(String)));
       })
       .catch(err => {